@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Measure how long importing elkpy takes, each sample in a fresh interpreter so nothing is already cached.
+
+Usage:
+    python3 benchmarks/import_benchmark.py [-n RUNS] [--proto PROTO] [--max-ms MS] [--json]
+
+With --proto, the time to create a SushiController and its keyboard sub-controller is measured as well (no sushi
+instance is needed, nothing is sent). With --max-ms, the script exits with status 1 if the median of any measurement
+is above that limit, so it can be used to catch import time regressions.
+"""
+
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Benchmark the working tree, not an installed elkpy
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+TIMED_SCRIPT = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+STATEMENTS = {
+    "import elkpy": "import elkpy",
+    "import elkpy.sushicontroller": "import elkpy.sushicontroller",
+    "import elkpy.keyboardcontroller": "import elkpy.keyboardcontroller",
+}
+
+CONTROLLER_STATEMENT = ("from elkpy.sushicontroller import SushiController\n"
+                        "SushiController('localhost:51051', {proto!r}).keyboard")
+
+
+def time_statement(statement: str, runs: int, work_dir: str) -> list[float]:
+    """
+    Parameters:
+        statement (str): The python code to time.
+        runs (int): The number of fresh interpreters to time it in, after one warm-up run.
+        work_dir (str): The working directory of the interpreters, where the protobuf modules are generated.
+
+    Returns:
+        list[float]: The times in milliseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    script = TIMED_SCRIPT.format(statement=statement)
+    times = []
+    for _ in range(runs + 1):
+        output = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True,
+                                cwd=work_dir)
+        times.append(float(output.stdout.split()[-1]) * 1000)
+    # The warm-up run fills the bytecode caches and generates the protobuf modules
+    return times[1:]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of elkpy")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="The number of samples per measurement")
+    parser.add_argument("--proto", help="Path to sushi_rpc.proto, to also time creating a SushiController")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median of a measurement is above this")
+    parser.add_argument("--json", action="store_true", help="Print the results as json")
+    args = parser.parse_args()
+
+    statements = dict(STATEMENTS)
+    if args.proto:
+        statements["SushiController().keyboard"] = CONTROLLER_STATEMENT.format(proto=os.path.abspath(args.proto))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, statement in statements.items():
+            times = time_statement(statement, args.runs, work_dir)
+            results[name] = {"median_ms": statistics.median(times), "min_ms": min(times), "max_ms": max(times)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print("{:<36} median {:8.2f} ms   min {:8.2f} ms   max {:8.2f} ms".format(
+                name, result["median_ms"], result["min_ms"], result["max_ms"]))
+
+    if args.max_ms is not None:
+        too_slow = [name for name, result in results.items() if result["median_ms"] > args.max_ms]
+        for name in too_slow:
+            print("{} is above {} ms".format(name, args.max_ms), file=sys.stderr)
+        return 1 if too_slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
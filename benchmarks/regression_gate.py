@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""
+A performance regression gate: compares a run of rpc_benchmark.py, against the mock servers of tests/mockups, with a
+stored json baseline, and fails when a benchmark got significantly slower.
+
+Usage:
+    python3 benchmarks/regression_gate.py record --baseline FILE [--proto PROTO] [--transport {tcp,unix}] [--quick]
+    python3 benchmarks/regression_gate.py compare --baseline FILE [--current FILE] [--threshold 0.1] [--output FILE]
+
+For each benchmark, the ratio of the current median and p95 to the baseline ones is estimated with a bootstrap
+confidence interval. A statistic regresses when the whole interval is past the threshold, e.g. more than 10 % slower,
+so that noisy benchmarks need a larger difference to be reported. compare exits with 1 if anything regressed.
+"""
+
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+
+import rpc_benchmark
+
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+
+STATISTICS = {"median": statistics.median,
+              "p95": lambda samples: rpc_benchmark.percentile(sorted(samples), 95)}
+
+
+class Comparison(object):
+    """
+    The comparison of one statistic of a benchmark with its baseline.
+
+    Attributes:
+        ratio (float): current / baseline, of the statistic.
+        low (float): The lower bound of the confidence interval of the ratio.
+        high (float): The upper bound of the confidence interval of the ratio.
+        status (str): "regression", "improvement" or "unchanged".
+    """
+
+    def __init__(self, name: str, statistic: str, baseline: float, current: float, low: float, high: float,
+                 status: str):
+        self.name = name
+        self.statistic = statistic
+        self.baseline = baseline
+        self.current = current
+        self.ratio = current / baseline if baseline else float("inf")
+        self.low = low
+        self.high = high
+        self.status = status
+
+    def to_dict(self) -> dict:
+        return {"statistic": self.statistic, "baseline": self.baseline, "current": self.current,
+                "ratio": self.ratio, "ci": [self.low, self.high], "status": self.status}
+
+    def __str__(self):
+        return "{:<52} {:<6} {:>8.3f}x [{:.3f}, {:.3f}] {}".format(self.name, self.statistic, self.ratio, self.low,
+                                                                   self.high, self.status)
+
+
+def bootstrap_ratio(baseline: list[float], current: list[float], statistic, confidence: float = DEFAULT_CONFIDENCE,
+                    resamples: int = DEFAULT_RESAMPLES, rng: random.Random | None = None) -> tuple[float, float]:
+    """
+    Estimate a confidence interval of statistic(current) / statistic(baseline) by resampling both sample sets.
+
+    Parameters:
+        baseline (list[float]): The baseline samples.
+        current (list[float]): The current samples.
+        statistic (Callable): A function of a list of samples, e.g. statistics.median.
+        confidence (float): The confidence level of the interval.
+        resamples (int): The number of bootstrap resamples.
+        rng (random.Random | None): The random generator, a seeded one if None so results are reproducible.
+
+    Returns:
+        tuple[float, float]: The lower and upper bound of the interval.
+    """
+    rng = rng or random.Random(0)
+    ratios = []
+    for _ in range(resamples):
+        base = statistic(rng.choices(baseline, k=len(baseline)))
+        ratios.append(statistic(rng.choices(current, k=len(current))) / base if base else float("inf"))
+    ratios.sort()
+    tail = (1 - confidence) / 2 * 100
+    return rpc_benchmark.percentile(ratios, tail), rpc_benchmark.percentile(ratios, 100 - tail)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD,
+                    confidence: float = DEFAULT_CONFIDENCE, resamples: int = DEFAULT_RESAMPLES) -> list[Comparison]:
+    """
+    Compare the median and p95 of every benchmark present in both results.
+
+    Parameters:
+        baseline (dict): The baseline, as written by rpc_benchmark.write_results().
+        current (dict): The new results, in the same format.
+        threshold (float): The relative change that counts as a regression or an improvement, e.g. 0.1 for 10 %.
+        confidence (float): The confidence level of the intervals.
+        resamples (int): The number of bootstrap resamples.
+
+    Returns:
+        list[Comparison]: The comparisons, in the order of the current results.
+    """
+    rng = random.Random(0)
+    comparisons = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["unit"] != result["unit"]:
+            continue
+        for statistic, function in STATISTICS.items():
+            low, high = bootstrap_ratio(base["samples"], result["samples"], function, confidence, resamples, rng)
+            if result["higher_is_better"]:
+                worse, better = high < 1 - threshold, low > 1 + threshold
+            else:
+                worse, better = low > 1 + threshold, high < 1 - threshold
+            status = "regression" if worse else "improvement" if better else "unchanged"
+            comparisons.append(Comparison(name, statistic, function(base["samples"]), function(result["samples"]),
+                                          low, high, status))
+    return comparisons
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("version") != rpc_benchmark.RESULT_VERSION:
+        raise ValueError("Unsupported benchmark result version in {}".format(path))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare elkpy benchmark runs with a stored baseline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record = subparsers.add_parser("record", help="Run the benchmarks and store the results as the baseline")
+    compare = subparsers.add_parser("compare", help="Compare a run with the baseline")
+    for sub in (record, compare):
+        sub.add_argument("--baseline", required=True, help="The baseline json file")
+        sub.add_argument("--proto", default=os.environ.get("SUSHI_GRPC_ELKPY_PROTO"),
+                         help="Path to sushi_rpc.proto, $SUSHI_GRPC_ELKPY_PROTO by default")
+        sub.add_argument("--transport", choices=["tcp", "unix"], default="tcp")
+        sub.add_argument("--quick", action="store_true", help="Take fewer samples")
+        sub.add_argument("--filter", default="*", help="Only run the benchmarks matching this glob pattern")
+    compare.add_argument("--current", help="Compare these stored results instead of running the benchmarks")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="The relative slowdown reported as a regression, 0.1 by default")
+    compare.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    compare.add_argument("--output", help="Write the comparison as json to this file")
+    args = parser.parse_args()
+
+    if args.command == "compare" and args.current:
+        current = load_results(args.current)
+    else:
+        if args.proto is None:
+            parser.error("--proto or SUSHI_GRPC_ELKPY_PROTO is needed")
+        current = rpc_benchmark.run_benchmarks(args.proto, args.transport, args.quick, args.filter)
+
+    if args.command == "record":
+        rpc_benchmark.write_results(current, args.baseline)
+        rpc_benchmark.print_results(current)
+        return 0
+
+    baseline = load_results(args.baseline)
+    comparisons = compare_results(baseline, current, args.threshold, args.confidence)
+    for comparison in comparisons:
+        print(comparison)
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing and args.filter == "*":
+        print("Not in the current run: {}".format(", ".join(missing)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"baseline": baseline["meta"], "current": current["meta"], "threshold": args.threshold,
+                       "comparisons": {"{}.{}".format(c.name, c.statistic): c.to_dict() for c in comparisons}},
+                      f, indent=1)
+
+    regressions = [c for c in comparisons if c.status == "regression"]
+    print("{} regressions in {} comparisons".format(len(regressions), len(comparisons)))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks of elkpy's client side: unary call latency per controller, parameter throughput, notification fan-out,
+info type conversion and SushiController startup. The rpcs are served by the mock servers of tests/mockups, and the
+notifications by elkpy.fakesushi, as the mocks don't stream notifications, over loopback tcp or a unix socket.
+
+Usage:
+    python3 benchmarks/rpc_benchmark.py [--proto PROTO] [--transport {tcp,unix}] [--quick] [--filter GLOB]
+                                        [--output FILE]
+
+The results are printed as a table, and written as json to --output: the raw samples of each benchmark with their
+median, p95, mean, min and max. Latencies are in seconds, throughputs in operations per second.
+"""
+
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from concurrent import futures
+from datetime import datetime, timezone
+
+import grpc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+# The mocks and elkpy are imported from the working tree, as in the unit tests. The generated modules are written
+# next to this script, which must stay first in sys.path for the mocks to find them.
+sys.path.insert(1, REPO_DIR)
+
+from src.elkpy import grpc_gen  # noqa: E402
+
+RESULT_VERSION = 1
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from src.elkpy.sushicontroller import SushiController
+controller = SushiController(sys.argv[1], sys.argv[2])
+for name in {sub_controllers!r}:
+    getattr(controller, name)
+print(time.perf_counter() - start)
+controller.close()
+"""
+
+SUB_CONTROLLERS = ["audio_graph", "keyboard", "parameters", "programs", "timings", "transport", "audio_routing",
+                   "midi_controller", "cv_gate_controller", "osc_controller", "system", "session"]
+
+
+class BenchmarkResult(object):
+    """
+    The samples of one benchmark.
+    """
+
+    def __init__(self, name: str, unit: str, samples: list[float], higher_is_better: bool = False):
+        """
+        Parameters:
+            name (str): The name of the benchmark, e.g. "latency.transport.get_tempo".
+            unit (str): The unit of the samples, "s" or "ops/s".
+            samples (list[float]): The measurements.
+            higher_is_better (bool): True for throughputs, False for latencies.
+        """
+        self.name = name
+        self.unit = unit
+        self.samples = samples
+        self.higher_is_better = higher_is_better
+
+    def to_dict(self) -> dict:
+        return {"unit": self.unit, "higher_is_better": self.higher_is_better, "samples": self.samples} | \
+            summarize(self.samples)
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Returns:
+        dict: The count, median, p95, mean, min and max of the samples.
+    """
+    ordered = sorted(samples)
+    return {"count": len(ordered),
+            "median": statistics.median(ordered),
+            "p95": percentile(ordered, 95),
+            "mean": statistics.fmean(ordered),
+            "min": ordered[0],
+            "max": ordered[-1]}
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """
+    Parameters:
+        ordered (list[float]): Sorted samples.
+        q (float): The percentile, 0 to 100.
+
+    Returns:
+        float: The percentile, linearly interpolated between the closest samples.
+    """
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+################
+# Mock servers #
+################
+
+
+class MockSushi(object):
+    """
+    A gRPC server running the mock servicers of tests/mockups, which answer with canned values.
+    """
+
+    def __init__(self, sushi_grpc, address: str, max_workers: int = 16):
+        from tests.mockups import audiograph_service_mock, audiorouting_service_mock, cvgate_service_mock, \
+            keyboard_service_mock, midi_service_mock, osc_service_mock, parameter_service_mock, \
+            program_service_mock, session_service_mock, system_service_mock, timing_service_mock, \
+            transport_service_mock
+
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        for service, servicer in (
+                ("AudioGraphController", audiograph_service_mock.AudioGraphControllerServiceMockup()),
+                ("AudioRoutingController", audiorouting_service_mock.AudioRoutingControllerServiceMockup()),
+                ("CvGateController", cvgate_service_mock.CvGateControllerServiceMockup()),
+                ("KeyboardController", keyboard_service_mock.KeyboardControllerServiceMockup()),
+                ("MidiController", midi_service_mock.MidiControllerServiceMockup()),
+                ("OscController", osc_service_mock.OscControllerServiceMockup()),
+                ("ParameterController", parameter_service_mock.ParameterControllerServiceMockup()),
+                ("ProgramController", program_service_mock.ProgramControllerServiceMockup()),
+                ("SessionController", session_service_mock.SessionControllerServiceMockup()),
+                ("SystemController", system_service_mock.SystemControllerServiceMockup()),
+                ("TimingController", timing_service_mock.TimingControllerServiceMockup()),
+                ("TransportController", transport_service_mock.TransportControllerServiceMockup())):
+            getattr(sushi_grpc, "add_{}Servicer_to_server".format(service))(servicer, self._server)
+        port = self._server.add_insecure_port(address)
+        self.address = address if address.startswith("unix:") else "{}:{}".format(address.rsplit(":", 1)[0], port)
+
+    def __enter__(self):
+        self._server.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.stop(None).wait()
+
+
+##############
+# Benchmarks #
+##############
+
+
+def time_calls(call, iterations: int, warmup: int) -> list[float]:
+    """
+    Returns:
+        list[float]: The duration in seconds of each of the iterations calls, after warmup untimed calls.
+    """
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def unary_latency(address: str, proto: str, iterations: int) -> list[BenchmarkResult]:
+    """
+    Time one representative call of each controller.
+    """
+    from src.elkpy.sushicontroller import SushiController
+    from tests.mockups import keyboard_service_mock, parameter_service_mock, program_service_mock
+
+    controller = SushiController(address, proto)
+    calls = {
+        "audio_graph.get_all_processors": controller.audio_graph.get_all_processors,
+        "audio_routing.get_all_input_connections": controller.audio_routing.get_all_input_connections,
+        "cv_gate.get_all_cv_input_connections": controller.cv_gate_controller.get_all_cv_input_connections,
+        "keyboard.send_note_on": lambda: controller.keyboard.send_note_on(
+            keyboard_service_mock.expected_track_id, keyboard_service_mock.expected_channel,
+            keyboard_service_mock.expected_note, keyboard_service_mock.expected_velocity),
+        "midi.get_all_kbd_input_connections": controller.midi_controller.get_all_kbd_input_connections,
+        "osc.get_enabled_parameter_outputs": controller.osc_controller.get_enabled_parameter_outputs,
+        "parameters.get_processor_parameters": lambda: controller.parameters.get_processor_parameters(
+            parameter_service_mock.expected_processor_identifier),
+        "programs.get_processor_programs": lambda: controller.programs.get_processor_programs(
+            program_service_mock.expected_processor_identifier.id),
+        "session.save_binary_session": controller.session.save_binary_session,
+        "system.get_build_info": controller.system.get_build_info,
+        "timings.get_engine_timings": controller.timings.get_engine_timings,
+        "transport.get_tempo": controller.transport.get_tempo,
+    }
+    try:
+        return [BenchmarkResult("latency." + name, "s", time_calls(call, iterations, iterations // 10 + 1))
+                for name, call in calls.items()]
+    finally:
+        controller.close()
+
+
+def parameter_throughput(address: str, proto: str, calls: int, repeats: int,
+                         threads: int = 4) -> list[BenchmarkResult]:
+    """
+    Measure the parameter get and set rates, from one thread and from several threads sharing a controller.
+    """
+    from src.elkpy.parametercontroller import ParameterController
+    from tests.mockups import parameter_service_mock as mock
+
+    parameters = ParameterController(address, proto)
+    processor = mock.expected_processor_identifier
+    parameter = mock.expected_parameter_1.id
+    operations = {"get": lambda: parameters.get_parameter_value(processor, parameter),
+                  "set": lambda: parameters.set_parameter_value(processor, parameter, 0.5)}
+
+    results = []
+    with futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        for name, operation in operations.items():
+            single = []
+            multi = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for _ in range(calls):
+                    operation()
+                single.append(calls / (time.perf_counter() - start))
+
+                start = time.perf_counter()
+                for f in [pool.submit(operation) for _ in range(calls)]:
+                    f.result()
+                multi.append(calls / (time.perf_counter() - start))
+            results.append(BenchmarkResult("throughput.parameter_{}".format(name), "ops/s", single, True))
+            results.append(BenchmarkResult("throughput.parameter_{}_{}_threads".format(name, threads), "ops/s",
+                                           multi, True))
+    return results
+
+
+def notification_fanout(fake, proto: str, subscribers: int, notifications: int,
+                        repeats: int) -> list[BenchmarkResult]:
+    """
+    Measure the rate at which parameter notifications reach the callbacks of several subscriptions of one
+    SushiController. The notifications are sent by a FakeSushi, as the mocks have no notification service.
+    """
+    from src.elkpy import sushi_info_types as info_types
+    from src.elkpy.sushicontroller import SushiController
+
+    controller = SushiController(fake.address, proto)
+    try:
+        track = controller.audio_graph.create_track("bench", 2)
+        track.wait_sync(5.0)
+        gain = controller.audio_graph.create_processor_on_track("bench_gain", "sushi.testing.gain", "",
+                                                                info_types.PluginType.INTERNAL, track.sushi_id, 0,
+                                                                True)
+        gain.wait_sync(5.0)
+
+        lock = threading.Lock()
+        done = threading.Event()
+        received = 0
+        expected = 0
+
+        def on_update(_):
+            nonlocal received
+            with lock:
+                received += 1
+                if received == expected:
+                    done.set()
+
+        for _ in range(subscribers):
+            controller.notifications.subscribe_to_parameter_updates(on_update)
+        deadline = time.monotonic() + 10.0
+        while fake.get_subscriber_count("parameter") < subscribers:
+            if time.monotonic() > deadline:
+                raise TimeoutError("The parameter subscriptions were not established")
+            time.sleep(0.01)
+
+        samples = []
+        sent = 0
+        for _ in range(repeats):
+            with lock:
+                received = 0
+                expected = subscribers * notifications
+                done.clear()
+            start = time.perf_counter()
+            for i in range(notifications):
+                # Alternate the value so every call sends a notification
+                sent += 1
+                controller.parameters.set_parameter_value(gain.sushi_id, 0, 0.25 + 0.5 * (sent % 2))
+            if not done.wait(30.0):
+                raise TimeoutError("Only {} of {} notifications were received".format(received, expected))
+            samples.append(expected / (time.perf_counter() - start))
+        return [BenchmarkResult("notifications.fanout_{}_subscribers".format(subscribers), "notifications/s",
+                                samples, True)]
+    finally:
+        controller.close()
+
+
+def info_conversion(sushi_proto, iterations: int, repeats: int) -> list[BenchmarkResult]:
+    """
+    Time the conversion of gRPC messages to elkpy info types.
+    """
+    from src.elkpy import sushi_info_types as info_types
+
+    parameter = sushi_proto.ParameterInfo(id=1, type=sushi_proto.ParameterType(type=3), label="Gain", name="gain",
+                                          unit="dB", automatable=True, min_domain_value=-120.0,
+                                          max_domain_value=24.0)
+    processor = sushi_proto.ProcessorInfo(id=1, label="Gain", name="gain", parameter_count=1, program_count=0)
+    track = sushi_proto.TrackInfo(id=1, label="main", name="main", channels=2, buses=1,
+                                  type=sushi_proto.TrackType(type=1),
+                                  processors=[sushi_proto.ProcessorIdentifier(id=i) for i in range(8)])
+    state = sushi_proto.ProcessorState()
+    state.bypassed.has_value = True
+    for i in range(32):
+        state.parameters.add(value=i / 32).parameter.parameter_id = i
+    conversions = {"parameter_info": lambda: info_types.ParameterInfo(parameter),
+                   "processor_info": lambda: info_types.ProcessorInfo(processor),
+                   "track_info": lambda: info_types.TrackInfo(track),
+                   "processor_state_32_parameters": lambda: info_types.ProcessorState(state)}
+    return [BenchmarkResult("conversion." + name, "s",
+                            [t / iterations for t in timeit.repeat(convert, number=iterations, repeat=repeats)])
+            for name, convert in conversions.items()]
+
+
+def controller_startup(address: str, proto: str, repeats: int) -> list[BenchmarkResult]:
+    """
+    Time importing elkpy, creating a SushiController and all its sub-controllers in fresh interpreters.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    results = []
+    for name, sub_controllers in (("startup.sushi_controller", []),
+                                  ("startup.sushi_controller_keyboard", ["keyboard"]),
+                                  ("startup.sushi_controller_all", SUB_CONTROLLERS)):
+        script = STARTUP_SCRIPT.format(sub_controllers=sub_controllers)
+        samples = []
+        # The first run is a warm-up, filling the bytecode caches
+        for _ in range(repeats + 1):
+            output = subprocess.run([sys.executable, "-c", script, address, proto], env=env, cwd=BENCHMARK_DIR,
+                                    check=True, capture_output=True, text=True)
+            samples.append(float(output.stdout.split()[0]))
+        results.append(BenchmarkResult(name, "s", samples[1:]))
+    return results
+
+
+##########
+# Runner #
+##########
+
+
+def run_benchmarks(proto: str, transport: str = "tcp", quick: bool = False, pattern: str = "*") -> dict:
+    """
+    Run all benchmarks whose name matches pattern.
+
+    Parameters:
+        proto (str): path to .proto file with SUSHI's gRPC services definition
+        transport (str): "tcp" for loopback tcp, "unix" for a unix socket.
+        quick (bool): Take fewer samples, for a quick check.
+        pattern (str): A glob pattern on the benchmark names, e.g. "latency.*".
+
+    Returns:
+        dict: The results, see write_results().
+    """
+    from src.elkpy.fakesushi import FakeSushi
+
+    proto = os.path.abspath(proto)
+    sushi_proto, sushi_grpc = grpc_gen.modules_from_proto(proto)
+    scale = 10 if quick else 1
+    iterations = 1000 // scale
+    repeats = 5 if quick else 20
+
+    with tempfile.TemporaryDirectory() as socket_dir:
+        def address(name: str) -> str:
+            return "unix:" + os.path.join(socket_dir, name) if transport == "unix" else "localhost:0"
+
+        groups = [
+            ("latency.*", lambda: unary_latency(mock.address, proto, iterations)),
+            ("throughput.*", lambda: parameter_throughput(mock.address, proto, iterations, repeats)),
+            ("notifications.*", lambda: notification_fanout(fake, proto, 4, iterations // 2, repeats)),
+            ("conversion.*", lambda: info_conversion(sushi_proto, 10000 // scale, repeats)),
+            ("startup.*", lambda: controller_startup(mock.address, proto, repeats // 2)),
+        ]
+        results = []
+        with MockSushi(sushi_grpc, address("mock.sock")) as mock, \
+                FakeSushi(proto, address("fake.sock")) as fake:
+            for group, run in groups:
+                # Skip the groups that can't match, then filter the results by name
+                if "." not in pattern or fnmatch.fnmatchcase(group, pattern.split(".")[0] + ".*"):
+                    results += [r for r in run() if fnmatch.fnmatchcase(r.name, pattern)]
+
+    return {"version": RESULT_VERSION,
+            "meta": {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                     "python": platform.python_version(),
+                     "grpc": grpc.__version__,
+                     "platform": platform.platform(),
+                     "commit": _git_commit(),
+                     "transport": transport,
+                     "quick": quick},
+            "results": {r.name: r.to_dict() for r in results}}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def write_results(results: dict, path: str) -> None:
+    """
+    Write results as json: {"version", "meta": {...}, "results": {name: {"unit", "higher_is_better", "samples",
+    "count", "median", "p95", "mean", "min", "max"}}}.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1)
+
+
+def print_results(results: dict) -> None:
+    for name, result in results["results"].items():
+        if result["unit"] != "s":
+            scale, unit = 1, result["unit"]
+        elif result["median"] < 1e-2:
+            scale, unit = 1e6, "us"
+        else:
+            scale, unit = 1e3, "ms"
+        print("{:<52} median {:>12.2f} {:<15} p95 {:>12.2f}".format(name, result["median"] * scale, unit,
+                                                                   result["p95"] * scale))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark elkpy against mock sushi servers")
+    parser.add_argument("--proto", default=os.environ.get("SUSHI_GRPC_ELKPY_PROTO"),
+                        help="Path to sushi_rpc.proto, $SUSHI_GRPC_ELKPY_PROTO by default")
+    parser.add_argument("--transport", choices=["tcp", "unix"], default="tcp")
+    parser.add_argument("--quick", action="store_true", help="Take fewer samples")
+    parser.add_argument("--filter", default="*", help="Only run the benchmarks matching this glob pattern")
+    parser.add_argument("--output", help="Write the results as json to this file")
+    args = parser.parse_args()
+    if args.proto is None:
+        parser.error("--proto or SUSHI_GRPC_ELKPY_PROTO is needed")
+
+    results = run_benchmarks(args.proto, args.transport, args.quick, args.filter)
+    print_results(results)
+    if args.output:
+        write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
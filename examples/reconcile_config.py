@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy. If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+"""
+    Applies a sushi json config to a running sushi instance, only changing what differs.
+    With --dry-run, the plan and its estimated rpc count are printed without changing anything.
+"""
+
+import os
+import sys
+import argparse
+
+# This is needed to run reconcile_config.py from within the examples folder without also copying elkpy to it.
+sys.path.append("../elkpy/")
+
+from elkpy.sushicontroller import SushiController
+from elkpy.graphreconciler import GraphReconciler, load_config
+from elkpy import grpc_gen
+
+
+def read_args():
+    proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+
+    parser = argparse.ArgumentParser(description="Apply a sushi json config",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("config", help="Path to the sushi json config")
+    parser.add_argument("-i", "--ip", action="store", help="Ip of sushi device", default="localhost")
+    parser.add_argument("-p", "--port", action="store", help="Port of Sushi device", default="51051")
+    parser.add_argument("-g", "--protofile", action="store",
+                        help="Path to proto_file (Retrieved from the SUSHI_GRPC_ELKPY_PROTO env. variable)",
+                        default=proto_file)
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only print the plan")
+    args = parser.parse_args()
+    config = vars(args)
+
+    if not config['protofile']:
+        print("No proto file is found, probably the environment variable SUSHI_GRPC_ELKPY_PROTO is not defined.")
+        sys.exit(-1)
+
+    return config
+
+
+def main():
+    config = read_args()
+    sushi_proto, _ = grpc_gen.modules_from_proto(config['protofile'])
+    controller = SushiController(f"{config['ip']}:{config['port']}", config['protofile'])
+
+    try:
+        reconciler = GraphReconciler(controller, sushi_proto)
+        plan = reconciler.reconcile(load_config(config['config']), dry_run=config['dry_run'])
+        if not config['dry_run']:
+            print(f"Applied {plan.rpc_count()} operations")
+    finally:
+        controller.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+# Submodules and classes are imported on first access, so that "import elkpy" stays cheap and scripts only pay for
+# grpc, numpy and the generated protobuf modules when they use something needing them.
+
+import importlib
+
+_SUBMODULES = {
+    "audiographcontroller",
+    "audioroutingcontroller",
+    "callbackexecutor",
+    "changedispatch",
+    "cvgatecontroller",
+    "events",
+    "graphmetadata",
+    "graphreconciler",
+    "grpc_gen",
+    "keyboardcontroller",
+    "midicontroller",
+    "notificationbroker",
+    "notificationcontroller",
+    "notificationrecorder",
+    "osccontroller",
+    "parameterbatch",
+    "parametercontroller",
+    "parametermirror",
+    "parametersearch",
+    "programcontroller",
+    "sequenceplayer",
+    "sessioncontroller",
+    "sessiondiff",
+    "sessionstore",
+    "sushi_info_types",
+    "sushicontroller",
+    "sushierrors",
+    "sushimacro",
+    "sushiprocessor",
+    "sushisnapshot",
+    "systemcontroller",
+    "timingcontroller",
+    "transportcontroller",
+    "valuecache",
+}
+
+# Class name: submodule defining it
+_CLASSES = {
+    "SushiController": "sushicontroller",
+    "SushiProcessor": "sushiprocessor",
+    "SushiMacro": "sushimacro",
+    "SequencePlayer": "sequenceplayer",
+    "SessionSnapshotStore": "sessionstore",
+    "GraphReconciler": "graphreconciler",
+    "NotificationBroker": "notificationbroker",
+    "BrokerNotificationClient": "notificationbroker",
+    "NotificationRecorder": "notificationrecorder",
+    "NotificationReplayer": "notificationrecorder",
+    "ParameterMirror": "parametermirror",
+    "ParameterMirrorWriter": "parametermirror",
+    "ParameterValueCache": "valuecache",
+    "PropertyValueCache": "valuecache",
+    "ParameterSearchIndex": "parametersearch",
+    "ProcessorMetadata": "graphmetadata",
+    "GraphMetadataCache": "graphmetadata",
+    "ChangeDispatcher": "changedispatch",
+    "CallbackExecutor": "callbackexecutor",
+}
+
+__all__ = sorted(_SUBMODULES) + sorted(_CLASSES)
+
+
+def __getattr__(name: str):
+    if name in _CLASSES:
+        value = getattr(importlib.import_module("." + _CLASSES[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    # Cache it, so __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -21,6 +21,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from elkpy.sushicontroller import SushiController
 
+import asyncio
 import grpc
 
 from . import sushierrors
@@ -80,6 +81,15 @@ class AudioGraphController:
         self.audiograph_event_queue: list[ElkpyEvent] = []
         self.processor_event_queue: list[ElkpyEvent] = []
 
+    def _start_event_matching(self) -> None:
+        """
+        Make sure the parent controller matches notifications with the events of this controller before a command
+        producing an event is sent. Should not be called by the user.
+        """
+        start = getattr(self._parent, "_start_event_matching", None)
+        if start is not None:
+            start()
+
     def get_all_processors(self) -> List[info_types.ProcessorInfo]:
         """
         Gets a list of all available processors.
@@ -405,6 +415,7 @@ class AudioGraphController:
             name (str): The name of the new track.
             channels (int): The number of channels to assign the new track.
         """
+        self._start_event_matching()
         ev = TrackCreationEvent(name=name)
         self.audiograph_event_queue.append(ev)
         try:
@@ -428,6 +439,7 @@ class AudioGraphController:
             name (str): The name of the new track.
             buses (int): The number of audio buses in the new track.
         """
+        self._start_event_matching()
         ev = TrackCreationEvent(name=name)
         self.audiograph_event_queue.append(ev)
         try:
@@ -496,6 +508,7 @@ class AudioGraphController:
             before_processor (int): Which existing processor to create the new processor in front of.
             add_to_back (bool): Set to true to add the processor to the back of the processing chain on the track.
         """
+        self._start_event_matching()
         ev = ProcessorCreationEvent(name=name)
         self.processor_event_queue.append(ev)
 
@@ -533,6 +546,51 @@ class AudioGraphController:
         finally:
             return ev
 
+    async def create_processors(
+        self,
+        processors: list[tuple[str, str, str, info_types.PluginType]],
+        track_id: int,
+        before_processor: int = 0,
+        add_to_back: bool = True,
+        timeout: float = 10.0,
+    ) -> list[tuple[info_types.ProcessorInfo, list[info_types.ParameterInfo]]]:
+        """
+        Create a chain of processors on an existing track. All creations are sent at once, in order, and then awaited
+        together, which is much faster than creating and awaiting processors one by one.
+        To be used in asyncio programs, with the SushiController created while the loop is running.
+
+        Parameters:
+            processors (list[tuple[str, str, str, info_types.PluginType]]): (name, uid, path, processor_type) of the
+                processors to create, in processing order. See create_processor_on_track().
+            track_id (int): The id of the track to add the processors to.
+            before_processor (int): Which existing processor to create the chain in front of.
+            add_to_back (bool): Set to true to add the chain to the back of the processing chain on the track.
+            timeout (float): The maximum time in seconds to wait for all processors to be created.
+
+        Returns:
+            list[tuple[info_types.ProcessorInfo, list[info_types.ParameterInfo]]]: The info and parameters of the
+                created processors, in the same order as processors.
+        """
+        events = [
+            self.create_processor_on_track(
+                name, uid, path, processor_type, track_id, before_processor, add_to_back
+            )
+            for name, uid, path, processor_type in processors
+        ]
+
+        waiter = asyncio.gather(*(ev.wait() for ev in events))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException:
+            waiter.cancel()
+            # Don't leave events that will never be matched in the queue
+            for ev in events:
+                if not ev.is_set() and ev in self.processor_event_queue:
+                    self.processor_event_queue.remove(ev)
+            raise
+
+        return [(ev.data, ev.params) for ev in events]
+
     def move_processor_on_track(
         self,
         processor: int,
@@ -588,6 +646,7 @@ class AudioGraphController:
             processor (int): The id of the processor to delete.
             track (int): The id of the track that contains the processor.
         """
+        self._start_event_matching()
         ev = ProcessorDeletionEvent(sushi_id=processor)
         self.processor_event_queue.append(ev)
 
@@ -615,6 +674,7 @@ class AudioGraphController:
         Parameters:
             track_id (int): The id of the track to delete.
         """
+        self._start_event_matching()
         ev = TrackDeletionEvent(sushi_id=track_id)
         self.audiograph_event_queue.append(ev)
         try:
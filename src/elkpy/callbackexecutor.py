@@ -0,0 +1,246 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import asyncio
+import collections
+import threading
+import traceback
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from . import grpc_gen
+
+# Execution policies
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+# The key of the callbacks that aren't ordered
+_UNORDERED = object()
+
+
+def parameter_key(notification) -> tuple[int, int]:
+    """
+    The key ordering the callbacks of parameter updates per parameter, see CallbackExecutor.
+    """
+    return notification.parameter.processor_id, notification.parameter.parameter_id
+
+
+def property_key(notification) -> tuple[int, int]:
+    """
+    The key ordering the callbacks of property updates per property, see CallbackExecutor.
+    """
+    return notification.property.processor_id, notification.property.property_id
+
+
+def processor_key(notification) -> int:
+    """
+    The key ordering the callbacks of parameter updates, property updates and processor changes per processor, see
+    CallbackExecutor.
+    """
+    if hasattr(notification, "parameter"):
+        return notification.parameter.processor_id
+    if hasattr(notification, "property"):
+        return notification.property.processor_id
+    return notification.processor.id
+
+
+#####################
+# Callback executor #
+#####################
+
+
+class CallbackExecutor(object):
+    """
+    Runs notification callbacks off the notification loop, so that a slow callback doesn't hold back the streams.
+    Pass it to a subscribe_to_*() method of NotificationController or BrokerNotificationClient with executor=.
+
+    The policy decides where callbacks run: INLINE on the notification loop as without an executor, THREAD in a
+    thread pool, or PROCESS in a process pool, in which case the callback must be a module level function and is
+    called with a copy of the notification. Callbacks run concurrently, in any order, unless a key function is
+    given, e.g. parameter_key: the callbacks of notifications with the same key then run one at a time, in the order
+    the notifications were received, while those of different keys still run concurrently.
+
+    Exceptions raised by callbacks are printed and counted in get_stats().
+    """
+
+    def __init__(self,
+                 policy: str = THREAD,
+                 max_workers: int | None = None,
+                 key: Callable[[object], Hashable] | None = None,
+                 sushi_proto_def: str | None = None):
+        """
+        The constructor for the CallbackExecutor class.
+
+        Parameters:
+            policy (str): INLINE, THREAD or PROCESS.
+            max_workers (int | None): The size of the pool, or None for the default of concurrent.futures.
+            key (Callable | None): A function returning the key of a notification, to run the callbacks of
+                notifications with the same key in order.
+            sushi_proto_def (str | None): The .proto file of the notifications, loaded by each worker process so
+                they can be unpickled there. Only used with PROCESS.
+        """
+        if policy not in (INLINE, THREAD, PROCESS):
+            raise ValueError("Unknown policy {}".format(policy))
+        self.policy = policy
+        self._key = key
+        self._lock = threading.Lock()
+        self._queues: dict[Hashable, collections.deque] = {}
+        self._submitted = 0
+        self._completed = 0
+        self._errors = 0
+        self._dropped = 0
+        self._max_pending = 0
+        self._shut_down = False
+        self._pool: Executor | None = None
+        if policy == THREAD:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="elkpy-callback")
+        elif policy == PROCESS:
+            self._pool = ProcessPoolExecutor(max_workers=max_workers,
+                                             initializer=grpc_gen.modules_from_proto if sushi_proto_def else None,
+                                             initargs=(sushi_proto_def,) if sushi_proto_def else ())
+
+    def wrap(self, callback: Callable) -> Callable:
+        """
+        Get a callback running callback with this executor, for subscriptions not taking an executor.
+
+        Parameters:
+            callback (Callable): The callback, a plain function as coroutine functions can't run in a pool.
+
+        Returns:
+            Callable: The callback to subscribe with.
+        """
+        if asyncio.iscoroutinefunction(callback):
+            raise TypeError("Coroutine functions can't be run by a CallbackExecutor")
+        return lambda notification: self.submit(callback, notification)
+
+    def submit(self, callback: Callable, notification) -> None:
+        """
+        Run a callback with a notification according to the policy.
+        """
+        with self._lock:
+            self._submitted += 1
+            if self._shut_down:
+                self._completed += 1
+                self._dropped += 1
+                return
+            self._max_pending = max(self._max_pending, self._submitted - self._completed)
+            if self._key is not None and self._pool is not None:
+                key = self._key(notification)
+                queue = self._queues.get(key)
+                if queue is not None:
+                    # Started when the callback before it is done
+                    queue.append((callback, notification))
+                    return
+                self._queues[key] = collections.deque()
+            else:
+                key = _UNORDERED
+
+        if self._pool is None:
+            self._done(key, _run(callback, notification))
+        else:
+            self._start(key, callback, notification)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: "pending", the number of callbacks waiting or running, "max_pending", the highest it has been,
+                  "submitted", "completed", "errors", the number of callbacks that raised an exception, and
+                  "dropped", the number of callbacks not run because of shutdown(), which count as completed.
+        """
+        with self._lock:
+            return {"pending": self._submitted - self._completed,
+                    "max_pending": self._max_pending,
+                    "submitted": self._submitted,
+                    "completed": self._completed,
+                    "errors": self._errors,
+                    "dropped": self._dropped}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop running callbacks. Callbacks submitted afterwards are dropped without raising, as they are usually
+        submitted from a notification loop, and counted in the "dropped" stat.
+
+        Parameters:
+            wait (bool): Wait for the running callbacks to finish. Queued ones of ordered keys are dropped, and
+                if wait is False, so are the ones the pool didn't start yet.
+        """
+        with self._lock:
+            self._shut_down = True
+            queued = sum(len(queue) for queue in self._queues.values())
+            self._completed += queued
+            self._dropped += queued
+            self._queues.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _start(self, key: Hashable, callback: Callable, notification) -> None:
+        try:
+            future = self._pool.submit(_run, callback, notification)
+        except RuntimeError:
+            # Shut down in the meantime
+            with self._lock:
+                self._dropped += 1
+            self._done(key, True)
+            return
+        future.add_done_callback(lambda f: self._on_future_done(key, f))
+
+    def _on_future_done(self, key: Hashable, future: Future) -> None:
+        if future.cancelled():
+            # By shutdown(wait=False)
+            with self._lock:
+                self._dropped += 1
+            self._done(key, True)
+            return
+        try:
+            succeeded = future.result()
+        except Exception:
+            # e.g. the notification or callback couldn't be pickled
+            traceback.print_exc()
+            succeeded = False
+        self._done(key, succeeded)
+
+    def _done(self, key: Hashable, succeeded: bool) -> None:
+        with self._lock:
+            self._completed += 1
+            if not succeeded:
+                self._errors += 1
+            if key is _UNORDERED:
+                return
+            queue = self._queues.get(key)
+            if not queue:
+                self._queues.pop(key, None)
+                return
+            callback, notification = queue.popleft()
+        self._start(key, callback, notification)
+
+
+def _run(callback: Callable, notification) -> bool:
+    # Runs in the pool, returns False if the callback failed
+    try:
+        callback(notification)
+        return True
+    except Exception:
+        traceback.print_exc()
+        return False
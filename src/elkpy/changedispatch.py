@@ -0,0 +1,177 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import threading
+import traceback
+from typing import Callable
+
+PARAMETER = "parameter"
+PROPERTY = "property"
+
+
+class ChangeListener(object):
+    """
+    A callback registered with ChangeDispatcher, see SushiProcessor.on_parameter_change().
+    """
+    __slots__ = ("_dispatcher", "kind", "key", "callback")
+
+    def __init__(self, dispatcher: "ChangeDispatcher", kind: str, key: tuple[int, int], callback: Callable):
+        self._dispatcher = dispatcher
+        self.kind = kind
+        self.key = key
+        self.callback = callback
+
+    def cancel(self) -> None:
+        """
+        Stop calling the callback. Can be called more than once.
+        """
+        self._dispatcher.remove(self)
+
+    def __repr__(self):
+        return "ChangeListener({}, processor_id={}, id={})".format(self.kind, *self.key)
+
+
+#####################
+# Change dispatcher #
+#####################
+
+
+class ChangeDispatcher(object):
+    """
+    Calls the callbacks registered for a parameter or property when it changes, sharing one notification stream
+    per kind between all of them.
+
+    Each notification is dispatched with one dict lookup on (processor id, parameter or property id), so its cost
+    doesn't depend on how many callbacks are registered for other parameters. The streams are subscribed to when
+    the first callback of their kind is added. A callback raising an exception doesn't prevent the others from
+    being called, the exception is printed.
+
+    Callbacks are called on the thread running the notification loop, with the ParameterUpdate or PropertyValue
+    notification.
+    """
+
+    def __init__(self, notifications):
+        """
+        The constructor for the ChangeDispatcher class.
+
+        Parameters:
+            notifications: A NotificationController, e.g. SushiController.notifications, or a
+                BrokerNotificationClient.
+        """
+        self._notifications = notifications
+        self._lock = threading.Lock()
+        # The tuples of callbacks are replaced rather than modified, so dispatching needs no lock
+        self._listeners: dict[str, dict[tuple[int, int], tuple[ChangeListener, ...]]] = {PARAMETER: {},
+                                                                                          PROPERTY: {}}
+        self._subscriptions = {}
+
+    def add_parameter_listener(self, processor_id: int, parameter_id: int, callback: Callable) -> ChangeListener:
+        """
+        Call a callback with each update of a parameter.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            parameter_id (int): The id of the parameter.
+            callback (Callable): Called with the ParameterUpdate notification.
+
+        Returns:
+            ChangeListener: The registration, cancel() it to stop the calls.
+        """
+        return self._add(PARAMETER, processor_id, parameter_id, callback)
+
+    def add_property_listener(self, processor_id: int, property_id: int, callback: Callable) -> ChangeListener:
+        """
+        Call a callback with each new value of a property.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            property_id (int): The id of the property.
+            callback (Callable): Called with the PropertyValue notification.
+
+        Returns:
+            ChangeListener: The registration, cancel() it to stop the calls.
+        """
+        return self._add(PROPERTY, processor_id, property_id, callback)
+
+    def remove(self, listener: ChangeListener) -> None:
+        """
+        Stop calling the callback of a listener, same as listener.cancel().
+        """
+        with self._lock:
+            listeners = self._listeners[listener.kind]
+            remaining = tuple(l for l in listeners.get(listener.key, ()) if l is not listener)
+            if remaining:
+                listeners[listener.key] = remaining
+            else:
+                listeners.pop(listener.key, None)
+
+    def get_listener_count(self, kind: str | None = None) -> int:
+        """
+        Parameters:
+            kind (str | None): PARAMETER or PROPERTY to only count those, or None for both.
+
+        Returns:
+            int: The number of registered callbacks.
+        """
+        with self._lock:
+            kinds = [kind] if kind is not None else list(self._listeners)
+            return sum(len(l) for k in kinds for l in self._listeners[k].values())
+
+    def close(self) -> None:
+        """
+        End the notification streams and remove all callbacks.
+        """
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, {}
+            for listeners in self._listeners.values():
+                listeners.clear()
+        for subscription in subscriptions.values():
+            subscription.cancel()
+
+    def on_parameter_update(self, notification) -> None:
+        self._dispatch(self._listeners[PARAMETER].get(
+            (notification.parameter.processor_id, notification.parameter.parameter_id)), notification)
+
+    def on_property_update(self, notification) -> None:
+        self._dispatch(self._listeners[PROPERTY].get(
+            (notification.property.processor_id, notification.property.property_id)), notification)
+
+    def _add(self, kind: str, processor_id: int, id: int, callback: Callable) -> ChangeListener:
+        if not callable(callback):
+            raise TypeError("The callback must be callable")
+        listener = ChangeListener(self, kind, (processor_id, id), callback)
+        with self._lock:
+            listeners = self._listeners[kind]
+            listeners[listener.key] = listeners.get(listener.key, ()) + (listener,)
+            if kind not in self._subscriptions or self._subscriptions[kind].done():
+                if kind == PARAMETER:
+                    subscription = self._notifications.subscribe_to_parameter_updates(self.on_parameter_update)
+                else:
+                    subscription = self._notifications.subscribe_to_property_updates(self.on_property_update)
+                self._subscriptions[kind] = subscription
+        return listener
+
+    @staticmethod
+    def _dispatch(listeners: tuple[ChangeListener, ...] | None, notification) -> None:
+        if listeners is None:
+            return
+        for listener in listeners:
+            try:
+                listener.callback(notification)
+            except Exception:
+                traceback.print_exc()
@@ -1,44 +1,203 @@
 import asyncio
+import threading
+import time
+from typing import Iterable
 from .sushierrors import SushiUnkownError
 from .sushi_info_types import TrackInfo, ProcessorInfo
 
+# Time in seconds after which an event that was never matched by a notification expires
+DEFAULT_EVENT_EXPIRY = 30.0
 
-class ElkpyEvent(asyncio.Event):
+
+class ElkpyEvent:
+    """
+    A completion object set by elkpy when the notification matching an audio graph command is received.
+
+    It can be waited on from any thread with wait_sync(), and awaited from any event loop with wait() or directly
+    with `await event`. Events that aren't matched before their expiry time are removed from elkpy's queues, and
+    their waiters get a TimeoutError.
+    """
     error: bool = False
     action: int
     name: str = ''
-    sushi_id: int = 0 
+    sushi_id: int = 0
     data: TrackInfo | ProcessorInfo
 
-    async def wait(self):
+    def __init__(self, expiry: float = DEFAULT_EVENT_EXPIRY) -> None:
+        """
+        Parameters:
+            expiry (float): The time in seconds after which the event expires if it hasn't been set.
+        """
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.expired = False
+        self.deadline = time.monotonic() + expiry
+
+    def is_set(self) -> bool:
+        """
+        Returns:
+            bool: True once the event has been set.
+        """
+        return self._event.is_set()
+
+    def set(self) -> None:
+        """
+        Set the event and wake up all threads and coroutines waiting on it. Thread-safe.
+        """
+        with self._lock:
+            self._event.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The loop of that waiter is closed
+                pass
+
+    def clear(self) -> None:
+        """
+        Reset the event to not set.
+        """
+        self._event.clear()
+
+    def expire(self) -> None:
+        """
+        Mark the event as expired, waking up its waiters with a TimeoutError.
+        """
+        self.expired = True
+        self.set()
+
+    def wait_sync(self, timeout: float | None = None) -> bool:
+        """
+        Block until the event is set. Can be called from any thread, except from the thread running elkpy's
+        notification loop.
+
+        Parameters:
+            timeout (float | None): The maximum time to wait in seconds, or None to wait until the event expires.
+
+        Returns:
+            bool: True
+        """
+        if self.error:
+            raise SushiUnkownError
+        if not self._event.wait(timeout):
+            raise TimeoutError("{} was not set after {} s".format(self, timeout))
+        self._check_result()
+        return True
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait until the event is set. Can be awaited on any event loop.
+
+        Parameters:
+            timeout (float | None): The maximum time to wait in seconds, or None to wait until the event expires.
+
+        Returns:
+            bool: True
+        """
         if self.error:
             raise SushiUnkownError
-        return await super().wait()
+        if not self._event.is_set():
+            waiter = (asyncio.get_running_loop(), asyncio.get_running_loop().create_future())
+            with self._lock:
+                if self._event.is_set():
+                    waiter[1].set_result(None)
+                else:
+                    self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter[1], timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError("{} was not set after {} s".format(self, timeout)) from None
+            finally:
+                # Don't keep timed out or cancelled waiters until the event is set
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        self._check_result()
+        return True
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    def _check_result(self) -> None:
+        if self.error:
+            raise SushiUnkownError
+        if self.expired:
+            raise TimeoutError("{} expired before a matching notification was received".format(self))
+
+    def __repr__(self):
+        return "{}(name={!r}, sushi_id={})".format(type(self).__name__, self.name, self.sushi_id)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
 
 
 class TrackCreationEvent(ElkpyEvent):
-    def __init__(self, name: str) -> None:
-        super().__init__()
+    def __init__(self, name: str, expiry: float = DEFAULT_EVENT_EXPIRY) -> None:
+        super().__init__(expiry)
         self.name: str = name
         self.action = 1
 
 
 class TrackDeletionEvent(ElkpyEvent):
-    def __init__(self, sushi_id: int) -> None:
-        super().__init__()
+    def __init__(self, sushi_id: int, expiry: float = DEFAULT_EVENT_EXPIRY) -> None:
+        super().__init__(expiry)
         self.action = 2
         self.sushi_id: int = sushi_id
 
 
 class ProcessorCreationEvent(ElkpyEvent):
-    def __init__(self, name: str) -> None:
-        super().__init__()
+    def __init__(self, name: str, expiry: float = DEFAULT_EVENT_EXPIRY) -> None:
+        super().__init__(expiry)
         self.name: str = name
         self.action = 1
 
 
 class ProcessorDeletionEvent(ElkpyEvent):
-    def __init__(self, sushi_id: int) -> None:
-        super().__init__()
+    def __init__(self, sushi_id: int, expiry: float = DEFAULT_EVENT_EXPIRY) -> None:
+        super().__init__(expiry)
         self.action = 2
         self.sushi_id: int = sushi_id
+
+
+def expire_events(queue: list[ElkpyEvent], now: float | None = None) -> int:
+    """
+    Remove the events that are past their expiry time from an event queue, and expire them.
+
+    Parameters:
+        queue (list[ElkpyEvent]): The queue, e.g. AudioGraphController.processor_event_queue.
+        now (float | None): The current time.monotonic() value, or None to read it.
+
+    Returns:
+        int: The number of expired events.
+    """
+    if now is None:
+        now = time.monotonic()
+    expired = 0
+    for ev in queue[:]:
+        if ev.deadline <= now:
+            try:
+                queue.remove(ev)
+            except ValueError:
+                # Matched in the meantime
+                continue
+            ev.expire()
+            expired += 1
+    return expired
+
+
+def wait_for_events(events: Iterable[ElkpyEvent], timeout: float = 10.0) -> None:
+    """
+    Block until all events are set, for synchronous programs. This must not be called from the thread running elkpy's
+    notification loop.
+
+    Parameters:
+        events (Iterable[ElkpyEvent]): The events to wait for.
+        timeout (float): The maximum time to wait in seconds for all events together.
+    """
+    deadline = time.monotonic() + timeout
+    for ev in events:
+        ev.wait_sync(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,1604 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import fnmatch
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from concurrent import futures
+from datetime import datetime
+
+import grpc
+
+from . import grpc_gen
+from . import sushi_info_types as info_types
+
+SUSHI_VERSION = "fake"
+API_VERSION = "1.2.0"
+
+# Bool parameters are on from this normalised value
+_BOOL_THRESHOLD = 0.5
+
+
+####################
+# Plugin catalogue #
+####################
+
+
+class ParameterSpec(object):
+    """
+    The description of a parameter of a fake plugin.
+    """
+
+    def __init__(self,
+                 name: str,
+                 min_domain_value: float = 0.0,
+                 max_domain_value: float = 1.0,
+                 default: float = 0.0,
+                 unit: str = "",
+                 parameter_type: info_types.ParameterType = info_types.ParameterType.FLOAT,
+                 label: str | None = None):
+        """
+        Parameters:
+            name (str): The name of the parameter.
+            min_domain_value (float): The value in the parameter domain at normalised value 0.
+            max_domain_value (float): The value in the parameter domain at normalised value 1.
+            default (float): The normalised default value.
+            unit (str): The unit of the domain value.
+            parameter_type (ParameterType): BOOL, INT or FLOAT.
+            label (str | None): The display name, the name if None.
+        """
+        self.name = name
+        self.label = label if label is not None else name
+        self.unit = unit
+        self.type = parameter_type
+        self.min_domain_value = min_domain_value
+        self.max_domain_value = max_domain_value
+        self.default = default
+
+
+class PluginSpec(object):
+    """
+    The description of a fake plugin, i.e. what a processor created with its uid gets.
+    """
+
+    def __init__(self,
+                 label: str,
+                 parameters: list[ParameterSpec] | None = None,
+                 properties: list[tuple[str, str]] | None = None,
+                 programs: list[str] | None = None):
+        """
+        Parameters:
+            label (str): The label of the processors.
+            parameters (list[ParameterSpec] | None): The parameters, the parameter ids are their indices.
+            properties (list[tuple[str, str]] | None): (name, default value) of the properties.
+            programs (list[str] | None): The names of the programs, if the plugin supports programs.
+        """
+        self.label = label
+        self.parameters = parameters or []
+        self.properties = properties or []
+        self.programs = programs or []
+
+
+DEFAULT_PLUGINS = {
+    "sushi.testing.passthrough": PluginSpec("Passthrough"),
+    "sushi.testing.gain": PluginSpec("Gain", [ParameterSpec("gain", -120.0, 24.0, 120 / 144, "dB")]),
+    "sushi.testing.equalizer": PluginSpec("Equalizer", [ParameterSpec("frequency", 20.0, 20000.0, 0.05, "Hz"),
+                                                        ParameterSpec("gain", -24.0, 24.0, 0.5, "dB"),
+                                                        ParameterSpec("q", 0.0, 10.0, 0.1)]),
+    "sushi.testing.lfo": PluginSpec("Lfo", [ParameterSpec("freq", 0.001, 10.0, 0.1, "Hz"),
+                                            ParameterSpec("out", 0.0, 1.0, 0.5)]),
+    "sushi.testing.arpeggiator": PluginSpec("Arpeggiator", [ParameterSpec("range", 1, 5, 0.25, "octaves",
+                                                                          info_types.ParameterType.INT)]),
+    "sushi.testing.sampleplayer": PluginSpec("Sample player", [ParameterSpec("volume", -120.0, 36.0, 0.8, "dB"),
+                                                               ParameterSpec("attack", 0.0, 10.0, 0.0, "s"),
+                                                               ParameterSpec("decay", 0.0, 10.0, 0.0, "s"),
+                                                               ParameterSpec("sustain", 0.0, 1.0, 1.0),
+                                                               ParameterSpec("release", 0.0, 10.0, 0.0, "s")],
+                                             [("sample_file", "")]),
+}
+
+# Used for plugins not in the catalogue, e.g. vst and lv2 plugins
+GENERIC_PLUGIN = PluginSpec("Generic plugin",
+                            [ParameterSpec("parameter_{}".format(i)) for i in range(8)],
+                            [("file", "")],
+                            ["Program {}".format(i) for i in range(4)])
+
+TRACK_PLUGIN = PluginSpec("Track", [ParameterSpec("gain", -120.0, 24.0, 120 / 144, "dB"),
+                                    ParameterSpec("pan", -1.0, 1.0, 0.5),
+                                    ParameterSpec("mute", 0.0, 1.0, 0.0, "", info_types.ParameterType.BOOL)])
+
+
+################
+# Engine model #
+################
+
+
+class _Parameter(object):
+    def __init__(self, parameter_id: int, spec: ParameterSpec):
+        self.id = parameter_id
+        self.spec = spec
+        self.value = spec.default
+
+    def domain_value(self) -> float:
+        spec = self.spec
+        value = spec.min_domain_value + self.value * (spec.max_domain_value - spec.min_domain_value)
+        if spec.type == info_types.ParameterType.INT:
+            return float(round(value))
+        if spec.type == info_types.ParameterType.BOOL:
+            return 1.0 if self.value >= _BOOL_THRESHOLD else 0.0
+        return value
+
+    def formatted_value(self) -> str:
+        if self.spec.type == info_types.ParameterType.BOOL:
+            return "on" if self.value >= _BOOL_THRESHOLD else "off"
+        if self.spec.type == info_types.ParameterType.INT:
+            return "{}".format(int(self.domain_value()))
+        return "{:.2f}".format(self.domain_value())
+
+
+class _Processor(object):
+    def __init__(self, processor_id: int, name: str, uid: str, path: str, plugin_type: int, spec: PluginSpec):
+        self.id = processor_id
+        self.name = name
+        self.label = spec.label
+        self.uid = uid
+        self.path = path
+        self.type = plugin_type
+        self.bypassed = False
+        self.parameters = [_Parameter(i, p) for i, p in enumerate(spec.parameters)]
+        self.properties = {i: [name, value] for i, (name, value) in enumerate(spec.properties)}
+        self.programs = list(spec.programs)
+        self.program = 0
+
+
+class _Track(_Processor):
+    def __init__(self, track_id: int, name: str, channels: int, buses: int, thread: int, track_type: int):
+        super().__init__(track_id, name, "", "", info_types.PluginType.INTERNAL, TRACK_PLUGIN)
+        self.label = name
+        self.channels = channels
+        self.buses = buses
+        self.thread = thread
+        self.track_type = track_type
+        self.processors: list[int] = []
+
+
+class _Notifications(object):
+    """
+    Fans out notifications to the subscribed streams, each having its own queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, list[queue.SimpleQueue]] = {}
+
+    def subscribe(self, kind: str) -> queue.SimpleQueue:
+        q = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.setdefault(kind, []).append(q)
+        return q
+
+    def unsubscribe(self, kind: str, q: queue.SimpleQueue) -> None:
+        with self._lock:
+            self._subscribers[kind].remove(q)
+
+    def publish(self, kind: str, notification) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(kind, []))
+        for q in subscribers:
+            q.put(notification)
+
+    def subscriber_count(self, kind: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(kind, []))
+
+
+###################
+# Fault injection #
+###################
+
+
+class _Fault(object):
+    def __init__(self, pattern: str, latency: float, jitter: float, error_rate: float, error_code: grpc.StatusCode):
+        self.pattern = pattern
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+
+
+class _FaultInjector(grpc.ServerInterceptor):
+    """
+    Counts calls and delays or fails them according to the faults matching their method.
+    """
+
+    def __init__(self, seed: int | None):
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.faults: list[_Fault] = []
+        self.call_counts = Counter()
+
+    def intercept_service(self, continuation, handler_call_details):
+        method = handler_call_details.method.split(".", 1)[-1]
+        with self._lock:
+            self.call_counts[method] += 1
+            fault = next((f for f in reversed(self.faults) if fnmatch.fnmatchcase(method, f.pattern)), None)
+
+        handler = continuation(handler_call_details)
+        if fault is None or handler is None:
+            return handler
+
+        if handler.unary_unary is not None:
+            def unary_unary(request, context):
+                self._inject(fault, context)
+                return handler.unary_unary(request, context)
+
+            return grpc.unary_unary_rpc_method_handler(unary_unary,
+                                                       request_deserializer=handler.request_deserializer,
+                                                       response_serializer=handler.response_serializer)
+        if handler.unary_stream is not None:
+            def unary_stream(request, context):
+                self._inject(fault, context)
+                yield from handler.unary_stream(request, context)
+
+            return grpc.unary_stream_rpc_method_handler(unary_stream,
+                                                        request_deserializer=handler.request_deserializer,
+                                                        response_serializer=handler.response_serializer)
+        return handler
+
+    def _inject(self, fault: _Fault, context) -> None:
+        with self._lock:
+            delay = fault.latency + self._random.uniform(0.0, fault.jitter)
+            fail = self._random.random() < fault.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            context.abort(fault.error_code, "Injected error")
+
+
+##############
+# Fake sushi #
+##############
+
+
+class FakeSushi(object):
+    """
+    An in-process fake of sushi, serving all gRPC services of the sushi_rpc.proto api on a real gRPC server.
+
+    It keeps a model of the engine: tracks and processors with parameters, properties and programs, transport,
+    audio, midi, cv/gate and osc connections and sessions. Commands change that model and send the notifications sushi
+    would send, so elkpy and applications built on it can be tested and benchmarked end to end without an audio
+    engine. Processors are created from a catalogue of plugin descriptions, see DEFAULT_PLUGINS.
+
+    Latency, jitter and errors can be injected per method with set_fault().
+    """
+
+    def __init__(self,
+                 sushi_proto_def: str = "/usr/share/sushi/sushi_rpc.proto",
+                 address: str = "localhost:0",
+                 plugins: dict[str, PluginSpec] | None = None,
+                 audio_inputs: int = 8,
+                 audio_outputs: int = 8,
+                 max_workers: int = 64,
+                 seed: int | None = None):
+        """
+        The constructor for the FakeSushi class. The server is started by start().
+
+        Parameters:
+            sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
+            address (str): 'ip-address:port' to serve on, port 0 picks a free port, or 'unix:path' for a unix socket.
+            plugins (dict[str, PluginSpec] | None): The plugins by uid, DEFAULT_PLUGINS if None. Processors with
+                other uids get the parameters of GENERIC_PLUGIN.
+            audio_inputs (int): The number of engine audio input channels.
+            audio_outputs (int): The number of engine audio output channels.
+            max_workers (int): The number of server threads. Each open notification stream uses one.
+            seed (int | None): The seed of the random generator used for fault injection.
+        """
+        self._sushi_proto, self._sushi_grpc = grpc_gen.modules_from_proto(sushi_proto_def)
+        self._requested_address = address
+        self._max_workers = max_workers
+        self.plugins = plugins if plugins is not None else DEFAULT_PLUGINS
+        self.audio_inputs = audio_inputs
+        self.audio_outputs = audio_outputs
+        self.midi_inputs = 1
+        self.midi_outputs = 1
+        self.cv_inputs = 4
+        self.cv_outputs = 4
+        self.cpu_timings = (0.05, 0.02, 0.1)
+        self.timing_update_interval = 1.0
+
+        self._lock = threading.RLock()
+        self._notifications = _Notifications()
+        self._faults = _FaultInjector(seed)
+        self._stopping = threading.Event()
+        self._server = None
+        self.address = None
+        self._reset_engine()
+
+    def start(self) -> str:
+        """
+        Start serving.
+
+        Returns:
+            str: The 'ip-address:port', or 'unix:path' address, the fake is listening on.
+        """
+        self._stopping.clear()
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=self._max_workers),
+                                   interceptors=[self._faults])
+        for service in (_SystemService, _TransportService, _TimingService, _KeyboardService, _AudioGraphService,
+                        _ProgramService, _ParameterService, _MidiService, _AudioRoutingService, _CvGateService,
+                        _OscService, _SessionService, _NotificationService):
+            register = getattr(self._sushi_grpc, "add_{}Servicer_to_server".format(service.NAME))
+            register(service(self, self._sushi_proto), self._server)
+        port = self._server.add_insecure_port(self._requested_address)
+        self._server.start()
+        if self._requested_address.startswith("unix:"):
+            self.address = self._requested_address
+        else:
+            self.address = "{}:{}".format(self._requested_address.rsplit(":", 1)[0], port)
+        return self.address
+
+    def stop(self, grace: float | None = None) -> None:
+        """
+        Stop serving, ending all notification streams.
+
+        Parameters:
+            grace (float | None): The time in seconds to let ongoing calls finish.
+        """
+        self._stopping.set()
+        if self._server is not None:
+            self._server.stop(grace).wait()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def set_fault(self,
+                  method: str = "*",
+                  latency: float = 0.0,
+                  jitter: float = 0.0,
+                  error_rate: float = 0.0,
+                  error_code: grpc.StatusCode = grpc.StatusCode.UNAVAILABLE) -> None:
+        """
+        Delay or fail the calls of some methods. When several faults match a method, the last one set is used.
+
+        Parameters:
+            method (str): A glob pattern matched against 'Service/Method', e.g. 'ParameterController/*'.
+            latency (float): The minimum delay in seconds added to each call.
+            jitter (float): Each call is delayed by an additional uniformly distributed 0 to jitter seconds.
+            error_rate (float): The probability of a call failing with error_code after the delay.
+            error_code (grpc.StatusCode): The status of the failed calls.
+        """
+        with self._faults._lock:
+            self._faults.faults.append(_Fault(method, latency, jitter, error_rate, error_code))
+
+    def clear_faults(self) -> None:
+        """
+        Remove all faults set with set_fault().
+        """
+        with self._faults._lock:
+            self._faults.faults.clear()
+
+    def get_call_counts(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The number of calls received per 'Service/Method', including injected failures.
+        """
+        with self._faults._lock:
+            return dict(self._faults.call_counts)
+
+    def publish_notification(self, kind: str, notification) -> None:
+        """
+        Send a notification to the clients subscribed to a kind, e.g. one read from a recording.
+
+        Parameters:
+            kind (str): "transport", "timing", "track", "processor", "parameter", "property" or "async_command".
+            notification: The message, of the type streamed by the matching NotificationController rpc.
+        """
+        self._notifications.publish(kind, notification)
+
+    def get_subscriber_count(self, kind: str) -> int:
+        """
+        Parameters:
+            kind (str): "transport", "timing", "track", "processor", "parameter", "property" or "async_command".
+
+        Returns:
+            int: The number of notification streams of that kind currently open.
+        """
+        return self._notifications.subscriber_count(kind)
+
+    def reset(self) -> None:
+        """
+        Remove all tracks, processors and connections and reset the transport, like a sushi started without config.
+        """
+        with self._lock:
+            self._reset_engine()
+
+    ##################
+    # Model handling #
+    ##################
+
+    def _reset_engine(self) -> None:
+        self._next_id = 0
+        self.tracks: dict[int, _Track] = {}
+        self.processors: dict[int, _Processor] = {}
+        self.sample_rate = 48000.0
+        self.tempo = 120.0
+        self.playing_mode = info_types.PlayingMode.STOPPED
+        self.sync_mode = info_types.SyncMode.INTERNAL
+        self.time_signature = (4, 4)
+        self.timings_enabled = False
+        self.input_connections: set[tuple[int, int, int]] = set()
+        self.output_connections: set[tuple[int, int, int]] = set()
+        self.kbd_input_connections: set[tuple[int, int, int, bool]] = set()
+        self.kbd_output_connections: set[tuple[int, int, int, bool]] = set()
+        self.cc_connections: dict[tuple[int, int, int, int, int], tuple[float, float, bool]] = {}
+        self.pc_connections: set[tuple[int, int, int]] = set()
+        self.clock_outputs: set[int] = set()
+        self.cv_input_connections: set[tuple[int, int, int]] = set()
+        self.cv_output_connections: set[tuple[int, int, int]] = set()
+        self.gate_input_connections: set[tuple[int, int, int, int]] = set()
+        self.gate_output_connections: set[tuple[int, int, int, int]] = set()
+        self.osc_outputs: set[tuple[int, int]] = set()
+        self.osc_all_outputs = False
+        self.note_count = 0
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _all_processors(self) -> dict[int, _Processor]:
+        return self.tracks | self.processors
+
+    def _names(self) -> set[str]:
+        return {p.name for p in self._all_processors().values()}
+
+    def _get_track(self, track_id: int, context) -> _Track:
+        track = self.tracks.get(track_id)
+        if track is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No track with id {}".format(track_id))
+        return track
+
+    def _get_processor(self, processor_id: int, context) -> _Processor:
+        processor = self.processors.get(processor_id, self.tracks.get(processor_id))
+        if processor is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No processor with id {}".format(processor_id))
+        return processor
+
+    def _get_parameter(self, processor_id: int, parameter_id: int, context) -> _Parameter:
+        processor = self._get_processor(processor_id, context)
+        if not 0 <= parameter_id < len(processor.parameters):
+            context.abort(grpc.StatusCode.NOT_FOUND, "No parameter with id {}".format(parameter_id))
+        return processor.parameters[parameter_id]
+
+    def _get_property(self, processor_id: int, property_id: int, context) -> list:
+        processor = self._get_processor(processor_id, context)
+        if property_id not in processor.properties:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No property with id {}".format(property_id))
+        return processor.properties[property_id]
+
+    def _add_track(self, name: str, channels: int, buses: int, thread: int, track_type: int, context) -> _Track:
+        if not name or name in self._names():
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid or existing name {}".format(name))
+        if track_type != info_types.TrackType.REGULAR and \
+                any(t.track_type == track_type for t in self.tracks.values()):
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "There is already a track of type {}".format(track_type))
+        track = _Track(self._new_id(), name, channels, buses, thread, track_type)
+        self.tracks[track.id] = track
+        self._publish_track(1, track.id)
+        return track
+
+    def _add_processor(self, name: str, uid: str, path: str, plugin_type: int, track: _Track,
+                       add_to_back: bool, before: int, context) -> _Processor:
+        if not name or name in self._names():
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid or existing name {}".format(name))
+        processor = _Processor(self._new_id(), name, uid, path, plugin_type, self.plugins.get(uid, GENERIC_PLUGIN))
+        self._insert(track, processor.id, add_to_back, before, context)
+        self.processors[processor.id] = processor
+        self._publish_processor(1, processor.id, track.id)
+        return processor
+
+    @staticmethod
+    def _insert(track: _Track, processor_id: int, add_to_back: bool, before: int, context) -> None:
+        if add_to_back:
+            track.processors.append(processor_id)
+        elif before in track.processors:
+            track.processors.insert(track.processors.index(before), processor_id)
+        else:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No processor with id {} on track {}".format(before, track.id))
+
+    def _delete_processor(self, processor_id: int) -> None:
+        for track in self.tracks.values():
+            if processor_id in track.processors:
+                track.processors.remove(processor_id)
+                self._publish_processor(2, processor_id, track.id)
+        del self.processors[processor_id]
+        self._disconnect_processor(processor_id)
+
+    def _delete_track(self, track_id: int) -> None:
+        track = self.tracks[track_id]
+        for processor_id in list(track.processors):
+            self._delete_processor(processor_id)
+        del self.tracks[track_id]
+        self._disconnect_processor(track_id)
+        for connections in (self.input_connections, self.output_connections):
+            connections -= {c for c in connections if c[0] == track_id}
+        for connections in (self.kbd_input_connections, self.kbd_output_connections):
+            connections -= {c for c in connections if c[0] == track_id}
+        self._publish_track(2, track_id)
+
+    def _disconnect_processor(self, processor_id: int) -> None:
+        self.cc_connections = {k: v for k, v in self.cc_connections.items() if k[0] != processor_id}
+        for connections in (self.pc_connections, self.cv_input_connections, self.cv_output_connections,
+                            self.gate_input_connections, self.gate_output_connections, self.osc_outputs):
+            connections -= {c for c in connections if c[0] == processor_id}
+
+    def _set_parameter(self, processor_id: int, parameter: _Parameter, value: float) -> None:
+        value = min(1.0, max(0.0, value))
+        if value == parameter.value:
+            return
+        parameter.value = value
+        self._notifications.publish("parameter", self._sushi_proto.ParameterUpdate(
+            parameter=self._sushi_proto.ParameterIdentifier(processor_id=processor_id, parameter_id=parameter.id),
+            normalized_value=value,
+            domain_value=parameter.domain_value(),
+            formatted_value=parameter.formatted_value()))
+
+    def _set_property(self, processor_id: int, property_id: int, value: str) -> None:
+        self._all_processors()[processor_id].properties[property_id][1] = value
+        self._notifications.publish("property", self._sushi_proto.PropertyValue(
+            property=self._sushi_proto.PropertyIdentifier(processor_id=processor_id, property_id=property_id),
+            value=value))
+
+    def _publish_track(self, action: int, track_id: int) -> None:
+        self._notifications.publish("track", self._sushi_proto.TrackUpdate(
+            action=action, track=self._sushi_proto.TrackIdentifier(id=track_id)))
+
+    def _publish_processor(self, action: int, processor_id: int, track_id: int) -> None:
+        self._notifications.publish("processor", self._sushi_proto.ProcessorUpdate(
+            action=action,
+            processor=self._sushi_proto.ProcessorIdentifier(id=processor_id),
+            parent_track=self._sushi_proto.TrackIdentifier(id=track_id)))
+
+    def _publish_transport(self, **kwargs) -> None:
+        self._notifications.publish("transport", self._sushi_proto.TransportUpdate(**kwargs))
+
+    def _stream(self, kind: str, context, accept=None):
+        """
+        Yield the notifications of a kind until the call or the server ends.
+        """
+        q = self._notifications.subscribe(kind)
+        # Let clients know the subscription is in place without waiting for a first notification
+        context.send_initial_metadata(())
+        try:
+            while context.is_active() and not self._stopping.is_set():
+                try:
+                    notification = q.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if accept is None or accept(notification):
+                    yield notification
+        finally:
+            self._notifications.unsubscribe(kind, q)
+
+
+############
+# Services #
+############
+
+
+class _Service(object):
+    NAME = ""
+
+    def __init__(self, sushi: FakeSushi, sushi_proto):
+        self._sushi = sushi
+        self._proto = sushi_proto
+        self._void = sushi_proto.GenericVoidValue()
+
+
+class _SystemService(_Service):
+    NAME = "SystemController"
+
+    def GetSushiVersion(self, request, context):
+        return self._proto.GenericStringValue(value=SUSHI_VERSION)
+
+    def GetSushiApiVersion(self, request, context):
+        return self._proto.GenericStringValue(value=API_VERSION)
+
+    def GetBuildInfo(self, request, context):
+        return self._build_info()
+
+    def _build_info(self):
+        return self._proto.SushiBuildInfo(version=SUSHI_VERSION, build_options=["fake"], audio_buffer_size=64,
+                                          commit_hash="", build_date="")
+
+    def GetInputAudioChannelCount(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.audio_inputs)
+
+    def GetOutputAudioChannelCount(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.audio_outputs)
+
+
+class _TransportService(_Service):
+    NAME = "TransportController"
+
+    def GetSamplerate(self, request, context):
+        return self._proto.GenericFloatValue(value=self._sushi.sample_rate)
+
+    def GetPlayingMode(self, request, context):
+        return self._proto.PlayingMode(mode=self._sushi.playing_mode)
+
+    def GetSyncMode(self, request, context):
+        return self._proto.SyncMode(mode=self._sushi.sync_mode)
+
+    def GetTimeSignature(self, request, context):
+        numerator, denominator = self._sushi.time_signature
+        return self._proto.TimeSignature(numerator=numerator, denominator=denominator)
+
+    def GetTempo(self, request, context):
+        return self._proto.GenericFloatValue(value=self._sushi.tempo)
+
+    def SetTempo(self, request, context):
+        if request.value <= 0:
+            context.abort(grpc.StatusCode.OUT_OF_RANGE, "Invalid tempo {}".format(request.value))
+        with self._sushi._lock:
+            self._sushi.tempo = request.value
+            self._sushi._publish_transport(tempo=request.value)
+        return self._void
+
+    def SetPlayingMode(self, request, context):
+        with self._sushi._lock:
+            self._sushi.playing_mode = info_types.PlayingMode(request.mode)
+            self._sushi._publish_transport(playing_mode=request)
+        return self._void
+
+    def SetSyncMode(self, request, context):
+        with self._sushi._lock:
+            self._sushi.sync_mode = info_types.SyncMode(request.mode)
+            self._sushi._publish_transport(sync_mode=request)
+        return self._void
+
+    def SetTimeSignature(self, request, context):
+        if request.numerator <= 0 or request.denominator <= 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid time signature")
+        with self._sushi._lock:
+            self._sushi.time_signature = (request.numerator, request.denominator)
+            self._sushi._publish_transport(time_signature=request)
+        return self._void
+
+
+class _TimingService(_Service):
+    NAME = "TimingController"
+
+    def GetTimingsEnabled(self, request, context):
+        return self._proto.GenericBoolValue(value=self._sushi.timings_enabled)
+
+    def SetTimingsEnabled(self, request, context):
+        self._sushi.timings_enabled = request.value
+        return self._void
+
+    def _timings(self):
+        average, minimum, maximum = self._sushi.cpu_timings
+        return self._proto.CpuTimings(average=average, min=minimum, max=maximum)
+
+    def GetEngineTimings(self, request, context):
+        return self._timings()
+
+    def GetTrackTimings(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+        return self._timings()
+
+    def GetProcessorTimings(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+        return self._timings()
+
+    def ResetAllTimings(self, request, context):
+        return self._void
+
+    def ResetTrackTimings(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+        return self._void
+
+    def ResetProcessorTimings(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+        return self._void
+
+
+class _KeyboardService(_Service):
+    NAME = "KeyboardController"
+
+    def _event(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.track.id, context)
+            self._sushi.note_count += 1
+        return self._void
+
+    SendNoteOn = SendNoteOff = SendNoteAftertouch = SendAftertouch = SendPitchBend = SendModulation = _event
+
+
+class _AudioGraphService(_Service):
+    NAME = "AudioGraphController"
+
+    def _processor_info(self, processor: _Processor):
+        return self._proto.ProcessorInfo(id=processor.id, label=processor.label, name=processor.name,
+                                         parameter_count=len(processor.parameters),
+                                         program_count=len(processor.programs))
+
+    def _track_info(self, track: _Track):
+        return self._proto.TrackInfo(id=track.id, label=track.label, name=track.name, channels=track.channels,
+                                     buses=track.buses, thread=track.thread,
+                                     type=self._proto.TrackType(type=track.track_type),
+                                     processors=[self._proto.ProcessorIdentifier(id=i) for i in track.processors])
+
+    def GetAllProcessors(self, request, context):
+        with self._sushi._lock:
+            return self._proto.ProcessorInfoList(
+                processors=[self._processor_info(p) for p in self._sushi.processors.values()])
+
+    def GetAllTracks(self, request, context):
+        with self._sushi._lock:
+            return self._proto.TrackInfoList(tracks=[self._track_info(t) for t in self._sushi.tracks.values()])
+
+    def GetTrackId(self, request, context):
+        with self._sushi._lock:
+            for track in self._sushi.tracks.values():
+                if track.name == request.value:
+                    return self._proto.TrackIdentifier(id=track.id)
+        context.abort(grpc.StatusCode.NOT_FOUND, "No track named {}".format(request.value))
+
+    def GetTrackInfo(self, request, context):
+        with self._sushi._lock:
+            return self._track_info(self._sushi._get_track(request.id, context))
+
+    def GetTrackProcessors(self, request, context):
+        with self._sushi._lock:
+            track = self._sushi._get_track(request.id, context)
+            return self._proto.ProcessorInfoList(
+                processors=[self._processor_info(self._sushi.processors[i]) for i in track.processors])
+
+    def GetProcessorId(self, request, context):
+        with self._sushi._lock:
+            for processor in self._sushi._all_processors().values():
+                if processor.name == request.value:
+                    return self._proto.ProcessorIdentifier(id=processor.id)
+        context.abort(grpc.StatusCode.NOT_FOUND, "No processor named {}".format(request.value))
+
+    def GetProcessorInfo(self, request, context):
+        with self._sushi._lock:
+            return self._processor_info(self._sushi._get_processor(request.id, context))
+
+    def GetProcessorBypassState(self, request, context):
+        with self._sushi._lock:
+            return self._proto.GenericBoolValue(value=self._sushi._get_processor(request.id, context).bypassed)
+
+    def GetProcessorState(self, request, context):
+        with self._sushi._lock:
+            return _processor_state(self._proto, self._sushi._get_processor(request.id, context))
+
+    def SetProcessorBypassState(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.processor.id, context).bypassed = request.value
+        return self._void
+
+    def SetProcessorState(self, request, context):
+        with self._sushi._lock:
+            processor = self._sushi._get_processor(request.processor.id, context)
+            _apply_state(self._sushi, processor, request.state)
+        return self._void
+
+    def CreateTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._add_track(request.name, request.channels, 1 if request.channels <= 2 else 0,
+                                   request.thread.value, info_types.TrackType.REGULAR, context)
+        return self._void
+
+    def CreateMultibusTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._add_track(request.name, 2 * request.buses, request.buses, request.thread.value,
+                                   info_types.TrackType.REGULAR, context)
+        return self._void
+
+    def CreatePreTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._add_track(request.name, self._sushi.audio_inputs, 0, 0, info_types.TrackType.PRE, context)
+        return self._void
+
+    def CreatePostTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._add_track(request.name, self._sushi.audio_outputs, 0, 0, info_types.TrackType.POST,
+                                   context)
+        return self._void
+
+    def CreateProcessorOnTrack(self, request, context):
+        with self._sushi._lock:
+            track = self._sushi._get_track(request.track.id, context)
+            self._sushi._add_processor(request.name, request.uid, request.path, request.type.type, track,
+                                       request.position.add_to_back, request.position.before_processor.id, context)
+        return self._void
+
+    def MoveProcessorOnTrack(self, request, context):
+        with self._sushi._lock:
+            source = self._sushi._get_track(request.source_track.id, context)
+            dest = self._sushi._get_track(request.dest_track.id, context)
+            processor_id = request.processor.id
+            if processor_id not in source.processors:
+                context.abort(grpc.StatusCode.NOT_FOUND,
+                              "No processor with id {} on track {}".format(processor_id, source.id))
+            index = source.processors.index(processor_id)
+            source.processors.remove(processor_id)
+            try:
+                self._sushi._insert(dest, processor_id, request.position.add_to_back,
+                                    request.position.before_processor.id, context)
+            except BaseException:
+                source.processors.insert(index, processor_id)
+                raise
+        return self._void
+
+    def DeleteProcessorFromTrack(self, request, context):
+        with self._sushi._lock:
+            track = self._sushi._get_track(request.track.id, context)
+            if request.processor.id not in track.processors:
+                context.abort(grpc.StatusCode.NOT_FOUND,
+                              "No processor with id {} on track {}".format(request.processor.id, track.id))
+            self._sushi._delete_processor(request.processor.id)
+        return self._void
+
+    def DeleteTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+            self._sushi._delete_track(request.id)
+        return self._void
+
+
+class _ProgramService(_Service):
+    NAME = "ProgramController"
+
+    def _with_programs(self, processor_id: int, context) -> _Processor:
+        processor = self._sushi._get_processor(processor_id, context)
+        if not processor.programs:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, "Processor {} has no programs".format(processor_id))
+        return processor
+
+    def GetProcessorCurrentProgram(self, request, context):
+        with self._sushi._lock:
+            return self._proto.ProgramIdentifier(program=self._with_programs(request.id, context).program)
+
+    def GetProcessorCurrentProgramName(self, request, context):
+        with self._sushi._lock:
+            processor = self._with_programs(request.id, context)
+            return self._proto.GenericStringValue(value=processor.programs[processor.program])
+
+    def GetProcessorProgramName(self, request, context):
+        with self._sushi._lock:
+            processor = self._with_programs(request.processor.id, context)
+            if not 0 <= request.program < len(processor.programs):
+                context.abort(grpc.StatusCode.OUT_OF_RANGE, "No program {}".format(request.program))
+            return self._proto.GenericStringValue(value=processor.programs[request.program])
+
+    def GetProcessorPrograms(self, request, context):
+        with self._sushi._lock:
+            processor = self._with_programs(request.id, context)
+            return self._proto.ProgramInfoList(programs=[
+                self._proto.ProgramInfo(id=self._proto.ProgramIdentifier(program=i), name=name)
+                for i, name in enumerate(processor.programs)])
+
+    def SetProcessorProgram(self, request, context):
+        with self._sushi._lock:
+            processor = self._with_programs(request.processor.id, context)
+            if not 0 <= request.program.program < len(processor.programs):
+                context.abort(grpc.StatusCode.OUT_OF_RANGE, "No program {}".format(request.program.program))
+            processor.program = request.program.program
+        return self._void
+
+
+class _ParameterService(_Service):
+    NAME = "ParameterController"
+
+    def _parameter_info(self, parameter: _Parameter):
+        spec = parameter.spec
+        return self._proto.ParameterInfo(id=parameter.id, type=self._proto.ParameterType(type=spec.type),
+                                         label=spec.label, name=spec.name, unit=spec.unit, automatable=True,
+                                         min_domain_value=spec.min_domain_value,
+                                         max_domain_value=spec.max_domain_value)
+
+    def _property_info(self, property_id: int, prop: list):
+        return self._proto.PropertyInfo(id=property_id, name=prop[0], label=prop[0])
+
+    def GetTrackParameters(self, request, context):
+        with self._sushi._lock:
+            track = self._sushi._get_track(request.id, context)
+            return self._proto.ParameterInfoList(parameters=[self._parameter_info(p) for p in track.parameters])
+
+    def GetProcessorParameters(self, request, context):
+        with self._sushi._lock:
+            processor = self._sushi._get_processor(request.id, context)
+            return self._proto.ParameterInfoList(parameters=[self._parameter_info(p) for p in processor.parameters])
+
+    def GetParameterId(self, request, context):
+        with self._sushi._lock:
+            processor = self._sushi._get_processor(request.processor.id, context)
+            for parameter in processor.parameters:
+                if parameter.spec.name == request.ParameterName:
+                    return self._proto.ParameterIdentifier(processor_id=processor.id, parameter_id=parameter.id)
+        context.abort(grpc.StatusCode.NOT_FOUND, "No parameter named {}".format(request.ParameterName))
+
+    def GetParameterInfo(self, request, context):
+        with self._sushi._lock:
+            return self._parameter_info(
+                self._sushi._get_parameter(request.processor_id, request.parameter_id, context))
+
+    def GetParameterValue(self, request, context):
+        with self._sushi._lock:
+            parameter = self._sushi._get_parameter(request.processor_id, request.parameter_id, context)
+            return self._proto.GenericFloatValue(value=parameter.value)
+
+    def GetParameterValueInDomain(self, request, context):
+        with self._sushi._lock:
+            parameter = self._sushi._get_parameter(request.processor_id, request.parameter_id, context)
+            return self._proto.GenericFloatValue(value=parameter.domain_value())
+
+    def GetParameterValueAsString(self, request, context):
+        with self._sushi._lock:
+            parameter = self._sushi._get_parameter(request.processor_id, request.parameter_id, context)
+            return self._proto.GenericStringValue(value=parameter.formatted_value())
+
+    def SetParameterValue(self, request, context):
+        with self._sushi._lock:
+            identifier = request.parameter
+            parameter = self._sushi._get_parameter(identifier.processor_id, identifier.parameter_id, context)
+            self._sushi._set_parameter(identifier.processor_id, parameter, request.value)
+        return self._void
+
+    def GetTrackProperties(self, request, context):
+        with self._sushi._lock:
+            track = self._sushi._get_track(request.id, context)
+            return self._proto.PropertyInfoList(
+                properties=[self._property_info(i, p) for i, p in track.properties.items()])
+
+    def GetProcessorProperties(self, request, context):
+        with self._sushi._lock:
+            processor = self._sushi._get_processor(request.id, context)
+            return self._proto.PropertyInfoList(
+                properties=[self._property_info(i, p) for i, p in processor.properties.items()])
+
+    def GetPropertyId(self, request, context):
+        with self._sushi._lock:
+            processor = self._sushi._get_processor(request.processor.id, context)
+            for property_id, prop in processor.properties.items():
+                if prop[0] == request.property_name:
+                    return self._proto.PropertyIdentifier(processor_id=processor.id, property_id=property_id)
+        context.abort(grpc.StatusCode.NOT_FOUND, "No property named {}".format(request.property_name))
+
+    def GetPropertyInfo(self, request, context):
+        with self._sushi._lock:
+            prop = self._sushi._get_property(request.processor_id, request.property_id, context)
+            return self._property_info(request.property_id, prop)
+
+    def GetPropertyValue(self, request, context):
+        with self._sushi._lock:
+            prop = self._sushi._get_property(request.processor_id, request.property_id, context)
+            return self._proto.GenericStringValue(value=prop[1])
+
+    def SetPropertyValue(self, request, context):
+        with self._sushi._lock:
+            identifier = request.property
+            self._sushi._get_property(identifier.processor_id, identifier.property_id, context)
+            self._sushi._set_property(identifier.processor_id, identifier.property_id, request.value)
+        return self._void
+
+
+class _MidiService(_Service):
+    NAME = "MidiController"
+
+    def _check_port(self, port: int, count: int, context) -> None:
+        if not 0 <= port < count:
+            context.abort(grpc.StatusCode.OUT_OF_RANGE, "No midi port {}".format(port))
+
+    def _kbd(self, request, count: int, context) -> tuple:
+        self._sushi._get_track(request.track.id, context)
+        self._check_port(request.port, count, context)
+        return request.track.id, request.channel.channel, request.port, request.raw_midi
+
+    def _kbd_list(self, connections):
+        return self._proto.MidiKbdConnectionList(connections=[
+            self._proto.MidiKbdConnection(track=self._proto.TrackIdentifier(id=t),
+                                          channel=self._proto.MidiChannel(channel=c), port=p, raw_midi=r)
+            for t, c, p, r in sorted(connections)])
+
+    def _cc_list(self, processor_id: int | None = None):
+        return self._proto.MidiCCConnectionList(connections=[
+            self._proto.MidiCCConnection(
+                parameter=self._proto.ParameterIdentifier(processor_id=k[0], parameter_id=k[1]),
+                channel=self._proto.MidiChannel(channel=k[2]), port=k[3], cc_number=k[4],
+                min_range=v[0], max_range=v[1], relative_mode=v[2])
+            for k, v in sorted(self._sushi.cc_connections.items()) if processor_id in (None, k[0])])
+
+    def _pc_list(self, processor_id: int | None = None):
+        return self._proto.MidiPCConnectionList(connections=[
+            self._proto.MidiPCConnection(processor=self._proto.ProcessorIdentifier(id=p),
+                                         channel=self._proto.MidiChannel(channel=c), port=port)
+            for p, c, port in sorted(self._sushi.pc_connections) if processor_id in (None, p)])
+
+    def GetInputPorts(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.midi_inputs)
+
+    def GetOutputPorts(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.midi_outputs)
+
+    def GetAllKbdInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._kbd_list(self._sushi.kbd_input_connections)
+
+    def GetAllKbdOutputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._kbd_list(self._sushi.kbd_output_connections)
+
+    def GetAllCCInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._cc_list()
+
+    def GetAllPCInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._pc_list()
+
+    def GetCCInputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._cc_list(request.id)
+
+    def GetPCInputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._pc_list(request.id)
+
+    def GetMidiClockOutputEnabled(self, request, context):
+        with self._sushi._lock:
+            self._check_port(request.value, self._sushi.midi_outputs, context)
+            return self._proto.GenericBoolValue(value=request.value in self._sushi.clock_outputs)
+
+    def SetMidiClockOutputEnabled(self, request, context):
+        with self._sushi._lock:
+            self._check_port(request.port, self._sushi.midi_outputs, context)
+            if request.enabled:
+                self._sushi.clock_outputs.add(request.port)
+            else:
+                self._sushi.clock_outputs.discard(request.port)
+        return self._void
+
+    def ConnectKbdInputToTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi.kbd_input_connections.add(self._kbd(request, self._sushi.midi_inputs, context))
+        return self._void
+
+    def ConnectKbdOutputFromTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi.kbd_output_connections.add(self._kbd(request, self._sushi.midi_outputs, context))
+        return self._void
+
+    def ConnectCCToParameter(self, request, context):
+        with self._sushi._lock:
+            identifier = request.parameter
+            self._sushi._get_parameter(identifier.processor_id, identifier.parameter_id, context)
+            self._check_port(request.port, self._sushi.midi_inputs, context)
+            key = (identifier.processor_id, identifier.parameter_id, request.channel.channel, request.port,
+                   request.cc_number)
+            self._sushi.cc_connections[key] = (request.min_range, request.max_range, request.relative_mode)
+        return self._void
+
+    def ConnectPCToProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.processor.id, context)
+            self._check_port(request.port, self._sushi.midi_inputs, context)
+            self._sushi.pc_connections.add((request.processor.id, request.channel.channel, request.port))
+        return self._void
+
+    def DisconnectKbdInput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.kbd_input_connections.discard(self._kbd(request, self._sushi.midi_inputs, context))
+        return self._void
+
+    def DisconnectKbdOutput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.kbd_output_connections.discard(self._kbd(request, self._sushi.midi_outputs, context))
+        return self._void
+
+    def DisconnectCC(self, request, context):
+        with self._sushi._lock:
+            key = (request.parameter.processor_id, request.parameter.parameter_id, request.channel.channel,
+                   request.port, request.cc_number)
+            self._sushi.cc_connections.pop(key, None)
+        return self._void
+
+    def DisconnectPC(self, request, context):
+        with self._sushi._lock:
+            self._sushi.pc_connections.discard((request.processor.id, request.channel.channel, request.port))
+        return self._void
+
+    def DisconnectAllCCFromProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            self._sushi.cc_connections = {k: v for k, v in self._sushi.cc_connections.items() if k[0] != request.id}
+        return self._void
+
+    def DisconnectAllPCFromProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            self._sushi.pc_connections = {c for c in self._sushi.pc_connections if c[0] != request.id}
+        return self._void
+
+
+class _AudioRoutingService(_Service):
+    NAME = "AudioRoutingController"
+
+    def _connection(self, request, engine_channels: int, context) -> tuple:
+        track = self._sushi._get_track(request.track.id, context)
+        if not 0 <= request.track_channel < track.channels:
+            context.abort(grpc.StatusCode.OUT_OF_RANGE, "No track channel {}".format(request.track_channel))
+        if not 0 <= request.engine_channel < engine_channels:
+            context.abort(grpc.StatusCode.OUT_OF_RANGE, "No engine channel {}".format(request.engine_channel))
+        return request.track.id, request.track_channel, request.engine_channel
+
+    def _list(self, connections, track_id: int | None = None):
+        return self._proto.AudioConnectionList(connections=[
+            self._proto.AudioConnection(track=self._proto.TrackIdentifier(id=t), track_channel=tc, engine_channel=e)
+            for t, tc, e in sorted(connections) if track_id in (None, t)])
+
+    def GetAllInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._list(self._sushi.input_connections)
+
+    def GetAllOutputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._list(self._sushi.output_connections)
+
+    def GetInputConnectionsForTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+            return self._list(self._sushi.input_connections, request.id)
+
+    def GetOutputConnectionsForTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+            return self._list(self._sushi.output_connections, request.id)
+
+    def ConnectInputChannelToTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi.input_connections.add(self._connection(request, self._sushi.audio_inputs, context))
+        return self._void
+
+    def ConnectOutputChannelFromTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi.output_connections.add(self._connection(request, self._sushi.audio_outputs, context))
+        return self._void
+
+    def DisconnectInput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.input_connections.discard(self._connection(request, self._sushi.audio_inputs, context))
+        return self._void
+
+    def DisconnectOutput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.output_connections.discard(self._connection(request, self._sushi.audio_outputs, context))
+        return self._void
+
+    def DisconnectAllInputsFromTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+            self._sushi.input_connections = {c for c in self._sushi.input_connections if c[0] != request.id}
+        return self._void
+
+    def DisconnectAllOutputsFromTrack(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_track(request.id, context)
+            self._sushi.output_connections = {c for c in self._sushi.output_connections if c[0] != request.id}
+        return self._void
+
+    DisconnectAllOutputFromTrack = DisconnectAllOutputsFromTrack
+
+
+class _CvGateService(_Service):
+    NAME = "CvGateController"
+
+    def _cv(self, request, ports: int, context) -> tuple:
+        identifier = request.parameter
+        self._sushi._get_parameter(identifier.processor_id, identifier.parameter_id, context)
+        if not 0 <= request.cv_port_id < ports:
+            context.abort(grpc.StatusCode.OUT_OF_RANGE, "No cv port {}".format(request.cv_port_id))
+        return identifier.processor_id, identifier.parameter_id, request.cv_port_id
+
+    def _gate(self, request, context) -> tuple:
+        self._sushi._get_processor(request.processor.id, context)
+        return request.processor.id, request.gate_port_id, request.channel, request.note_no
+
+    def _cv_list(self, connections, processor_id: int | None = None):
+        return self._proto.CvConnectionList(connections=[
+            self._proto.CvConnection(parameter=self._proto.ParameterIdentifier(processor_id=p, parameter_id=i),
+                                     cv_port_id=port)
+            for p, i, port in sorted(connections) if processor_id in (None, p)])
+
+    def _gate_list(self, connections, processor_id: int | None = None):
+        return self._proto.GateConnectionList(connections=[
+            self._proto.GateConnection(processor=self._proto.ProcessorIdentifier(id=p), gate_port_id=port,
+                                       channel=channel, note_no=note)
+            for p, port, channel, note in sorted(connections) if processor_id in (None, p)])
+
+    def GetCvInputChannelCount(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.cv_inputs)
+
+    def GetCvOutputChannelCount(self, request, context):
+        return self._proto.GenericIntValue(value=self._sushi.cv_outputs)
+
+    def GetAllCvInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._cv_list(self._sushi.cv_input_connections)
+
+    def GetAllCvOutputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._cv_list(self._sushi.cv_output_connections)
+
+    def GetAllGateInputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._gate_list(self._sushi.gate_input_connections)
+
+    def GetAllGateOutputConnections(self, request, context):
+        with self._sushi._lock:
+            return self._gate_list(self._sushi.gate_output_connections)
+
+    def GetCvInputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._cv_list(self._sushi.cv_input_connections, request.id)
+
+    def GetCvOutputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._cv_list(self._sushi.cv_output_connections, request.id)
+
+    def GetGateInputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._gate_list(self._sushi.gate_input_connections, request.id)
+
+    def GetGateOutputConnectionsForProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            return self._gate_list(self._sushi.gate_output_connections, request.id)
+
+    def ConnectCvInputToParameter(self, request, context):
+        with self._sushi._lock:
+            self._sushi.cv_input_connections.add(self._cv(request, self._sushi.cv_inputs, context))
+        return self._void
+
+    def ConnectCvOutputFromParameter(self, request, context):
+        with self._sushi._lock:
+            self._sushi.cv_output_connections.add(self._cv(request, self._sushi.cv_outputs, context))
+        return self._void
+
+    def ConnectGateInputToProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi.gate_input_connections.add(self._gate(request, context))
+        return self._void
+
+    def ConnectGateOutputFromProcessor(self, request, context):
+        with self._sushi._lock:
+            self._sushi.gate_output_connections.add(self._gate(request, context))
+        return self._void
+
+    def DisconnectCvInput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.cv_input_connections.discard(self._cv(request, self._sushi.cv_inputs, context))
+        return self._void
+
+    def DisconnectCvOutput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.cv_output_connections.discard(self._cv(request, self._sushi.cv_outputs, context))
+        return self._void
+
+    def DisconnectGateInput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.gate_input_connections.discard(self._gate(request, context))
+        return self._void
+
+    def DisconnectGateOutput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.gate_output_connections.discard(self._gate(request, context))
+        return self._void
+
+    def _disconnect_all(self, name: str, request, context):
+        with self._sushi._lock:
+            self._sushi._get_processor(request.id, context)
+            connections = getattr(self._sushi, name)
+            connections -= {c for c in connections if c[0] == request.id}
+        return self._void
+
+    def DisconnectAllCvInputsFromProcessor(self, request, context):
+        return self._disconnect_all("cv_input_connections", request, context)
+
+    def DisconnectAllCvOutputsFromProcessor(self, request, context):
+        return self._disconnect_all("cv_output_connections", request, context)
+
+    def DisconnectAllGateInputsFromProcessor(self, request, context):
+        return self._disconnect_all("gate_input_connections", request, context)
+
+    def DisconnectAllGateOutputsFromProcessor(self, request, context):
+        return self._disconnect_all("gate_output_connections", request, context)
+
+
+class _OscService(_Service):
+    NAME = "OscController"
+
+    SEND_IP = "127.0.0.1"
+    SEND_PORT = 24023
+    RECEIVE_PORT = 24024
+
+    def GetSendIP(self, request, context):
+        return self._proto.GenericStringValue(value=self.SEND_IP)
+
+    def GetSendPort(self, request, context):
+        return self._proto.GenericIntValue(value=self.SEND_PORT)
+
+    def GetReceivePort(self, request, context):
+        return self._proto.GenericIntValue(value=self.RECEIVE_PORT)
+
+    def GetEnabledParameterOutputs(self, request, context):
+        with self._sushi._lock:
+            processors = self._sushi._all_processors()
+            if self._sushi.osc_all_outputs:
+                outputs = [(p.id, i.id) for p in processors.values() for i in p.parameters]
+            else:
+                outputs = sorted(self._sushi.osc_outputs)
+            return self._proto.OscParameterOutputList(
+                path=["/parameter/{}/{}".format(processors[p].name, processors[p].parameters[i].spec.name)
+                      for p, i in outputs])
+
+    def EnableOutputForParameter(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_parameter(request.processor_id, request.parameter_id, context)
+            self._sushi.osc_outputs.add((request.processor_id, request.parameter_id))
+        return self._void
+
+    def DisableOutputForParameter(self, request, context):
+        with self._sushi._lock:
+            self._sushi._get_parameter(request.processor_id, request.parameter_id, context)
+            self._sushi.osc_outputs.discard((request.processor_id, request.parameter_id))
+        return self._void
+
+    def EnableAllOutput(self, request, context):
+        self._sushi.osc_all_outputs = True
+        return self._void
+
+    def DisableAllOutput(self, request, context):
+        with self._sushi._lock:
+            self._sushi.osc_all_outputs = False
+            self._sushi.osc_outputs.clear()
+        return self._void
+
+
+class _SessionService(_Service):
+    NAME = "SessionController"
+
+    def SaveSession(self, request, context):
+        with self._sushi._lock:
+            return _save_session(self._sushi, self._proto)
+
+    def RestoreSession(self, request, context):
+        with self._sushi._lock:
+            _restore_session(self._sushi, self._proto, request, context)
+        return self._void
+
+
+class _NotificationService(_Service):
+    NAME = "NotificationController"
+
+    def SubscribeToTransportChanges(self, request, context):
+        yield from self._sushi._stream("transport", context)
+
+    def SubscribeToTrackChanges(self, request, context):
+        yield from self._sushi._stream("track", context)
+
+    def SubscribeToProcessorChanges(self, request, context):
+        yield from self._sushi._stream("processor", context)
+
+    def SubscribeToParameterUpdates(self, request, context):
+        blocked = {(p.processor_id, p.parameter_id) for p in request.parameters}
+        yield from self._sushi._stream(
+            "parameter", context,
+            lambda n: (n.parameter.processor_id, n.parameter.parameter_id) not in blocked)
+
+    def SubscribeToPropertyUpdates(self, request, context):
+        blocked = {(p.processor_id, p.property_id) for p in request.properties}
+        yield from self._sushi._stream(
+            "property", context,
+            lambda n: (n.property.processor_id, n.property.property_id) not in blocked)
+
+    def SubscribeToAsyncCommandUpdates(self, request, context):
+        yield from self._sushi._stream("async_command", context)
+
+    def SubscribeToEngineCpuTimingUpdates(self, request, context):
+        # Sends cpu_timings periodically, and the timings published in between
+        q = self._sushi._notifications.subscribe("timing")
+        context.send_initial_metadata(())
+        next_update = time.monotonic() + self._sushi.timing_update_interval
+        try:
+            while context.is_active() and not self._sushi._stopping.is_set():
+                try:
+                    yield q.get(timeout=min(0.05, max(0.0, next_update - time.monotonic())))
+                except queue.Empty:
+                    if time.monotonic() >= next_update:
+                        next_update += self._sushi.timing_update_interval
+                        average, minimum, maximum = self._sushi.cpu_timings
+                        yield self._proto.CpuTimings(average=average, min=minimum, max=maximum)
+        finally:
+            self._sushi._notifications.unsubscribe("timing", q)
+
+
+##################
+# State handling #
+##################
+
+
+def _processor_state(sushi_proto, processor: _Processor):
+    state = sushi_proto.ProcessorState()
+    if processor.programs:
+        state.program_id.has_value = True
+        state.program_id.value = processor.program
+    state.bypassed.has_value = True
+    state.bypassed.value = processor.bypassed
+    for parameter in processor.parameters:
+        value = state.parameters.add(value=parameter.value)
+        value.parameter.processor_id = processor.id
+        value.parameter.parameter_id = parameter.id
+    for property_id, prop in processor.properties.items():
+        value = state.properties.add(value=prop[1])
+        value.property.processor_id = processor.id
+        value.property.property_id = property_id
+    return state
+
+
+def _apply_state(sushi: FakeSushi, processor: _Processor, state) -> None:
+    if state.program_id.has_value and 0 <= state.program_id.value < len(processor.programs):
+        processor.program = state.program_id.value
+    if state.bypassed.has_value:
+        processor.bypassed = state.bypassed.value
+    for value in state.parameters:
+        parameter_id = value.parameter.parameter_id
+        if 0 <= parameter_id < len(processor.parameters):
+            sushi._set_parameter(processor.id, processor.parameters[parameter_id], value.value)
+    for value in state.properties:
+        if value.property.property_id in processor.properties:
+            sushi._set_property(processor.id, value.property.property_id, value.value)
+
+
+def _save_session(sushi: FakeSushi, sushi_proto):
+    session = sushi_proto.SessionState(save_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    session.sushi_info.CopyFrom(_SystemService(sushi, sushi_proto)._build_info())
+    track_names = {t.id: t.name for t in sushi.tracks.values()}
+    names = {p.id: p.name for p in sushi._all_processors().values()}
+
+    engine = session.engine_state
+    engine.sample_rate = sushi.sample_rate
+    engine.tempo = sushi.tempo
+    engine.playing_mode.mode = sushi.playing_mode
+    engine.sync_mode.mode = sushi.sync_mode
+    engine.time_signature.numerator, engine.time_signature.denominator = sushi.time_signature
+    engine.used_audio_inputs = sushi.audio_inputs
+    engine.used_audio_outputs = sushi.audio_outputs
+    for connections, field in ((sushi.input_connections, engine.input_connections),
+                               (sushi.output_connections, engine.output_connections)):
+        for track_id, track_channel, engine_channel in sorted(connections):
+            field.add(track=track_names[track_id], track_channel=track_channel, engine_channel=engine_channel)
+
+    midi = session.midi_state
+    midi.inputs = sushi.midi_inputs
+    midi.outputs = sushi.midi_outputs
+    for connections, field in ((sushi.kbd_input_connections, midi.kbd_input_connections),
+                               (sushi.kbd_output_connections, midi.kbd_output_connections)):
+        for track_id, channel, port, raw_midi in sorted(connections):
+            field.add(track=track_names[track_id], channel=sushi_proto.MidiChannel(channel=channel), port=port,
+                      raw_midi=raw_midi)
+    for (processor_id, parameter_id, channel, port, cc_number), (min_range, max_range, relative) in \
+            sorted(sushi.cc_connections.items()):
+        midi.cc_connections.add(processor=names[processor_id],
+                                parameter=sushi_proto.ParameterIdentifier(processor_id=processor_id,
+                                                                          parameter_id=parameter_id),
+                                channel=sushi_proto.MidiChannel(channel=channel), port=port, cc_number=cc_number,
+                                min_range=min_range, max_range=max_range, relative_mode=relative)
+    for processor_id, channel, port in sorted(sushi.pc_connections):
+        midi.pc_connections.add(processor=names[processor_id], channel=sushi_proto.MidiChannel(channel=channel),
+                                port=port)
+    midi.enabled_clock_outputs.extend(sorted(sushi.clock_outputs))
+
+    session.osc_state.enable_all_processor_outputs = sushi.osc_all_outputs
+    osc_outputs = {}
+    for processor_id, parameter_id in sorted(sushi.osc_outputs):
+        osc_outputs.setdefault(names[processor_id], []).append(parameter_id)
+    for name, parameter_ids in osc_outputs.items():
+        session.osc_state.enabled_processor_outputs.add(processor=name, parameter_ids=parameter_ids)
+
+    for track in sushi.tracks.values():
+        track_state = session.tracks.add(name=track.name, label=track.label, channels=track.channels,
+                                         buses=track.buses, thread=track.thread,
+                                         type=sushi_proto.TrackType(type=track.track_type))
+        track_state.track_state.CopyFrom(_processor_state(sushi_proto, track))
+        for processor_id in track.processors:
+            processor = sushi.processors[processor_id]
+            track_state.processors.add(name=processor.name, label=processor.label, uid=processor.uid,
+                                       path=processor.path, type=sushi_proto.PluginType(type=processor.type),
+                                       state=_processor_state(sushi_proto, processor))
+    return session
+
+
+def _restore_session(sushi: FakeSushi, sushi_proto, session, context) -> None:
+    for track_id in list(sushi.tracks):
+        sushi._delete_track(track_id)
+
+    engine = session.engine_state
+    if engine.tempo > 0:
+        sushi.tempo = engine.tempo
+    if engine.playing_mode.mode:
+        sushi.playing_mode = info_types.PlayingMode(engine.playing_mode.mode)
+    if engine.sync_mode.mode:
+        sushi.sync_mode = info_types.SyncMode(engine.sync_mode.mode)
+    if engine.time_signature.denominator:
+        sushi.time_signature = (engine.time_signature.numerator, engine.time_signature.denominator)
+
+    tracks = {}
+    processors = {}
+    for track_state in session.tracks:
+        track = sushi._add_track(track_state.name, track_state.channels, track_state.buses, track_state.thread,
+                                 track_state.type.type or info_types.TrackType.REGULAR, context)
+        _apply_state(sushi, track, track_state.track_state)
+        tracks[track.name] = track.id
+        for plugin in track_state.processors:
+            processor = sushi._add_processor(plugin.name, plugin.uid, plugin.path, plugin.type.type, track, True, 0,
+                                             context)
+            _apply_state(sushi, processor, plugin.state)
+            processors[processor.name] = processor.id
+    processors.update(tracks)
+
+    for field, connections in ((engine.input_connections, sushi.input_connections),
+                               (engine.output_connections, sushi.output_connections)):
+        connections.update((tracks[c.track], c.track_channel, c.engine_channel) for c in field if c.track in tracks)
+
+    midi = session.midi_state
+    for field, connections in ((midi.kbd_input_connections, sushi.kbd_input_connections),
+                               (midi.kbd_output_connections, sushi.kbd_output_connections)):
+        connections.update((tracks[c.track], c.channel.channel, c.port, c.raw_midi) for c in field
+                           if c.track in tracks)
+    for c in midi.cc_connections:
+        if c.processor in processors:
+            key = (processors[c.processor], c.parameter.parameter_id, c.channel.channel, c.port, c.cc_number)
+            sushi.cc_connections[key] = (c.min_range, c.max_range, c.relative_mode)
+    sushi.pc_connections.update((processors[c.processor], c.channel.channel, c.port) for c in midi.pc_connections
+                                if c.processor in processors)
+    sushi.clock_outputs = set(midi.enabled_clock_outputs)
+
+    sushi.osc_all_outputs = session.osc_state.enable_all_processor_outputs
+    for output in session.osc_state.enabled_processor_outputs:
+        if output.processor in processors:
+            sushi.osc_outputs.update((processors[output.processor], i) for i in output.parameter_ids)
@@ -0,0 +1,329 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, TYPE_CHECKING
+
+from . import sushi_info_types as info_types
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+
+def _default_cache_path() -> str:
+    # Per user, as the file is loaded with marshal, which mustn't be given data written by others
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "elkpy", "graph-metadata")
+
+
+DEFAULT_CACHE_PATH = _default_cache_path()
+
+MAGIC = b"ELKGMETA"
+FORMAT_VERSION = 1
+
+# Magic, format version, sha256 fingerprint of the graph
+_HEADER = struct.Struct("<8sI32s")
+
+
+class ProcessorMetadata(object):
+    """
+    The static description of a processor needed to control it by name: its ids, and the ids of its parameters and
+    programs.
+
+    Attributes:
+        name (str): The name of the processor.
+        id (int): The id of the processor.
+        label (str): The label of the processor.
+        track_id (int): The id of the track the processor is on, or -1 if unknown.
+        parameter_count (int): The number of parameters of the processor.
+        program_count (int): The number of programs of the processor.
+        parameters (dict[str, int]): A mapping from parameter name to parameter id.
+        programs (dict[str, int]): A mapping from program name to program id.
+    """
+    __slots__ = ("name", "id", "label", "track_id", "parameter_count", "program_count", "parameters", "programs")
+
+    def __init__(self,
+                 name: str,
+                 id: int,
+                 label: str = "",
+                 track_id: int = -1,
+                 parameter_count: int = 0,
+                 program_count: int = 0,
+                 parameters: dict[str, int] | None = None,
+                 programs: dict[str, int] | None = None):
+        self.name = name
+        self.id = id
+        self.label = label
+        self.track_id = track_id
+        self.parameter_count = parameter_count
+        self.program_count = program_count
+        self.parameters = parameters or {}
+        self.programs = programs or {}
+
+    def to_tuple(self) -> tuple:
+        """
+        Returns:
+            tuple: The metadata as a tuple of plain values, which from_tuple() turns back into metadata.
+        """
+        return (self.name, self.id, self.label, self.track_id, self.parameter_count, self.program_count,
+                self.parameters, self.programs)
+
+    @classmethod
+    def from_tuple(cls, values: tuple) -> "ProcessorMetadata":
+        return cls(*values)
+
+    def __eq__(self, other):
+        return isinstance(other, ProcessorMetadata) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        return "ProcessorMetadata(name={!r}, id={}, track_id={})".format(self.name, self.id, self.track_id)
+
+
+def fetch_graph_metadata(controller: "SushiController",
+                         names: Iterable[str] | None = None,
+                         known: dict[str, ProcessorMetadata] | None = None,
+                         max_workers: int = 8,
+                         processor_infos: list[info_types.ProcessorInfo] | None = None,
+                         track_ids: dict[int, int] | None = None) -> dict[str, ProcessorMetadata]:
+    """
+    Read the metadata of all processors, or of some of them, with one get_all_processors() call and concurrent
+    reads of their parameters, programs and tracks.
+
+    Parameters:
+        controller (SushiController): The controller of the sushi instance.
+        names (Iterable[str] | None): The names of the processors to read, or None for all of them.
+        known (dict[str, ProcessorMetadata] | None): Metadata read before, e.g. from a cache. It is used as is for
+            the processors it has that still have the same id, and no rpc is sent for them.
+        max_workers (int): The maximum number of rpcs sent at the same time.
+        processor_infos (list[ProcessorInfo] | None): The result of get_all_processors(), if already read.
+        track_ids (dict[int, int] | None): The result of read_track_ids(), if already read.
+
+    Returns:
+        dict[str, ProcessorMetadata]: The metadata, keyed by processor name.
+    """
+    if processor_infos is None:
+        processor_infos = controller.audio_graph.get_all_processors()
+    processors = {p.name: p for p in processor_infos}
+    if names is not None:
+        names = list(names)
+        missing = [n for n in names if n not in processors]
+        if missing:
+            raise KeyError("No processors named {}".format(", ".join(missing)))
+        processors = {n: processors[n] for n in names}
+
+    known = known or {}
+    metadata = {name: known[name] for name, info in processors.items()
+                if name in known and known[name].id == info.id}
+    to_read = [info for name, info in processors.items() if name not in metadata]
+    if not to_read:
+        return metadata
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tracks = pool.submit(controller.audio_graph.get_all_tracks) if track_ids is None else None
+        parameters = [pool.submit(controller.parameters.get_processor_parameters, p.id) for p in to_read]
+        programs = [pool.submit(controller.programs.get_processor_programs, p.id) if p.program_count > 0 else None
+                    for p in to_read]
+        if track_ids is None:
+            track_ids = _read_track_ids(controller, pool, tracks.result())
+        for info, parameter_infos, program_infos in zip(to_read, parameters, programs):
+            metadata[info.name] = _metadata(info, track_ids.get(info.id, -1), parameter_infos.result(),
+                                            program_infos.result() if program_infos is not None else [])
+    return metadata
+
+
+def read_track_ids(controller: "SushiController", max_workers: int = 8) -> dict[int, int]:
+    """
+    Read which track each processor is on, with one get_all_tracks() call and concurrent reads of their processors.
+
+    Parameters:
+        controller (SushiController): The controller of the sushi instance.
+        max_workers (int): The maximum number of rpcs sent at the same time.
+
+    Returns:
+        dict[int, int]: The track id of each processor on a track, keyed by processor id.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return _read_track_ids(controller, pool, controller.audio_graph.get_all_tracks())
+
+
+def _read_track_ids(controller: "SushiController",
+                    pool: ThreadPoolExecutor,
+                    tracks: list[info_types.TrackInfo]) -> dict[int, int]:
+    track_processors = [pool.submit(controller.audio_graph.get_track_processors, t.id) for t in tracks]
+    track_ids = {}
+    for track, processors in zip(tracks, track_processors):
+        for processor in processors.result():
+            track_ids[processor.id] = track.id
+    return track_ids
+
+
+def _metadata(info: info_types.ProcessorInfo,
+              track_id: int,
+              parameter_infos: list[info_types.ParameterInfo],
+              program_infos: list[info_types.ProgramInfo]) -> ProcessorMetadata:
+    return ProcessorMetadata(info.name, info.id, info.label, track_id, info.parameter_count, info.program_count,
+                             {p.name: p.id for p in parameter_infos}, {p.name: p.id for p in program_infos})
+
+
+def graph_fingerprint(processor_infos: Iterable[info_types.ProcessorInfo], track_ids: dict[int, int]) -> bytes:
+    """
+    Compute a fingerprint of the processors of a graph, changing whenever a processor is added, deleted, renamed,
+    replaced or moved to another track, as sushi never reuses processor ids.
+
+    Parameters:
+        processor_infos (Iterable[ProcessorInfo]): The result of get_all_processors().
+        track_ids (dict[int, int]): The result of read_track_ids().
+
+    Returns:
+        bytes: The sha256 digest.
+    """
+    key = sorted((p.id, p.name, p.label, p.parameter_count, p.program_count, track_ids.get(p.id, -1))
+                 for p in processor_infos)
+    return hashlib.sha256(marshal.dumps(key)).digest()
+
+
+#############################
+# Warm-start metadata cache #
+#############################
+
+
+class GraphMetadataCache(object):
+    """
+    A file keeping the metadata of all processors between runs, so a restarted process can skip reading it.
+
+    The file holds a fingerprint of the graph it was read from, see graph_fingerprint(), and the metadata in the
+    marshal format. fetch() compares the fingerprint with the live graph, read with get_all_processors() and the
+    processor lists of the tracks, and only maps and loads the metadata if they match. Otherwise the metadata is read
+    from sushi and the file replaced.
+
+    The fingerprint doesn't cover the names of parameters and programs, which don't change for a given processor.
+    As marshal isn't safe against malicious data, files owned by another user or writable by others are ignored.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        The constructor for the GraphMetadataCache class.
+
+        Parameters:
+            path (str): The path of the file. Its directory is created, only accessible to the user, if missing.
+        """
+        self.path = path
+
+    def fetch(self,
+              controller: "SushiController",
+              names: Iterable[str] | None = None,
+              max_workers: int = 8) -> dict[str, ProcessorMetadata]:
+        """
+        Get the metadata of all processors, or some of them, from the file if it matches the graph of sushi, and
+        from sushi otherwise.
+
+        Parameters:
+            controller (SushiController): The controller of the sushi instance.
+            names (Iterable[str] | None): The names of the processors, or None for all of them.
+            max_workers (int): The maximum number of rpcs sent at the same time if reading from sushi.
+
+        Returns:
+            dict[str, ProcessorMetadata]: The metadata, keyed by processor name.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            processor_infos = pool.submit(controller.audio_graph.get_all_processors)
+            track_ids = _read_track_ids(controller, pool, controller.audio_graph.get_all_tracks())
+            processor_infos = processor_infos.result()
+        fingerprint = graph_fingerprint(processor_infos, track_ids)
+        metadata = self.load(fingerprint)
+        if metadata is None:
+            metadata = fetch_graph_metadata(controller, max_workers=max_workers, processor_infos=processor_infos,
+                                            track_ids=track_ids)
+            self.save(fingerprint, metadata)
+        if names is None:
+            return metadata
+        names = list(names)
+        missing = [n for n in names if n not in metadata]
+        if missing:
+            raise KeyError("No processors named {}".format(", ".join(missing)))
+        return {n: metadata[n] for n in names}
+
+    def load(self, fingerprint: bytes) -> dict[str, ProcessorMetadata] | None:
+        """
+        Load the metadata from the file.
+
+        Parameters:
+            fingerprint (bytes): The fingerprint of the live graph.
+
+        Returns:
+            dict[str, ProcessorMetadata] | None: The metadata, or None if the file is missing, unreadable, for
+                another graph, or could have been written by another user.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                if not _is_private(os.fstat(f.fileno())):
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with mapped:
+                if len(mapped) < _HEADER.size:
+                    return None
+                magic, version, file_fingerprint = _HEADER.unpack_from(mapped)
+                if magic != MAGIC or version != FORMAT_VERSION or file_fingerprint != fingerprint:
+                    return None
+                with memoryview(mapped) as view:
+                    entries = marshal.loads(view[_HEADER.size:])
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        return {e[0]: ProcessorMetadata.from_tuple(e) for e in entries}
+
+    def save(self, fingerprint: bytes, metadata: dict[str, ProcessorMetadata]) -> None:
+        """
+        Replace the file.
+
+        Parameters:
+            fingerprint (bytes): The fingerprint of the graph the metadata was read from.
+            metadata (dict[str, ProcessorMetadata]): The metadata of all its processors.
+        """
+        data = _HEADER.pack(MAGIC, FORMAT_VERSION, fingerprint) + \
+            marshal.dumps([m.to_tuple() for m in metadata.values()])
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+        # Write to a temporary file first so a process reading it never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def clear(self) -> None:
+        """
+        Remove the file, if it exists.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_private(stat: os.stat_result) -> bool:
+    if not hasattr(os, "getuid"):
+        return True
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
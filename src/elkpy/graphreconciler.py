@@ -0,0 +1,247 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import sushi_info_types as info_types
+from .sessiondiff import GraphModel, GraphPlan, PlanExecutor, ProcessorModel, TrackModel, diff_graphs
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+PLUGIN_TYPES = {"internal": info_types.PluginType.INTERNAL,
+                "vst2x": info_types.PluginType.VST2X,
+                "vst3x": info_types.PluginType.VST3X,
+                "lv2": info_types.PluginType.LV2}
+
+SYNC_MODES = {"internal": info_types.SyncMode.INTERNAL,
+              "midi": info_types.SyncMode.MIDI,
+              "ableton_link": info_types.SyncMode.LINK,
+              "link": info_types.SyncMode.LINK}
+
+MIDI_CHANNEL_OMNI = 17
+
+
+##########################
+# Sushi json config file #
+##########################
+
+
+def load_config(path: str) -> dict:
+    """
+    Read a sushi json config file.
+
+    Parameters:
+        path (str): The path to the file.
+
+    Returns:
+        dict: The config.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def graph_from_config(config: dict) -> GraphModel:
+    """
+    Build a graph model from a sushi json config. Parameters, properties and cc mappings keep referring to
+    parameters and properties by name.
+
+    Parameters:
+        config (dict): The config, e.g. from load_config().
+
+    Returns:
+        GraphModel: The model.
+    """
+    model = GraphModel()
+
+    for key, track_type in (("pre_track", info_types.TrackType.PRE), ("post_track", info_types.TrackType.POST)):
+        if key in config:
+            track = config[key]
+            model.add_track(TrackModel(track.get("name", key.split("_")[0]), track_type=track_type,
+                                       processors=_plugins(track)))
+
+    for track in config.get("tracks", []):
+        if track.get("multibus", False):
+            buses = track["buses"]
+            channels = 2 * buses
+        else:
+            buses = 1
+            channels = track.get("channels", 1 if track.get("mode") == "mono" else 2)
+        model.add_track(TrackModel(track["name"], channels, buses, processors=_plugins(track)))
+
+        for connection in track.get("inputs", []):
+            model.audio_inputs.update(_audio_connections(track["name"], connection))
+        for connection in track.get("outputs", []):
+            model.audio_outputs.update(_audio_connections(track["name"], connection))
+
+    midi = config.get("midi", {})
+    model.kbd_inputs = {(c["track"], _midi_channel(c["channel"]), c["port"], c.get("raw_midi", False))
+                        for c in midi.get("track_connections", [])}
+    model.kbd_outputs = {(c["track"], _midi_channel(c["channel"]), c["port"], c.get("raw_midi", False))
+                         for c in midi.get("track_out_connections", [])}
+    model.pc_connections = {(c["plugin"], _midi_channel(c["channel"]), c["port"])
+                            for c in midi.get("program_change_connections", [])}
+    model.cc_connections = {(c["plugin_name"], c["parameter_name"], _midi_channel(c["channel"]), c["port"],
+                             c["cc_number"], float(c.get("min_range", 0.0)), float(c.get("max_range", 1.0)),
+                             c.get("mode", "absolute") == "relative")
+                            for c in midi.get("cc_mappings", [])}
+    model.clock_outputs = set(midi.get("clock_output", {}).get("enabled_ports", []))
+
+    host = config.get("host_config", {})
+    if "tempo" in host:
+        model.tempo = float(host["tempo"])
+    if "time_signature" in host:
+        model.time_signature = (host["time_signature"]["numerator"], host["time_signature"]["denominator"])
+    if "tempo_sync" in host:
+        model.sync_mode = SYNC_MODES[host["tempo_sync"]]
+
+    processors = model.processors()
+    for entry in config.get("initial_state", []):
+        name = entry["processor"]
+        if name in model.tracks:
+            state = model.tracks[name].state
+        elif name in processors:
+            state = processors[name][1].state
+        else:
+            raise ValueError("initial_state refers to unknown processor {}".format(name))
+        if "bypassed" in entry:
+            state.bypassed = entry["bypassed"]
+        if "program" in entry:
+            state.program_id = entry["program"]
+        state.parameters = [(k, float(v)) for k, v in entry.get("parameters", {}).items()]
+        state.properties = [(k, str(v)) for k, v in entry.get("properties", {}).items()]
+
+    return model
+
+
+def _plugins(track: dict) -> list:
+    return [ProcessorModel(p["name"], p.get("uid", ""), p.get("path", p.get("uri", "")), PLUGIN_TYPES[p["type"]])
+            for p in track.get("plugins", [])]
+
+
+def _audio_connections(track: str, connection: dict) -> list:
+    # A bus is a stereo pair of channels
+    if "engine_bus" in connection:
+        return [(track, 2 * connection["track_bus"] + i, 2 * connection["engine_bus"] + i) for i in range(2)]
+    return [(track, connection["track_channel"], connection["engine_channel"])]
+
+
+def _midi_channel(channel) -> int:
+    if channel in ("all", "omni"):
+        return MIDI_CHANNEL_OMNI
+    return int(channel) + 1
+
+
+####################
+# Graph reconciler #
+####################
+
+
+class GraphReconciler(object):
+    """
+    A class bringing the audio graph of sushi in line with a declarative sushi json config.
+
+    The current graph is fetched once, and the plan creating, deleting, moving and reconnecting what differs is
+    executed stage by stage, with the independent operations of each stage sent concurrently and all creations of a
+    stage awaited together.
+    """
+
+    def __init__(self, controller: "SushiController", sushi_proto, timeout: float = 10.0, max_workers: int = 8):
+        """
+        The constructor for the GraphReconciler class.
+
+        Parameters:
+            controller (SushiController): The controller of the sushi instance to reconcile.
+            sushi_proto (ModuleType): The generated protobuf module, see grpc_gen.modules_from_proto().
+            timeout (float): The maximum time in seconds to wait for the objects created by each stage.
+            max_workers (int): The maximum number of rpcs sent at the same time.
+        """
+        self._controller = controller
+        self._sushi_proto = sushi_proto
+        self._max_workers = max_workers
+        self._executor = PlanExecutor(controller, timeout, max_workers)
+
+    def plan(self, config: dict) -> GraphPlan:
+        """
+        Compute the plan turning the current graph into the one described by a config.
+
+        Parameters:
+            config (dict): The config, e.g. from load_config().
+
+        Returns:
+            GraphPlan: The plan.
+        """
+        live = GraphModel.from_binary_session(self._controller.session.save_binary_session(), self._sushi_proto)
+        target = graph_from_config(config)
+        self._executor.refresh_ids()
+        self._resolve_names(live, target)
+        return diff_graphs(live, target)
+
+    def reconcile(self, config: dict, dry_run: bool = False) -> GraphPlan:
+        """
+        Apply a config.
+
+        Parameters:
+            config (dict): The config, e.g. from load_config().
+            dry_run (bool): Only print the plan, with the estimated rpc count, without executing it.
+
+        Returns:
+            GraphPlan: The plan.
+        """
+        plan = self.plan(config)
+        if dry_run:
+            print(plan)
+        elif not plan.is_empty():
+            self._executor.execute(plan, refresh_ids=False)
+        return plan
+
+    def _resolve_names(self, live: GraphModel, target: GraphModel) -> None:
+        """
+        Replace parameter and property names by ids for the targets that already exist, so they can be compared with
+        the live graph. Names of processors that will be created are resolved when the plan is executed.
+        """
+        live_processors = live.processors()
+        states = {name: track.state for name, track in target.tracks.items() if name in live.tracks}
+        states.update({name: processor.state for name, (_, processor) in target.processors().items()
+                       if name in live_processors})
+        cc_processors = {c[0] for c in target.cc_connections if c[0] in states}
+
+        needs_parameters = [name for name, state in states.items() if state.parameters or name in cc_processors]
+        needs_properties = [name for name, state in states.items() if state.properties]
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            parameters = dict(zip(needs_parameters, pool.map(self._parameter_ids, needs_parameters)))
+            properties = dict(zip(needs_properties, pool.map(self._property_ids, needs_properties)))
+
+        for name, state in states.items():
+            if name in parameters:
+                state.parameters = [(parameters[name][k], v) for k, v in state.parameters]
+            if name in properties:
+                state.properties = [(properties[name][k], v) for k, v in state.properties]
+        target.cc_connections = {(c[0], parameters[c[0]][c[1]]) + c[2:] if c[0] in parameters else c
+                                 for c in target.cc_connections}
+
+    def _parameter_ids(self, name: str) -> dict:
+        infos = self._controller.parameters.get_processor_parameters(self._executor.get_processor_id(name))
+        return {p.name: p.id for p in infos}
+
+    def _property_ids(self, name: str) -> dict:
+        infos = self._controller.parameters.get_processor_properties(self._executor.get_processor_id(name))
+        return {p.name: p.id for p in infos}
@@ -17,17 +17,28 @@ __copyright__ = """
 __license__ = "GPL-3.0"
 
 import __main__
+import hashlib
 import os
 import sys
 import importlib
-import grpc_tools.protoc as gprotoc
+import threading
 from types import ModuleType
 from typing import Tuple 
 
+from .stubs import registry
+
+# grpc_tools is only imported when a .proto file actually needs compiling, as importing it is slow
+
+# Generated modules by absolute .proto path, so that protoc runs once per process and not once per controller
+_modules: dict[str, Tuple[ModuleType, ModuleType]] = {}
+_modules_lock = threading.Lock()
+
 
 def modules_from_proto(proto_filename: str) -> Tuple[ModuleType, ModuleType]:
     """
     Run protoc compiler and get generated modules.
+    If the .proto file is one of a known sushi version, the modules bundled with elkpy are used instead. Otherwise,
+    the compiler is not run if the generated modules were compiled from a .proto file with the same content.
 
     Parameters:
         proto_filename : path to .proto file with service definition
@@ -36,6 +47,31 @@ def modules_from_proto(proto_filename: str) -> Tuple[ModuleType, ModuleType]:
         (protobuf_module, grpc_module)
     """
     full_path = os.path.abspath(proto_filename)
+    with _modules_lock:
+        if full_path not in _modules:
+            _modules[full_path] = _bundled_modules(full_path) or _compile_proto(full_path)
+        return _modules[full_path]
+
+
+def _bundled_modules(full_path: str) -> Tuple[ModuleType, ModuleType] | None:
+    if not registry.BUNDLED_STUBS:
+        return None
+    try:
+        api_version = registry.BUNDLED_STUBS.get(_file_digest(full_path))
+    except OSError:
+        return None
+    if api_version is None:
+        return None
+    package = "{}.stubs.{}".format(__package__, stub_package_name(api_version))
+    try:
+        return (importlib.import_module(package + ".sushi_rpc_pb2"),
+                importlib.import_module(package + ".sushi_rpc_pb2_grpc"))
+    except ImportError:
+        # E.g. the subpackage wasn't installed, compile the .proto file instead
+        return None
+
+
+def _compile_proto(full_path: str) -> Tuple[ModuleType, ModuleType]:
     [inc_path, rel_proto_filename] = os.path.split(full_path)
     out_dir = "."
     if hasattr(__main__, "__file__"):
@@ -43,15 +79,117 @@ def modules_from_proto(proto_filename: str) -> Tuple[ModuleType, ModuleType]:
         if sys.path[0] == file_path:
             out_dir = file_path
 
-    protoc_args = [ 'dummy',
-                    '-I%s' % inc_path,
-                    f'--python_out={out_dir}',
-                    f'--grpc_python_out={out_dir}',
-                    rel_proto_filename ]
-    gprotoc.main(protoc_args)
     proto_base_name = os.path.splitext(rel_proto_filename)[0]
     proto_module_name = '%s_pb2' % proto_base_name
-    proto_module = importlib.import_module(proto_module_name)
     grpc_module_name = '%s_pb2_grpc' % proto_base_name
+
+    generated = [os.path.join(out_dir, m + ".py") for m in (proto_module_name, grpc_module_name)]
+    if not is_up_to_date(full_path, generated):
+        try:
+            import grpc_tools.protoc as gprotoc
+        except ImportError as e:
+            raise ImportError("grpcio-tools is needed to compile {}, which isn't a sushi version elkpy bundles "
+                              "generated modules for".format(full_path)) from e
+
+        protoc_args = [ 'dummy',
+                        '-I%s' % inc_path,
+                        f'--python_out={out_dir}',
+                        f'--grpc_python_out={out_dir}',
+                        rel_proto_filename ]
+        gprotoc.main(protoc_args)
+        write_source_digest(full_path, generated)
+        importlib.invalidate_caches()
+
+    proto_module = importlib.import_module(proto_module_name)
     grpc_module = importlib.import_module(grpc_module_name)
     return (proto_module, grpc_module)
+
+
+def is_up_to_date(source: str, generated: list[str]) -> bool:
+    """
+    Check if generated files need to be regenerated.
+
+    Parameters:
+        source (str): The path of the file they are generated from.
+        generated (list[str]): The paths of the generated files.
+
+    Returns:
+        bool: True if all generated files exist and were generated from a file with the same content as source,
+            according to the digest written by write_source_digest().
+    """
+    try:
+        with open(_digest_path(source, generated)) as f:
+            recorded = f.read().strip()
+        return recorded == _file_digest(source) and all(os.path.isfile(path) for path in generated)
+    except FileNotFoundError:
+        return False
+
+
+def write_source_digest(source: str, generated: list[str]) -> None:
+    """
+    Record the sha256 of the file generated files were just generated from, next to them, for is_up_to_date().
+
+    Parameters:
+        source (str): The path of the file they are generated from.
+        generated (list[str]): The paths of the generated files.
+    """
+    with open(_digest_path(source, generated), "w") as f:
+        f.write(_file_digest(source) + "\n")
+
+
+def _digest_path(source: str, generated: list[str]) -> str:
+    return os.path.join(os.path.dirname(generated[0]), os.path.basename(source) + ".sha256")
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def stub_package_name(api_version: str) -> str:
+    """
+    Parameters:
+        api_version (str): A sushi gRPC api version, e.g. "1.2.0".
+
+    Returns:
+        str: The name of the subpackage of elkpy.stubs for that version, e.g. "v1_2_0".
+    """
+    return "v" + api_version.replace(".", "_")
+
+
+def bundled_proto(api_version: str) -> str | None:
+    """
+    Get the .proto file bundled with elkpy for a sushi gRPC api version. Passing it to the controllers makes them use
+    the pregenerated modules, so neither the .proto file of the sushi installation nor grpcio-tools are needed.
+
+    Parameters:
+        api_version (str): The version, e.g. from get_sushi_api_version().
+
+    Returns:
+        str | None: The path of the .proto file, or None if elkpy doesn't bundle that version.
+    """
+    if api_version not in registry.BUNDLED_STUBS.values():
+        return None
+    return os.path.join(os.path.dirname(registry.__file__), stub_package_name(api_version), "sushi_rpc.proto")
+
+
+def get_sushi_api_version(address: str = "localhost:51051", timeout: float = 5.0) -> str:
+    """
+    Ask a running sushi for its gRPC api version, without needing any generated module.
+
+    Parameters:
+        address (str): 'ip-address:port' The ip-address and port at which to connect to sushi.
+        timeout (float): The maximum time to wait for an answer in seconds.
+
+    Returns:
+        str: The version, e.g. "1.2.0".
+    """
+    import grpc
+    # GenericVoidValue and GenericStringValue are wire compatible with Empty and StringValue
+    from google.protobuf import empty_pb2, wrappers_pb2
+
+    with grpc.insecure_channel(address) as channel:
+        call = channel.unary_unary("/sushi_rpc.SystemController/GetSushiApiVersion",
+                                   request_serializer=empty_pb2.Empty.SerializeToString,
+                                   response_deserializer=wrappers_pb2.StringValue.FromString)
+        return call(empty_pb2.Empty(), timeout=timeout).value
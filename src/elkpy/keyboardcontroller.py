@@ -17,11 +17,38 @@ __copyright__ = """
 __license__ = "GPL-3.0"
 
 import grpc
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
 
 from . import sushierrors
 from . import grpc_gen
 from . import sushi_info_types as info_types
-from typing import List
+from typing import Callable, Iterable, List, Tuple
+
+class KeyboardEventType(IntEnum):
+    """
+    Enum class to hold the types of keyboard events that can be sent asynchronously.
+
+    Attributes:
+        NOTE_ON,
+        NOTE_OFF,
+        NOTE_AFTERTOUCH,
+        AFTERTOUCH,
+        PITCH_BEND,
+        MODULATION
+    """
+    NOTE_ON = 1
+    NOTE_OFF = 2
+    NOTE_AFTERTOUCH = 3
+    AFTERTOUCH = 4
+    PITCH_BEND = 5
+    MODULATION = 6
+
+# (event type, channel, note, value). The note is ignored for AFTERTOUCH, PITCH_BEND and MODULATION.
+KeyboardEvent = Tuple[KeyboardEventType, int, int, float]
 
 ####################################
 # Sushi keyboard controller class #
@@ -32,6 +59,12 @@ class KeyboardController(object):
     A class to control the keyboard in sushi via gRPC. It can send typical keyboard events like
     note on, note off, pitch bend, modulation and after touch.
 
+    Every event can be sent either blocking (send_note_on(), ...) or asynchronously (send_events_async(),
+    send_chord_on(), ...). Asynchronous events return immediately. The events of one call are dispatched together
+    over the channel, except that an event for a note, or a controller, already sent in that call waits for sushi to
+    reply to the earlier one, so they can't overtake each other. Successive calls on the same track are dispatched in
+    order, each one once the previous has been acknowledged by sushi. Errors are reported through the returned future and the async error callback.
+
     Attributes:
         _stub (KeyboardControllerStub): Connection stubs to the gRPC keyboard interface implemented in sushi.
     """
@@ -53,6 +86,12 @@ class KeyboardController(object):
         self._sushi_proto, self._sushi_grpc = grpc_gen.modules_from_proto(sushi_proto_def)
         self._stub = self._sushi_grpc.KeyboardControllerStub(channel)
 
+        self._async_condition = threading.Condition()
+        self._async_pending = {}
+        self._async_in_flight = set()
+        self._async_error_callback = None
+        self._async_errors = deque(maxlen=100)
+
     #######################
     # // Keyboard control #
     #######################
@@ -176,3 +215,248 @@ class KeyboardController(object):
 
         except grpc.RpcError as e:
             sushierrors.grpc_error_handling(e, " With track id: {}, channel: {}, value: {}".format(track_identifier, channel, value))
+
+    #############################
+    # // Async keyboard control #
+    #############################
+
+    def send_events_async(self, track_identifier: int, events: Iterable[KeyboardEvent]) -> Future:
+        """
+        Send a batch of keyboard events to the specified track without waiting for sushi to reply.
+        The events of a batch are sent concurrently, except that an event for the same channel and note, or for the
+        same controller and channel, as an earlier event of the batch is only sent once sushi has replied to it. So a
+        chord is sent at once, while a note off still reaches sushi before the note on retriggering the same note.
+        Batches sent to the same track are dispatched in the order they were sent.
+
+        Parameters:
+            track_identifier (int): The id of the track that should receive the events.
+            events (Iterable[KeyboardEvent]): (event type, channel, note, value) tuples. The note is ignored for
+                                              AFTERTOUCH, PITCH_BEND and MODULATION events.
+
+        Returns:
+            Future: A future that is resolved once sushi has replied to every event of the batch. If an event
+                    failed, it holds the first error.
+        """
+        batch = _KeyboardBatch([self._build_request(track_identifier, *event) for event in events])
+        if batch.remaining == 0:
+            batch.future.set_result(None)
+            return batch.future
+
+        with self._async_condition:
+            if track_identifier in self._async_in_flight:
+                self._async_pending.setdefault(track_identifier, deque()).append(batch)
+                return batch.future
+            self._async_in_flight.add(track_identifier)
+
+        self._dispatch_batch(track_identifier, batch)
+        return batch.future
+
+    def send_note_on_async(self, track_identifier: int, channel: int, note: int, velocity: float) -> Future:
+        """
+        Sends a note on message to the specified track without waiting for sushi to reply.
+
+        Parameters:
+            track_identifier (int): The id of the track that should receive the message.
+            channel (int): The channel on which the message should be sent.
+            note (int): The note to send. Follows the MIDI standard where middle c = 60.
+            velocity (float): The velocity of the note. Should be in range (0.0-1.0).
+
+        Returns:
+            Future: A future that is resolved once sushi has replied.
+        """
+        return self.send_events_async(track_identifier, [(KeyboardEventType.NOTE_ON, channel, note, velocity)])
+
+    def send_note_off_async(self, track_identifier: int, channel: int, note: int, velocity: float) -> Future:
+        """
+        Sends a note off message to the specified track without waiting for sushi to reply.
+
+        Parameters:
+            track_identifier (int): The id of the track that should receive the message.
+            channel (int): The channel on which the message should be sent.
+            note (int): The note to send. Follows the MIDI standard where middle c = 60.
+            velocity (float): The velocity of the note. Should be in range (0.0-1.0).
+
+        Returns:
+            Future: A future that is resolved once sushi has replied.
+        """
+        return self.send_events_async(track_identifier, [(KeyboardEventType.NOTE_OFF, channel, note, velocity)])
+
+    def send_chord_on(self, track_identifier: int, channel: int, notes: Iterable[int], velocity: float) -> Future:
+        """
+        Sends note on messages for several notes to the specified track at once, without waiting for sushi to reply
+        to each.
+
+        Parameters:
+            track_identifier (int): The id of the track that should receive the messages.
+            channel (int): The channel on which the messages should be sent.
+            notes (Iterable[int]): The notes to send. Follows the MIDI standard where middle c = 60.
+            velocity (float): The velocity of the notes. Should be in range (0.0-1.0).
+
+        Returns:
+            Future: A future that is resolved once sushi has replied to every note.
+        """
+        return self.send_events_async(
+            track_identifier, [(KeyboardEventType.NOTE_ON, channel, note, velocity) for note in notes])
+
+    def send_chord_off(self, track_identifier: int, channel: int, notes: Iterable[int], velocity: float) -> Future:
+        """
+        Sends note off messages for several notes to the specified track at once, without waiting for sushi to reply
+        to each.
+
+        Parameters:
+            track_identifier (int): The id of the track that should receive the messages.
+            channel (int): The channel on which the messages should be sent.
+            notes (Iterable[int]): The notes to send. Follows the MIDI standard where middle c = 60.
+            velocity (float): The velocity of the notes. Should be in range (0.0-1.0).
+
+        Returns:
+            Future: A future that is resolved once sushi has replied to every note.
+        """
+        return self.send_events_async(
+            track_identifier, [(KeyboardEventType.NOTE_OFF, channel, note, velocity) for note in notes])
+
+    def set_async_error_callback(self, callback: Callable[[Exception], None] | None) -> None:
+        """
+        Set a callable to receive the errors of asynchronously sent events. It is called from a gRPC thread and
+        should return quickly. Errors are also kept and can be retrieved with get_async_errors().
+
+        Parameters:
+            callback (Callable[[Exception], None] | None): The callable, or None to remove it.
+        """
+        self._async_error_callback = callback
+
+    def get_async_errors(self) -> List[Exception]:
+        """
+        Get and clear the errors of asynchronously sent events that occurred since the last call.
+        At most the 100 most recent errors are kept.
+
+        Returns:
+            List[Exception]: The errors, oldest first.
+        """
+        with self._async_condition:
+            errors = list(self._async_errors)
+            self._async_errors.clear()
+        return errors
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Block until every asynchronously sent event has been replied to by sushi.
+
+        Parameters:
+            timeout (float | None): The maximum time to wait in seconds, or None to wait indefinitely.
+
+        Returns:
+            bool: True if all events were replied to, False if the timeout expired first.
+        """
+        with self._async_condition:
+            return self._async_condition.wait_for(lambda: len(self._async_in_flight) == 0, timeout)
+
+    def _build_request(self, track_identifier: int, event_type: KeyboardEventType, channel: int, note: int,
+                       value: float):
+        track = self._sushi_proto.TrackIdentifier(id = track_identifier)
+        context_info = " With track id: {}, channel: {}, note: {}, value: {}".format(
+            track_identifier, channel, note, value)
+        # Events with the same key must reach sushi in order
+        if event_type in (KeyboardEventType.NOTE_ON, KeyboardEventType.NOTE_OFF, KeyboardEventType.NOTE_AFTERTOUCH):
+            key = (channel, note)
+        else:
+            key = (event_type, channel)
+
+        if event_type == KeyboardEventType.NOTE_ON:
+            request = self._sushi_proto.NoteOnRequest(track = track, channel = channel, note = note, velocity = value)
+            return self._stub.SendNoteOn, request, context_info, key
+        elif event_type == KeyboardEventType.NOTE_OFF:
+            request = self._sushi_proto.NoteOffRequest(track = track, channel = channel, note = note, velocity = value)
+            return self._stub.SendNoteOff, request, context_info, key
+        elif event_type == KeyboardEventType.NOTE_AFTERTOUCH:
+            request = self._sushi_proto.NoteAftertouchRequest(track = track, channel = channel, note = note,
+                                                              value = value)
+            return self._stub.SendNoteAftertouch, request, context_info, key
+
+        request = self._sushi_proto.NoteModulationRequest(track = track, channel = channel, value = value)
+        if event_type == KeyboardEventType.AFTERTOUCH:
+            return self._stub.SendAftertouch, request, context_info, key
+        elif event_type == KeyboardEventType.PITCH_BEND:
+            return self._stub.SendPitchBend, request, context_info, key
+        elif event_type == KeyboardEventType.MODULATION:
+            return self._stub.SendModulation, request, context_info, key
+        raise ValueError("Event type = {}. Should be a KeyboardEventType".format(event_type))
+
+    def _dispatch_batch(self, track_identifier: int, batch: "_KeyboardBatch") -> None:
+        # Sends the next wave of the batch
+        wave = batch.waves[batch.wave]
+        batch.wave_remaining = len(wave)
+        for rpc, request, context_info in wave:
+            call = rpc.future(request)
+            call.add_done_callback(lambda call, context_info=context_info:
+                                   self._on_call_done(track_identifier, batch, call, context_info))
+
+    def _on_call_done(self, track_identifier: int, batch: "_KeyboardBatch", call, context_info: str) -> None:
+        error = None
+        if call.exception() is not None:
+            try:
+                sushierrors.grpc_error_handling(call.exception(), context_info)
+            except Exception as e:
+                error = e
+
+        with self._async_condition:
+            if error is not None:
+                batch.errors.append(error)
+                self._async_errors.append(error)
+            batch.remaining -= 1
+            batch.wave_remaining -= 1
+            done = batch.remaining == 0
+            next_wave = not done and batch.wave_remaining == 0
+            if next_wave:
+                batch.wave += 1
+
+        if done:
+            self._finish_batch(track_identifier, batch)
+        elif next_wave:
+            self._dispatch_batch(track_identifier, batch)
+
+        # Last, so a failing callback can't leave the batch unresolved or the track blocked
+        callback = self._async_error_callback
+        if error is not None and callback is not None:
+            try:
+                callback(error)
+            except Exception:
+                traceback.print_exc()
+
+    def _finish_batch(self, track_identifier: int, batch: "_KeyboardBatch") -> None:
+        if batch.errors:
+            batch.future.set_exception(batch.errors[0])
+        else:
+            batch.future.set_result(None)
+
+        with self._async_condition:
+            pending = self._async_pending.get(track_identifier)
+            next_batch = pending.popleft() if pending else None
+            if next_batch is None:
+                self._async_pending.pop(track_identifier, None)
+                self._async_in_flight.discard(track_identifier)
+                self._async_condition.notify_all()
+
+        if next_batch is not None:
+            self._dispatch_batch(track_identifier, next_batch)
+
+
+class _KeyboardBatch(object):
+    """
+    The requests of one asynchronous send call, and the future resolved when they have all been replied to.
+    The requests are split in waves sent one after the other, each holding at most one request per key.
+    """
+    def __init__(self, calls: list):
+        self.waves = []
+        keys = set()
+        for rpc, request, context_info, key in calls:
+            if key in keys or not self.waves:
+                self.waves.append([])
+                keys.clear()
+            keys.add(key)
+            self.waves[-1].append((rpc, request, context_info))
+        self.wave = 0
+        self.wave_remaining = 0
+        self.remaining = len(calls)
+        self.errors = []
+        self.future = Future()
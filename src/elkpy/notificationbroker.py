@@ -0,0 +1,582 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from typing import Callable
+
+import grpc.experimental.aio
+
+from . import grpc_gen
+from . import sushierrors
+from .notificationcontroller import NotificationController
+from .notificationrecorder import KINDS, _decode_varint, _encode_varint
+
+
+def _default_socket_path() -> str:
+    # Per user, so that users don't replace or listen to each other's broker
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "elkpy-notifications.sock")
+    return os.path.join(tempfile.gettempdir(), "elkpy-notifications-{}.sock".format(os.getuid()))
+
+
+DEFAULT_SOCKET_PATH = _default_socket_path()
+
+# Notifications queued for one subscriber before it is considered stuck and disconnected
+MAX_PENDING = 10000
+
+# Seconds between attempts to resubscribe to sushi after a stream ended, and before a client first tries to
+# reconnect to a broker that went away
+RECONNECT_INTERVAL = 1.0
+
+# The longest a client waits between attempts to reconnect, the interval doubles after each failed attempt
+MAX_RECONNECT_INTERVAL = 30.0
+
+_SUBSCRIBE_RPCS = {"transport": "SubscribeToTransportChanges",
+                   "timing": "SubscribeToEngineCpuTimingUpdates",
+                   "track": "SubscribeToTrackChanges",
+                   "processor": "SubscribeToProcessorChanges",
+                   "parameter": "SubscribeToParameterUpdates",
+                   "property": "SubscribeToPropertyUpdates"}
+
+
+###########
+# Framing #
+###########
+# Over the socket, every frame is a varint length followed by the data. A client sends one json subscription request
+# per connection, the broker answers with a json status, then sends the serialized notifications.
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = b""
+    while True:
+        byte = await reader.readexactly(1)
+        header += byte
+        if not byte[0] & 0x80:
+            break
+    size, _ = _decode_varint(header, 0)
+    return await reader.readexactly(size)
+
+
+def _frame(data: bytes) -> bytes:
+    return _encode_varint(len(data)) + data
+
+
+def _notification_filter(kind: str, processors, blocklist):
+    """
+    Returns:
+        Callable | None: A function telling if a notification passes the filters of a subscription, None if all pass.
+    """
+    processors = set(processors) if processors else None
+    blocked = {tuple(b) for b in blocklist} if blocklist else None
+    if kind == "parameter":
+        identifier = lambda n: (n.parameter.processor_id, n.parameter.parameter_id)  # noqa: E731
+    elif kind == "property":
+        identifier = lambda n: (n.property.processor_id, n.property.property_id)  # noqa: E731
+    elif kind == "processor":
+        identifier = lambda n: (n.processor.id, None)  # noqa: E731
+    else:
+        return None
+    if processors is None and blocked is None:
+        return None
+    return lambda n: ((processors is None or identifier(n)[0] in processors)
+                      and (blocked is None or identifier(n) not in blocked))
+
+
+#######################
+# Notification broker #
+#######################
+
+
+class _Subscriber(object):
+    def __init__(self, accept):
+        self.accept = accept
+        self.queue: asyncio.Queue = asyncio.Queue(MAX_PENDING)
+        self.task = asyncio.current_task()
+
+
+class NotificationBroker(object):
+    """
+    A class holding one subscription to each sushi notification stream, and re-publishing the notifications to any
+    number of local processes over a unix socket, see BrokerNotificationClient.
+
+    The upstream stream of a kind is opened when its first client subscribes, and kept open, so sushi serves at most
+    one stream per kind. Each notification is serialized once and sent to all clients whose filters accept it.
+    Clients that don't keep up are disconnected once MAX_PENDING notifications are waiting for them.
+    """
+
+    def __init__(self,
+                 socket_path: str = DEFAULT_SOCKET_PATH,
+                 address: str = "localhost:51051",
+                 sushi_proto_def: str = "/usr/share/sushi/sushi_rpc.proto"):
+        """
+        The constructor for the NotificationBroker class.
+
+        Parameters:
+            socket_path (str): The path of the unix socket to serve on. A stale socket left there is replaced,
+                but serving fails with RuntimeError if another broker answers on it.
+            address (str): 'ip-address:port' The ip-address and port at which to connect to sushi.
+            sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
+        """
+        self.socket_path = socket_path
+        self.address = address
+        self._sushi_proto, self._sushi_grpc = grpc_gen.modules_from_proto(sushi_proto_def)
+        self._subscribers: dict[str, list[_Subscriber]] = {kind: [] for kind in KINDS}
+        self._upstream: dict[str, asyncio.Task] = {}
+        self._upstream_ready: dict[str, asyncio.Event] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._start_error: Exception | None = None
+
+    async def serve(self) -> None:
+        """
+        Serve until stop() is called.
+
+        Raises:
+            RuntimeError: If another broker is already serving on socket_path.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        await self._remove_stale_socket()
+        server = await asyncio.start_unix_server(self._handle_client, self.socket_path)
+        channel = grpc.experimental.aio.insecure_channel(self.address)
+        self._stub = self._sushi_grpc.NotificationControllerStub(channel)
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for task in self._upstream.values():
+                task.cancel()
+            await asyncio.gather(*self._upstream.values(), return_exceptions=True)
+            self._upstream.clear()
+            await channel.close()
+            await server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._ready.clear()
+
+    async def _remove_stale_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            _, writer = await asyncio.open_unix_connection(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left by a broker that didn't stop cleanly
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+            return
+        writer.close()
+        raise RuntimeError("A notification broker is already serving on {}".format(self.socket_path))
+
+    def start(self, timeout: float = 5.0) -> None:
+        """
+        Serve from a background thread.
+
+        Parameters:
+            timeout (float): The maximum time in seconds to wait for the socket to be ready.
+
+        Raises:
+            RuntimeError: If another broker is already serving on socket_path.
+        """
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("The notification broker didn't start within {} s".format(timeout))
+        if self._start_error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._start_error
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            if not self._ready.is_set():
+                self._start_error = e
+                self._ready.set()
+            else:
+                raise
+
+    def stop(self) -> None:
+        """
+        Stop serving after start(), ending the streams of all clients.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def get_subscriber_count(self, kind: str) -> int:
+        """
+        Parameters:
+            kind (str): One of notificationrecorder.KINDS.
+
+        Returns:
+            int: The number of clients currently subscribed to that kind.
+        """
+        return len(self._subscribers[kind])
+
+    def get_upstream_kinds(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The kinds of the streams currently subscribed from sushi.
+        """
+        return [kind for kind, task in self._upstream.items() if not task.done()]
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(await _read_frame(reader))
+            kind = request["kind"]
+            if kind not in KINDS:
+                raise ValueError("Unknown notification kind {}".format(kind))
+            accept = _notification_filter(kind, request.get("processors"), request.get("blocklist"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            writer.write(_frame(json.dumps({"error": str(e)}).encode()))
+            writer.close()
+            return
+
+        if kind not in self._upstream or self._upstream[kind].done():
+            self._upstream_ready[kind] = asyncio.Event()
+            self._upstream[kind] = asyncio.create_task(self._forward(kind))
+        # Acknowledge once sushi's stream is in place, so the client doesn't miss what follows
+        await self._upstream_ready[kind].wait()
+        subscriber = _Subscriber(accept)
+        self._subscribers[kind].append(subscriber)
+        disconnected = asyncio.ensure_future(reader.read())
+        try:
+            writer.write(_frame(json.dumps({"kind": kind}).encode()))
+            while True:
+                data = asyncio.ensure_future(subscriber.queue.get())
+                await asyncio.wait({data, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not data.done():
+                    data.cancel()
+                    break
+                writer.write(data.result())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if subscriber in self._subscribers[kind]:
+                self._subscribers[kind].remove(subscriber)
+            disconnected.cancel()
+            writer.close()
+
+    async def _forward(self, kind: str) -> None:
+        """
+        Read the upstream stream of a kind and queue its notifications for the subscribers, resubscribing when the
+        stream ends, e.g. when sushi restarts.
+        """
+        request = self._sushi_proto.GenericVoidValue() if kind not in ("parameter", "property") else \
+            getattr(self._sushi_proto, "ParameterNotificationBlocklist" if kind == "parameter" else
+                    "PropertyNotificationBlocklist")()
+        while True:
+            try:
+                stream = getattr(self._stub, _SUBSCRIBE_RPCS[kind])(request)
+                await NotificationController._wait_for_subscription(stream)
+                self._upstream_ready[kind].set()
+                async for notification in stream:
+                    subscribers = self._subscribers[kind]
+                    if not subscribers:
+                        continue
+                    frame = _frame(notification.SerializeToString())
+                    for subscriber in list(subscribers):
+                        if subscriber.accept is not None and not subscriber.accept(notification):
+                            continue
+                        try:
+                            subscriber.queue.put_nowait(frame)
+                        except asyncio.QueueFull:
+                            # Too slow, disconnect it rather than buffering without limit
+                            subscribers.remove(subscriber)
+                            subscriber.task.cancel()
+            except grpc.RpcError as e:
+                try:
+                    sushierrors.grpc_error_handling(e)
+                except Exception as error:
+                    print("Notification broker: {} stream failed: {}".format(kind, error))
+            await asyncio.sleep(RECONNECT_INTERVAL)
+
+
+##############################
+# Broker notification client #
+##############################
+
+
+class BrokerNotificationClient(object):
+    """
+    A class receiving notifications from a NotificationBroker, with the subscribe API of NotificationController.
+
+    The notifications are the same protobuf messages NotificationController passes to callbacks. Callbacks are
+    called from a thread running the client's event loop, or from the running loop when created in asyncio programs.
+    When the broker goes away, e.g. when it restarts, subscriptions reconnect to it with an increasing interval, up
+    to MAX_RECONNECT_INTERVAL, until they are cancelled. Notifications sent in the meantime are missed.
+    """
+
+    def __init__(self,
+                 socket_path: str = DEFAULT_SOCKET_PATH,
+                 sushi_proto_def: str = "/usr/share/sushi/sushi_rpc.proto"):
+        """
+        The constructor for the BrokerNotificationClient class.
+
+        Parameters:
+            socket_path (str): The path of the unix socket of the broker.
+            sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
+        """
+        self.socket_path = socket_path
+        self._sushi_proto, _ = grpc_gen.modules_from_proto(sushi_proto_def)
+        self.tasks = []
+        try:
+            self.loop = asyncio.get_running_loop()
+            self._async = True
+        except RuntimeError:
+            self._async = False
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """
+        End all subscriptions.
+        """
+        if self._async:
+            for task in self.tasks:
+                task.cancel()
+        elif self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+        self.tasks.clear()
+
+    @staticmethod
+    async def _cancel_all() -> None:
+        # The loop only runs the subscriptions, end them so their connections are closed
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def subscribe_to_transport_changes(self, cb, executor=None, on_subscribed=None):
+        """
+        Subscribe to the transport changes of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("transport", cb, on_subscribed=on_subscribed)
+
+    def subscribe_to_timing_updates(self, cb, executor=None, on_subscribed=None):
+        """
+        Subscribe to the cpu timing updates of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("timing", cb, on_subscribed=on_subscribed)
+
+    def subscribe_to_track_changes(self, cb, executor=None, on_subscribed=None):
+        """
+        Subscribe to the track changes of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("track", cb, on_subscribed=on_subscribed)
+
+    def subscribe_to_processor_changes(self, cb, processors=None, executor=None, on_subscribed=None):
+        """
+        Subscribe to the processor changes of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            processors: The ids of the processors to receive the changes of, all if None.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("processor", cb, processors, on_subscribed=on_subscribed)
+
+    def subscribe_to_parameter_updates(self, cb, param_blocklist=None, processors=None, executor=None,
+                                       on_subscribed=None):
+        """
+        Subscribe to the parameter updates of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            param_blocklist: a list of [processor_id, parameter_id] identifiers of parameters to not receive the
+                updates of.
+            processors: The ids of the processors to receive the updates of, all if None.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("parameter", cb, processors, param_blocklist, on_subscribed=on_subscribed)
+
+    def subscribe_to_property_updates(self, cb, property_blocklist=None, processors=None, executor=None,
+                                      on_subscribed=None):
+        """
+        Subscribe to the property updates of sushi.
+
+        Parameters:
+            cb: a callable, or coroutine function, that will be called for each notification.
+            property_blocklist: a list of [processor_id, property_id] identifiers of properties to not receive the
+                updates of.
+            processors: The ids of the processors to receive the updates of, all if None.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the loop of the client.
+            on_subscribed: a callable called without arguments on the loop of the client each time the broker has
+                accepted the subscription, or None.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
+        return self._subscribe("property", cb, processors, property_blocklist, on_subscribed=on_subscribed)
+
+    def _subscribe(self, kind: str, cb: Callable, processors=None, blocklist=None, on_subscribed=None):
+        request = {"kind": kind,
+                   "processors": list(processors) if processors else None,
+                   "blocklist": [list(b) for b in blocklist] if blocklist else None}
+        if self._async:
+            task = asyncio.create_task(self._receive(request, cb, on_subscribed))
+        else:
+            task = asyncio.run_coroutine_threadsafe(self._receive(request, cb, on_subscribed), self.loop)
+        self.tasks.append(task)
+        return task
+
+    async def _receive(self, request: dict, cb: Callable, on_subscribed: Callable | None) -> None:
+        message_type = getattr(self._sushi_proto, KINDS[request["kind"]])
+        reader, writer = await self._connect(request)
+        while True:
+            if on_subscribed is not None:
+                on_subscribed()
+            try:
+                while True:
+                    try:
+                        data = await _read_frame(reader)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        # The broker stopped
+                        break
+                    notification = message_type()
+                    notification.ParseFromString(data)
+                    if asyncio.iscoroutinefunction(cb):
+                        await cb(notification)
+                    else:
+                        cb(notification)
+            finally:
+                writer.close()
+            reader, writer = await self._reconnect(request)
+
+    async def _connect(self, request: dict) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            writer.write(_frame(json.dumps(request).encode()))
+            status = json.loads(await _read_frame(reader))
+            if "error" in status:
+                raise ValueError(status["error"])
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _reconnect(self, request: dict) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        interval = RECONNECT_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                return await self._connect(request)
+            except (OSError, asyncio.IncompleteReadError):
+                interval = min(interval * 2, MAX_RECONNECT_INTERVAL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Share sushi notification streams between local processes")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="The unix socket to serve on")
+    parser.add_argument("--address", default="localhost:51051", help="The address of sushi")
+    parser.add_argument("--protofile", default="/usr/share/sushi/sushi_rpc.proto",
+                        help="Path to sushi_rpc.proto")
+    args = parser.parse_args()
+    broker = NotificationBroker(args.socket, args.address, args.protofile)
+    try:
+        asyncio.run(broker.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -19,15 +19,20 @@ __license__ = "GPL-3.0"
 
 import grpc.experimental.aio
 import asyncio
-from threading import Thread
+import time
+from threading import Event, Thread
 from . import sushierrors
 from . import grpc_gen
+from .events import expire_events
 
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .sushicontroller import SushiController
 
+# Maximum time in seconds to wait for sushi to answer the subscriptions needed to set ElkpyEvents
+SUBSCRIPTION_TIMEOUT = 0.5
+
 
 ###########################################
 #   Sushi Notification Controller class   #
@@ -70,6 +75,9 @@ class NotificationController:
             sushi_proto_def
         )
         self.tasks = []
+        # Set once the matching streams are subscribed, or have failed to
+        self._track_matching = Event()
+        self._processor_matching = Event()
         try:
             self.loop = asyncio.get_running_loop()
             self._async = True
@@ -91,6 +99,11 @@ class NotificationController:
                     self.match_processor_event_notification(), self.loop
                 )
             )
+            self.tasks.append(
+                asyncio.run_coroutine_threadsafe(
+                    self.expire_unmatched_events(), self.loop
+                )
+            )
 
         else:
             self.tasks.append(
@@ -99,6 +112,9 @@ class NotificationController:
             self.tasks.append(
                 asyncio.create_task(self.match_processor_event_notification())
             )
+            self.tasks.append(
+                asyncio.create_task(self.expire_unmatched_events())
+            )
 
     @staticmethod
     def _run_notification_loop(loop):
@@ -108,6 +124,41 @@ class NotificationController:
         asyncio.set_event_loop(loop)
         loop.run_forever()
 
+    def wait_until_matching(self, timeout: float = 5.0) -> bool:
+        """
+        Block until the track and processor change streams used to set ElkpyEvents are subscribed, so that the
+        notifications of a command sent afterwards aren't missed. Returns immediately in asyncio programs, where
+        blocking would stop the streams from being subscribed.
+
+        Parameters:
+            timeout (float): The maximum time to wait in seconds.
+
+        Returns:
+            bool: False if the timeout expired before both streams were subscribed.
+        """
+        if self._async:
+            return self._track_matching.is_set() and self._processor_matching.is_set()
+        deadline = time.monotonic() + timeout
+        return (self._track_matching.wait(timeout)
+                and self._processor_matching.wait(max(0.0, deadline - time.monotonic())))
+
+    @staticmethod
+    async def _wait_for_subscription(stream, timeout: float = SUBSCRIPTION_TIMEOUT) -> None:
+        """
+        Wait until sushi has answered a subscription, or at most timeout seconds, as servers that only send the
+        headers of a stream with its first message don't answer before a notification is sent.
+        """
+        connected = asyncio.ensure_future(stream.wait_for_connection())
+        # Failed subscriptions are reported by the stream itself
+        connected.add_done_callback(lambda f: f.cancelled() or f.exception())
+        await asyncio.wait({connected}, timeout=timeout)
+
+    async def _confirm_subscription(self, stream, on_subscribed) -> None:
+        if on_subscribed is not None:
+            await self._wait_for_subscription(stream)
+            if not stream.done():
+                on_subscribed()
+
     def close(self):
         for t in self.tasks:
             try:
@@ -129,13 +180,14 @@ class NotificationController:
     # Should not be called directly by the user.    #
     #################################################
 
-    async def process_transport_change_notifications(self, call_back=None):
+    async def process_transport_change_notifications(self, call_back=None, on_subscribed=None):
         try:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToTransportChanges(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -151,13 +203,14 @@ class NotificationController:
                 f"Should be a string containing the IP address and port to Sushi"
             )
 
-    async def process_timing_update_notifications(self, call_back=None):
+    async def process_timing_update_notifications(self, call_back=None, on_subscribed=None):
         try:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToEngineCpuTimingUpdates(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -178,13 +231,14 @@ class NotificationController:
                 f"Should be a string containing the IP address and port to Sushi"
             )
 
-    async def process_track_change_notifications(self, call_back=None):
+    async def process_track_change_notifications(self, call_back=None, on_subscribed=None):
         try:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToTrackChanges(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -205,13 +259,14 @@ class NotificationController:
                 f"Should be a string containing the IP address and port to Sushi"
             )
 
-    async def process_processor_change_notifications(self, call_back=None):
+    async def process_processor_change_notifications(self, call_back=None, on_subscribed=None):
         try:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToProcessorChanges(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -233,7 +288,7 @@ class NotificationController:
             )
 
     async def process_parameter_update_notifications(
-        self, call_back=None, param_list=None
+        self, call_back=None, param_list=None, on_subscribed=None
     ):
         if not param_list:
             block_list = self._sushi_proto.GenericVoidValue()
@@ -251,6 +306,7 @@ class NotificationController:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToParameterUpdates(block_list)
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -272,7 +328,7 @@ class NotificationController:
             )
 
     async def process_property_update_notifications(
-        self, call_back=None, property_list=None
+        self, call_back=None, property_list=None, on_subscribed=None
     ):
         if not property_list:
             block_list = self._sushi_proto.GenericVoidValue()
@@ -290,6 +346,7 @@ class NotificationController:
             async with grpc.experimental.aio.insecure_channel(self.address) as channel:
                 stub = self._sushi_grpc.NotificationControllerStub(channel)
                 stream = stub.SubscribeToPropertyUpdates(block_list)
+                await self._confirm_subscription(stream, on_subscribed)
                 async for notification in stream:
                     # User logic here
                     if call_back and callable(call_back):
@@ -314,78 +371,111 @@ class NotificationController:
     # API : Subscription to Sushi notification streams #
     ####################################################
 
-    def subscribe_to_transport_changes(self, cb) -> None:
+    def subscribe_to_transport_changes(self, cb, executor=None, on_subscribed=None):
         """
         Subscribes to Transport changes notification stream from Sushi
         User needs to implement their own stream consumer logic and pass it as cb.
 
         Parameters:
             cb: a callable that will be called for each notification received from the stream.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
         """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_transport_change_notifications(cb))
-            )
+            task = asyncio.create_task(
+                self.process_transport_change_notifications(cb, on_subscribed=on_subscribed))
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
-                self.process_transport_change_notifications(cb), self.loop
+            return asyncio.run_coroutine_threadsafe(
+                self.process_transport_change_notifications(cb, on_subscribed=on_subscribed), self.loop
             )
 
-    def subscribe_to_timing_updates(self, cb):
+    def subscribe_to_timing_updates(self, cb, executor=None, on_subscribed=None):
         """
         Subscribes to Timing update notification stream from Sushi
         User needs to implement their own stream consumer logic and pass it as cb.
 
         Parameters:
-            cb: a callable that will be called for each notification received from the stream."""
+            cb: a callable that will be called for each notification received from the stream.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
+        """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_timing_update_notifications(cb))
-            )
+            task = asyncio.create_task(
+                self.process_timing_update_notifications(cb, on_subscribed=on_subscribed))
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
-                self.process_timing_update_notifications(cb), self.loop
+            return asyncio.run_coroutine_threadsafe(
+                self.process_timing_update_notifications(cb, on_subscribed=on_subscribed), self.loop
             )
 
-    def subscribe_to_track_changes(self, cb):
+    def subscribe_to_track_changes(self, cb, executor=None, on_subscribed=None):
         """
         Subscribes to Track change notification stream from Sushi.
         User needs to implement their own stream consumer logic and pass it as cb.
 
         Parameters:
             cb: a callable that will be called for each notification received from the stream.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
         """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_track_change_notifications(cb))
-            )
+            task = asyncio.create_task(
+                self.process_track_change_notifications(cb, on_subscribed=on_subscribed))
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
-                self.process_track_change_notifications(cb), self.loop
+            return asyncio.run_coroutine_threadsafe(
+                self.process_track_change_notifications(cb, on_subscribed=on_subscribed), self.loop
             )
 
-    def subscribe_to_processor_changes(self, cb):
+    def subscribe_to_processor_changes(self, cb, executor=None, on_subscribed=None):
         """
         Subscribes to Processor change notification stream from Sushi.
         User needs to implement their own stream consumer logic and pass it as cb.
 
         Parameters:
             cb: a callable that will be called for each notification received from the stream.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
         """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_processor_change_notifications(cb))
-            )
+            task = asyncio.create_task(
+                self.process_processor_change_notifications(cb, on_subscribed=on_subscribed))
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
-                self.process_processor_change_notifications(cb), self.loop
+            return asyncio.run_coroutine_threadsafe(
+                self.process_processor_change_notifications(cb, on_subscribed=on_subscribed), self.loop
             )
 
-    def subscribe_to_parameter_updates(self, cb, param_blocklist=None):
+    def subscribe_to_parameter_updates(self, cb, param_blocklist=None, executor=None, on_subscribed=None):
         """
         Subscribes to Parameter update notification stream from Sushi
         User needs to implement their own logic to process these notification in the placeholder methods below
@@ -395,6 +485,10 @@ class NotificationController:
             param_blocklist: a list of parameter identifiers for which to block update notifications. \
                         A parameter identifier is itself a list of [processor_id: int, parameter_id: int] \
                         If no param_blocklist is passed, all parameter notifications will be subscribed to. \
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
 
         Notes to write useful callbacks:
             Notification objects have 2 attributes: parameter and value;
@@ -404,26 +498,34 @@ class NotificationController:
             ex: notification.normalized_value (gets the value normalized between 0 and 1)
             ex: notification.domain_value (gets the domain value)
             ex: notification.formatted_value (gets the value formatted as a string)
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
         """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_parameter_update_notifications(cb))
-            )
+            task = asyncio.create_task(
+                self.process_parameter_update_notifications(cb, on_subscribed=on_subscribed))
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
+            return asyncio.run_coroutine_threadsafe(
                 self.process_parameter_update_notifications(
-                    cb, param_blocklist),
+                    cb, param_blocklist, on_subscribed=on_subscribed),
                 self.loop,
             )
 
-    def subscribe_to_property_updates(self, cb, property_blocklist=None):
+    def subscribe_to_property_updates(self, cb, property_blocklist=None, executor=None, on_subscribed=None):
         """
         Subscribes to Property update notification stream from Sushi
         User needs to implement their own logic to process these notification in the placeholder methods below
 
         Parameters:
             cb: a callable that will be called for each notification received from the stream.
+            executor: a CallbackExecutor deciding where cb runs, see elkpy.callbackexecutor. If None, cb runs on
+                the notification loop.
+            on_subscribed: a callable called without arguments on the notification loop once sushi has accepted
+                the subscription, or None.
 
         Notes to write useful callbacks:
             Notification objects have 2 attributes: property and value;
@@ -431,18 +533,22 @@ class NotificationController:
             ex: notification.parameter.property_id (gets the property ID)
             ex: notification.parameter.processor_id (gets the processor ID)
             ex: notification.value (gets the value)
+        Returns:
+            asyncio.Task | concurrent.futures.Future: The subscription, which can be cancelled to end it.
         """
+        if executor is not None:
+            cb = executor.wrap(cb)
         if self._async:
-            self.tasks.append(
-                asyncio.create_task(
-                    self.process_property_update_notifications(
-                        cb, property_blocklist)
-                )
+            task = asyncio.create_task(
+                self.process_property_update_notifications(
+                    cb, property_blocklist, on_subscribed=on_subscribed)
             )
+            self.tasks.append(task)
+            return task
         else:
-            asyncio.run_coroutine_threadsafe(
+            return asyncio.run_coroutine_threadsafe(
                 self.process_property_update_notifications(
-                    cb, property_blocklist),
+                    cb, property_blocklist, on_subscribed=on_subscribed),
                 self.loop,
             )
 
@@ -457,31 +563,35 @@ class NotificationController:
                 stream = stub.SubscribeToTrackChanges(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._wait_for_subscription(stream)
+                self._track_matching.set()
                 async for notification in stream:
                     if not self._parent.audiograph_event_queue:
                         continue
 
-                    # match with events
-                    for ev in self._parent.audiograph_event_queue:
+                    # match with events, only the matching event is removed from the queue
+                    obj_info = None
+                    for ev in self._parent.audiograph_event_queue[:]:
                         if ev.action == notification.action:
                             match notification.action:
                                 case 1:
-                                    if (
-                                        obj_info
-                                        := self._parent.audio_graph.get_track_info(
+                                    if obj_info is None:
+                                        obj_info = self._parent.audio_graph.get_track_info(
                                             notification.track.id
                                         )
-                                    ):
-                                        if obj_info.name == ev.name:
-                                            ev.sushi_id = obj_info.id
-                                            ev.data = obj_info
-                                            ev.set()
+                                    if obj_info and obj_info.name == ev.name:
+                                        ev.sushi_id = obj_info.id
+                                        ev.data = obj_info
+                                        ev.set()
                                 case 2:
                                     if notification.track.id == ev.sushi_id:
                                         ev.set()
                                 case _:
                                     print(f"Got an unmatchable track update notification: {notification}")
-                            self._parent.audiograph_event_queue.remove(ev)
+                                    break
+                            if ev.is_set():
+                                self._parent.audiograph_event_queue.remove(ev)
+                                break
         except grpc.RpcError as e:
             sushierrors.grpc_error_handling(e)
         except AttributeError:
@@ -497,35 +607,39 @@ class NotificationController:
                 stream = stub.SubscribeToProcessorChanges(
                     self._sushi_proto.GenericVoidValue()
                 )
+                await self._wait_for_subscription(stream)
+                self._processor_matching.set()
                 async for notification in stream:
                     if not self._parent.processor_event_queue:
                         continue
 
-                    # match with events
+                    # match with events, only the matching event is removed from the queue
+                    proc_info = None
                     for ev in self._parent.processor_event_queue[:]:
                         if ev.action == notification.action:
                             match notification.action:
                                 case 1:
-                                    if (
-                                        proc_info
-                                        := self._parent.audio_graph.get_processor_info(
+                                    if proc_info is None:
+                                        proc_info = self._parent.audio_graph.get_processor_info(
                                             notification.processor.id
                                         )
-                                    ):
-                                        if proc_info.name == ev.name:
-                                            proc_params = self._parent.parameters.get_processor_parameters(
-                                                processor_identifier=proc_info.id
-                                            )
-                                            ev.data = proc_info
-                                            ev.params = proc_params
-                                            ev.sushi_id = proc_info.id
-                                            ev.set()
+                                    if proc_info and proc_info.name == ev.name:
+                                        proc_params = self._parent.parameters.get_processor_parameters(
+                                            processor_identifier=proc_info.id
+                                        )
+                                        ev.data = proc_info
+                                        ev.params = proc_params
+                                        ev.sushi_id = proc_info.id
+                                        ev.set()
                                 case 2:
                                     if notification.processor.id == ev.sushi_id:
                                         ev.set()
                                 case _:
                                     print(f"Got an unmatchable processor update notification: {notification}")
-                            self._parent.processor_event_queue.remove(ev)
+                                    break
+                            if ev.is_set():
+                                self._parent.processor_event_queue.remove(ev)
+                                break
         except grpc.RpcError as e:
             sushierrors.grpc_error_handling(e)
         except AttributeError:
@@ -534,6 +648,14 @@ class NotificationController:
                 f"Should be a string containing the IP address and port to Sushi"
             )
 
+    async def expire_unmatched_events(self, interval: float = 1.0) -> None:
+        """Periodically removes the events that were never matched by a notification from the event queues."""
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            expire_events(self._parent.audiograph_event_queue, now)
+            expire_events(self._parent.processor_event_queue, now)
+
     async def match_parameter_event_notification(self) -> None: ...
 
     async def match_property_event_notification(self) -> None: ...
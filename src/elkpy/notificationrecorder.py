@@ -0,0 +1,290 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from . import grpc_gen
+
+if TYPE_CHECKING:
+    from .fakesushi import FakeSushi
+    from .notificationcontroller import NotificationController
+
+MAGIC = b"ELKNOTIF"
+FORMAT_VERSION = 1
+
+# Notification kind: the message type streamed by sushi. The position of a kind is its code in recordings.
+KINDS = {"transport": "TransportUpdate",
+         "timing": "CpuTimings",
+         "track": "TrackUpdate",
+         "processor": "ProcessorUpdate",
+         "parameter": "ParameterUpdate",
+         "property": "PropertyValue"}
+
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+_SUBSCRIBE_METHODS = {"transport": "subscribe_to_transport_changes",
+                      "timing": "subscribe_to_timing_updates",
+                      "track": "subscribe_to_track_changes",
+                      "processor": "subscribe_to_processor_changes",
+                      "parameter": "subscribe_to_parameter_updates",
+                      "property": "subscribe_to_property_updates"}
+
+
+#################
+# File encoding #
+#################
+# A recording is MAGIC, the format version as a varint, then one record per notification: the kind code, the time
+# in nanoseconds since the previous record and the length of the serialized message as varints, then the message.
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _decode_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+#########################
+# Notification recorder #
+#########################
+
+
+class NotificationRecorder(object):
+    """
+    A class writing sushi notifications to a compact file, with the monotonic time at which they were received, to
+    replay them later with NotificationReplayer.
+
+    Attributes:
+        path (str): The path of the recording.
+        record_count (int): The number of notifications written.
+    """
+
+    def __init__(self, path: str):
+        """
+        The constructor for the NotificationRecorder class. Creates or truncates the file.
+
+        Parameters:
+            path (str): The path of the recording.
+        """
+        self.path = path
+        self.record_count = 0
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + _encode_varint(FORMAT_VERSION))
+        self._last_time = time.monotonic_ns()
+
+    def record(self, kind: str, notification) -> None:
+        """
+        Write a notification. Thread-safe.
+
+        Parameters:
+            kind (str): One of KINDS.
+            notification: The notification message, as received from sushi.
+        """
+        code = _KIND_CODES[kind]
+        data = notification.SerializeToString()
+        with self._lock:
+            if self._file.closed:
+                return
+            now = time.monotonic_ns()
+            self._file.write(_encode_varint(code) + _encode_varint(now - self._last_time) +
+                             _encode_varint(len(data)) + data)
+            self._last_time = now
+            self.record_count += 1
+
+    def attach(self, notifications: "NotificationController", kinds=None) -> None:
+        """
+        Subscribe to notification streams of a NotificationController and record all their notifications, until
+        close() is called.
+
+        Parameters:
+            notifications (NotificationController): The controller, e.g. SushiController.notifications.
+            kinds (Iterable[str] | None): The kinds to record, all of KINDS if None.
+        """
+        for kind in kinds if kinds is not None else KINDS:
+            subscribe = getattr(notifications, _SUBSCRIBE_METHODS[kind])
+            self._subscriptions.append(subscribe(lambda notification, kind=kind: self.record(kind, notification)))
+
+    def flush(self) -> None:
+        """
+        Write the buffered records to the file.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self) -> None:
+        """
+        End the subscriptions made by attach() and close the file.
+        """
+        for subscription in self._subscriptions:
+            subscription.cancel()
+        self._subscriptions.clear()
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+#########################
+# Notification replayer #
+#########################
+
+
+class NotificationReplayer(object):
+    """
+    A class reading a recording made by NotificationRecorder and feeding its notifications to callbacks or to a
+    FakeSushi, with their original timing or accelerated.
+    """
+
+    def __init__(self, path: str, sushi_proto_def: str = "/usr/share/sushi/sushi_rpc.proto"):
+        """
+        The constructor for the NotificationReplayer class. Reads the whole recording.
+
+        Parameters:
+            path (str): The path of the recording.
+            sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
+        """
+        self._sushi_proto, _ = grpc_gen.modules_from_proto(sushi_proto_def)
+        with open(path, "rb") as f:
+            self._data = f.read()
+        if not self._data.startswith(MAGIC):
+            raise ValueError("{} is not a notification recording".format(path))
+        version, self._start = _decode_varint(self._data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported notification recording version {} in {}".format(version, path))
+        self._message_types = [getattr(self._sushi_proto, name) for name in KINDS.values()]
+        self._kinds = list(KINDS)
+
+    def __iter__(self) -> Iterator[tuple[float, str, object]]:
+        """
+        Iterate over the notifications. A record truncated by an interrupted recording ends the iteration.
+
+        Returns:
+            Iterator[tuple[float, str, object]]: (time in seconds since the first notification, kind, notification).
+        """
+        data = self._data
+        pos = self._start
+        elapsed = 0
+        first = None
+        while pos < len(data):
+            try:
+                code, pos = _decode_varint(data, pos)
+                delta, pos = _decode_varint(data, pos)
+                size, pos = _decode_varint(data, pos)
+            except IndexError:
+                return
+            if pos + size > len(data):
+                return
+            elapsed += delta
+            first = elapsed if first is None else first
+            notification = self._message_types[code]()
+            notification.ParseFromString(data[pos:pos + size])
+            pos += size
+            yield (elapsed - first) / 1e9, self._kinds[code], notification
+
+    def replay(self, callbacks: dict[str, Callable], speed: float = 1.0) -> int:
+        """
+        Call the callbacks with the recorded notifications from the calling thread, in order and paced like the
+        recording. Notifications of kinds without a callback are skipped.
+
+        Parameters:
+            callbacks (dict[str, Callable]): The callback for each kind, called with the notification.
+            speed (float): The speed factor, e.g. 10 for 10 times faster than recorded, or 0 for as fast as possible.
+
+        Returns:
+            int: The number of notifications passed to callbacks.
+        """
+        count = 0
+        start = time.monotonic()
+        for timestamp, kind, notification in self:
+            if kind not in callbacks:
+                continue
+            if speed > 0:
+                delay = start + timestamp / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            callbacks[kind](notification)
+            count += 1
+        return count
+
+    async def replay_async(self, callbacks: dict[str, Callable], speed: float = 1.0) -> int:
+        """
+        Like replay(), for asyncio programs. Coroutine callbacks are awaited.
+
+        Parameters:
+            callbacks (dict[str, Callable]): The callback or coroutine function for each kind.
+            speed (float): The speed factor, or 0 for as fast as possible.
+
+        Returns:
+            int: The number of notifications passed to callbacks.
+        """
+        count = 0
+        start = time.monotonic()
+        for timestamp, kind, notification in self:
+            if kind not in callbacks:
+                continue
+            if speed > 0:
+                delay = start + timestamp / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if asyncio.iscoroutinefunction(callbacks[kind]):
+                await callbacks[kind](notification)
+            else:
+                callbacks[kind](notification)
+            count += 1
+        return count
+
+    def replay_to(self, fake: "FakeSushi", speed: float = 1.0, kinds=None) -> int:
+        """
+        Send the recorded notifications to the clients subscribed to a FakeSushi, so a whole client application
+        receives them as it would from sushi.
+
+        Parameters:
+            fake (FakeSushi): The started fake.
+            speed (float): The speed factor, or 0 for as fast as possible.
+            kinds (Iterable[str] | None): The kinds to replay, all if None.
+
+        Returns:
+            int: The number of notifications sent.
+        """
+        callbacks = {kind: lambda notification, kind=kind: fake.publish_notification(kind, notification)
+                     for kind in (kinds if kinds is not None else KINDS)}
+        return self.replay(callbacks, speed)
@@ -0,0 +1,86 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+
+###########################
+# Batched parameter write #
+###########################
+
+
+def group_parameter_values(
+    processor_ids: Iterable[int],
+    parameter_ids: Iterable[int],
+    values: Iterable[float],
+) -> dict[int, list[tuple[int, float]]]:
+    """
+    Group parallel sequences of processor ids, parameter ids and values per processor.
+
+    Parameters:
+        processor_ids (Iterable[int]): The id of the processor owning each parameter.
+        parameter_ids (Iterable[int]): The id of each parameter.
+        values (Iterable[float]): The normalised value to write to each parameter.
+
+    Returns:
+        dict[int, list[tuple[int, float]]]: A mapping from processor id to a list of (parameter id, value) tuples,
+        in the order they were given.
+    """
+    batches: dict[int, list[tuple[int, float]]] = {}
+    for processor_id, parameter_id, value in zip(processor_ids, parameter_ids, values):
+        batches.setdefault(int(processor_id), []).append(
+            (int(parameter_id), float(value))
+        )
+    return batches
+
+
+def write_parameter_batch(
+    controller: "SushiController",
+    processor_ids: Iterable[int],
+    parameter_ids: Iterable[int],
+    values: Iterable[float],
+) -> int:
+    """
+    Write a set of parameter values to sushi using as few RPCs as possible.
+
+    Sushi has no call to set parameters on several processors at once, so the values are grouped per
+    processor and each processor receives a single update: set_parameter_value() if only one of its
+    parameters changes, otherwise a partial set_processor_state() carrying all of them.
+
+    Parameters:
+        controller (SushiController): The controller to write the values through.
+        processor_ids (Iterable[int]): The id of the processor owning each parameter.
+        parameter_ids (Iterable[int]): The id of each parameter.
+        values (Iterable[float]): The normalised value to write to each parameter.
+
+    Returns:
+        int: The number of RPCs issued.
+    """
+    batches = group_parameter_values(processor_ids, parameter_ids, values)
+    for processor_id, parameter_values in batches.items():
+        if len(parameter_values) == 1:
+            parameter_id, value = parameter_values[0]
+            controller.parameters.set_parameter_value(processor_id, parameter_id, value)
+        else:
+            controller.audio_graph.set_discrete_processor_state(
+                processor_id, bypassed=None, parameter_values=parameter_values
+            )
+    return len(batches)
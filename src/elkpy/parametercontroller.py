@@ -16,12 +16,18 @@ __copyright__ = """
 """
 __license__ = "GPL-3.0"
 
+import time
+
 import grpc
 
 from . import sushierrors
 from . import grpc_gen
 from . import sushi_info_types as info_types
-from typing import List
+from .valuecache import NORMALIZED, DOMAIN, STRING
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .valuecache import ParameterValueCache, PropertyValueCache
 
 ####################################
 # Sushi parameter controller class #
@@ -53,7 +59,29 @@ class ParameterController:
 
         self._sushi_proto, self._sushi_grpc = grpc_gen.modules_from_proto(sushi_proto_def)
         self._stub = self._sushi_grpc.ParameterControllerStub(channel)
+        self._value_cache = None
+        self._property_cache = None
+
+    def set_value_cache(self, cache: "ParameterValueCache | None") -> None:
+        """
+        Serve parameter value reads from a cache when it has them, see SushiController.enable_parameter_cache().
 
+        Parameters:
+            cache (ParameterValueCache | None): The cache, attached to the notifications of the same sushi, or None
+                to always read from sushi.
+        """
+        self._value_cache = cache
+
+    def set_property_cache(self, cache: "PropertyValueCache | None") -> None:
+        """
+        Serve property value and property list reads from a cache when it has them, see
+        SushiController.enable_property_cache().
+
+        Parameters:
+            cache (PropertyValueCache | None): The cache, attached to the notifications of the same sushi, or None
+                to always read from sushi.
+        """
+        self._property_cache = cache
 
     def get_track_parameters(self, track_identifier: int) -> List[info_types.ParameterInfo]:
         """
@@ -156,11 +184,19 @@ class ParameterController:
         Returns:
             float: The value of the parameter matching the id.
         """
+        cache = self._value_cache
+        if cache is not None:
+            value = cache.lookup(processor_identifier, parameter_identifier, NORMALIZED)
+            if value is not None:
+                return value
+            read_time = time.monotonic()
         try:
             response = self._stub.GetParameterValue(self._sushi_proto.ParameterIdentifier(
                 processor_id = processor_identifier,
                 parameter_id = parameter_identifier
             ))
+            if cache is not None:
+                cache.store(processor_identifier, parameter_identifier, NORMALIZED, response.value, read_time)
             return response.value
 
         except grpc.RpcError as e:
@@ -177,11 +213,19 @@ class ParameterController:
         Returns:
             float: The normalised value of the parameter matching the id.
         """
+        cache = self._value_cache
+        if cache is not None:
+            value = cache.lookup(processor_identifier, parameter_identifier, DOMAIN)
+            if value is not None:
+                return value
+            read_time = time.monotonic()
         try:
             response = self._stub.GetParameterValueInDomain(self._sushi_proto.ParameterIdentifier(
                 processor_id = processor_identifier,
                 parameter_id = parameter_identifier
             ))
+            if cache is not None:
+                cache.store(processor_identifier, parameter_identifier, DOMAIN, response.value, read_time)
             return response.value
 
         except grpc.RpcError as e:
@@ -198,11 +242,19 @@ class ParameterController:
         Returns:
             str: The value as a string of the parameter matching the id.
         """
+        cache = self._value_cache
+        if cache is not None:
+            value = cache.lookup(processor_identifier, parameter_identifier, STRING)
+            if value is not None:
+                return value
+            read_time = time.monotonic()
         try:
             response = self._stub.GetParameterValueAsString(self._sushi_proto.ParameterIdentifier(
                 processor_id = processor_identifier,
                 parameter_id = parameter_identifier
             ))
+            if cache is not None:
+                cache.store(processor_identifier, parameter_identifier, STRING, response.value, read_time)
             return response.value
 
         except grpc.RpcError as e:
@@ -216,6 +268,9 @@ class ParameterController:
             processor_identifier (int): The id of the processor that has the parameter to be changed.
             parameter_identifier (int): The id of the property to set the value of.
         """
+        if self._value_cache is not None:
+            # Before sending, so the notification of the new value isn't dropped
+            self._value_cache.invalidate(processor_identifier, parameter_identifier)
         try:
             self._stub.SetParameterValue(self._sushi_proto.ParameterValue(
                 parameter = self._sushi_proto.ParameterIdentifier(
@@ -238,6 +293,11 @@ class ParameterController:
         Returns:
             List[info_types.PropertyInfo]: A list of the info of the properties assigned to the track matching the id.
         """
+        cache = self._property_cache
+        if cache is not None:
+            property_info_list = cache.lookup_infos(track_identifier)
+            if property_info_list is not None:
+                return property_info_list
         try:
             response = self._stub.GetTrackProperties(self._sushi_proto.TrackIdentifier(
                 id = track_identifier
@@ -247,6 +307,8 @@ class ParameterController:
             for property_info in response.properties:
                 property_info_list.append(info_types.PropertyInfo(property_info))
 
+            if cache is not None:
+                cache.store_infos(track_identifier, property_info_list)
             return property_info_list
 
         except grpc.RpcError as e:
@@ -262,6 +324,11 @@ class ParameterController:
         Returns:
             List[info_types.PropertyInfo]: A list of the properties available to the processor matching the id.
         """
+        cache = self._property_cache
+        if cache is not None:
+            property_info_list = cache.lookup_infos(processor_identifier)
+            if property_info_list is not None:
+                return property_info_list
         try:
             response = self._stub.GetProcessorProperties(self._sushi_proto.ProcessorIdentifier(
                 id = processor_identifier
@@ -271,6 +338,8 @@ class ParameterController:
             for property_info in response.properties:
                 property_info_list.append(info_types.PropertyInfo(property_info))
 
+            if cache is not None:
+                cache.store_infos(processor_identifier, property_info_list)
             return property_info_list
 
         except grpc.RpcError as e:
@@ -329,11 +398,19 @@ class ParameterController:
         Returns:
             str: The value of the property matching the id.
         """
+        cache = self._property_cache
+        if cache is not None:
+            value = cache.lookup(processor_identifier, property_identifier)
+            if value is not None:
+                return value
+            read_time = time.monotonic()
         try:
             response = self._stub.GetPropertyValue(self._sushi_proto.PropertyIdentifier(
                 processor_id = processor_identifier,
                 property_id = property_identifier
             ))
+            if cache is not None:
+                cache.store(processor_identifier, property_identifier, response.value, read_time)
             return response.value
 
         except grpc.RpcError as e:
@@ -348,6 +425,9 @@ class ParameterController:
             property_identifier (int): The id of the property to set the value of.
             value (string) : The new value to assign to the property
         """
+        if self._property_cache is not None:
+            # Before sending, so the notification of the new value isn't dropped
+            self._property_cache.invalidate(processor_identifier, property_identifier)
         try:
             self._stub.SetPropertyValue(self._sushi_proto.PropertyValue(
                 property = self._sushi_proto.PropertyIdentifier(
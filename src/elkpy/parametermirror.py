@@ -0,0 +1,395 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+
+def _default_path() -> str:
+    # Per user, as /dev/shm and the temporary directory are shared by all users
+    name = "elkpy-parameters-{}".format(os.getuid()) if hasattr(os, "getuid") else "elkpy-parameters"
+    return os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), name)
+
+
+DEFAULT_PATH = _default_path()
+DEFAULT_CAPACITY = 4096
+
+MAGIC = b"ELKPMIRR"
+FORMAT_VERSION = 2
+
+# Times a reader retries a value being written before giving up, a writer never holds a slot longer than a store
+MAX_READ_RETRIES = 100000
+
+##########
+# Layout #
+##########
+# The file starts with a header: magic, version, capacity, generation, number of slots used and the sequence number
+# of the slot table, padded so the values stay 8 byte aligned. Then comes the table of (processor id, parameter id)
+# keys of the slots, in the order they were added, followed by the slots: a sequence number and the normalized value.
+#
+# Sequence numbers are seqlocks: the writer makes them odd while it changes what they protect and even when done,
+# so a reader knows a read is consistent if the number was even and unchanged around it. They wrap around at 2**32,
+# which keeps them even, so comparing them for equality stays correct.
+#
+# A writer replacing the file of a previous one gives its file the next generation, then writes that generation in
+# the header of the replaced file, so readers still mapping it know to map the new one.
+
+_HEADER = struct.Struct("<8sIIIII4x")
+_KEY = struct.Struct("<II")
+_UINT32 = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_SLOT_SIZE = 16
+_GENERATION_OFFSET = 20
+_COUNT_OFFSET = 24
+_TABLE_SEQUENCE_OFFSET = 28
+_SEQUENCE_MASK = 0xFFFFFFFF
+
+
+def _file_size(capacity: int) -> int:
+    return _HEADER.size + capacity * (_KEY.size + _SLOT_SIZE)
+
+
+###########################
+# Parameter mirror writer #
+###########################
+
+
+class ParameterMirrorWriter(object):
+    """
+    A class keeping the normalized value of every parameter of sushi in a memory mapped file, updated from
+    parameter notifications, so that any number of local processes can read them with ParameterMirror without an
+    rpc per read.
+
+    Slots are added for parameters as they are first seen and are never removed, so the parameters of deleted
+    processors keep their last value. Once the capacity is reached, new parameters are counted in `dropped` instead.
+
+    Attributes:
+        path (str): The path of the mapped file.
+        dropped (int): The number of updates of parameters that didn't fit.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, capacity: int = DEFAULT_CAPACITY):
+        """
+        The constructor for the ParameterMirrorWriter class. Replaces any file at path, and makes the readers of a
+        previous writer's file there switch to this one, unless that file is another user's or writable by others.
+
+        Parameters:
+            path (str): The path of the file to map, preferably on a tmpfs such as /dev/shm.
+            capacity (int): The maximum number of parameters.
+        """
+        self.path = path
+        self.dropped = 0
+        self._capacity = capacity
+        self._slots: dict[tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+        self._subscriptions = []
+
+        replaced = _map_previous(path)
+        generation = 0
+        if replaced is not None:
+            generation = (_UINT32.unpack_from(replaced, _GENERATION_OFFSET)[0] + 1) & _SEQUENCE_MASK
+
+        # Readers opening the path never see a file without its header
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            os.ftruncate(fd, _file_size(capacity))
+            stat = os.fstat(fd)
+            self._file_id = (stat.st_dev, stat.st_ino)
+            self._map = mmap.mmap(fd, _file_size(capacity))
+            _HEADER.pack_into(self._map, 0, MAGIC, FORMAT_VERSION, capacity, generation, 0, 0)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            if replaced is not None:
+                replaced.close()
+            raise
+        finally:
+            os.close(fd)
+        if replaced is not None:
+            _UINT32.pack_into(replaced, _GENERATION_OFFSET, generation)
+            replaced.close()
+        self._slot_offset = _HEADER.size + capacity * _KEY.size
+
+    def update(self, processor_id: int, parameter_id: int, value: float) -> None:
+        """
+        Store the value of a parameter. Thread-safe.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            parameter_id (int): The id of the parameter.
+            value (float): The normalized value.
+        """
+        key = (processor_id, parameter_id)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._add_slot(key)
+                if slot is None:
+                    self.dropped += 1
+                    return
+            offset = self._slot_offset + slot * _SLOT_SIZE
+            sequence = _UINT32.unpack_from(self._map, offset)[0]
+            _UINT32.pack_into(self._map, offset, (sequence + 1) & _SEQUENCE_MASK)
+            _VALUE.pack_into(self._map, offset + 8, value)
+            _UINT32.pack_into(self._map, offset, (sequence + 2) & _SEQUENCE_MASK)
+
+    def update_many(self, values: Iterable[tuple[int, int, float]]) -> None:
+        """
+        Store the values of several parameters.
+
+        Parameters:
+            values (Iterable[tuple[int, int, float]]): (processor id, parameter id, normalized value) tuples.
+        """
+        for processor_id, parameter_id, value in values:
+            self.update(processor_id, parameter_id, value)
+
+    def populate(self, controller: "SushiController") -> int:
+        """
+        Read the current values of all parameters of all tracks and processors from sushi, with one rpc per track
+        and processor.
+
+        Parameters:
+            controller (SushiController): The controller of the sushi instance.
+
+        Returns:
+            int: The number of parameters stored.
+        """
+        ids = [t.id for t in controller.audio_graph.get_all_tracks()]
+        ids += [p.id for p in controller.audio_graph.get_all_processors()]
+        count = 0
+        for processor_id in ids:
+            state = controller.audio_graph.get_processor_state(processor_id)
+            self.update_many((processor_id, parameter_id, value) for parameter_id, value in state.parameters)
+            count += len(state.parameters)
+        return count
+
+    def attach(self, notifications) -> None:
+        """
+        Keep the values up to date from parameter notifications, until close() is called.
+
+        Parameters:
+            notifications: A NotificationController, e.g. SushiController.notifications, or a
+                BrokerNotificationClient.
+        """
+        self._subscriptions.append(notifications.subscribe_to_parameter_updates(self._on_update))
+
+    def close(self) -> None:
+        """
+        End the subscriptions and remove the file, unless another writer replaced it. Readers that have it mapped
+        keep the last values.
+        """
+        for subscription in self._subscriptions:
+            subscription.cancel()
+        self._subscriptions.clear()
+        with self._lock:
+            if not self._map.closed:
+                self._map.close()
+                try:
+                    stat = os.stat(self.path)
+                    if (stat.st_dev, stat.st_ino) == self._file_id:
+                        os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _on_update(self, notification) -> None:
+        self.update(notification.parameter.processor_id, notification.parameter.parameter_id,
+                    notification.normalized_value)
+
+    def _add_slot(self, key: tuple[int, int]) -> int | None:
+        slot = len(self._slots)
+        if slot == self._capacity:
+            return None
+        sequence = _UINT32.unpack_from(self._map, _TABLE_SEQUENCE_OFFSET)[0]
+        _UINT32.pack_into(self._map, _TABLE_SEQUENCE_OFFSET, (sequence + 1) & _SEQUENCE_MASK)
+        _KEY.pack_into(self._map, _HEADER.size + slot * _KEY.size, *key)
+        _UINT32.pack_into(self._map, _COUNT_OFFSET, slot + 1)
+        _UINT32.pack_into(self._map, _TABLE_SEQUENCE_OFFSET, (sequence + 2) & _SEQUENCE_MASK)
+        self._slots[key] = slot
+        return slot
+
+
+def _map_previous(path: str) -> mmap.mmap | None:
+    """
+    Returns:
+        mmap.mmap | None: A writable mapping of the mirror file at path, None if there is no valid one or it could
+            have been written by another user.
+    """
+    try:
+        with open(path, "r+b") as f:
+            if not _is_private(os.fstat(f.fileno())):
+                return None
+            mapped = mmap.mmap(f.fileno(), 0)
+    except (OSError, ValueError):
+        # Missing, not writable or empty
+        return None
+    if len(mapped) < _HEADER.size or _HEADER.unpack_from(mapped, 0)[:2] != (MAGIC, FORMAT_VERSION):
+        mapped.close()
+        return None
+    return mapped
+
+
+def _is_private(stat: os.stat_result) -> bool:
+    if not hasattr(os, "getuid"):
+        return True
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+####################
+# Parameter mirror #
+####################
+
+
+class ParameterMirror(object):
+    """
+    A class reading the parameter values kept by a ParameterMirrorWriter, possibly in another process.
+
+    When a new writer replaces the file, e.g. after the writing process restarted, the mirror maps the new file on
+    its next read.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        The constructor for the ParameterMirror class.
+
+        Parameters:
+            path (str): The path of the file of the writer.
+
+        Raises:
+            PermissionError: If the file is owned by another user, or writable by others.
+            ValueError: If the file is not a parameter mirror.
+        """
+        self.path = path
+        self._map: mmap.mmap | None = None
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as f:
+            if not _is_private(os.fstat(f.fileno())):
+                raise PermissionError("{} is owned by another user or writable by others".format(self.path))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, capacity, generation, _, _ = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError("{} is not a parameter mirror".format(self.path))
+        if version != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError("Unsupported parameter mirror version {} in {}".format(version, self.path))
+        if self._map is not None:
+            self._map.close()
+        self._map = mapped
+        self._generation = generation
+        self._slot_offset = _HEADER.size + capacity * _KEY.size
+        self._offsets: dict[tuple[int, int], int] = {}
+        self._table_sequence = -1
+
+    def _check_generation(self) -> None:
+        if _UINT32.unpack_from(self._map, _GENERATION_OFFSET)[0] != self._generation:
+            # A new writer replaced the file
+            self._open()
+
+    def get_parameter_value(self, processor_identifier: int, parameter_identifier: int) -> float:
+        """
+        Get the normalized value of a parameter, as ParameterController.get_parameter_value() would.
+
+        Parameters:
+            processor_identifier (int): The id of the processor or track.
+            parameter_identifier (int): The id of the parameter.
+
+        Returns:
+            float: The value.
+        """
+        self._check_generation()
+        key = (processor_identifier, parameter_identifier)
+        offset = self._offsets.get(key)
+        if offset is None:
+            self._refresh()
+            offset = self._offsets.get(key)
+            if offset is None:
+                raise KeyError("No value for parameter {} of processor {}".format(parameter_identifier,
+                                                                                  processor_identifier))
+        return self._read(offset)
+
+    def __contains__(self, key) -> bool:
+        self._refresh()
+        return key in self._offsets
+
+    def keys(self) -> list[tuple[int, int]]:
+        """
+        Returns:
+            list[tuple[int, int]]: The (processor id, parameter id) of all mirrored parameters.
+        """
+        self._refresh()
+        return list(self._offsets)
+
+    def get_all_values(self) -> dict[tuple[int, int], float]:
+        """
+        Returns:
+            dict[tuple[int, int], float]: The values of all mirrored parameters, by (processor id, parameter id).
+        """
+        self._refresh()
+        return {key: self._read(offset) for key, offset in self._offsets.items()}
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read(self, offset: int) -> float:
+        mapped = self._map
+        for _ in range(MAX_READ_RETRIES):
+            before = _UINT32.unpack_from(mapped, offset)[0]
+            value = _VALUE.unpack_from(mapped, offset + 8)[0]
+            if not before & 1 and _UINT32.unpack_from(mapped, offset)[0] == before:
+                return value
+        raise TimeoutError("The parameter mirror writer didn't finish a write")
+
+    def _refresh(self) -> None:
+        """
+        Read the slots added since the last refresh. Slots are only ever appended, so known offsets stay valid.
+        """
+        self._check_generation()
+        for _ in range(MAX_READ_RETRIES):
+            sequence = _UINT32.unpack_from(self._map, _TABLE_SEQUENCE_OFFSET)[0]
+            if sequence == self._table_sequence:
+                return
+            if sequence & 1:
+                continue
+            count = _UINT32.unpack_from(self._map, _COUNT_OFFSET)[0]
+            keys = [_KEY.unpack_from(self._map, _HEADER.size + slot * _KEY.size) for slot in range(count)]
+            if _UINT32.unpack_from(self._map, _TABLE_SEQUENCE_OFFSET)[0] == sequence:
+                self._offsets = {key: self._slot_offset + slot * _SLOT_SIZE for slot, key in enumerate(keys)}
+                self._table_sequence = sequence
+                return
+        raise TimeoutError("The parameter mirror writer didn't finish adding parameters")
@@ -0,0 +1,308 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, TYPE_CHECKING
+
+from . import sushierrors
+from . import sushi_info_types as info_types
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+PARAMETER = "parameter"
+PROPERTY = "property"
+
+SEARCH_FIELDS = ("name", "label", "unit")
+
+# Separates the entries of the searched text, never part of a name, label or unit
+_SEPARATOR = "\0"
+
+
+class SearchEntry(object):
+    """
+    A parameter or property found by ParameterSearchIndex.search().
+
+    Attributes:
+        kind (str): PARAMETER or PROPERTY.
+        processor_id (int): The id of the processor or track owning it.
+        processor_name (str): The name of that processor or track.
+        id (int): The id of the parameter or property.
+        name (str): Its name.
+        label (str): Its label.
+        unit (str): The unit of a parameter, '' for properties.
+        type (info_types.ParameterType | None): The type of a parameter, None for properties.
+    """
+    __slots__ = ("kind", "processor_id", "processor_name", "id", "name", "label", "unit", "type")
+
+    def __init__(self, kind: str, processor_id: int, processor_name: str,
+                 info: info_types.ParameterInfo | info_types.PropertyInfo):
+        self.kind = kind
+        self.processor_id = processor_id
+        self.processor_name = processor_name
+        self.id = info.id
+        self.name = info.name
+        self.label = info.label
+        self.unit = getattr(info, "unit", "")
+        self.type = getattr(info, "type", None)
+
+    def __repr__(self):
+        return "SearchEntry({}, {}.{}, id={})".format(self.kind, self.processor_name, self.name, self.id)
+
+
+class _SearchTables(object):
+    """
+    The lookup structures of one version of the index: per field, the lowercase values of all entries joined into
+    one string for substring search, and sorted for prefix search.
+    """
+
+    def __init__(self, entries: list[SearchEntry]):
+        self.entries = entries
+        self.text = {}
+        self.starts = {}
+        self.sorted = {}
+        for field in SEARCH_FIELDS:
+            values = [getattr(e, field).lower() for e in entries]
+            starts = []
+            offset = 0
+            for value in values:
+                starts.append(offset)
+                offset += len(value) + 1
+            self.text[field] = _SEPARATOR.join(values)
+            self.starts[field] = starts
+            self.sorted[field] = sorted((v, i) for i, v in enumerate(values) if v)
+
+    def find(self, field: str, text: str) -> Iterable[int]:
+        haystack = self.text[field]
+        starts = self.starts[field]
+        position = haystack.find(text)
+        while position >= 0:
+            i = bisect.bisect_right(starts, position) - 1
+            yield i
+            if i + 1 == len(starts):
+                break
+            # Continue with the next entry
+            position = haystack.find(text, starts[i + 1])
+
+    def find_prefix(self, field: str, text: str) -> Iterable[int]:
+        values = self.sorted[field]
+        for j in range(bisect.bisect_left(values, (text,)), len(values)):
+            value, i = values[j]
+            if not value.startswith(text):
+                break
+            yield i
+
+
+##########################
+# Parameter search index #
+##########################
+
+
+class ParameterSearchIndex(object):
+    """
+    An in-memory index of the parameters and properties of all tracks and processors of a sushi instance, searchable
+    by name, label and unit.
+
+    build() reads the parameter and property lists of all processors concurrently. Once attach() is called, the
+    lists of added processors and tracks are read as they are notified, and those of deleted ones are removed.
+    Searches only use memory: the entries are joined into one lowercase string per field, so a substring search is a
+    few str.find() calls, and a prefix search is a bisection of the sorted values.
+    """
+
+    def __init__(self, controller: "SushiController", max_workers: int = 8):
+        """
+        The constructor for the ParameterSearchIndex class.
+
+        Parameters:
+            controller (SushiController): The controller of the sushi instance to index.
+            max_workers (int): The maximum number of rpcs sent at the same time.
+        """
+        self._controller = controller
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._processors: dict[int, list[SearchEntry]] = {}
+        # Increased when a processor is deleted, so a list read before the deletion isn't added back
+        self._generations: dict[int, int] = {}
+        self._tables: _SearchTables | None = None
+        self._subscriptions = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    def build(self) -> int:
+        """
+        Read the parameters and properties of all tracks and processors, replacing anything indexed before.
+
+        Returns:
+            int: The number of indexed entries.
+        """
+        audio_graph = self._controller.audio_graph
+        tracks = audio_graph.get_all_tracks()
+        track_ids = {t.id for t in tracks}
+        targets = [(t.id, t.name, True) for t in tracks]
+        targets += [(p.id, p.name, False) for p in audio_graph.get_all_processors() if p.id not in track_ids]
+        with self._lock:
+            generations = [self._generations.get(t[0], 0) for t in targets]
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            lists = list(pool.map(lambda t: self._read_entries(*t), targets))
+
+        with self._lock:
+            self._processors = {}
+            for (processor_id, _, _), generation, entries in zip(targets, generations, lists):
+                if entries is not None and self._generations.get(processor_id, 0) == generation:
+                    self._processors[processor_id] = entries
+            self._tables = None
+            return sum(len(e) for e in self._processors.values())
+
+    def attach(self, notifications) -> None:
+        """
+        Keep the index up to date with the processors and tracks added and deleted.
+
+        Parameters:
+            notifications: A NotificationController, e.g. SushiController.notifications, or a
+                BrokerNotificationClient.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._subscriptions = [notifications.subscribe_to_processor_changes(self.on_processor_update),
+                               notifications.subscribe_to_track_changes(self.on_track_update)]
+
+    def detach(self) -> None:
+        """
+        End the subscriptions. The index keeps its entries.
+        """
+        for subscription in self._subscriptions:
+            subscription.cancel()
+        self._subscriptions = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def search(self,
+               text: str,
+               prefix: bool = False,
+               fields: Iterable[str] = ("name", "label"),
+               kind: str | None = None,
+               parameter_type: info_types.ParameterType | None = None,
+               processor_id: int | None = None,
+               limit: int | None = None) -> list[SearchEntry]:
+        """
+        Find parameters and properties, ignoring case.
+
+        Parameters:
+            text (str): The text to look for.
+            prefix (bool): Only match the values starting with text, instead of containing it.
+            fields (Iterable[str]): The fields to search, among "name", "label" and "unit".
+            kind (str | None): PARAMETER or PROPERTY to only find those, or None for both.
+            parameter_type (ParameterType | None): Only find parameters of that type.
+            processor_id (int | None): Only find the entries of that processor or track.
+            limit (int | None): The maximum number of entries returned.
+
+        Returns:
+            list[SearchEntry]: The matching entries, ordered by processor id, kind and id.
+        """
+        tables = self._get_tables()
+        text = text.lower()
+        matches = set()
+        for field in fields:
+            if field not in SEARCH_FIELDS:
+                raise ValueError("Can't search field {}, only {}".format(field, ", ".join(SEARCH_FIELDS)))
+            matches.update(tables.find_prefix(field, text) if prefix else tables.find(field, text))
+
+        found = []
+        for i in sorted(matches):
+            entry = tables.entries[i]
+            if ((kind is None or entry.kind == kind)
+                    and (parameter_type is None or entry.type == parameter_type)
+                    and (processor_id is None or entry.processor_id == processor_id)):
+                found.append(entry)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def get_entries(self, processor_id: int) -> list[SearchEntry]:
+        """
+        Parameters:
+            processor_id (int): The id of a processor or track.
+
+        Returns:
+            list[SearchEntry]: Its indexed parameters and properties, empty if it isn't indexed.
+        """
+        with self._lock:
+            return list(self._processors.get(processor_id, []))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(e) for e in self._processors.values())
+
+    def on_processor_update(self, notification) -> None:
+        self._on_change(notification.action, notification.processor.id, False)
+
+    def on_track_update(self, notification) -> None:
+        self._on_change(notification.action, notification.track.id, True)
+
+    def _on_change(self, action: int, processor_id: int, is_track: bool) -> None:
+        if action == 1:
+            # The lists are read off the notification thread
+            with self._lock:
+                generation = self._generations.get(processor_id, 0)
+            if self._executor is not None:
+                self._executor.submit(self._add, processor_id, is_track, generation)
+        elif action == 2:
+            with self._lock:
+                self._generations[processor_id] = self._generations.get(processor_id, 0) + 1
+                if self._processors.pop(processor_id, None) is not None:
+                    self._tables = None
+
+    def _add(self, processor_id: int, is_track: bool, generation: int) -> None:
+        audio_graph = self._controller.audio_graph
+        try:
+            info = audio_graph.get_track_info(processor_id) if is_track else audio_graph.get_processor_info(processor_id)
+        except sushierrors.SushiNotFoundError:
+            # Deleted in the meantime
+            return
+        entries = self._read_entries(processor_id, info.name, is_track)
+        with self._lock:
+            if entries is not None and self._generations.get(processor_id, 0) == generation:
+                self._processors[processor_id] = entries
+                self._tables = None
+
+    def _read_entries(self, processor_id: int, processor_name: str, is_track: bool) -> list[SearchEntry] | None:
+        parameters = self._controller.parameters
+        try:
+            if is_track:
+                parameter_infos = parameters.get_track_parameters(processor_id)
+                property_infos = parameters.get_track_properties(processor_id)
+            else:
+                parameter_infos = parameters.get_processor_parameters(processor_id)
+                property_infos = parameters.get_processor_properties(processor_id)
+        except sushierrors.SushiNotFoundError:
+            return None
+        entries = [SearchEntry(PARAMETER, processor_id, processor_name, p) for p in parameter_infos]
+        entries += [SearchEntry(PROPERTY, processor_id, processor_name, p) for p in property_infos]
+        return entries
+
+    def _get_tables(self) -> _SearchTables:
+        with self._lock:
+            if self._tables is None:
+                entries = []
+                for processor_id in sorted(self._processors):
+                    entries.extend(self._processors[processor_id])
+                self._tables = _SearchTables(entries)
+            return self._tables
@@ -21,7 +21,10 @@ import grpc
 from . import sushierrors
 from . import grpc_gen
 from . import sushi_info_types as info_types
-from typing import List
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .valuecache import ParameterValueCache
 
 ####################################
 # Sushi program controller class #
@@ -52,6 +55,16 @@ class ProgramController:
 
         self._sushi_proto, self._sushi_grpc = grpc_gen.modules_from_proto(sushi_proto_def)
         self._stub = self._sushi_grpc.ProgramControllerStub(channel)
+        self._value_cache = None
+
+    def set_value_cache(self, cache: "ParameterValueCache | None") -> None:
+        """
+        Drop the cached parameter values of processors whose program is set through this controller.
+
+        Parameters:
+            cache (ParameterValueCache | None): The cache used by the ParameterController, or None.
+        """
+        self._value_cache = cache
 
     def get_processor_current_program(self, processor_identifier: int) -> int:
         """
@@ -149,6 +162,8 @@ class ProgramController:
                 processor = self._sushi_proto.ProcessorIdentifier(id = processor_identifier),
                 program = self._sushi_proto.ProgramIdentifier(program = program_identifier)
             ))
+            if self._value_cache is not None:
+                self._value_cache.invalidate_processor(processor_identifier)
 
         except grpc.RpcError as e:
             sushierrors.grpc_error_handling(e, "With processor id: {}, program id: {}".format(processor_identifier, program_identifier))
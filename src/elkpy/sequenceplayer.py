@@ -0,0 +1,495 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import gc
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Iterable, List, TYPE_CHECKING
+
+from .keyboardcontroller import KeyboardController, KeyboardEventType
+
+if TYPE_CHECKING:
+    from .transportcontroller import TransportController
+
+# Players currently keeping the garbage collector disabled, and whether it was enabled before the first one
+_gc_lock = threading.Lock()
+_gc_users = 0
+_gc_was_enabled = False
+
+
+def _pause_gc() -> None:
+    global _gc_users, _gc_was_enabled
+    with _gc_lock:
+        if _gc_users == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.collect()
+            gc.disable()
+        _gc_users += 1
+
+
+def _resume_gc() -> None:
+    global _gc_users
+    with _gc_lock:
+        _gc_users -= 1
+        if _gc_users == 0 and _gc_was_enabled:
+            gc.enable()
+
+
+###################
+# Sequence events #
+###################
+
+
+class SequenceEvent(object):
+    """
+    Class to represent one timed keyboard event of a sequence.
+
+    Attributes:
+        time (float): The time of the event from the start of the sequence, in seconds or beats.
+        type (KeyboardEventType): The type of the event.
+        channel (int): The channel on which the event should be sent.
+        note (int): The note of the event. Ignored for AFTERTOUCH, PITCH_BEND and MODULATION events.
+        value (float): The velocity or value of the event. Should be in range (0.0-1.0).
+    """
+
+    __slots__ = ("time", "type", "channel", "note", "value")
+
+    def __init__(self, time: float, event_type: KeyboardEventType, channel: int, note: int = 0, value: float = 0.0):
+        self.time = time
+        self.type = KeyboardEventType(event_type)
+        self.channel = channel
+        self.note = note
+        self.value = value
+
+    def __str__(self):
+        return f"{{ time: {self.time}, type: {self.type.name}, channel: {self.channel}, " \
+               f"note: {self.note}, value: {self.value} }}"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __eq__(self, other):
+        return self.time == other.time and self.type == other.type and self.channel == other.channel \
+               and self.note == other.note and self.value == other.value
+
+
+########################
+# Standard MIDI Files  #
+########################
+
+
+def _read_variable_length(data: bytes, pos: int) -> tuple[int, int]:
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_midi_file(path: str) -> tuple[List[SequenceEvent], List[tuple[float, float]]]:
+    """
+    Read the keyboard events of a Standard MIDI File (format 0 or 1). Note on/off, polyphonic aftertouch, channel
+    aftertouch, pitch bend and modulation (CC 1) are converted, other messages are ignored.
+
+    Parameters:
+        path (str): The path to the .mid file.
+
+    Returns:
+        List[SequenceEvent]: The events of all tracks merged and sorted, with times in beats.
+        List[tuple[float, float]]: The tempo map as (beat, tempo in bpm) tuples, sorted by beat.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data[0:4] != b"MThd":
+        raise ValueError("{} is not a Standard MIDI File".format(path))
+    header_length, _format, track_count, division = struct.unpack(">IHHH", data[4:14])
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+
+    events = []
+    tempo_map = []
+    pos = 8 + header_length
+    for _ in range(track_count):
+        chunk_type, chunk_length = struct.unpack(">4sI", data[pos:pos + 8])
+        pos += 8
+        end = pos + chunk_length
+        if chunk_type != b"MTrk":
+            pos = end
+            continue
+
+        ticks = 0
+        status = 0
+        while pos < end:
+            delta, pos = _read_variable_length(data, pos)
+            ticks += delta
+            beat = ticks / division
+
+            if data[pos] & 0x80:
+                status = data[pos]
+                pos += 1
+
+            if status == 0xFF:
+                meta_type = data[pos]
+                length, pos = _read_variable_length(data, pos + 1)
+                if meta_type == 0x51 and length == 3:
+                    microseconds = int.from_bytes(data[pos:pos + 3], "big")
+                    tempo_map.append((beat, 60000000.0 / microseconds))
+                pos += length
+                continue
+            if status in (0xF0, 0xF7):
+                length, pos = _read_variable_length(data, pos)
+                pos += length
+                continue
+
+            kind = status & 0xF0
+            channel = status & 0x0F
+            if kind in (0xC0, 0xD0):
+                data_1 = data[pos]
+                pos += 1
+                if kind == 0xD0:
+                    events.append(SequenceEvent(beat, KeyboardEventType.AFTERTOUCH, channel, 0, data_1 / 127))
+                continue
+
+            data_1, data_2 = data[pos], data[pos + 1]
+            pos += 2
+            if kind == 0x90 and data_2 > 0:
+                events.append(SequenceEvent(beat, KeyboardEventType.NOTE_ON, channel, data_1, data_2 / 127))
+            elif kind == 0x80 or kind == 0x90:
+                events.append(SequenceEvent(beat, KeyboardEventType.NOTE_OFF, channel, data_1, data_2 / 127))
+            elif kind == 0xA0:
+                events.append(SequenceEvent(beat, KeyboardEventType.NOTE_AFTERTOUCH, channel, data_1, data_2 / 127))
+            elif kind == 0xB0 and data_1 == 1:
+                events.append(SequenceEvent(beat, KeyboardEventType.MODULATION, channel, 0, data_2 / 127))
+            elif kind == 0xE0:
+                events.append(SequenceEvent(beat, KeyboardEventType.PITCH_BEND, channel, 0,
+                                            ((data_2 << 7) | data_1) / 16383))
+        pos = end
+
+    events.sort(key=lambda e: e.time)
+    tempo_map.sort()
+    return events, tempo_map
+
+
+def beats_to_seconds(events: Iterable[SequenceEvent], tempo_map: List[tuple[float, float]],
+                     default_tempo: float = 120.0) -> List[SequenceEvent]:
+    """
+    Convert event times from beats to seconds following a tempo map.
+
+    Parameters:
+        events (Iterable[SequenceEvent]): The events, with times in beats.
+        tempo_map (List[tuple[float, float]]): (beat, tempo in bpm) tuples sorted by beat.
+        default_tempo (float): The tempo in bpm before the first tempo change.
+
+    Returns:
+        List[SequenceEvent]: New events with times in seconds.
+    """
+    segments = [(0.0, 0.0, default_tempo)]
+    for beat, tempo in tempo_map:
+        start_beat, start_seconds, previous_tempo = segments[-1]
+        segments.append((beat, start_seconds + (beat - start_beat) * 60.0 / previous_tempo, tempo))
+
+    converted = []
+    segment = 0
+    for event in sorted(events, key=lambda e: e.time):
+        while segment + 1 < len(segments) and segments[segment + 1][0] <= event.time:
+            segment += 1
+        start_beat, start_seconds, tempo = segments[segment]
+        seconds = start_seconds + (event.time - start_beat) * 60.0 / tempo
+        converted.append(SequenceEvent(seconds, event.type, event.channel, event.note, event.value))
+    return converted
+
+
+################
+# Jitter stats #
+################
+
+
+class JitterStats(object):
+    """
+    Class to represent the dispatch timing accuracy of a sequence playback.
+
+    Attributes:
+        count (int): The number of dispatches measured.
+        mean (float): The mean lateness in ms.
+        max (float): The maximum lateness in ms.
+        p50 (float): The median lateness in ms.
+        p95 (float): The 95th percentile lateness in ms.
+        p99 (float): The 99th percentile lateness in ms.
+    """
+
+    def __init__(self, lateness: Iterable[float]):
+        values = sorted(v * 1000.0 for v in lateness)
+        self.count = len(values)
+        if self.count == 0:
+            self.mean = self.max = self.p50 = self.p95 = self.p99 = 0.0
+            return
+        self.mean = sum(values) / self.count
+        self.max = values[-1]
+        self.p50 = values[int(0.50 * (self.count - 1))]
+        self.p95 = values[int(0.95 * (self.count - 1))]
+        self.p99 = values[int(0.99 * (self.count - 1))]
+
+    def __str__(self):
+        return f"{{ count: {self.count}, mean: {self.mean:.3f} ms, p50: {self.p50:.3f} ms, " \
+               f"p95: {self.p95:.3f} ms, p99: {self.p99:.3f} ms, max: {self.max:.3f} ms }}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+###################
+# Sequence player #
+###################
+
+
+class SequencePlayer(object):
+    """
+    A class playing back a sequence of timed keyboard events on a sushi track.
+
+    Events are scheduled against a monotonic clock and dispatched from a dedicated thread, which asks for realtime
+    priority when the system allows it. Events sharing a time stamp are sent as one asynchronous batch, in their
+    order in the sequence, so the dispatch thread never waits for sushi to reply. Optionally the garbage collector is
+    disabled during playback so that a collection can't delay a dispatch. Notes still on when playback stops are
+    turned off.
+
+    Attributes:
+        realtime (bool): Whether the dispatch thread got realtime scheduling priority.
+    """
+
+    def __init__(self,
+                 keyboard: KeyboardController,
+                 track_identifier: int,
+                 events: Iterable[SequenceEvent],
+                 in_beats: bool = False,
+                 tempo: float = 120.0,
+                 transport: "TransportController" = None,
+                 disable_gc: bool = False,
+                 priority: int = 50,
+                 spin_time: float = 0.001):
+        """
+        The constructor for the SequencePlayer class.
+
+        Parameters:
+            keyboard (KeyboardController): The keyboard controller to send the events with.
+            track_identifier (int): The id of the track that should receive the events.
+            events (Iterable[SequenceEvent]): The events to play.
+            in_beats (bool): True if the event times are in beats, False if they are in seconds.
+            tempo (float): The tempo in bpm used for events in beats, unless transport is given.
+            transport (TransportController): If given, the tempo is read from sushi when playback starts and each
+                time a looped sequence restarts. Use set_tempo() to follow tempo changes within one pass.
+            disable_gc (bool): Disable the garbage collector of the whole process while playing. It is enabled again
+                when the last player disabling it stops, if it was enabled before.
+            priority (int): The SCHED_FIFO priority requested for the dispatch thread.
+            spin_time (float): How long before each dispatch, in seconds, the thread stops sleeping and busy-waits.
+        """
+        self._keyboard = keyboard
+        self._track_identifier = track_identifier
+        self._in_beats = in_beats
+        self._tempo = tempo
+        self._transport = transport
+        self._disable_gc = disable_gc
+        self._priority = priority
+        self._spin_time = spin_time
+
+        self._times = []
+        self._batches = []
+        for event in sorted(events, key=lambda e: e.time):
+            item = (event.type, event.channel, event.note, event.value)
+            if self._times and self._times[-1] == event.time:
+                self._batches[-1].append(item)
+            else:
+                self._times.append(event.time)
+                self._batches.append([item])
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lateness = array("d")
+        self._start_time = 0.0
+        self._start_position = 0.0
+        self.realtime = False
+
+    @classmethod
+    def from_midi_file(cls, keyboard: KeyboardController, track_identifier: int, path: str,
+                       transport: "TransportController" = None, **kwargs) -> "SequencePlayer":
+        """
+        Create a player for a Standard MIDI File.
+
+        Parameters:
+            keyboard (KeyboardController): The keyboard controller to send the events with.
+            track_identifier (int): The id of the track that should receive the events.
+            path (str): The path to the .mid file.
+            transport (TransportController): If given, the file is played at sushi's tempo instead of its own.
+            kwargs: Other arguments passed to the SequencePlayer constructor.
+
+        Returns:
+            SequencePlayer: The player.
+        """
+        events, tempo_map = read_midi_file(path)
+        if transport is not None:
+            return cls(keyboard, track_identifier, events, in_beats=True, transport=transport, **kwargs)
+        return cls(keyboard, track_identifier, beats_to_seconds(events, tempo_map), **kwargs)
+
+    def play(self, loop: bool = False) -> None:
+        """
+        Start playing the sequence from the beginning in the dispatch thread.
+
+        Parameters:
+            loop (bool): Restart from the beginning when the end is reached, until stop() is called.
+        """
+        self.stop()
+        if self._in_beats and self._transport is not None:
+            self._tempo = self._transport.get_tempo()
+        self._stop_event.clear()
+        self._lateness = array("d")
+        self._thread = threading.Thread(target=self._run, args=(loop,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop playing, and send note offs for the notes that are on.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until the sequence has finished playing.
+
+        Parameters:
+            timeout (float | None): The maximum time to wait in seconds, or None to wait indefinitely.
+
+        Returns:
+            bool: True if playback has finished.
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def is_playing(self) -> bool:
+        """
+        Returns:
+            bool: True if the sequence is currently playing.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_tempo(self, tempo: float) -> None:
+        """
+        Change the tempo of a sequence in beats, e.g. from a transport change notification. Takes effect from the
+        current position, without jumping.
+
+        Parameters:
+            tempo (float): The new tempo in bpm.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._start_position = self._position(now)
+            self._start_time = now
+            self._tempo = tempo
+
+    def get_jitter_stats(self) -> JitterStats:
+        """
+        Get how late events were dispatched relative to their scheduled time, for the current or last playback.
+
+        Returns:
+            JitterStats: The lateness statistics.
+        """
+        return JitterStats(self._lateness)
+
+    def _position(self, now: float) -> float:
+        elapsed = now - self._start_time
+        if self._in_beats:
+            return self._start_position + elapsed * self._tempo / 60.0
+        return self._start_position + elapsed
+
+    def _deadline(self, position: float) -> float:
+        offset = position - self._start_position
+        if self._in_beats:
+            offset *= 60.0 / self._tempo
+        return self._start_time + offset
+
+    def _set_realtime_priority(self) -> None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self._priority))
+            self.realtime = True
+        except (AttributeError, OSError):
+            self.realtime = False
+
+    def _run(self, loop: bool) -> None:
+        self._set_realtime_priority()
+        if self._disable_gc:
+            _pause_gc()
+
+        # The (channel, note) pairs that are on
+        active = set()
+        try:
+            send = self._keyboard.send_events_async
+            first = True
+            while True:
+                if not first and self._in_beats and self._transport is not None:
+                    tempo = self._transport.get_tempo()
+                    with self._lock:
+                        self._tempo = tempo
+                first = False
+                with self._lock:
+                    self._start_time = time.monotonic()
+                    self._start_position = 0.0
+
+                for position, batch in zip(self._times, self._batches):
+                    with self._lock:
+                        deadline = self._deadline(position)
+                    sleep_time = deadline - time.monotonic() - self._spin_time
+                    if sleep_time > 0 and self._stop_event.wait(sleep_time):
+                        return
+                    if self._stop_event.is_set():
+                        return
+                    while time.monotonic() < deadline:
+                        pass
+
+                    send(self._track_identifier, batch)
+                    self._lateness.append(time.monotonic() - deadline)
+                    _update_active_notes(active, batch)
+
+                if not loop or len(self._times) == 0:
+                    return
+        finally:
+            if active:
+                send(self._track_identifier,
+                     [(KeyboardEventType.NOTE_OFF, channel, note, 0.0) for channel, note in sorted(active)])
+            if self._disable_gc:
+                _resume_gc()
+
+
+def _update_active_notes(active: set, batch: list) -> None:
+    for event_type, channel, note, value in batch:
+        if event_type == KeyboardEventType.NOTE_ON and value > 0:
+            active.add((channel, note))
+        elif event_type in (KeyboardEventType.NOTE_ON, KeyboardEventType.NOTE_OFF):
+            active.discard((channel, note))
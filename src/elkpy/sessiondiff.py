@@ -0,0 +1,835 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import Dict, List, TYPE_CHECKING
+
+from . import sushi_info_types as info_types
+from .events import wait_for_events
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+
+###############
+# Graph model #
+###############
+
+
+class ProcessorModel(object):
+    """
+    Class to represent a processor of a graph, identified by its name.
+
+    Attributes:
+        name (str): The unique name of the processor.
+        label (str): The display name of the processor.
+        uid (str): The uid of the plugin.
+        path (str): The path to the plugin library.
+        type (PluginType): The type of the plugin.
+        state (info_types.ProcessorState): The state of the processor.
+    """
+
+    def __init__(self, name: str, uid: str, path: str, plugin_type: info_types.PluginType,
+                 state: info_types.ProcessorState = None, label: str = ""):
+        self.name = name
+        self.label = label
+        self.uid = uid
+        self.path = path
+        self.type = plugin_type
+        self.state = state if state is not None else empty_state()
+
+    def is_compatible(self, other: "ProcessorModel") -> bool:
+        """
+        Returns:
+            bool: True if the other processor is the same plugin, so it can be updated in place.
+        """
+        return self.uid == other.uid and self.path == other.path and self.type == other.type
+
+    def __str__(self):
+        return f"{{ name: {self.name}, uid: {self.uid}, path: {self.path}, type: {self.type} }}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class TrackModel(object):
+    """
+    Class to represent a track of a graph, identified by its name.
+
+    Attributes:
+        name (str): The unique name of the track.
+        label (str): The display name of the track.
+        channels (int): The number of channels of the track.
+        buses (int): The number of buses of the track.
+        type (TrackType): The type of the track.
+        state (info_types.ProcessorState): The state of the track itself (gain, pan, mute...).
+        processors (List[ProcessorModel]): The processors of the track, in processing order.
+    """
+
+    def __init__(self, name: str, channels: int = 2, buses: int = 1,
+                 track_type: info_types.TrackType = info_types.TrackType.REGULAR,
+                 state: info_types.ProcessorState = None, processors: List[ProcessorModel] = None, label: str = ""):
+        self.name = name
+        self.label = label
+        self.channels = channels
+        self.buses = buses
+        self.type = track_type
+        self.state = state if state is not None else empty_state()
+        self.processors = processors if processors is not None else []
+
+    def is_compatible(self, other: "TrackModel") -> bool:
+        """
+        Returns:
+            bool: True if the other track has the same layout, so it can be updated in place.
+        """
+        return self.channels == other.channels and self.buses == other.buses and self.type == other.type
+
+    def __str__(self):
+        return f"{{ name: {self.name}, channels: {self.channels}, buses: {self.buses}, type: {self.type}, " \
+               f"processors: {[p.name for p in self.processors]} }}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class GraphModel(object):
+    """
+    Class to represent the audio graph of a session, with all objects identified by name rather than by sushi id.
+
+    Attributes:
+        tracks (Dict[str, TrackModel]): The tracks, in session order.
+        audio_inputs (set): (track, track_channel, engine_channel) audio input connections.
+        audio_outputs (set): (track, track_channel, engine_channel) audio output connections.
+        kbd_inputs (set): (track, channel, port, raw_midi) midi keyboard input connections.
+        kbd_outputs (set): (track, channel, port, raw_midi) midi keyboard output connections.
+        cc_connections (set): (processor, parameter_id, channel, port, cc_number, min_range, max_range, relative_mode)
+                              midi cc connections.
+        pc_connections (set): (processor, channel, port) midi program change connections.
+        clock_outputs (set): The midi ports with clock output enabled.
+        tempo (float | None): The tempo in bpm, or None to leave it unchanged.
+        time_signature ((int, int) | None): The time signature, or None to leave it unchanged.
+        sync_mode (SyncMode | None): The sync mode, or None to leave it unchanged.
+    """
+
+    def __init__(self):
+        self.tracks: Dict[str, TrackModel] = {}
+        self.audio_inputs = set()
+        self.audio_outputs = set()
+        self.kbd_inputs = set()
+        self.kbd_outputs = set()
+        self.cc_connections = set()
+        self.pc_connections = set()
+        self.clock_outputs = set()
+        self.tempo = None
+        self.time_signature = None
+        self.sync_mode = None
+
+    @classmethod
+    def from_session(cls, session) -> "GraphModel":
+        """
+        Build a model from a session.
+
+        Parameters:
+            session (sushi_rpc_pb2.SessionState): A session, e.g. parsed from SessionController.save_binary_session().
+
+        Returns:
+            GraphModel: The model.
+        """
+        model = cls()
+        for track in session.tracks:
+            processors = [ProcessorModel(p.name, p.uid, p.path, _enum_or_value(info_types.PluginType, p.type.type),
+                                         info_types.ProcessorState(p.state), p.label)
+                          for p in track.processors]
+            model.add_track(TrackModel(track.name, track.channels, track.buses,
+                                       _enum_or_value(info_types.TrackType, track.type.type),
+                                       info_types.ProcessorState(track.track_state), processors, track.label))
+
+        engine = session.engine_state
+        model.audio_inputs = {(c.track, c.track_channel, c.engine_channel) for c in engine.input_connections}
+        model.audio_outputs = {(c.track, c.track_channel, c.engine_channel) for c in engine.output_connections}
+        # Unset engine fields are left unchanged
+        if engine.tempo > 0:
+            model.tempo = engine.tempo
+        if engine.time_signature.numerator > 0:
+            model.time_signature = (engine.time_signature.numerator, engine.time_signature.denominator)
+        if engine.sync_mode.mode > 0:
+            model.sync_mode = _enum_or_value(info_types.SyncMode, engine.sync_mode.mode)
+
+        midi = session.midi_state
+        model.kbd_inputs = {(c.track, c.channel.channel, c.port, c.raw_midi) for c in midi.kbd_input_connections}
+        model.kbd_outputs = {(c.track, c.channel.channel, c.port, c.raw_midi) for c in midi.kbd_output_connections}
+        model.cc_connections = {(c.processor, c.parameter.parameter_id, c.channel.channel, c.port, c.cc_number,
+                                 c.min_range, c.max_range, c.relative_mode) for c in midi.cc_connections}
+        model.pc_connections = {(c.processor, c.channel.channel, c.port) for c in midi.pc_connections}
+        model.clock_outputs = set(midi.enabled_clock_outputs)
+        return model
+
+    @classmethod
+    def from_binary_session(cls, binary_session: bytes, sushi_proto) -> "GraphModel":
+        """
+        Build a model from a binary session.
+
+        Parameters:
+            binary_session (bytes): A session as returned by SessionController.save_binary_session().
+            sushi_proto (ModuleType): The generated protobuf module, see grpc_gen.modules_from_proto().
+
+        Returns:
+            GraphModel: The model.
+        """
+        session = sushi_proto.SessionState()
+        session.ParseFromString(binary_session)
+        return cls.from_session(session)
+
+    def add_track(self, track: TrackModel) -> None:
+        """
+        Add a track, replacing any track with the same name.
+
+        Parameters:
+            track (TrackModel): The track.
+        """
+        self.tracks[track.name] = track
+
+    def processors(self) -> Dict[str, tuple[str, ProcessorModel]]:
+        """
+        Returns:
+            Dict[str, tuple[str, ProcessorModel]]: All processors by name, with the name of their track.
+        """
+        return {p.name: (t.name, p) for t in self.tracks.values() for p in t.processors}
+
+
+def empty_state() -> info_types.ProcessorState:
+    """
+    Returns:
+        info_types.ProcessorState: A processor state that changes nothing.
+    """
+    state = info_types.ProcessorState({})
+    state.program_id = None
+    state.bypassed = None
+    state.properties = []
+    state.parameters = []
+    state.binary_data = bytes()
+    return state
+
+
+def state_difference(live: info_types.ProcessorState | None,
+                     target: info_types.ProcessorState) -> info_types.ProcessorState | None:
+    """
+    Compute the partial state that brings a processor from its live state to a target state.
+
+    Parameters:
+        live (info_types.ProcessorState | None): The current state, or None for a newly created processor.
+        target (info_types.ProcessorState): The wanted state.
+
+    Returns:
+        info_types.ProcessorState | None: The state to set, or None if nothing needs to change.
+    """
+    if live is None:
+        live = empty_state()
+    diff = empty_state()
+    changed = False
+
+    # Opaque plugin data or a program change may reset everything, so then send the complete target state
+    full = (len(target.binary_data) > 0 and target.binary_data != live.binary_data) or \
+           (target.program_id and target.program_id != live.program_id)
+    if full:
+        diff.binary_data = target.binary_data
+        diff.program_id = target.program_id
+
+    if target.bypassed is not None and (full or target.bypassed != live.bypassed):
+        diff.bypassed = target.bypassed
+        changed = True
+
+    live_properties = dict(live.properties)
+    diff.properties = [(i, v) for i, v in target.properties if full or live_properties.get(i) != v]
+    live_parameters = dict(live.parameters)
+    diff.parameters = [(i, v) for i, v in target.parameters if full or live_parameters.get(i) != v]
+
+    if full or changed or diff.properties or diff.parameters:
+        return diff
+    return None
+
+
+def _enum_or_value(enum_type, value):
+    try:
+        return enum_type(value)
+    except ValueError:
+        return value
+
+
+####################
+# Graph operations #
+####################
+
+
+class OperationType(IntEnum):
+    """
+    Enum class to hold the kinds of graph operations. Each operation is one rpc.
+    """
+    DISCONNECT_AUDIO_INPUT = 1
+    DISCONNECT_AUDIO_OUTPUT = 2
+    DISCONNECT_KBD_INPUT = 3
+    DISCONNECT_KBD_OUTPUT = 4
+    DISCONNECT_CC = 5
+    DISCONNECT_PC = 6
+    DELETE_PROCESSOR = 7
+    DELETE_TRACK = 8
+    CREATE_TRACK = 9
+    CREATE_PROCESSOR = 10
+    MOVE_PROCESSOR = 11
+    SET_PROCESSOR_STATE = 12
+    CONNECT_AUDIO_INPUT = 13
+    CONNECT_AUDIO_OUTPUT = 14
+    CONNECT_KBD_INPUT = 15
+    CONNECT_KBD_OUTPUT = 16
+    CONNECT_CC = 17
+    CONNECT_PC = 18
+    SET_CLOCK_OUTPUT = 19
+    SET_TEMPO = 20
+    SET_TIME_SIGNATURE = 21
+    SET_SYNC_MODE = 22
+
+
+class GraphOperation(object):
+    """
+    Class to represent one operation on the audio graph. Tracks and processors are referred to by name and only
+    resolved to sushi ids when the operation is executed, so operations can refer to objects created earlier in a plan.
+
+    Attributes:
+        type (OperationType): The kind of operation.
+        key (str): Operations with the same key must be executed in order, others are independent within a stage.
+        args (dict): The arguments of the operation.
+    """
+
+    def __init__(self, operation_type: OperationType, key: str = "", **args):
+        self.type = operation_type
+        self.key = key
+        self.args = args
+
+    def __str__(self):
+        args = ", ".join("{}={}".format(k, _format_arg(v)) for k, v in self.args.items())
+        return "{}({})".format(self.type.name.lower(), args)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __eq__(self, other):
+        return self.type == other.type and self.args == other.args
+
+
+def _format_arg(value):
+    if isinstance(value, info_types.ProcessorState):
+        parts = []
+        if value.program_id:
+            parts.append("program={}".format(value.program_id))
+        if value.bypassed is not None:
+            parts.append("bypassed={}".format(value.bypassed))
+        if value.properties:
+            parts.append("{} properties".format(len(value.properties)))
+        if value.parameters:
+            parts.append("{} parameters".format(len(value.parameters)))
+        if value.binary_data:
+            parts.append("{} bytes of data".format(len(value.binary_data)))
+        return "<{}>".format(", ".join(parts))
+    return repr(value)
+
+
+class GraphPlan(object):
+    """
+    Class to represent the operations needed to turn one graph into another, grouped in stages. A stage only
+    starts when all operations of the previous stage are done and the tracks and processors it created exist.
+
+    Attributes:
+        stages (List[List[GraphOperation]]): The operations of each stage.
+    """
+
+    def __init__(self, stages: List[List[GraphOperation]]):
+        self.stages = [stage for stage in stages if stage]
+
+    def operations(self) -> List[GraphOperation]:
+        """
+        Returns:
+            List[GraphOperation]: All operations, in execution order.
+        """
+        return [op for stage in self.stages for op in stage]
+
+    def rpc_count(self) -> int:
+        """
+        Returns:
+            int: The estimated number of rpcs needed to execute the plan, not counting id lookups.
+        """
+        return len(self.operations())
+
+    def is_empty(self) -> bool:
+        """
+        Returns:
+            bool: True if the plan has no operations, i.e. the graphs are already the same.
+        """
+        return len(self.stages) == 0
+
+    def __str__(self):
+        lines = []
+        for i, stage in enumerate(self.stages):
+            lines.append("Stage {}:".format(i + 1))
+            lines.extend("  " + str(op) for op in stage)
+        lines.append("Estimated rpc count: {}".format(self.rpc_count()))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+###############
+# Graph diffs #
+###############
+
+
+def diff_graphs(live: GraphModel, target: GraphModel) -> GraphPlan:
+    """
+    Compute the operations turning the live graph into the target graph. Processors and tracks that exist in both
+    with a compatible type are kept and updated in place, moved if needed, and only get the parameters, properties
+    and other state that differ.
+
+    Parameters:
+        live (GraphModel): The current graph.
+        target (GraphModel): The wanted graph.
+
+    Returns:
+        GraphPlan: The plan.
+    """
+    live_processors = live.processors()
+    target_processors = target.processors()
+
+    recreated_tracks = {name for name, track in target.tracks.items()
+                        if name in live.tracks and not track.is_compatible(live.tracks[name])}
+    removed_tracks = {name for name in live.tracks if name not in target.tracks}
+    gone_tracks = recreated_tracks | removed_tracks
+
+    # Processors on recreated tracks are deleted with them, so they are created again too
+    kept_processors = {name for name, (track, processor) in target_processors.items()
+                       if name in live_processors and processor.is_compatible(live_processors[name][1])
+                       and live_processors[name][0] not in recreated_tracks}
+    gone_processors = {name for name in live_processors if name not in kept_processors}
+
+    removals = []
+    removals += _disconnect(OperationType.DISCONNECT_AUDIO_INPUT, live.audio_inputs, target.audio_inputs,
+                            gone_tracks, _audio_args)
+    removals += _disconnect(OperationType.DISCONNECT_AUDIO_OUTPUT, live.audio_outputs, target.audio_outputs,
+                            gone_tracks, _audio_args)
+    removals += _disconnect(OperationType.DISCONNECT_KBD_INPUT, live.kbd_inputs, target.kbd_inputs,
+                            gone_tracks, _kbd_args)
+    removals += _disconnect(OperationType.DISCONNECT_KBD_OUTPUT, live.kbd_outputs, target.kbd_outputs,
+                            gone_tracks, _kbd_args)
+    removals += _disconnect(OperationType.DISCONNECT_CC, live.cc_connections, target.cc_connections,
+                            gone_processors, _cc_args)
+    removals += _disconnect(OperationType.DISCONNECT_PC, live.pc_connections, target.pc_connections,
+                            gone_processors, _pc_args)
+    for name in sorted(gone_processors):
+        track = live_processors[name][0]
+        if track not in gone_tracks:
+            removals.append(GraphOperation(OperationType.DELETE_PROCESSOR, track, processor=name, track=track))
+    for name in sorted(recreated_tracks):
+        removals.append(GraphOperation(OperationType.DELETE_TRACK, name, track=name))
+
+    creations = []
+    for name, track in target.tracks.items():
+        if name not in live.tracks or name in recreated_tracks:
+            creations.append(GraphOperation(OperationType.CREATE_TRACK, name, track=name, channels=track.channels,
+                                            buses=track.buses, track_type=track.type))
+
+    placements = []
+    for name, track in target.tracks.items():
+        live_order = []
+        if name in live.tracks and name not in recreated_tracks:
+            live_order = [p.name for p in live.tracks[name].processors
+                          if p.name in kept_processors and target_processors[p.name][0] == name]
+        target_order = [p.name for p in track.processors]
+        stable = set(_longest_common_subsequence(live_order, target_order))
+        for i, processor in enumerate(track.processors):
+            if processor.name in stable:
+                continue
+            before = next((p for p in target_order[i + 1:] if p in stable), None)
+            if processor.name in kept_processors:
+                placements.append(GraphOperation(OperationType.MOVE_PROCESSOR, name, processor=processor.name,
+                                                 source_track=live_processors[processor.name][0], track=name,
+                                                 before=before))
+            else:
+                placements.append(GraphOperation(OperationType.CREATE_PROCESSOR, name, processor=processor.name,
+                                                 uid=processor.uid, path=processor.path,
+                                                 plugin_type=processor.type, track=name, before=before))
+
+    updates = []
+    for name in sorted(removed_tracks):
+        updates.append(GraphOperation(OperationType.DELETE_TRACK, name, track=name))
+    for name, track in target.tracks.items():
+        live_state = live.tracks[name].state if name in live.tracks and name not in gone_tracks else None
+        diff = state_difference(live_state, track.state)
+        if diff is not None:
+            updates.append(GraphOperation(OperationType.SET_PROCESSOR_STATE, name, processor=name, state=diff))
+        for processor in track.processors:
+            live_state = live_processors[processor.name][1].state if processor.name in kept_processors else None
+            diff = state_difference(live_state, processor.state)
+            if diff is not None:
+                updates.append(GraphOperation(OperationType.SET_PROCESSOR_STATE, processor.name,
+                                              processor=processor.name, state=diff))
+
+    updates += _connect(OperationType.CONNECT_AUDIO_INPUT, live.audio_inputs, target.audio_inputs,
+                        gone_tracks, _audio_args)
+    updates += _connect(OperationType.CONNECT_AUDIO_OUTPUT, live.audio_outputs, target.audio_outputs,
+                        gone_tracks, _audio_args)
+    updates += _connect(OperationType.CONNECT_KBD_INPUT, live.kbd_inputs, target.kbd_inputs,
+                        gone_tracks, _kbd_args)
+    updates += _connect(OperationType.CONNECT_KBD_OUTPUT, live.kbd_outputs, target.kbd_outputs,
+                        gone_tracks, _kbd_args)
+    updates += _connect(OperationType.CONNECT_CC, live.cc_connections, target.cc_connections,
+                        gone_processors, _cc_args)
+    updates += _connect(OperationType.CONNECT_PC, live.pc_connections, target.pc_connections,
+                        gone_processors, _pc_args)
+    for port in sorted(live.clock_outputs ^ target.clock_outputs):
+        updates.append(GraphOperation(OperationType.SET_CLOCK_OUTPUT, "midi_clock", port=port,
+                                      enabled=port in target.clock_outputs))
+
+    if target.tempo is not None and target.tempo != live.tempo:
+        updates.append(GraphOperation(OperationType.SET_TEMPO, "engine", tempo=target.tempo))
+    if target.time_signature is not None and target.time_signature != live.time_signature:
+        updates.append(GraphOperation(OperationType.SET_TIME_SIGNATURE, "engine",
+                                      numerator=target.time_signature[0], denominator=target.time_signature[1]))
+    if target.sync_mode is not None and target.sync_mode != live.sync_mode:
+        updates.append(GraphOperation(OperationType.SET_SYNC_MODE, "engine", sync_mode=target.sync_mode))
+
+    return GraphPlan([removals, creations, placements, updates])
+
+
+def _audio_args(connection):
+    return connection[0], dict(track=connection[0], track_channel=connection[1], engine_channel=connection[2])
+
+
+def _kbd_args(connection):
+    return connection[0], dict(track=connection[0], channel=connection[1], port=connection[2], raw_midi=connection[3])
+
+
+def _cc_args(connection):
+    return connection[0], dict(processor=connection[0], parameter_id=connection[1], channel=connection[2],
+                               port=connection[3], cc_number=connection[4], min_range=connection[5],
+                               max_range=connection[6], relative_mode=connection[7])
+
+
+def _pc_args(connection):
+    return connection[0], dict(processor=connection[0], channel=connection[1], port=connection[2])
+
+
+def _disconnect(operation_type, live, target, gone, to_args) -> List[GraphOperation]:
+    # Connections of deleted objects disappear with them
+    operations = []
+    for connection in sorted(live - target, key=repr):
+        key, args = to_args(connection)
+        if key not in gone:
+            operations.append(GraphOperation(operation_type, key, **args))
+    return operations
+
+
+def _connect(operation_type, live, target, gone, to_args) -> List[GraphOperation]:
+    operations = []
+    for connection in sorted(target, key=repr):
+        key, args = to_args(connection)
+        if connection not in live or key in gone:
+            operations.append(GraphOperation(operation_type, key, **args))
+    return operations
+
+
+def _longest_common_subsequence(a: List[str], b: List[str]) -> List[str]:
+    lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            if a[i] == b[j]:
+                lengths[i][j] = lengths[i + 1][j + 1] + 1
+            else:
+                lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif lengths[i + 1][j] >= lengths[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+##################
+# Plan execution #
+##################
+
+
+class PlanExecutor(object):
+    """
+    A class executing graph plans on sushi through a SushiController.
+
+    Creation operations return immediately, and the tracks and processors created by a stage are awaited together
+    through their creation events before the next stage starts. As this blocks while elkpy's notification loop sets
+    the events, asyncio programs should run it in an executor, e.g. with loop.run_in_executor().
+
+    With max_workers > 1, the operations of a stage are sent concurrently, keeping the operations sharing a key in
+    order. Parameters, properties and cc connections may refer to parameters and properties by name instead of id,
+    they are then resolved when the operation is executed.
+    """
+
+    def __init__(self, controller: "SushiController", timeout: float = 10.0, max_workers: int = 1):
+        """
+        The constructor for the PlanExecutor class.
+
+        Parameters:
+            controller (SushiController): The controller to execute the operations with.
+            timeout (float): The maximum time in seconds to wait for the objects created by a stage.
+            max_workers (int): The maximum number of operations sent at the same time.
+        """
+        self._controller = controller
+        self._timeout = timeout
+        self._max_workers = max_workers
+        self._track_ids = {}
+        self._processor_ids = {}
+        self._parameter_ids = {}
+        self._property_ids = {}
+
+    def execute(self, plan: GraphPlan, refresh_ids: bool = True) -> None:
+        """
+        Execute all operations of a plan.
+
+        Parameters:
+            plan (GraphPlan): The plan.
+            refresh_ids (bool): Fetch the ids of the current tracks and processors first. Set to False if
+                                refresh_ids() was just called.
+        """
+        if refresh_ids:
+            self.refresh_ids()
+        if self._max_workers <= 1:
+            for stage in plan.stages:
+                self._await_creations([self._execute(op) for op in stage])
+            return
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            for stage in plan.stages:
+                groups = {}
+                for op in stage:
+                    groups.setdefault(op.key, []).append(op)
+                futures = [pool.submit(self._execute_group, ops) for ops in groups.values()]
+                self._await_creations([c for future in futures for c in future.result()])
+
+    def get_track_id(self, name: str) -> int:
+        """
+        Parameters:
+            name (str): The name of a track.
+
+        Returns:
+            int: The sushi id of the track, as known after the last executed stage.
+        """
+        return self._track_ids[name]
+
+    def get_processor_id(self, name: str) -> int:
+        """
+        Parameters:
+            name (str): The name of a processor or track.
+
+        Returns:
+            int: The sushi id of the processor, as known after the last executed stage.
+        """
+        return self._processor_ids[name]
+
+    def refresh_ids(self) -> None:
+        """
+        Fetch the ids of all current tracks and processors from sushi.
+        """
+        graph = self._controller.audio_graph
+        self._track_ids = {t.name: t.id for t in graph.get_all_tracks()}
+        self._processor_ids = {p.name: p.id for p in graph.get_all_processors()}
+        # Tracks are processors too
+        self._processor_ids.update(self._track_ids)
+
+    def _await_creations(self, created) -> None:
+        created = [c for c in created if c is not None]
+        if not created:
+            return
+        wait_for_events([event for event, _, _ in created if event is not None], self._timeout)
+
+        deadline = time.monotonic() + self._timeout
+        for event, name, is_track in created:
+            if event is not None:
+                sushi_id = event.sushi_id
+                params = getattr(event, "params", None)
+                if params is not None:
+                    self._parameter_ids[name] = {p.name: p.id for p in params}
+            else:
+                # Pre and post tracks have no creation event, so poll for them
+                sushi_id = self._poll_track_id(name, deadline)
+            if is_track:
+                self._track_ids[name] = sushi_id
+            self._processor_ids[name] = sushi_id
+
+    def _poll_track_id(self, name: str, deadline: float) -> int:
+        while True:
+            try:
+                return self._controller.audio_graph.get_track_id(name)
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Track {} was not created after {} s".format(name, self._timeout))
+                time.sleep(0.01)
+
+    def _parameter_id(self, processor: str, parameter: int | str) -> int:
+        if not isinstance(parameter, str):
+            return parameter
+        if processor not in self._parameter_ids:
+            infos = self._controller.parameters.get_processor_parameters(self._processor_ids[processor])
+            self._parameter_ids[processor] = {p.name: p.id for p in infos}
+        return self._parameter_ids[processor][parameter]
+
+    def _property_id(self, processor: str, prop: int | str) -> int:
+        if not isinstance(prop, str):
+            return prop
+        if processor not in self._property_ids:
+            infos = self._controller.parameters.get_processor_properties(self._processor_ids[processor])
+            self._property_ids[processor] = {p.name: p.id for p in infos}
+        return self._property_ids[processor][prop]
+
+    def _resolve_state(self, processor: str, state: info_types.ProcessorState) -> info_types.ProcessorState:
+        resolved = empty_state()
+        resolved.program_id = state.program_id
+        resolved.bypassed = state.bypassed
+        resolved.binary_data = state.binary_data
+        resolved.parameters = [(self._parameter_id(processor, i), v) for i, v in state.parameters]
+        resolved.properties = [(self._property_id(processor, i), v) for i, v in state.properties]
+        return resolved
+
+    def _execute_group(self, ops: List[GraphOperation]) -> list:
+        return [self._execute(op) for op in ops]
+
+    def _execute(self, op: GraphOperation):
+        """
+        Execute one operation.
+
+        Returns:
+            tuple | None: (event, name, is_track) for creation operations, otherwise None.
+        """
+        c = self._controller
+        a = op.args
+        match op.type:
+            case OperationType.DISCONNECT_AUDIO_INPUT:
+                c.audio_routing.disconnect_input(self._track_ids[a["track"]], a["track_channel"], a["engine_channel"])
+            case OperationType.DISCONNECT_AUDIO_OUTPUT:
+                c.audio_routing.disconnect_output(self._track_ids[a["track"]], a["track_channel"], a["engine_channel"])
+            case OperationType.DISCONNECT_KBD_INPUT:
+                c.midi_controller.disconnect_kbd_input(self._track_ids[a["track"]], a["channel"], a["port"],
+                                                       a["raw_midi"])
+            case OperationType.DISCONNECT_KBD_OUTPUT:
+                c.midi_controller.disconnect_kbd_output(self._track_ids[a["track"]], a["channel"], a["port"],
+                                                        a["raw_midi"])
+            case OperationType.DISCONNECT_CC:
+                c.midi_controller.disconnect_cc(self._processor_ids[a["processor"]],
+                                                self._parameter_id(a["processor"], a["parameter_id"]), a["channel"],
+                                                a["port"], a["cc_number"], a["min_range"], a["max_range"],
+                                                a["relative_mode"])
+            case OperationType.DISCONNECT_PC:
+                c.midi_controller.disconnect_pc(self._processor_ids[a["processor"]], a["channel"], a["port"])
+            case OperationType.DELETE_PROCESSOR:
+                c.audio_graph.delete_processor_from_track(self._processor_ids.pop(a["processor"]),
+                                                          self._track_ids[a["track"]])
+            case OperationType.DELETE_TRACK:
+                self._processor_ids.pop(a["track"], None)
+                c.audio_graph.delete_track(self._track_ids.pop(a["track"]))
+            case OperationType.CREATE_TRACK:
+                if a["track_type"] == info_types.TrackType.PRE:
+                    c.audio_graph.create_pre_track(a["track"])
+                    return None, a["track"], True
+                if a["track_type"] == info_types.TrackType.POST:
+                    c.audio_graph.create_post_track(a["track"])
+                    return None, a["track"], True
+                if a["buses"] > 1:
+                    return c.audio_graph.create_multibus_track(a["track"], a["buses"]), a["track"], True
+                return c.audio_graph.create_track(a["track"], a["channels"]), a["track"], True
+            case OperationType.CREATE_PROCESSOR:
+                before = a["before"]
+                event = c.audio_graph.create_processor_on_track(
+                    a["processor"], a["uid"], a["path"], a["plugin_type"], self._track_ids[a["track"]],
+                    self._processor_ids[before] if before is not None else 0, before is None)
+                return event, a["processor"], False
+            case OperationType.MOVE_PROCESSOR:
+                before = a["before"]
+                c.audio_graph.move_processor_on_track(
+                    self._processor_ids[a["processor"]], self._track_ids[a["source_track"]],
+                    self._track_ids[a["track"]], self._processor_ids[before] if before is not None else 0,
+                    before is None)
+            case OperationType.SET_PROCESSOR_STATE:
+                c.audio_graph.set_processor_state(self._processor_ids[a["processor"]],
+                                                  self._resolve_state(a["processor"], a["state"]))
+            case OperationType.CONNECT_AUDIO_INPUT:
+                c.audio_routing.connect_input_channel_to_track(self._track_ids[a["track"]], a["track_channel"],
+                                                               a["engine_channel"])
+            case OperationType.CONNECT_AUDIO_OUTPUT:
+                c.audio_routing.connect_output_channel_from_track(self._track_ids[a["track"]], a["track_channel"],
+                                                                  a["engine_channel"])
+            case OperationType.CONNECT_KBD_INPUT:
+                c.midi_controller.connect_kbd_input_to_track(self._track_ids[a["track"]], a["channel"], a["port"],
+                                                             a["raw_midi"])
+            case OperationType.CONNECT_KBD_OUTPUT:
+                c.midi_controller.connect_kbd_output_from_track(self._track_ids[a["track"]], a["channel"], a["port"],
+                                                                a["raw_midi"])
+            case OperationType.CONNECT_CC:
+                c.midi_controller.connect_cc_to_parameter(self._processor_ids[a["processor"]],
+                                                          self._parameter_id(a["processor"], a["parameter_id"]),
+                                                          a["channel"], a["port"], a["cc_number"], a["min_range"],
+                                                          a["max_range"], a["relative_mode"])
+            case OperationType.CONNECT_PC:
+                c.midi_controller.connect_pc_to_processor(self._processor_ids[a["processor"]], a["channel"],
+                                                          a["port"])
+            case OperationType.SET_CLOCK_OUTPUT:
+                c.midi_controller.set_midi_clock_output_enabled(a["port"], a["enabled"])
+            case OperationType.SET_TEMPO:
+                c.transport.set_tempo(a["tempo"])
+            case OperationType.SET_TIME_SIGNATURE:
+                c.transport.set_time_signature(a["numerator"], a["denominator"])
+            case OperationType.SET_SYNC_MODE:
+                c.transport.set_sync_mode(a["sync_mode"])
+        return None
+
+
+def restore_session_incrementally(controller: "SushiController", binary_session: bytes, sushi_proto,
+                                  timeout: float = 10.0, dry_run: bool = False) -> GraphPlan:
+    """
+    Restore a session by only applying its differences with the live session, instead of reloading everything as
+    SessionController.restore_binary_session() does. Unchanged processors keep running, so audio isn't interrupted.
+    OSC settings, the playing mode and the sample rate are not restored.
+
+    Parameters:
+        controller (SushiController): The controller of the sushi instance to restore the session on.
+        binary_session (bytes): The session, as returned by SessionController.save_binary_session().
+        sushi_proto (ModuleType): The generated protobuf module, see grpc_gen.modules_from_proto().
+        timeout (float): The maximum time in seconds to wait for the objects created by each stage.
+        dry_run (bool): Only compute the plan, without executing it.
+
+    Returns:
+        GraphPlan: The executed plan.
+    """
+    live = GraphModel.from_binary_session(controller.session.save_binary_session(), sushi_proto)
+    target = GraphModel.from_binary_session(binary_session, sushi_proto)
+    plan = diff_graphs(live, target)
+    if not dry_run and not plan.is_empty():
+        PlanExecutor(controller, timeout).execute(plan)
+    return plan
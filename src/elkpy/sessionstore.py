@@ -0,0 +1,303 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from typing import List
+
+try:
+    import fcntl
+except ImportError:
+    # Not on posix, the store is then only locked within the process
+    fcntl = None
+
+from . import grpc_gen
+
+MANIFEST_VERSION = 1
+
+
+##########################
+# Session snapshot store #
+##########################
+
+
+class SessionSnapshotStore(object):
+    """
+    A class to store binary sessions, as returned by SessionController.save_binary_session(), on disk.
+
+    Each session is split into a skeleton (tracks, plugins, routing and engine settings) and one chunk per track and
+    processor state. Chunks are stored zlib compressed under the sha256 of their content, so states that are
+    identical between sessions, or between processors of one session, are only stored once. A small json manifest
+    per saved session lists the chunks needed to reconstruct it.
+
+    Files are synced to disk before they replace the previous version, so a power loss can't leave a saved session
+    or chunk empty. save() and collect_garbage() lock the store, also against other processes, so a chunk that a
+    session being saved refers to is never collected.
+
+    Attributes:
+        directory (str): The root directory of the store.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 sushi_proto_def: str = "/usr/share/sushi/sushi_rpc.proto",
+                 compression_level: int = 6):
+        """
+        The constructor for the SessionSnapshotStore class.
+
+        Parameters:
+            directory (str): The root directory of the store. Created if it doesn't exist.
+            sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
+            compression_level (int): The zlib compression level (0-9) used for new chunks.
+        """
+        self.directory = directory
+        self._compression_level = compression_level
+        self._chunk_dir = os.path.join(directory, "chunks")
+        self._session_dir = os.path.join(directory, "sessions")
+        os.makedirs(self._chunk_dir, exist_ok=True)
+        os.makedirs(self._session_dir, exist_ok=True)
+        self._lock_path = os.path.join(directory, ".lock")
+        self._thread_lock = threading.Lock()
+        self._sushi_proto, _ = grpc_gen.modules_from_proto(sushi_proto_def)
+
+    def save(self, name: str, binary_session: bytes) -> int:
+        """
+        Save a session under a name, replacing any session previously saved with that name.
+
+        Parameters:
+            name (str): The name of the session.
+            binary_session (bytes): The session, as returned by SessionController.save_binary_session().
+
+        Returns:
+            int: The number of bytes newly written to the chunk store.
+        """
+        manifest_path = self._manifest_path(name)
+        session = self._sushi_proto.SessionState()
+        session.ParseFromString(binary_session)
+        with self._locked():
+            written = 0
+            tracks = []
+            for track in session.tracks:
+                track_chunk, size = self._put_chunk(track.track_state)
+                written += size
+                track.ClearField("track_state")
+                processor_chunks = []
+                for processor in track.processors:
+                    chunk, size = self._put_chunk(processor.state)
+                    written += size
+                    processor.ClearField("state")
+                    processor_chunks.append(chunk)
+                tracks.append({"state": track_chunk, "processors": processor_chunks})
+
+            save_date = session.save_date
+            session.ClearField("save_date")
+            skeleton, size = self._put_chunk(session)
+            written += size
+
+            manifest = {"version": MANIFEST_VERSION,
+                        "save_date": save_date,
+                        "size": len(binary_session),
+                        "skeleton": skeleton,
+                        "tracks": tracks}
+            self._write_file(manifest_path, json.dumps(manifest, indent=1).encode())
+            return written
+
+    def load(self, name: str) -> bytes:
+        """
+        Reconstruct a saved session.
+
+        Parameters:
+            name (str): The name of the session.
+
+        Returns:
+            bytes: The session, which can be passed to SessionController.restore_binary_session().
+        """
+        manifest = self._read_manifest(name)
+        session = self._sushi_proto.SessionState()
+        session.ParseFromString(self._get_chunk(manifest["skeleton"]))
+        session.save_date = manifest["save_date"]
+
+        if len(session.tracks) != len(manifest["tracks"]):
+            raise ValueError("Manifest of session {} doesn't match its skeleton".format(name))
+        for track, entry in zip(session.tracks, manifest["tracks"]):
+            track.track_state.ParseFromString(self._get_chunk(entry["state"]))
+            if len(track.processors) != len(entry["processors"]):
+                raise ValueError("Manifest of session {} doesn't match its skeleton".format(name))
+            for processor, chunk in zip(track.processors, entry["processors"]):
+                processor.state.ParseFromString(self._get_chunk(chunk))
+
+        return session.SerializeToString(deterministic=True)
+
+    def list(self) -> List[str]:
+        """
+        Get the names of all saved sessions.
+
+        Returns:
+            List[str]: The names, sorted.
+        """
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self._session_dir) if f.endswith(".json"))
+
+    def contains(self, name: str) -> bool:
+        """
+        Parameters:
+            name (str): The name of the session.
+
+        Returns:
+            bool: True if a session is saved under that name.
+        """
+        return os.path.exists(self._manifest_path(name))
+
+    def delete(self, name: str) -> None:
+        """
+        Delete a saved session. Its chunks are only removed by collect_garbage(), as other sessions may share them.
+
+        Parameters:
+            name (str): The name of the session.
+        """
+        try:
+            os.remove(self._manifest_path(name))
+        except FileNotFoundError as e:
+            raise KeyError("No session named {}".format(name)) from e
+
+    def collect_garbage(self) -> int:
+        """
+        Remove the chunks that are not used by any saved session.
+
+        Returns:
+            int: The number of chunks removed.
+        """
+        with self._locked():
+            referenced = set()
+            for name in self.list():
+                manifest = self._read_manifest(name)
+                referenced.add(manifest["skeleton"])
+                for entry in manifest["tracks"]:
+                    referenced.add(entry["state"])
+                    referenced.update(entry["processors"])
+
+            removed = 0
+            for chunk in self._all_chunks():
+                if chunk not in referenced:
+                    os.remove(self._chunk_path(chunk))
+                    removed += 1
+            return removed
+
+    def get_stats(self) -> dict:
+        """
+        Get the size of the store.
+
+        Returns:
+            dict: "sessions": the number of saved sessions, "chunks": the number of stored chunks,
+                  "stored_bytes": the size of all chunks on disk, "session_bytes": the total size of the saved
+                  sessions before splitting and compression.
+        """
+        names = self.list()
+        chunks = list(self._all_chunks())
+        return {"sessions": len(names),
+                "chunks": len(chunks),
+                "stored_bytes": sum(os.path.getsize(self._chunk_path(c)) for c in chunks),
+                "session_bytes": sum(self._read_manifest(n)["size"] for n in names)}
+
+    def _put_chunk(self, message) -> tuple[str, int]:
+        data = message.SerializeToString(deterministic=True)
+        chunk = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(chunk)
+        if os.path.exists(path):
+            return chunk, 0
+        compressed = zlib.compress(data, self._compression_level)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _fsync_directory(self._chunk_dir)
+        self._write_file(path, compressed)
+        return chunk, len(compressed)
+
+    def _get_chunk(self, chunk: str) -> bytes:
+        with open(self._chunk_path(chunk), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _all_chunks(self):
+        for prefix in os.listdir(self._chunk_dir):
+            for chunk in os.listdir(os.path.join(self._chunk_dir, prefix)):
+                yield chunk
+
+    def _chunk_path(self, chunk: str) -> str:
+        return os.path.join(self._chunk_dir, chunk[:2], chunk)
+
+    def _manifest_path(self, name: str) -> str:
+        if not name or os.sep in name or name.startswith("."):
+            raise ValueError("Invalid session name {}".format(name))
+        return os.path.join(self._session_dir, name + ".json")
+
+    def _read_manifest(self, name: str) -> dict:
+        try:
+            with open(self._manifest_path(name), "rb") as f:
+                manifest = json.loads(f.read())
+        except FileNotFoundError as e:
+            raise KeyError("No session named {}".format(name)) from e
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError("Unsupported manifest version for session {}".format(name))
+        return manifest
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        # Write to a temporary file first so an interrupted save never leaves a truncated file behind, and sync it
+        # so the rename can't reach the disk before the data
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        _fsync_directory(directory)
+
+
+def _fsync_directory(path: str) -> None:
+    # Makes the rename durable, not possible on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
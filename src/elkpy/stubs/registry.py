@@ -0,0 +1,4 @@
+# Generated by tools/generate_stubs.py, do not edit.
+
+# sha256 of sushi_rpc.proto: sushi gRPC api version of the bundled stubs
+BUNDLED_STUBS: dict[str, str] = {}
@@ -485,7 +485,7 @@ class ProcessorState:
         try:
             self.properties = []
             for property in grpc_ProcessorState.properties:
-                self.properties.append((property.property.id, property.value))
+                self.properties.append((property.property.property_id, property.value))
         except AttributeError:
             self.properties = []
 
@@ -16,21 +16,31 @@ __copyright__ = """
 """
 __license__ = "GPL-3.0"
 
+import asyncio
+import threading
+from functools import cached_property
+
+from typing import TYPE_CHECKING
+
 from .events import ElkpyEvent
 
-from . import audiographcontroller
-from . import keyboardcontroller
-from . import parametercontroller
-from . import programcontroller
-from . import timingcontroller
-from . import transportcontroller
-from . import audioroutingcontroller
-from . import midicontroller
-from . import cvgatecontroller
-from . import osccontroller
-from . import systemcontroller
-from . import sessioncontroller
-from . import notificationcontroller
+# The sub-controller modules are imported when the sub-controller is first used
+if TYPE_CHECKING:
+    from .audiographcontroller import AudioGraphController
+    from .keyboardcontroller import KeyboardController
+    from .parametercontroller import ParameterController
+    from .programcontroller import ProgramController
+    from .timingcontroller import TimingController
+    from .transportcontroller import TransportController
+    from .audioroutingcontroller import AudioRoutingController
+    from .midicontroller import MidiController
+    from .cvgatecontroller import CvGateController
+    from .osccontroller import OscController
+    from .systemcontroller import SystemController
+    from .sessioncontroller import SessionController
+    from .notificationcontroller import NotificationController
+    from .valuecache import ParameterValueCache, PropertyValueCache
+    from .changedispatch import ChangeDispatcher
 
 
 ############################
@@ -114,9 +124,10 @@ def grpc_error_handling(e, context_info=""):
 class SushiController:
     """
     A class to control sushi via gRPC.
-    This class creates one instance of each different controller type and makes
-    these sub-controllers available as member variables. See the documentation
-    of the separate sub-controllers for their usage.
+    This class makes one instance of each different controller type available as member variables. The
+    sub-controllers are only created when first accessed, and the notification loop is only started when a
+    subscription or a command returning an ElkpyEvent needs it. See the documentation of the separate
+    sub-controllers for their usage.
 
     Attributes:
         _stub (SushiControllerStub): Connection stubs to the gRPC interface implemented in sushi.
@@ -138,37 +149,186 @@ class SushiController:
             address (str): 'ip-addres:port' The ip-addres and port at which to connect to sushi.
             sushi_proto_def (str): path to .proto file with SUSHI's gRPC services definition
         """
-        self.audio_graph = audiographcontroller.AudioGraphController(
-            self, address, sushi_proto_def
-        )
-        self.keyboard = keyboardcontroller.KeyboardController(address, sushi_proto_def)
-        self.parameters = parametercontroller.ParameterController(
-            address, sushi_proto_def
-        )
-        self.programs = programcontroller.ProgramController(address, sushi_proto_def)
-        self.timings = timingcontroller.TimingController(address, sushi_proto_def)
-        self.transport = transportcontroller.TransportController(
-            address, sushi_proto_def
-        )
-        self.audio_routing = audioroutingcontroller.AudioRoutingController(
-            address, sushi_proto_def
-        )
-        self.midi_controller = midicontroller.MidiController(address, sushi_proto_def)
-        self.cv_gate_controller = cvgatecontroller.CvGateController(
-            address, sushi_proto_def
-        )
-        self.osc_controller = osccontroller.OscController(address, sushi_proto_def)
-        self.system = systemcontroller.SystemController(address, sushi_proto_def)
-        self.session = sessioncontroller.SessionController(address, sushi_proto_def)
-        self.notifications = notificationcontroller.NotificationController(
-            self, address, sushi_proto_def
-        )
-
-        self.audiograph_event_queue: list[ElkpyEvent] = (
-            self.audio_graph.audiograph_event_queue
-        )
-        self.processor_event_queue = self.audio_graph.processor_event_queue
+        self._address = address
+        self._sushi_proto_def = sushi_proto_def
         self.parameter_event_queue = []
+        self._notifications_lock = threading.Lock()
+
+        # In asyncio programs, the notification tasks run on the caller's loop, which only runs them when the caller
+        # yields. Start them right away so they are subscribed before the first command needs them.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            self.notifications
+
+    @cached_property
+    def audio_graph(self) -> "AudioGraphController":
+        from .audiographcontroller import AudioGraphController
+
+        return AudioGraphController(self, self._address, self._sushi_proto_def)
+
+    @cached_property
+    def keyboard(self) -> "KeyboardController":
+        from .keyboardcontroller import KeyboardController
+
+        return KeyboardController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def parameters(self) -> "ParameterController":
+        from .parametercontroller import ParameterController
+
+        return ParameterController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def programs(self) -> "ProgramController":
+        from .programcontroller import ProgramController
+
+        return ProgramController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def timings(self) -> "TimingController":
+        from .timingcontroller import TimingController
+
+        return TimingController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def transport(self) -> "TransportController":
+        from .transportcontroller import TransportController
+
+        return TransportController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def audio_routing(self) -> "AudioRoutingController":
+        from .audioroutingcontroller import AudioRoutingController
+
+        return AudioRoutingController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def midi_controller(self) -> "MidiController":
+        from .midicontroller import MidiController
+
+        return MidiController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def cv_gate_controller(self) -> "CvGateController":
+        from .cvgatecontroller import CvGateController
+
+        return CvGateController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def osc_controller(self) -> "OscController":
+        from .osccontroller import OscController
+
+        return OscController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def system(self) -> "SystemController":
+        from .systemcontroller import SystemController
+
+        return SystemController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def session(self) -> "SessionController":
+        from .sessioncontroller import SessionController
+
+        return SessionController(self._address, self._sushi_proto_def)
+
+    @cached_property
+    def changes(self) -> "ChangeDispatcher":
+        from .changedispatch import ChangeDispatcher
+
+        return ChangeDispatcher(self.notifications)
+
+    @property
+    def notifications(self) -> "NotificationController":
+        # Locked, as commands sent from several threads may all need the notification loop started
+        with self._notifications_lock:
+            if "notifications" not in self.__dict__:
+                from .notificationcontroller import NotificationController
+
+                self.__dict__["notifications"] = NotificationController(
+                    self, self._address, self._sushi_proto_def
+                )
+        return self.__dict__["notifications"]
+
+    @property
+    def audiograph_event_queue(self) -> list[ElkpyEvent]:
+        return self.audio_graph.audiograph_event_queue
+
+    @property
+    def processor_event_queue(self) -> list[ElkpyEvent]:
+        return self.audio_graph.processor_event_queue
+
+    def enable_parameter_cache(self, max_age: float | None = 5.0) -> "ParameterValueCache":
+        """
+        Serve parameters.get_parameter_value() and related reads from memory while they are kept up to date by
+        parameter notifications, see ParameterValueCache.
+
+        Parameters:
+            max_age (float | None): The maximum time in seconds a value is served without being read or notified
+                again, or None for no limit.
+
+        Returns:
+            ParameterValueCache: The cache, with its hit ratio in get_stats().
+        """
+        from .valuecache import ParameterValueCache
+
+        self.disable_parameter_cache()
+        cache = ParameterValueCache(max_age)
+        cache.attach(self.notifications)
+        self.parameters.set_value_cache(cache)
+        self.programs.set_value_cache(cache)
+        self._parameter_cache = cache
+        return cache
+
+    def disable_parameter_cache(self) -> None:
+        """
+        Stop caching parameter values, if enable_parameter_cache() was called.
+        """
+        cache = self.__dict__.pop("_parameter_cache", None)
+        if cache is not None:
+            self.parameters.set_value_cache(None)
+            self.programs.set_value_cache(None)
+            cache.detach()
+
+    def enable_property_cache(self, max_age: float | None = 5.0) -> "PropertyValueCache":
+        """
+        Serve parameters.get_property_value() and the property lists of processors and tracks from memory while they
+        are kept up to date by property notifications, see PropertyValueCache.
+
+        Parameters:
+            max_age (float | None): The maximum time in seconds a value is served without being read or notified
+                again, or None for no limit.
+
+        Returns:
+            PropertyValueCache: The cache, with the versions of the properties in get_version().
+        """
+        from .valuecache import PropertyValueCache
+
+        self.disable_property_cache()
+        cache = PropertyValueCache(max_age)
+        cache.attach(self.notifications)
+        self.parameters.set_property_cache(cache)
+        self._property_cache = cache
+        return cache
+
+    def disable_property_cache(self) -> None:
+        """
+        Stop caching property values, if enable_property_cache() was called.
+        """
+        cache = self.__dict__.pop("_property_cache", None)
+        if cache is not None:
+            self.parameters.set_property_cache(None)
+            cache.detach()
+
+    def _start_event_matching(self, timeout: float = 5.0) -> None:
+        """
+        Make sure notifications are being matched to ElkpyEvents before a command producing one is sent.
+        Called by the sub-controllers, should not be called by the user.
+        """
+        self.notifications.wait_until_matching(timeout)
 
     def close(self):
         """
@@ -177,7 +337,10 @@ class SushiController:
         i.e.: NotificationController has an infinite event loop running in its own thread, which has to be stopped and joined
         to ensure clean closing and proper releasing of any resources.
         """
-        self.notifications.close()
+        if "changes" in self.__dict__:
+            self.changes.close()
+        if "notifications" in self.__dict__:
+            self.notifications.close()
 
     def __del__(self):
-        self.notifications.close()
+        self.close()
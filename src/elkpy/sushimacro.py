@@ -0,0 +1,287 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import threading
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .parameterbatch import write_parameter_batch
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+    from .sushiprocessor import SushiProcessor
+
+
+################
+# Macro curves #
+################
+
+
+class MacroCurve(IntEnum):
+    """
+    Enum class to hold the response curves a macro target can use.
+
+    Attributes:
+        LINEAR,
+        EXPONENTIAL,
+        LOGARITHMIC,
+        S_CURVE
+    """
+
+    LINEAR = 1
+    EXPONENTIAL = 2
+    LOGARITHMIC = 3
+    S_CURVE = 4
+
+
+def _linear(x: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    return x
+
+
+def _exponential(x: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    return np.expm1(amount * x) / np.expm1(amount)
+
+
+def _logarithmic(x: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    return np.log1p(amount * x) / np.log1p(amount)
+
+
+def _s_curve(x: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    return x * x * (3.0 - 2.0 * x)
+
+
+_CURVE_FUNCTIONS = {
+    MacroCurve.LINEAR: _linear,
+    MacroCurve.EXPONENTIAL: _exponential,
+    MacroCurve.LOGARITHMIC: _logarithmic,
+    MacroCurve.S_CURVE: _s_curve,
+}
+
+
+###############
+# Macro class #
+###############
+
+
+class SushiMacro:
+    """
+    A class mapping one macro value to many parameters in sushi.
+
+    Each target maps the macro value (0.0-1.0) through its own curve onto a normalised parameter range. Setting the
+    macro evaluates all targets at once with NumPy and only writes the targets whose value changed since the last
+    write, grouping the changes into one update per processor.
+
+    Attributes:
+        name (str): The name of the macro.
+        _controller (SushiController): The sushi controller to write parameter values through.
+        _tolerance (float): Changes smaller than this are not sent to sushi.
+    """
+
+    def __init__(self, name: str, controller: "SushiController", tolerance: float = 1e-6):
+        """
+        Constructor for the sushi macro.
+
+        Parameters:
+            name (str): The name of the macro.
+            controller (SushiController): The controller to use for writing parameter values.
+            tolerance (float): The smallest change in a target value that is written to sushi.
+        """
+        self.name = name
+        self._controller = controller
+        self._tolerance = tolerance
+        self._lock = threading.Lock()
+        self._value = None
+
+        self._processor_ids = np.empty(0, dtype=np.int64)
+        self._parameter_ids = np.empty(0, dtype=np.int64)
+        self._min_values = np.empty(0, dtype=np.float64)
+        self._max_values = np.empty(0, dtype=np.float64)
+        self._amounts = np.empty(0, dtype=np.float64)
+        self._curves = np.empty(0, dtype=np.int64)
+        self._written = np.empty(0, dtype=np.float64)
+
+    ##################
+    # Target control #
+    ##################
+
+    def add_target(
+        self,
+        processor_identifier: int,
+        parameter_identifier: int,
+        min_value: float = 0.0,
+        max_value: float = 1.0,
+        curve: MacroCurve = MacroCurve.LINEAR,
+        amount: float = 4.0,
+    ) -> None:
+        """
+        Add a parameter to be controlled by the macro. Adding a target that already exists replaces it.
+
+        Parameters:
+            processor_identifier (int): The id of the processor owning the parameter.
+            parameter_identifier (int): The id of the parameter to control.
+            min_value (float): The normalised parameter value when the macro is at 0.0.
+            max_value (float): The normalised parameter value when the macro is at 1.0. May be lower than
+                               min_value to invert the response.
+            curve (MacroCurve): The response curve of the target.
+            amount (float): The steepness of EXPONENTIAL and LOGARITHMIC curves. Must be positive.
+        """
+        curve = MacroCurve(curve)
+        if curve in (MacroCurve.EXPONENTIAL, MacroCurve.LOGARITHMIC) and amount <= 0:
+            raise ValueError(
+                "Curve amount = {}. Should be positive for {} curves".format(amount, curve.name)
+            )
+
+        with self._lock:
+            self._remove(processor_identifier, parameter_identifier)
+            self._processor_ids = np.append(self._processor_ids, processor_identifier)
+            self._parameter_ids = np.append(self._parameter_ids, parameter_identifier)
+            self._min_values = np.append(self._min_values, min_value)
+            self._max_values = np.append(self._max_values, max_value)
+            self._amounts = np.append(self._amounts, amount)
+            self._curves = np.append(self._curves, int(curve))
+            self._written = np.append(self._written, np.nan)
+
+    def add_processor_target(
+        self,
+        processor: "SushiProcessor",
+        parameter_name: str,
+        min_value: float = 0.0,
+        max_value: float = 1.0,
+        curve: MacroCurve = MacroCurve.LINEAR,
+        amount: float = 4.0,
+    ) -> None:
+        """
+        Add a parameter of a SushiProcessor, by name, to be controlled by the macro.
+
+        Parameters:
+            processor (SushiProcessor): The processor owning the parameter.
+            parameter_name (str): The name of the parameter to control.
+            min_value (float): The normalised parameter value when the macro is at 0.0.
+            max_value (float): The normalised parameter value when the macro is at 1.0.
+            curve (MacroCurve): The response curve of the target.
+            amount (float): The steepness of EXPONENTIAL and LOGARITHMIC curves.
+        """
+        self.add_target(
+            processor.get_id(),
+            processor.get_parameter_id(parameter_name),
+            min_value,
+            max_value,
+            curve,
+            amount,
+        )
+
+    def remove_target(self, processor_identifier: int, parameter_identifier: int) -> None:
+        """
+        Stop controlling a parameter with the macro.
+
+        Parameters:
+            processor_identifier (int): The id of the processor owning the parameter.
+            parameter_identifier (int): The id of the parameter.
+        """
+        with self._lock:
+            self._remove(processor_identifier, parameter_identifier)
+
+    def get_targets(self) -> list[tuple[int, int]]:
+        """
+        Get the parameters controlled by the macro.
+
+        Returns:
+            list[tuple[int, int]]: A list of (processor id, parameter id) tuples.
+        """
+        return list(zip(self._processor_ids.tolist(), self._parameter_ids.tolist()))
+
+    #################
+    # Value control #
+    #################
+
+    def evaluate(self, value: float) -> np.ndarray:
+        """
+        Compute the target parameter values for a macro value without writing them to sushi.
+
+        Parameters:
+            value (float): The macro value. Clipped to the range (0.0-1.0).
+
+        Returns:
+            np.ndarray: The normalised value of every target, in the order of get_targets().
+        """
+        x = np.full(len(self._curves), min(max(float(value), 0.0), 1.0))
+        shaped = np.empty_like(x)
+        for curve in np.unique(self._curves):
+            mask = self._curves == curve
+            shaped[mask] = _CURVE_FUNCTIONS[MacroCurve(curve)](x[mask], self._amounts[mask])
+
+        return self._min_values + (self._max_values - self._min_values) * shaped
+
+    def set_value(self, value: float) -> int:
+        """
+        Set the macro value and write the resulting parameter values to sushi. Only targets whose value changed
+        since the last write are sent, with one update per processor.
+
+        Parameters:
+            value (float): The macro value. Should be in range (0.0-1.0).
+
+        Returns:
+            int: The number of RPCs issued.
+        """
+        with self._lock:
+            self._value = value
+            values = self.evaluate(value)
+            changed = ~(np.abs(values - self._written) <= self._tolerance)
+            if not changed.any():
+                return 0
+
+            rpc_count = write_parameter_batch(
+                self._controller,
+                self._processor_ids[changed],
+                self._parameter_ids[changed],
+                values[changed],
+            )
+            self._written[changed] = values[changed]
+            return rpc_count
+
+    def get_value(self) -> float | None:
+        """
+        Get the last value the macro was set to.
+
+        Returns:
+            float | None: The macro value, or None if it has not been set yet.
+        """
+        return self._value
+
+    def invalidate(self) -> None:
+        """
+        Forget the values last written to sushi, so the next set_value() writes every target. Should be called if
+        the target parameters may have been changed from elsewhere.
+        """
+        with self._lock:
+            self._written[:] = np.nan
+
+    def _remove(self, processor_identifier: int, parameter_identifier: int) -> None:
+        keep = ~(
+            (self._processor_ids == processor_identifier)
+            & (self._parameter_ids == parameter_identifier)
+        )
+        self._processor_ids = self._processor_ids[keep]
+        self._parameter_ids = self._parameter_ids[keep]
+        self._min_values = self._min_values[keep]
+        self._max_values = self._max_values[keep]
+        self._amounts = self._amounts[keep]
+        self._curves = self._curves[keep]
+        self._written = self._written[keep]
@@ -18,7 +18,9 @@ __license__ = "GPL-3.0"
 
 from . import sushicontroller as sc
 from .sushicontroller import SushiController
-from typing import List
+from .graphmetadata import GraphMetadataCache, ProcessorMetadata, fetch_graph_metadata
+from .changedispatch import ChangeListener
+from typing import Callable, Iterable, List
 
 class SushiProcessor(object):
     """
@@ -57,10 +59,52 @@ class SushiProcessor(object):
             for program in controller.programs.get_processor_programs(self._id):
                 self._programs[program.name] = program.id
 
+    @classmethod
+    def from_metadata(cls, metadata: ProcessorMetadata, controller: SushiController) -> "SushiProcessor":
+        """
+        Create a sushi processor from metadata read before, without sending any rpc.
+
+        Parameters:
+            metadata (ProcessorMetadata): The metadata of the processor, e.g. from fetch_graph_metadata().
+            controller (SushiController): The controller to use for controlling the processor.
+
+        Returns:
+            SushiProcessor: The processor.
+        """
+        processor = cls.__new__(cls)
+        processor._name = metadata.name
+        processor._controller = controller
+        processor._track_id = metadata.track_id
+        processor._id = metadata.id
+        processor._parameters = dict(metadata.parameters)
+        processor._programs = dict(metadata.programs)
+        return processor
+
+    def get_id(self) -> int:
+        """
+        Get the id of the processor in sushi.
+
+        Returns:
+            int: The id of the processor.
+        """
+        return self._id
+
     #####################
     # Parameter Control #
     #####################
 
+    def get_parameter_id(self, parameter_name: str) -> int:
+        """
+        Get the id of a parameter by name.
+
+        Parameters:
+            parameter_name (str): The name of the parameter.
+
+        Returns:
+            int: The id of the parameter.
+        """
+        return self._parameters[parameter_name]
+
     def set_parameter_value(self, parameter_name: str, value: float) -> None:
         """
         Set the value of parameter by name.
@@ -105,6 +149,35 @@ class SushiProcessor(object):
 
         return parameter_values
 
+    def on_parameter_change(self, parameter_name: str, callback: Callable) -> ChangeListener:
+        """
+        Call a callback whenever a parameter changes. All callbacks registered through the same controller share one
+        notification stream, see SushiController.changes.
+
+        Parameters:
+            parameter_name (str): The name of the parameter.
+            callback (Callable): Called on the notification thread with the ParameterUpdate notification.
+
+        Returns:
+            ChangeListener: The registration, cancel() it to stop the calls.
+        """
+        return self._controller.changes.add_parameter_listener(self._id, self._parameters[parameter_name], callback)
+
+    def on_property_change(self, property_name: str, callback: Callable) -> ChangeListener:
+        """
+        Call a callback whenever a property changes. All callbacks registered through the same controller share one
+        notification stream, see SushiController.changes.
+
+        Parameters:
+            property_name (str): The name of the property.
+            callback (Callable): Called on the notification thread with the PropertyValue notification.
+
+        Returns:
+            ChangeListener: The registration, cancel() it to stop the calls.
+        """
+        property_id = self._controller.parameters.get_property_id(self._id, property_name)
+        return self._controller.changes.add_property_listener(self._id, property_id, callback)
+
     def get_bypass_state(self) -> bool:
         """
         Get the bypass state of the processor.
@@ -250,3 +323,32 @@ class SushiProcessor(object):
             value (float): The modulation value of the note as a float between 0-1.
         """
         self._controller.keyboard.send_pitch_bend(self._track_id, channel, value)
+
+
+def processors_from_metadata(controller: SushiController,
+                             names: Iterable[str] | None = None,
+                             metadata: dict[str, ProcessorMetadata] | None = None,
+                             max_workers: int = 8,
+                             cache: GraphMetadataCache | None = None) -> dict[str, SushiProcessor]:
+    """
+    Create sushi processors for all processors of the graph, or some of them, reading what they need with one
+    get_all_processors() call and concurrent reads, instead of several reads per processor in turn. Nothing is created
+    in sushi, see AudioGraphController.create_processors() for that.
+
+    Parameters:
+        controller (SushiController): The controller to use for controlling the processors.
+        names (Iterable[str] | None): The names of the processors, or None for all of them.
+        metadata (dict[str, ProcessorMetadata] | None): Metadata read before, used for the processors that still
+            have the same id, see fetch_graph_metadata().
+        max_workers (int): The maximum number of rpcs sent at the same time.
+        cache (GraphMetadataCache | None): A file to load the metadata from when it matches the graph, and to update
+            otherwise. metadata is ignored if given.
+
+    Returns:
+        dict[str, SushiProcessor]: The processors, keyed by name.
+    """
+    if cache is not None:
+        graph = cache.fetch(controller, names, max_workers)
+    else:
+        graph = fetch_graph_metadata(controller, names, metadata, max_workers)
+    return {name: SushiProcessor.from_metadata(m, controller) for name, m in graph.items()}
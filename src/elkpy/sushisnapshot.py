@@ -0,0 +1,413 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import threading
+import time
+from typing import Iterable, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from .parameterbatch import write_parameter_batch
+
+if TYPE_CHECKING:
+    from .sushicontroller import SushiController
+
+
+###################
+# Parameter index #
+###################
+
+
+class ParameterIndex:
+    """
+    A stable, sorted mapping from (processor id, parameter id) to a position in a value array.
+
+    Attributes:
+        processor_ids (np.ndarray): The processor id of each position.
+        parameter_ids (np.ndarray): The parameter id of each position.
+    """
+
+    def __init__(self, keys: Iterable[tuple[int, int]]):
+        """
+        Constructor for the parameter index.
+
+        Parameters:
+            keys (Iterable[tuple[int, int]]): The (processor id, parameter id) pairs to index. Duplicates are ignored.
+        """
+        self._keys = sorted(set((int(p), int(q)) for p, q in keys))
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+        self.processor_ids = np.array([k[0] for k in self._keys], dtype=np.int64)
+        self.parameter_ids = np.array([k[1] for k in self._keys], dtype=np.int64)
+
+    @classmethod
+    def union(cls, indices: Iterable["ParameterIndex"]) -> "ParameterIndex":
+        """
+        Create an index covering every parameter of the given indices.
+
+        Parameters:
+            indices (Iterable[ParameterIndex]): The indices to merge.
+
+        Returns:
+            ParameterIndex: The merged index.
+        """
+        keys = set()
+        for index in indices:
+            keys.update(index.keys())
+        return cls(keys)
+
+    def keys(self) -> list[tuple[int, int]]:
+        """
+        Get the indexed parameters in index order.
+
+        Returns:
+            list[tuple[int, int]]: A list of (processor id, parameter id) tuples.
+        """
+        return list(self._keys)
+
+    def position(self, processor_identifier: int, parameter_identifier: int) -> int:
+        """
+        Get the position of a parameter in the index.
+
+        Parameters:
+            processor_identifier (int): The id of the processor owning the parameter.
+            parameter_identifier (int): The id of the parameter.
+
+        Returns:
+            int: The position of the parameter. Raises KeyError if it is not indexed.
+        """
+        return self._positions[(processor_identifier, parameter_identifier)]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._positions
+
+    def __eq__(self, other):
+        return self._keys == other._keys
+
+
+######################
+# Parameter snapshot #
+######################
+
+
+class ParameterSnapshot:
+    """
+    A class holding the parameter values of one or more processors at a point in time.
+
+    Attributes:
+        name (str): The name of the snapshot.
+        index (ParameterIndex): The parameters held by the snapshot.
+        values (np.ndarray): The normalised value of each parameter, in index order.
+    """
+
+    def __init__(self, name: str, index: ParameterIndex, values: Sequence[float]):
+        """
+        Constructor for the parameter snapshot.
+
+        Parameters:
+            name (str): The name of the snapshot.
+            index (ParameterIndex): The parameters held by the snapshot.
+            values (Sequence[float]): The normalised value of each parameter, in index order.
+        """
+        if len(values) != len(index):
+            raise ValueError(
+                "Got {} values for {} indexed parameters".format(len(values), len(index))
+            )
+        self.name = name
+        self.index = index
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def capture(
+        cls, name: str, controller: "SushiController", processor_identifiers: Iterable[int]
+    ) -> "ParameterSnapshot":
+        """
+        Capture the current parameter values of the given processors with get_processor_state().
+
+        Parameters:
+            name (str): The name of the snapshot.
+            controller (SushiController): The controller to read the processor states through.
+            processor_identifiers (Iterable[int]): The ids of the processors (or tracks) to capture.
+
+        Returns:
+            ParameterSnapshot: A snapshot of the parameter values.
+        """
+        values = {}
+        for processor_id in processor_identifiers:
+            state = controller.audio_graph.get_processor_state(processor_id)
+            for parameter_id, value in state.parameters:
+                values[(processor_id, parameter_id)] = value
+
+        index = ParameterIndex(values)
+        return cls(name, index, [values[key] for key in index.keys()])
+
+    def aligned_values(self, index: ParameterIndex) -> np.ndarray:
+        """
+        Get the values of the snapshot laid out according to another index.
+
+        Parameters:
+            index (ParameterIndex): The index to align to.
+
+        Returns:
+            np.ndarray: The snapshot values in the order of index, with NaN for parameters missing in the snapshot.
+        """
+        aligned = np.full(len(index), np.nan)
+        for key, value in zip(self.index.keys(), self.values):
+            if key in index:
+                aligned[index.position(*key)] = value
+        return aligned
+
+
+#########################
+# Snapshot morph engine #
+#########################
+
+
+class SnapshotMorpher:
+    """
+    A class interpolating between N parameter snapshots and writing the result to sushi.
+
+    The snapshots are stacked into one matrix over the union of their parameters. A morph is a weighted average of
+    the snapshots, computed for all parameters at once. A parameter missing from some snapshots is averaged over
+    the snapshots that have it, and is left untouched when none of the snapshots with a non-zero weight have it.
+    Only values that changed since the last write are sent to sushi, with one update per processor.
+
+    Attributes:
+        index (ParameterIndex): The union of the parameters of all snapshots.
+        rate (float): The rate, in Hz, at which the background thread writes changes.
+    """
+
+    def __init__(
+        self,
+        controller: "SushiController",
+        snapshots: Sequence[ParameterSnapshot],
+        rate: float = 30.0,
+        tolerance: float = 1e-6,
+    ):
+        """
+        Constructor for the snapshot morpher.
+
+        Parameters:
+            controller (SushiController): The controller to write parameter values through.
+            snapshots (Sequence[ParameterSnapshot]): The snapshots to morph between. At least one is needed.
+            rate (float): The rate, in Hz, at which the background thread writes changes.
+            tolerance (float): The smallest change in a parameter value that is written to sushi.
+        """
+        if len(snapshots) == 0:
+            raise ValueError("At least one snapshot is needed to morph")
+
+        self._controller = controller
+        self._snapshots = list(snapshots)
+        self._tolerance = tolerance
+        self.rate = rate
+
+        self.index = ParameterIndex.union(s.index for s in self._snapshots)
+        matrix = np.stack([s.aligned_values(self.index) for s in self._snapshots])
+        self._present = ~np.isnan(matrix)
+        self._matrix = np.nan_to_num(matrix)
+        self._written = np.full(len(self.index), np.nan)
+
+        self._lock = threading.Lock()
+        self._weights = np.zeros(len(self._snapshots))
+        self._weights[0] = 1.0
+        self._dirty = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def get_snapshot_names(self) -> list[str]:
+        """
+        Get the names of the snapshots, in weight order.
+
+        Returns:
+            list[str]: The names of the snapshots.
+        """
+        return [s.name for s in self._snapshots]
+
+    def evaluate(self, weights: Sequence[float]) -> np.ndarray:
+        """
+        Compute the morphed parameter values for a set of snapshot weights, without writing them.
+
+        Parameters:
+            weights (Sequence[float]): One non-negative weight per snapshot. They don't need to sum to 1.
+
+        Returns:
+            np.ndarray: The morphed value of every parameter in index order, NaN where no weighted snapshot has it.
+        """
+        weights = self._check_weights(weights)
+        masked = weights[:, np.newaxis] * self._present
+        total = masked.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = (masked * self._matrix).sum(axis=0) / total
+        values[total <= 0.0] = np.nan
+        return values
+
+    def position_weights(self, position: float) -> np.ndarray:
+        """
+        Get the weights of a crossfade along the snapshots in order, where position 0.0 is the first snapshot,
+        1.0 the second and so on.
+
+        Parameters:
+            position (float): The crossfade position. Clipped to the range (0.0-N-1).
+
+        Returns:
+            np.ndarray: The weight of each snapshot.
+        """
+        last = len(self._snapshots) - 1
+        position = min(max(float(position), 0.0), float(last))
+        lower = min(int(position), max(last - 1, 0))
+        fraction = position - lower
+        weights = np.zeros(len(self._snapshots))
+        weights[lower] = 1.0 - fraction
+        if last > 0:
+            weights[lower + 1] = fraction
+        return weights
+
+    def apply(self, weights: Sequence[float]) -> int:
+        """
+        Morph to a set of snapshot weights immediately, writing only changed values.
+
+        Parameters:
+            weights (Sequence[float]): One non-negative weight per snapshot.
+
+        Returns:
+            int: The number of RPCs issued.
+        """
+        values = self.evaluate(weights)
+        with self._lock:
+            changed = ~np.isnan(values) & ~(np.abs(values - self._written) <= self._tolerance)
+            if not changed.any():
+                return 0
+
+            rpc_count = write_parameter_batch(
+                self._controller,
+                self.index.processor_ids[changed],
+                self.index.parameter_ids[changed],
+                values[changed],
+            )
+            self._written[changed] = values[changed]
+            return rpc_count
+
+    def invalidate(self) -> None:
+        """
+        Forget the values last written to sushi, so the next write sends every parameter.
+        """
+        with self._lock:
+            self._written[:] = np.nan
+
+    ######################
+    # Fixed rate writing #
+    ######################
+
+    def set_weights(self, weights: Sequence[float]) -> None:
+        """
+        Set the snapshot weights to be written by the background thread on its next tick.
+
+        Parameters:
+            weights (Sequence[float]): One non-negative weight per snapshot.
+        """
+        weights = self._check_weights(weights)
+        with self._lock:
+            self._weights = weights
+            self._dirty = True
+
+    def set_position(self, position: float) -> None:
+        """
+        Set a crossfade position (see position_weights()) to be written by the background thread on its next tick.
+
+        Parameters:
+            position (float): The crossfade position.
+        """
+        self.set_weights(self.position_weights(position))
+
+    def get_weights(self) -> np.ndarray:
+        """
+        Get the current snapshot weights.
+
+        Returns:
+            np.ndarray: The weight of each snapshot.
+        """
+        return self._weights.copy()
+
+    def morph(self, weights: Sequence[float], duration: float) -> None:
+        """
+        Ramp linearly from the current weights to new weights over a duration, writing at the fixed rate.
+        Blocks until the ramp is done.
+
+        Parameters:
+            weights (Sequence[float]): The weights to end at.
+            duration (float): The length of the ramp in seconds.
+        """
+        start = self.get_weights()
+        end = self._check_weights(weights)
+        steps = max(int(duration * self.rate), 1)
+        period = 1.0 / self.rate
+        deadline = time.monotonic()
+        for step in range(1, steps + 1):
+            current = start + (end - start) * (step / steps)
+            with self._lock:
+                self._weights = current
+                self._dirty = False
+            self.apply(current)
+            deadline += period
+            delay = deadline - time.monotonic()
+            if step < steps and delay > 0:
+                time.sleep(delay)
+
+    def start(self) -> None:
+        """
+        Start a background thread writing weight changes to sushi at the fixed rate.
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread. Should be called before the application exits.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        period = 1.0 / self.rate
+        deadline = time.monotonic()
+        while not self._stop_event.is_set():
+            with self._lock:
+                weights = self._weights if self._dirty else None
+                self._dirty = False
+            if weights is not None:
+                self.apply(weights)
+            deadline += period
+            self._stop_event.wait(max(deadline - time.monotonic(), 0.0))
+
+    def _check_weights(self, weights: Sequence[float]) -> np.ndarray:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (len(self._snapshots),):
+            raise ValueError(
+                "Got {} weights for {} snapshots".format(weights.size, len(self._snapshots))
+            )
+        if (weights < 0.0).any():
+            raise ValueError("Snapshot weights should be non-negative")
+        return weights
@@ -0,0 +1,399 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import threading
+import time
+
+# The representations of a parameter value that are cached
+NORMALIZED = 0
+DOMAIN = 1
+STRING = 2
+
+
+class _Entry(object):
+    __slots__ = ("values", "time")
+
+    def __init__(self, now: float):
+        self.values = [None, None, None]
+        self.time = now
+
+
+class _PropertyEntry(object):
+    __slots__ = ("value", "version", "time", "valid")
+
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self.time = 0.0
+        self.valid = False
+
+
+class _NotifiedCache(object):
+    """
+    The subscriptions, invalidation and hit counting shared by the caches. Entries are keyed by (processor id, id).
+    """
+
+    def __init__(self, max_age: float | None):
+        self.max_age = max_age
+        self._entries: dict[tuple[int, int], object] = {}
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        # Per subscription, whether its stream was confirmed by sushi or the broker
+        self._confirmed: list[bool] = []
+        self._hits = 0
+        self._misses = 0
+
+    def attach(self, notifications) -> None:
+        """
+        Subscribe to the notifications keeping the cache up to date.
+
+        Parameters:
+            notifications: A NotificationController, e.g. SushiController.notifications, or a
+                BrokerNotificationClient.
+        """
+        confirmed = self._confirmed = [False, False, False]
+        self._subscriptions = [self._subscribe(notifications, self._confirmer(confirmed, 0)),
+                               notifications.subscribe_to_processor_changes(
+                                   self.on_processor_update, on_subscribed=self._confirmer(confirmed, 1)),
+                               notifications.subscribe_to_track_changes(
+                                   self.on_track_update, on_subscribed=self._confirmer(confirmed, 2))]
+
+    def detach(self) -> None:
+        """
+        End the subscriptions and empty the cache.
+        """
+        for subscription in self._subscriptions:
+            subscription.cancel()
+        self._subscriptions = []
+        self._confirmed = []
+        self.clear()
+
+    def is_live(self) -> bool:
+        """
+        Returns:
+            bool: True once the notification streams keeping the cache up to date are subscribed and confirmed, and
+                  as long as none of them ended.
+        """
+        return (bool(self._subscriptions) and all(self._confirmed)
+                and not any(s.done() for s in self._subscriptions))
+
+    def invalidate_processor(self, processor_id: int) -> None:
+        """
+        Drop everything cached about a processor or track.
+        """
+        with self._lock:
+            self._drop([k for k in self._entries if k[0] == processor_id])
+
+    def clear(self) -> None:
+        """
+        Drop everything.
+        """
+        with self._lock:
+            self._drop(list(self._entries))
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: "hits" and "misses" since the cache was created or reset_stats() was called, "hit_ratio", the share
+                  of reads served from memory, and "entries", the number of cached entries.
+        """
+        with self._lock:
+            reads = self._hits + self._misses
+            return {"hits": self._hits,
+                    "misses": self._misses,
+                    "hit_ratio": self._hits / reads if reads else 0.0,
+                    "entries": len(self._entries)}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+    def on_processor_update(self, notification) -> None:
+        if notification.action == 2:
+            self.invalidate_processor(notification.processor.id)
+
+    def on_track_update(self, notification) -> None:
+        if notification.action == 2:
+            self.invalidate_processor(notification.track.id)
+
+    def _confirmer(self, confirmed: list[bool], index: int):
+        def confirm():
+            with self._lock:
+                # Anything stored before, or while a broker was reconnecting, may have missed notifications
+                self._drop(list(self._entries))
+                confirmed[index] = True
+        return confirm
+
+    def _drop(self, keys: list) -> None:
+        # Called with the lock held
+        for key in keys:
+            del self._entries[key]
+
+    def _subscribe(self, notifications, on_subscribed):
+        raise NotImplementedError
+
+    def _is_fresh(self, entry_time: float) -> bool:
+        return self.is_live() and (self.max_age is None or time.monotonic() - entry_time < self.max_age)
+
+
+#########################
+# Parameter value cache #
+#########################
+
+
+class ParameterValueCache(_NotifiedCache):
+    """
+    A read-through cache of parameter values for ParameterController, see ParameterController.set_value_cache() and
+    SushiController.enable_parameter_cache().
+
+    Values read from sushi, and the values of parameter notifications, are kept in memory. They are served as long as
+    the parameter notification stream is subscribed, as any change then updates them, and for at most max_age
+    seconds since they were last read or notified, as a bound on what a lost notification can cost. The parameters of
+    deleted processors and tracks, and of processors whose program changed, are dropped.
+
+    Until the streams subscribed by attach() are confirmed, or once one of them has ended, every read goes to sushi.
+    """
+
+    def __init__(self, max_age: float | None = 5.0):
+        """
+        The constructor for the ParameterValueCache class.
+
+        Parameters:
+            max_age (float | None): The maximum time in seconds a value is served without being read or notified
+                again, or None for no limit.
+        """
+        super().__init__(max_age)
+
+    def lookup(self, processor_id: int, parameter_id: int, representation: int = NORMALIZED):
+        """
+        Get a cached value, counting a hit or a miss.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            parameter_id (int): The id of the parameter.
+            representation (int): NORMALIZED, DOMAIN or STRING.
+
+        Returns:
+            float | str | None: The value, or None if it must be read from sushi.
+        """
+        with self._lock:
+            entry = self._entries.get((processor_id, parameter_id))
+            if entry is not None and entry.values[representation] is not None and self._is_fresh(entry.time):
+                self._hits += 1
+                return entry.values[representation]
+            self._misses += 1
+            return None
+
+    def store(self, processor_id: int, parameter_id: int, representation: int, value, read_time: float) -> None:
+        """
+        Cache a value read from sushi, unless a notification for that parameter was received since the read began,
+        in which case the read value may be older.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            parameter_id (int): The id of the parameter.
+            representation (int): NORMALIZED, DOMAIN or STRING.
+            value (float | str): The value.
+            read_time (float): The time.monotonic() before the read was sent.
+        """
+        key = (processor_id, parameter_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(read_time)
+            elif entry.time > read_time:
+                return
+            entry.values[representation] = value
+            entry.time = read_time
+
+    def invalidate(self, processor_id: int, parameter_id: int) -> None:
+        """
+        Drop the values of a parameter, e.g. before setting it.
+        """
+        with self._lock:
+            self._entries.pop((processor_id, parameter_id), None)
+
+    def on_parameter_update(self, notification) -> None:
+        key = (notification.parameter.processor_id, notification.parameter.parameter_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(0.0)
+            entry.values[NORMALIZED] = notification.normalized_value
+            entry.values[DOMAIN] = notification.domain_value
+            entry.values[STRING] = notification.formatted_value
+            entry.time = time.monotonic()
+
+    def _subscribe(self, notifications, on_subscribed):
+        return notifications.subscribe_to_parameter_updates(self.on_parameter_update, on_subscribed=on_subscribed)
+
+
+########################
+# Property value cache #
+########################
+
+
+class PropertyValueCache(_NotifiedCache):
+    """
+    A read-through cache of property values and property lists for ParameterController, see
+    ParameterController.set_property_cache() and SushiController.enable_property_cache().
+
+    Property values, often file paths or sample names, are fetched when first read and then kept up to date by
+    property notifications. Notifications of properties that were never read only count a new version, so large
+    strings nobody reads aren't kept. Each property has a version, increased whenever its value changes, so that
+    code redrawing a value can check if it changed since it last did with get_version(), without reading it. Versions
+    only ever increase: invalidating a processor, or reconfirming the streams, drops the values but not the versions.
+
+    Like ParameterValueCache, nothing is served until the streams subscribed by attach() are confirmed, or once one of
+    them has ended.
+    """
+
+    def __init__(self, max_age: float | None = 5.0):
+        """
+        The constructor for the PropertyValueCache class.
+
+        Parameters:
+            max_age (float | None): The maximum time in seconds a value is served without being read or notified
+                again, or None for no limit.
+        """
+        super().__init__(max_age)
+        self._infos: dict[int, list] = {}
+
+    def lookup(self, processor_id: int, property_id: int) -> str | None:
+        """
+        Get a cached value, counting a hit or a miss.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            property_id (int): The id of the property.
+
+        Returns:
+            str | None: The value, or None if it must be read from sushi.
+        """
+        with self._lock:
+            entry = self._entries.get((processor_id, property_id))
+            if entry is not None and entry.valid and self._is_fresh(entry.time):
+                self._hits += 1
+                return entry.value
+            self._misses += 1
+            return None
+
+    def store(self, processor_id: int, property_id: int, value: str, read_time: float) -> None:
+        """
+        Cache a value read from sushi, unless a notification for that property was received since the read began.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            property_id (int): The id of the property.
+            value (str): The value.
+            read_time (float): The time.monotonic() before the read was sent.
+        """
+        with self._lock:
+            entry = self._entries.setdefault((processor_id, property_id), _PropertyEntry())
+            if entry.time > read_time:
+                return
+            self._set(entry, value, read_time)
+
+    def get_version(self, processor_id: int, property_id: int) -> int:
+        """
+        Get the version of a property, without reading its value.
+
+        Parameters:
+            processor_id (int): The id of the processor or track.
+            property_id (int): The id of the property.
+
+        Returns:
+            int: A number increased each time the value changes, 0 if it was never read nor notified.
+        """
+        with self._lock:
+            entry = self._entries.get((processor_id, property_id))
+            return entry.version if entry is not None else 0
+
+    def invalidate(self, processor_id: int, property_id: int) -> None:
+        """
+        Stop serving the value of a property until it is read or notified again, e.g. before setting it. Its version
+        is kept.
+        """
+        with self._lock:
+            entry = self._entries.get((processor_id, property_id))
+            if entry is not None:
+                entry.valid = False
+
+    def lookup_infos(self, processor_id: int) -> list | None:
+        """
+        Parameters:
+            processor_id (int): The id of the processor or track.
+
+        Returns:
+            list[PropertyInfo] | None: The cached property list, or None if it must be read from sushi.
+        """
+        with self._lock:
+            infos = self._infos.get(processor_id)
+            if infos is not None and self.is_live():
+                self._hits += 1
+                return list(infos)
+            self._misses += 1
+            return None
+
+    def store_infos(self, processor_id: int, infos: list) -> None:
+        """
+        Cache the property list of a processor, which doesn't change until the processor is deleted.
+        """
+        with self._lock:
+            self._infos[processor_id] = list(infos)
+
+    def invalidate_processor(self, processor_id: int) -> None:
+        super().invalidate_processor(processor_id)
+        with self._lock:
+            self._infos.pop(processor_id, None)
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._infos.clear()
+
+    def on_property_update(self, notification) -> None:
+        key = (notification.property.processor_id, notification.property.property_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.value is None:
+                # Never read, only count the change
+                entry = self._entries.setdefault(key, _PropertyEntry())
+                entry.version += 1
+                entry.time = time.monotonic()
+            else:
+                self._set(entry, notification.value, time.monotonic())
+
+    def _drop(self, keys: list) -> None:
+        # Forget the values but keep the entries, so that the versions never go back
+        for key in keys:
+            entry = self._entries[key]
+            entry.value = None
+            entry.valid = False
+
+    @staticmethod
+    def _set(entry: _PropertyEntry, value: str, now: float) -> None:
+        if value != entry.value:
+            entry.version += 1
+            entry.value = value
+        entry.time = now
+        entry.valid = True
+
+    def _subscribe(self, notifications, on_subscribed):
+        return notifications.subscribe_to_property_updates(self.on_property_update, on_subscribed=on_subscribed)
@@ -16,6 +16,7 @@ __copyright__ = """
 """
 __license__ = "GPL-3.0"
 
+import asyncio
 import os
 import sys
 import unittest
@@ -271,3 +272,44 @@ class TestAudioGraphController(unittest.TestCase):
             service.get_recent_request(),
             SUSHI_PROTO.TrackIdentifier(id=audiograph_service_mock.expected_track_1.id),
         )
+
+
+class TestCreateProcessors(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._agc = agc.AudioGraphController(self, SUSHI_ADDRESS, proto_file)
+        self._specs = [
+            ("synth", "sushi.testing.synth", "", info_types.PluginType.INTERNAL),
+            ("delay", "sushi.testing.delay", "", info_types.PluginType.INTERNAL),
+            ("reverb", "sushi.testing.reverb", "", info_types.PluginType.INTERNAL),
+        ]
+
+    async def _notify(self, order):
+        # Stands in for the notification controller, creating the processors in the given order
+        while len(self._agc.processor_event_queue) < len(order):
+            await asyncio.sleep(0.001)
+        events = {ev.name: ev for ev in self._agc.processor_event_queue}
+        for name in order:
+            ev = events[name]
+            ev.sushi_id = order.index(name) + 10
+            ev.data = info_types.ProcessorInfo({})
+            ev.data.name = name
+            ev.params = [name + "_param"]
+            self._agc.processor_event_queue.remove(ev)
+            ev.set()
+            await asyncio.sleep(0)
+
+    async def test_create_processors(self):
+        notifier = asyncio.create_task(self._notify(["reverb", "synth", "delay"]))
+        result = await self._agc.create_processors(self._specs, track_id=1, timeout=2.0)
+        await notifier
+
+        self.assertEqual([info.name for info, _ in result], ["synth", "delay", "reverb"])
+        self.assertEqual([params for _, params in result], [["synth_param"], ["delay_param"], ["reverb_param"]])
+        request = service.get_recent_request()
+        self.assertEqual(request.name, "reverb")
+        self.assertTrue(request.position.add_to_back)
+
+    async def test_create_processors_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self._agc.create_processors(self._specs, track_id=1, timeout=0.05)
+        self.assertEqual(self._agc.processor_event_queue, [])
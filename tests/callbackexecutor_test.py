@@ -0,0 +1,171 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+from src.elkpy import grpc_gen
+from src.elkpy.callbackexecutor import INLINE, PROCESS, THREAD, CallbackExecutor, parameter_key, processor_key
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+TIMEOUT = 5.0
+
+
+def _parameter_update(processor_id, parameter_id, value):
+    return SUSHI_PROTO.ParameterUpdate(
+        parameter=SUSHI_PROTO.ParameterIdentifier(processor_id=processor_id, parameter_id=parameter_id),
+        normalized_value=value)
+
+
+def _check_value(notification):
+    # Runs in a worker process
+    if notification.normalized_value > 0.5:
+        raise ValueError("Out of range")
+
+
+def _wait_for_completion(executor, count):
+    deadline = time.monotonic() + TIMEOUT
+    while executor.get_stats()["completed"] < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestCallbackExecutor(unittest.TestCase):
+    def test_ordered_per_key(self):
+        received = []
+        running = set()
+        overlaps = []
+        lock = threading.Lock()
+
+        def callback(notification):
+            key = parameter_key(notification)
+            with lock:
+                overlaps.append(key in running)
+                running.add(key)
+            time.sleep(0.005)
+            with lock:
+                running.discard(key)
+                received.append((key, notification.normalized_value))
+
+        with CallbackExecutor(THREAD, max_workers=4, key=parameter_key) as executor:
+            wrapped = executor.wrap(callback)
+            for i in range(10):
+                for parameter_id in range(3):
+                    wrapped(_parameter_update(1, parameter_id, i / 16))
+            _wait_for_completion(executor, 30)
+            stats = executor.get_stats()
+
+        self.assertFalse(any(overlaps))
+        for parameter_id in range(3):
+            self.assertEqual([v for k, v in received if k == (1, parameter_id)], [i / 16 for i in range(10)])
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["completed"], 30)
+        self.assertGreater(stats["max_pending"], 1)
+
+    def test_inline(self):
+        received = []
+        executor = CallbackExecutor(INLINE, key=processor_key)
+        executor.wrap(received.append)(_parameter_update(1, 0, 0.5))
+        self.assertEqual(len(received), 1)
+        self.assertEqual(executor.get_stats()["max_pending"], 1)
+
+        with self.assertRaises(ValueError):
+            CallbackExecutor("gpu")
+
+        async def coroutine(notification):
+            pass
+
+        with self.assertRaises(TypeError):
+            executor.wrap(coroutine)
+
+    def test_shutdown_drops_queued_callbacks(self):
+        release = threading.Event()
+        started = threading.Event()
+        ran = []
+
+        def callback(notification):
+            started.set()
+            release.wait(TIMEOUT)
+            ran.append(notification.normalized_value)
+
+        executor = CallbackExecutor(THREAD, max_workers=1, key=processor_key)
+        for i in range(5):
+            executor.submit(callback, _parameter_update(1, 0, i / 4))
+        self.assertTrue(started.wait(TIMEOUT))
+        threading.Timer(0.05, release.set).start()
+        executor.shutdown()
+        # Dropped after shutdown without raising
+        executor.submit(callback, _parameter_update(1, 0, 1.0))
+
+        stats = executor.get_stats()
+        self.assertEqual(ran, [0.0])
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["completed"], 6)
+        self.assertEqual(stats["dropped"], 5)
+        self.assertEqual(stats["errors"], 0)
+
+    def test_process_pool(self):
+        with CallbackExecutor(PROCESS, max_workers=2, key=processor_key, sushi_proto_def=proto_file) as executor:
+            for value in (0.25, 0.75, 0.5):
+                executor.submit(_check_value, _parameter_update(1, 0, value))
+            _wait_for_completion(executor, 3)
+            stats = executor.get_stats()
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["errors"], 1)
+
+
+class TestCallbackExecutorWithFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def test_callbacks_run_off_the_notification_loop(self):
+        threads = []
+        done = threading.Event()
+
+        def callback(notification):
+            threads.append(threading.current_thread())
+            done.set()
+
+        with CallbackExecutor(THREAD, max_workers=1) as executor:
+            self._controller.notifications.subscribe_to_track_changes(callback, executor=executor)
+            deadline = time.monotonic() + TIMEOUT
+            while self._fake.get_subscriber_count("track") < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self._controller.audio_graph.create_track("main", 2).wait_sync(TIMEOUT)
+            self.assertTrue(done.wait(TIMEOUT))
+        self.assertIsNot(threads[0], self._controller.notifications.notification_thread)
+        self.assertTrue(threads[0].name.startswith("elkpy-callback"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+from src.elkpy import grpc_gen
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.changedispatch import PARAMETER, PROPERTY, ChangeDispatcher
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.sushicontroller import SushiController
+from src.elkpy.sushiprocessor import SushiProcessor
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+TIMEOUT = 5.0
+
+
+class Notifications(object):
+    """
+    Stands in for a NotificationController, the subscriptions never receive anything.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def _subscribe(self, cb):
+        self.subscriptions.append(Future())
+        return self.subscriptions[-1]
+
+    subscribe_to_parameter_updates = subscribe_to_property_updates = _subscribe
+
+
+def _parameter_update(processor_id, parameter_id, value):
+    return SUSHI_PROTO.ParameterUpdate(
+        parameter=SUSHI_PROTO.ParameterIdentifier(processor_id=processor_id, parameter_id=parameter_id),
+        normalized_value=value)
+
+
+class TestChangeDispatcher(unittest.TestCase):
+    def setUp(self):
+        self._notifications = Notifications()
+        self._dispatcher = ChangeDispatcher(self._notifications)
+
+    def test_dispatch(self):
+        received = []
+        first = self._dispatcher.add_parameter_listener(1, 2, lambda n: received.append(("first", n.normalized_value)))
+        self._dispatcher.add_parameter_listener(1, 2, lambda n: received.append(("second", n.normalized_value)))
+        self._dispatcher.add_parameter_listener(1, 3, lambda n: received.append(("other", n.normalized_value)))
+        self.assertEqual(len(self._notifications.subscriptions), 1)
+
+        self._dispatcher.on_parameter_update(_parameter_update(1, 2, 0.5))
+        self._dispatcher.on_parameter_update(_parameter_update(4, 2, 0.5))
+        self.assertEqual(received, [("first", 0.5), ("second", 0.5)])
+
+        first.cancel()
+        first.cancel()
+        self._dispatcher.on_parameter_update(_parameter_update(1, 2, 0.25))
+        self.assertEqual(received[2:], [("second", 0.25)])
+        self.assertEqual(self._dispatcher.get_listener_count(PARAMETER), 2)
+        self.assertEqual(self._dispatcher.get_listener_count(PROPERTY), 0)
+
+    def test_failing_callback(self):
+        received = []
+
+        def fail(notification):
+            raise ValueError()
+
+        self._dispatcher.add_parameter_listener(1, 2, fail)
+        self._dispatcher.add_parameter_listener(1, 2, received.append)
+        self._dispatcher.on_parameter_update(_parameter_update(1, 2, 0.5))
+        self.assertEqual(len(received), 1)
+
+    def test_resubscribe_after_stream_end(self):
+        self._dispatcher.add_property_listener(1, 0, print)
+        self._notifications.subscriptions[0].set_exception(ConnectionError())
+        self._dispatcher.add_property_listener(1, 1, print)
+        self.assertEqual(len(self._notifications.subscriptions), 2)
+
+        self._dispatcher.close()
+        self.assertEqual(self._dispatcher.get_listener_count(), 0)
+        self.assertTrue(self._notifications.subscriptions[1].cancelled())
+
+
+class TestProcessorChangeCallbacks(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        for name, uid in (("eq", "sushi.testing.equalizer"), ("synth", "vendor.synth")):
+            self._controller.audio_graph.create_processor_on_track(name, uid, "", info_types.PluginType.INTERNAL,
+                                                                   track.sushi_id, 0, True).wait_sync(TIMEOUT)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def test_callbacks(self):
+        eq = SushiProcessor("eq", self._controller)
+        synth = SushiProcessor("synth", self._controller)
+        gains = []
+        files = []
+        done = threading.Event()
+        eq.on_parameter_change("gain", lambda n: gains.append(n.normalized_value))
+        synth.on_parameter_change("parameter_0", lambda n: gains.append(None))
+        synth.on_property_change("file", lambda n: (files.append(n.value), done.set()))
+        deadline = time.monotonic() + TIMEOUT
+        while (self._fake.get_subscriber_count("parameter") < 1 or self._fake.get_subscriber_count("property") < 1) \
+                and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # One shared stream for all parameter callbacks
+        self.assertEqual(self._fake.get_subscriber_count("parameter"), 1)
+
+        eq.set_parameter_value("frequency", 0.5)
+        eq.set_parameter_value("gain", 0.75)
+        self._controller.parameters.set_property_value(synth.get_id(), 0, "kick.wav")
+        self.assertTrue(done.wait(TIMEOUT))
+        self.assertEqual(gains, [0.75])
+        self.assertEqual(files, ["kick.wav"])
+
+
+if __name__ == '__main__':
+    unittest.main()
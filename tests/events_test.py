@@ -0,0 +1,107 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import asyncio
+import threading
+import time
+import unittest
+
+from src.elkpy import events
+from src.elkpy import sushierrors
+
+
+def set_later(ev, delay=0.02):
+    threading.Timer(delay, ev.set).start()
+
+
+class TestElkpyEvent(unittest.TestCase):
+    def test_wait_sync_from_thread(self):
+        ev = events.TrackCreationEvent("main")
+        set_later(ev)
+        self.assertTrue(ev.wait_sync(1.0))
+        self.assertTrue(ev.is_set())
+
+    def test_wait_sync_timeout(self):
+        ev = events.ProcessorCreationEvent("synth")
+        with self.assertRaises(TimeoutError):
+            ev.wait_sync(0.01)
+
+    def test_error(self):
+        ev = events.ProcessorDeletionEvent(3)
+        ev.error = True
+        with self.assertRaises(sushierrors.SushiUnkownError):
+            ev.wait_sync(0.01)
+
+    def test_await_set_from_other_thread(self):
+        async def main():
+            ev = events.TrackCreationEvent("main")
+            set_later(ev)
+            self.assertTrue(await ev)
+            with self.assertRaises(TimeoutError):
+                await events.TrackCreationEvent("aux").wait(0.01)
+        asyncio.run(main())
+
+    def test_timed_out_and_cancelled_waiters_are_removed(self):
+        async def main():
+            ev = events.TrackCreationEvent("main")
+            for _ in range(3):
+                with self.assertRaises(TimeoutError):
+                    await ev.wait(0.01)
+            task = asyncio.create_task(ev.wait())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(ev._waiters, [])
+        asyncio.run(main())
+
+    def test_await_on_several_loops(self):
+        ev = events.TrackDeletionEvent(1)
+        results = []
+
+        def waiter():
+            async def main():
+                results.append(await ev.wait(1.0))
+            asyncio.run(main())
+
+        threads = [threading.Thread(target=waiter) for _ in range(3)]
+        for t in threads:
+            t.start()
+        time.sleep(0.02)
+        ev.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [True, True, True])
+
+    def test_expiry(self):
+        expired = events.ProcessorCreationEvent("synth", expiry=0.0)
+        pending = events.ProcessorCreationEvent("delay")
+        queue = [expired, pending]
+
+        self.assertEqual(events.expire_events(queue), 1)
+        self.assertEqual(queue, [pending])
+        with self.assertRaises(TimeoutError):
+            expired.wait_sync()
+
+    def test_wait_for_events(self):
+        evs = [events.TrackCreationEvent(name) for name in ("a", "b")]
+        for ev in evs:
+            set_later(ev)
+        events.wait_for_events(evs, 1.0)
+        with self.assertRaises(TimeoutError):
+            events.wait_for_events([events.TrackCreationEvent("c")], 0.01)
@@ -0,0 +1,165 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+from src.elkpy import fakesushi
+from src.elkpy import grpc_gen
+from src.elkpy import sushierrors
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.sessiondiff import restore_session_incrementally
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+TIMEOUT = 5.0
+
+
+class TestFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._fake = fakesushi.FakeSushi(proto_file, seed=1)
+        self._controller = SushiController(self._fake.start(), proto_file)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def _create_track(self, name="main", channels=2):
+        ev = self._controller.audio_graph.create_track(name, channels)
+        ev.wait_sync(TIMEOUT)
+        return ev.sushi_id
+
+    def _create_processor(self, track_id, name, uid="sushi.testing.gain"):
+        ev = self._controller.audio_graph.create_processor_on_track(name, uid, "", info_types.PluginType.INTERNAL,
+                                                                    track_id, 0, True)
+        ev.wait_sync(TIMEOUT)
+        return ev.sushi_id
+
+    def test_audio_graph(self):
+        graph = self._controller.audio_graph
+        track_id = self._create_track()
+        gain_id = self._create_processor(track_id, "gain")
+        eq_id = self._create_processor(track_id, "eq", "sushi.testing.equalizer")
+        self.assertEqual(["gain", "eq"], [p.name for p in graph.get_track_processors(track_id)])
+
+        graph.move_processor_on_track(eq_id, track_id, track_id, add_to_back=False, before_processor=gain_id)
+        self.assertEqual(["eq", "gain"], [p.name for p in graph.get_track_processors(track_id)])
+        self.assertEqual(eq_id, graph.get_processor_id("eq"))
+
+        graph.delete_processor_from_track(gain_id, track_id).wait_sync(TIMEOUT)
+        self.assertEqual(["eq"], [p.name for p in graph.get_all_processors()])
+        graph.delete_track(track_id).wait_sync(TIMEOUT)
+        self.assertEqual([], graph.get_all_tracks())
+        self.assertEqual([], graph.get_all_processors())
+
+    def test_errors(self):
+        with self.assertRaises(sushierrors.SushiNotFoundError):
+            self._controller.audio_graph.get_track_info(42)
+        track_id = self._create_track()
+        self.assertTrue(self._controller.audio_graph.create_track("main", 2).error)
+        gain_id = self._create_processor(track_id, "gain")
+        with self.assertRaises(sushierrors.SushiUnsupportedOperationError):
+            self._controller.programs.get_processor_current_program(gain_id)
+
+    def test_parameters_and_notifications(self):
+        updates = []
+        received = threading.Event()
+
+        def on_update(notification):
+            updates.append(notification)
+            received.set()
+
+        track_id = self._create_track()
+        gain_id = self._create_processor(track_id, "gain")
+        parameters = self._controller.parameters
+        gain = parameters.get_parameter_id(gain_id, "gain")
+
+        self._controller.notifications.subscribe_to_parameter_updates(on_update)
+        self._wait_for_subscribers("parameter")
+        parameters.set_parameter_value(gain_id, gain, 0.5)
+        self.assertTrue(received.wait(TIMEOUT))
+
+        self.assertAlmostEqual(0.5, parameters.get_parameter_value(gain_id, gain))
+        self.assertAlmostEqual(-48.0, parameters.get_parameter_value_in_domain(gain_id, gain))
+        self.assertEqual("-48.00", parameters.get_parameter_value_as_string(gain_id, gain))
+        self.assertEqual(gain_id, updates[0].parameter.processor_id)
+        self.assertAlmostEqual(-48.0, updates[0].domain_value)
+
+    def test_transport(self):
+        transport = self._controller.transport
+        transport.set_tempo(99.0)
+        transport.set_time_signature(3, 4)
+        self.assertEqual(99.0, transport.get_tempo())
+        self.assertEqual((3, 4), transport.get_time_signature())
+
+    def test_session_round_trip(self):
+        track_id = self._create_track()
+        gain_id = self._create_processor(track_id, "gain")
+        self._controller.parameters.set_parameter_value(gain_id, 0, 0.25)
+        self._controller.audio_routing.connect_output_channel_from_track(track_id, 1, 1)
+        session = self._controller.session.save_binary_session()
+
+        self._controller.audio_graph.delete_track(track_id).wait_sync(TIMEOUT)
+        self._controller.session.restore_binary_session(session)
+
+        track_id = self._controller.audio_graph.get_track_id("main")
+        gain_id = self._controller.audio_graph.get_processor_id("gain")
+        self.assertAlmostEqual(0.25, self._controller.parameters.get_parameter_value(gain_id, 0))
+        self.assertEqual([(track_id, 1, 1)], [(c.track, c.track_channel, c.engine_channel)
+                                               for c in self._controller.audio_routing.get_all_output_connections()])
+
+    def test_incremental_restore(self):
+        track_id = self._create_track()
+        self._create_processor(track_id, "gain")
+        target = self._controller.session.save_binary_session()
+        self._create_processor(track_id, "eq", "sushi.testing.equalizer")
+
+        restore_session_incrementally(self._controller, target, SUSHI_PROTO, timeout=TIMEOUT)
+        self.assertEqual(["gain"], [p.name for p in self._controller.audio_graph.get_track_processors(track_id)])
+
+    def test_fault_injection(self):
+        self._fake.set_fault("TransportController/*", latency=0.05, jitter=0.01)
+        start = time.perf_counter()
+        self._controller.transport.get_tempo()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+        self._fake.set_fault("TransportController/GetTempo", error_rate=1.0)
+        with self.assertRaises(sushierrors.SushiUnavailableError):
+            self._controller.transport.get_tempo()
+
+        self._fake.clear_faults()
+        self.assertEqual(120.0, self._controller.transport.get_tempo())
+        self.assertEqual(3, self._fake.get_call_counts()["TransportController/GetTempo"])
+
+    def _wait_for_subscribers(self, kind):
+        deadline = time.monotonic() + TIMEOUT
+        while not self._fake.get_subscriber_count(kind) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
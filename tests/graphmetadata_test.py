@@ -0,0 +1,152 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.elkpy import graphmetadata
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.graphmetadata import GraphMetadataCache, ProcessorMetadata, fetch_graph_metadata
+from src.elkpy.sushicontroller import SushiController
+from src.elkpy.sushiprocessor import SushiProcessor, processors_from_metadata
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+TIMEOUT = 5.0
+
+
+class TestGraphMetadata(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        ev = self._controller.audio_graph.create_track("main", 2)
+        ev.wait_sync(TIMEOUT)
+        self._track = ev.sushi_id
+        for name, uid in (("eq", "sushi.testing.equalizer"), ("synth", "vendor.synth"), ("lfo", "sushi.testing.lfo")):
+            self._controller.audio_graph.create_processor_on_track(name, uid, "", info_types.PluginType.INTERNAL,
+                                                                   self._track, 0, True).wait_sync(TIMEOUT)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def _calls(self, method):
+        return sum(v for k, v in self._fake.get_call_counts().items() if k.endswith("/" + method))
+
+    def test_fetch(self):
+        metadata = fetch_graph_metadata(self._controller)
+        self.assertEqual(sorted(metadata), ["eq", "lfo", "synth"])
+        synth = metadata["synth"]
+        self.assertEqual(synth.id, self._controller.audio_graph.get_processor_id("synth"))
+        self.assertEqual(synth.track_id, self._track)
+        self.assertEqual(len(synth.parameters), 8)
+        self.assertEqual(len(synth.programs), 4)
+        self.assertEqual(metadata["eq"].programs, {})
+        self.assertEqual(ProcessorMetadata.from_tuple(synth.to_tuple()), synth)
+        self.assertEqual(self._calls("GetAllProcessors"), 1)
+        # Only the synth has programs
+        self.assertEqual(self._calls("GetProcessorPrograms"), 1)
+
+        with self.assertRaises(KeyError):
+            fetch_graph_metadata(self._controller, ["eq", "reverb"])
+
+    def test_known_metadata_is_not_read_again(self):
+        known = fetch_graph_metadata(self._controller, ["eq", "synth"])
+        reads = self._calls("GetProcessorParameters")
+        metadata = fetch_graph_metadata(self._controller, known=known)
+        self.assertEqual(metadata["eq"], known["eq"])
+        self.assertEqual(self._calls("GetProcessorParameters"), reads + 1)
+
+    def test_processors_from_metadata(self):
+        processors = processors_from_metadata(self._controller, ["synth", "eq"])
+        self.assertEqual(sorted(processors), ["eq", "synth"])
+        for name, processor in processors.items():
+            single = SushiProcessor(name, self._controller)
+            self.assertEqual(processor.get_id(), single.get_id())
+            self.assertEqual(processor.get_parameters(), single.get_parameters())
+            self.assertEqual(processor.get_programs(), single.get_programs())
+
+        processors["eq"].set_parameter_value("gain", 0.75)
+        self.assertEqual(processors["eq"].get_parameter_value("gain"), 0.75)
+
+    def test_warm_start_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphMetadataCache(os.path.join(directory, "metadata"))
+            reads = self._calls("GetProcessorParameters")
+            first = cache.fetch(self._controller)
+            self.assertEqual(self._calls("GetProcessorParameters"), reads + 3)
+            reads += 3
+
+            # A new process with the same graph only checks the fingerprint
+            self.assertEqual(GraphMetadataCache(cache.path).fetch(self._controller), first)
+            processors = processors_from_metadata(self._controller, ["synth"], cache=cache)
+            self.assertEqual(processors["synth"].get_id(), first["synth"].id)
+            self.assertEqual(self._calls("GetProcessorParameters"), reads)
+            self.assertEqual(self._calls("GetAllProcessors"), 3)
+
+            self._controller.audio_graph.create_processor_on_track("gain", "sushi.testing.gain", "",
+                                                                   info_types.PluginType.INTERNAL,
+                                                                   self._track, 0, True).wait_sync(TIMEOUT)
+            reads = self._calls("GetProcessorParameters")
+            self.assertEqual(sorted(cache.fetch(self._controller)), ["eq", "gain", "lfo", "synth"])
+            self.assertEqual(self._calls("GetProcessorParameters"), reads + 4)
+
+            with open(cache.path, "wb") as f:
+                f.write(b"ELKGMETA")
+            self.assertIsNone(cache.load(b"\0" * 32))
+            cache.clear()
+            self.assertFalse(os.path.exists(cache.path))
+
+    def test_moved_processor_invalidates_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphMetadataCache(os.path.join(directory, "metadata"))
+            self.assertEqual(cache.fetch(self._controller)["eq"].track_id, self._track)
+
+            ev = self._controller.audio_graph.create_track("aux", 2)
+            ev.wait_sync(TIMEOUT)
+            eq = self._controller.audio_graph.get_processor_id("eq")
+            self._controller.audio_graph.move_processor_on_track(eq, self._track, ev.sushi_id, 0, True)
+            self.assertEqual(GraphMetadataCache(cache.path).fetch(self._controller)["eq"].track_id, ev.sushi_id)
+
+    def test_cache_written_by_others_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GraphMetadataCache(os.path.join(directory, "cache", "metadata"))
+            cache.fetch(self._controller)
+            self.assertEqual(os.stat(os.path.dirname(cache.path)).st_mode & 0o777, 0o700)
+            reads = self._calls("GetProcessorParameters")
+            cache.fetch(self._controller)
+            self.assertEqual(self._calls("GetProcessorParameters"), reads)
+
+            os.chmod(cache.path, 0o666)
+            cache.fetch(self._controller)
+            self.assertEqual(self._calls("GetProcessorParameters"), reads + 3)
+
+    def test_default_cache_path_is_per_user(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/home/user/.cache"}):
+            self.assertEqual(graphmetadata._default_cache_path(), "/home/user/.cache/elkpy/graph-metadata")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import unittest
+
+from tests.mockups.recording_controller_mock import RecordingGraphController
+from src.elkpy import graphreconciler as gr
+from src.elkpy import grpc_gen
+from src.elkpy import sushi_info_types as info
+from src.elkpy.sessiondiff import OperationType as Op
+
+proto_file = os.environ.get("SUSHI_GRPC_ELKPY_PROTO")
+if proto_file is None:
+    print(
+        "Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition"
+    )
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+CONFIG = {
+    "host_config": {"samplerate": 48000, "tempo": 100},
+    "tracks": [
+        {
+            "name": "main",
+            "channels": 2,
+            "inputs": [],
+            "outputs": [{"engine_bus": 0, "track_bus": 0}],
+            "plugins": [
+                {"name": "synth", "uid": "sushi.testing.synth", "type": "internal"},
+                {"name": "delay", "path": "/plugins/delay.vst3", "uid": "delay", "type": "vst3x"}
+            ]
+        }
+    ],
+    "midi": {
+        "track_connections": [{"port": 0, "channel": "all", "track": "main", "raw_midi": False}],
+        "cc_mappings": [{"port": 0, "channel": 1, "cc_number": 74, "plugin_name": "synth",
+                         "parameter_name": "cutoff", "min_range": 0, "max_range": 1}]
+    },
+    "initial_state": [{"processor": "synth", "bypassed": False, "parameters": {"cutoff": 0.5}}]
+}
+
+
+def live_session():
+    session = SUSHI_PROTO.SessionState()
+    session.engine_state.tempo = 100
+    track = session.tracks.add(name="main", channels=2, buses=1)
+    track.type.type = 1
+    synth = track.processors.add(name="synth", uid="sushi.testing.synth")
+    synth.type.type = 1
+    synth.state.parameters.add(value=0.25).parameter.parameter_id = 4
+    synth.state.bypassed.has_value = True
+    other = track.processors.add(name="old_eq", uid="sushi.testing.eq")
+    other.type.type = 1
+    session.engine_state.output_connections.add(track="main", track_channel=0, engine_channel=0)
+    session.engine_state.output_connections.add(track="main", track_channel=1, engine_channel=1)
+    return session.SerializeToString()
+
+
+class TestGraphFromConfig(unittest.TestCase):
+    def test_config(self):
+        model = gr.graph_from_config(CONFIG)
+        self.assertEqual(list(model.tracks), ["main"])
+        processors = model.tracks["main"].processors
+        self.assertEqual([p.name for p in processors], ["synth", "delay"])
+        self.assertEqual(processors[1].type, info.PluginType.VST3X)
+        self.assertEqual(processors[1].path, "/plugins/delay.vst3")
+        self.assertEqual(model.audio_outputs, {("main", 0, 0), ("main", 1, 1)})
+        self.assertEqual(model.kbd_inputs, {("main", gr.MIDI_CHANNEL_OMNI, 0, False)})
+        self.assertEqual(model.cc_connections, {("synth", "cutoff", 2, 0, 74, 0.0, 1.0, False)})
+        self.assertEqual(processors[0].state.parameters, [("cutoff", 0.5)])
+        self.assertEqual(model.tempo, 100.0)
+
+    def test_unknown_processor_in_initial_state(self):
+        with self.assertRaises(ValueError):
+            gr.graph_from_config({"initial_state": [{"processor": "missing"}]})
+
+
+class TestGraphReconciler(unittest.TestCase):
+    def setUp(self):
+        self._controller = RecordingGraphController(tracks={"main": 1}, processors={"synth": 2, "old_eq": 3},
+                                                    binary_session=live_session(),
+                                                    parameters={2: {"cutoff": 4, "resonance": 5}})
+        self._reconciler = gr.GraphReconciler(self._controller, SUSHI_PROTO, timeout=1.0)
+
+    def test_plan(self):
+        plan = self._reconciler.plan(CONFIG)
+        ops = [(op.type, op.args.get("processor", op.args.get("track"))) for op in plan.operations()]
+        self.assertEqual(ops, [(Op.DELETE_PROCESSOR, "old_eq"),
+                               (Op.CREATE_PROCESSOR, "delay"),
+                               (Op.SET_PROCESSOR_STATE, "synth"),
+                               (Op.CONNECT_KBD_INPUT, "main"),
+                               (Op.CONNECT_CC, "synth")])
+        state = plan.operations()[2].args["state"]
+        self.assertEqual(state.parameters, [(4, 0.5)])
+        self.assertEqual(plan.operations()[4].args["parameter_id"], 4)
+        self.assertIn("Estimated rpc count: 5", str(plan))
+
+    def test_dry_run(self):
+        self._reconciler.reconcile(CONFIG, dry_run=True)
+        self.assertEqual(self._controller.method_calls(), [])
+
+    def test_reconcile(self):
+        self._reconciler.reconcile(CONFIG)
+        self.assertEqual(sorted(self._controller.method_calls()),
+                         sorted(["delete_processor_from_track", "create_processor_on_track", "set_processor_state",
+                                 "connect_kbd_input_to_track", "connect_cc_to_parameter"]))
@@ -0,0 +1,146 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.elkpy import grpc_gen
+from src.elkpy import stubs
+from src.elkpy.stubs import registry
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+
+class TestIsUpToDate(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._source = self._path("sushi_rpc.proto")
+        self._generated = [self._path("sushi_rpc_pb2.py"), self._path("sushi_rpc_pb2_grpc.py")]
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self._dir.name, name)
+
+    def _write(self, path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_missing(self):
+        self._write(self._source, "syntax = \"proto3\";")
+        self.assertFalse(grpc_gen.is_up_to_date(self._source, self._generated))
+        self._write(self._generated[0], "")
+        grpc_gen.write_source_digest(self._source, self._generated)
+        self.assertFalse(grpc_gen.is_up_to_date(self._source, self._generated))
+
+    def test_content_changes(self):
+        self._write(self._source, "syntax = \"proto3\";")
+        for path in self._generated:
+            self._write(path, "")
+        self.assertFalse(grpc_gen.is_up_to_date(self._source, self._generated))
+        grpc_gen.write_source_digest(self._source, self._generated)
+        self.assertTrue(grpc_gen.is_up_to_date(self._source, self._generated))
+
+        # Only the content matters, not the modification times
+        os.utime(self._source, (3000, 3000))
+        for path in self._generated:
+            os.utime(path, (1000, 1000))
+        self.assertTrue(grpc_gen.is_up_to_date(self._source, self._generated))
+
+        self._write(self._source, "syntax = \"proto2\";")
+        os.utime(self._source, (1000, 1000))
+        self.assertFalse(grpc_gen.is_up_to_date(self._source, self._generated))
+
+
+class TestBundledStubs(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "tools", "generate_stubs.py"), proto_file,
+                                 "--api-version", "0.0.1", "--stubs-dir", self._dir.name],
+                                capture_output=True, text=True)
+        self.assertEqual(0, result.returncode, result.stderr)
+        with open(os.path.join(self._dir.name, "registry.py")) as f:
+            namespace = {}
+            exec(f.read(), namespace)
+        self._registry = namespace["BUNDLED_STUBS"]
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_registry(self):
+        self.assertEqual(["0.0.1"], list(self._registry.values()))
+        self.assertTrue(os.path.isfile(os.path.join(self._dir.name, "v0_0_1", "sushi_rpc_pb2_grpc.py")))
+
+    def test_modules_from_known_proto(self):
+        proto = os.path.join(self._dir.name, "v0_0_1", "sushi_rpc.proto")
+        with mock.patch.object(registry, "BUNDLED_STUBS", self._registry), \
+                mock.patch.object(stubs, "__path__", stubs.__path__ + [self._dir.name]), \
+                mock.patch.dict(grpc_gen._modules, clear=True):
+            proto_module, grpc_module = grpc_gen.modules_from_proto(proto)
+            self.assertEqual("src.elkpy.stubs.v0_0_1.sushi_rpc_pb2", proto_module.__name__)
+            self.assertEqual("src.elkpy.stubs.v0_0_1.sushi_rpc_pb2_grpc", grpc_module.__name__)
+            self.assertTrue(hasattr(grpc_module, "SystemControllerStub"))
+            self.assertEqual(os.path.join(os.path.dirname(registry.__file__), "v0_0_1", "sushi_rpc.proto"),
+                             grpc_gen.bundled_proto("0.0.1"))
+            self.assertIsNone(grpc_gen.bundled_proto("0.0.2"))
+
+    def test_missing_bundled_modules_are_compiled(self):
+        with mock.patch.object(registry, "BUNDLED_STUBS", {grpc_gen._file_digest(proto_file): "0.0.2"}), \
+                mock.patch.dict(grpc_gen._modules, clear=True):
+            proto_module, _ = grpc_gen.modules_from_proto(proto_file)
+            self.assertEqual("sushi_rpc_pb2", proto_module.__name__)
+
+    def test_unknown_proto_is_compiled(self):
+        with mock.patch.dict(grpc_gen._modules, clear=True):
+            proto_module, _ = grpc_gen.modules_from_proto(proto_file)
+        self.assertEqual("sushi_rpc_pb2", proto_module.__name__)
+
+
+class TestLazyImport(unittest.TestCase):
+    def _run(self, code):
+        return subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+
+    def test_import_loads_no_controllers(self):
+        result = self._run("import sys, src.elkpy\n"
+                           "print(sorted(m for m in sys.modules if m.startswith(('grpc', 'src.elkpy.'))))")
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual("[]", result.stdout.strip())
+
+    def test_attributes_on_access(self):
+        import src.elkpy as elkpy
+        from src.elkpy import sushicontroller, sessionstore
+        self.assertIs(sushicontroller, elkpy.sushicontroller)
+        self.assertIs(sushicontroller.SushiController, elkpy.SushiController)
+        self.assertIs(sessionstore.SessionSnapshotStore, elkpy.SessionSnapshotStore)
+        self.assertIn("SushiController", dir(elkpy))
+        with self.assertRaises(AttributeError):
+            elkpy.NotAController
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,7 @@ __license__ = "GPL-3.0"
 import os
 import sys
 import unittest
+import threading
 import time
 import grpc
 
@@ -28,6 +29,7 @@ from src.elkpy import keyboardcontroller as kc
 from src.elkpy import sushi_info_types as info_types
 
 from src.elkpy import grpc_gen
+from src.elkpy import sushierrors
 
 proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
 if proto_file is None:
@@ -149,3 +151,87 @@ class TestKeyboardController(unittest.TestCase):
             value = keyboard_service_mock.expected_value)
 
         self.assertEqual(service.get_recent_request(), expected_request)
+
+    def test_send_chord_on(self):
+        service.requests.clear()
+        notes = [60, 64, 67]
+        future = self._kc.send_chord_on(
+            keyboard_service_mock.expected_track_id,
+            keyboard_service_mock.expected_channel,
+            notes,
+            keyboard_service_mock.expected_velocity)
+
+        self.assertIsNone(future.result(timeout = 5))
+        self.assertTrue(service.was_called())
+        self.assertEqual(sorted(r.note for r in service.requests), notes)
+
+    def test_chord_is_sent_at_once(self):
+        service.requests.clear()
+        service.held = 0
+        service.hold = threading.Event()
+        try:
+            future = self._kc.send_chord_on(keyboard_service_mock.expected_track_id, 0, [60, 64, 67], 1.0)
+            # All notes reach sushi before it replied to any of them
+            deadline = time.monotonic() + 5
+            while service.held < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(service.held, 3)
+            self.assertFalse(future.done())
+        finally:
+            service.hold.set()
+            service.hold = None
+        self.assertIsNone(future.result(timeout = 5))
+
+    def test_repeated_note_waits_in_batch(self):
+        service.requests.clear()
+        on, off = kc.KeyboardEventType.NOTE_ON, kc.KeyboardEventType.NOTE_OFF
+        future = self._kc.send_events_async(keyboard_service_mock.expected_track_id,
+                                            [(off, 0, 60, 0.0), (on, 0, 60, 1.0), (on, 0, 64, 1.0),
+                                             (off, 0, 64, 0.0)])
+        self.assertIsNone(future.result(timeout = 5))
+        sent = [(type(r).__name__, r.note) for r in service.requests]
+        self.assertLess(sent.index(('NoteOffRequest', 60)), sent.index(('NoteOnRequest', 60)))
+        self.assertLess(sent.index(('NoteOnRequest', 64)), sent.index(('NoteOffRequest', 64)))
+
+    def test_async_events_are_ordered_per_track(self):
+        service.requests.clear()
+        futures = []
+        for note in range(40, 60):
+            futures.append(self._kc.send_note_on_async(keyboard_service_mock.expected_track_id, 0, note, 1.0))
+            futures.append(self._kc.send_note_off_async(keyboard_service_mock.expected_track_id, 0, note, 0.0))
+
+        self.assertTrue(self._kc.flush(timeout = 5))
+        self.assertTrue(all(f.done() for f in futures))
+        sent = [(type(r).__name__, r.note) for r in service.requests]
+        expected = []
+        for note in range(40, 60):
+            expected += [('NoteOnRequest', note), ('NoteOffRequest', note)]
+        self.assertEqual(sent, expected)
+
+    def test_async_errors_are_reported(self):
+        reported = []
+        self._kc.set_async_error_callback(reported.append)
+        future = self._kc.send_chord_on(-1, 0, [60, 64], 1.0)
+
+        with self.assertRaises(sushierrors.SushiNotFoundError):
+            future.result(timeout = 5)
+        self.assertTrue(self._kc.flush(timeout = 5))
+        self.assertEqual(len(reported), 2)
+        self.assertEqual(len(self._kc.get_async_errors()), 2)
+        self.assertEqual(self._kc.get_async_errors(), [])
+
+    def test_failing_error_callback_does_not_block_track(self):
+        def fail(error):
+            raise RuntimeError()
+
+        self._kc.set_async_error_callback(fail)
+        future = self._kc.send_chord_on(-1, 0, [60], 1.0)
+        with self.assertRaises(sushierrors.SushiNotFoundError):
+            future.result(timeout = 5)
+        self.assertTrue(self._kc.flush(timeout = 5))
+        # The track isn't left blocked
+        future = self._kc.send_note_on_async(-1, 0, 60, 1.0)
+        self.assertIsInstance(future.exception(timeout = 5), sushierrors.SushiNotFoundError)
+        self.assertTrue(self._kc.flush(timeout = 5))
+        self._kc.set_async_error_callback(None)
+        self._kc.get_async_errors()
@@ -0,0 +1,83 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import unittest
+
+import numpy as np
+
+from tests.mockups.recording_controller_mock import RecordingController
+from src.elkpy import sushimacro as sm
+
+
+class TestSushiMacro(unittest.TestCase):
+    def setUp(self):
+        self._controller = RecordingController()
+        self._macro = sm.SushiMacro("cutoff", self._controller)
+
+    def test_evaluate_curves(self):
+        self._macro.add_target(1, 1)
+        self._macro.add_target(1, 2, 1.0, 0.0)
+        self._macro.add_target(2, 1, curve=sm.MacroCurve.EXPONENTIAL)
+        self._macro.add_target(2, 2, curve=sm.MacroCurve.LOGARITHMIC)
+        self._macro.add_target(3, 1, 0.2, 0.6, curve=sm.MacroCurve.S_CURVE)
+
+        values = self._macro.evaluate(0.5)
+        np.testing.assert_allclose(values[:2], [0.5, 0.5])
+        self.assertLess(values[2], 0.5)
+        self.assertGreater(values[3], 0.5)
+        self.assertAlmostEqual(values[4], 0.4)
+
+        np.testing.assert_allclose(self._macro.evaluate(0.0), [0.0, 1.0, 0.0, 0.0, 0.2])
+        np.testing.assert_allclose(self._macro.evaluate(2.0), [1.0, 0.0, 1.0, 1.0, 0.6])
+
+    def test_set_value_batches_per_processor(self):
+        self._macro.add_target(1, 1)
+        self._macro.add_target(1, 2, 0.0, 0.5)
+        self._macro.add_target(2, 3)
+
+        self.assertEqual(self._macro.set_value(0.5), 2)
+        self.assertEqual(self._controller.audio_graph.calls, [(1, None, [(1, 0.5), (2, 0.25)])])
+        self.assertEqual(self._controller.parameters.calls, [(2, 3, 0.5)])
+
+    def test_set_value_skips_unchanged_targets(self):
+        self._macro.add_target(1, 1)
+        self._macro.add_target(2, 1, 0.5, 0.5)
+        self.assertEqual(self._macro.set_value(0.2), 2)
+        self.assertEqual(self._macro.set_value(0.2), 0)
+
+        self._controller.parameters.calls.clear()
+        self.assertEqual(self._macro.set_value(0.3), 1)
+        self.assertEqual(len(self._controller.parameters.calls), 1)
+        self.assertEqual(self._controller.parameters.calls[0][:2], (1, 1))
+
+        self._macro.invalidate()
+        self.assertEqual(self._macro.set_value(0.3), 2)
+
+    def test_replace_and_remove_target(self):
+        self._macro.add_target(1, 1)
+        self._macro.add_target(1, 1, 0.0, 0.5)
+        self.assertEqual(self._macro.get_targets(), [(1, 1)])
+        self.assertAlmostEqual(self._macro.evaluate(1.0)[0], 0.5)
+
+        self._macro.remove_target(1, 1)
+        self.assertEqual(self._macro.get_targets(), [])
+        self.assertEqual(self._macro.set_value(1.0), 0)
+
+    def test_invalid_curve_amount(self):
+        with self.assertRaises(ValueError):
+            self._macro.add_target(1, 1, curve=sm.MacroCurve.EXPONENTIAL, amount=0.0)
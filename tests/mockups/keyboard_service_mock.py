@@ -16,6 +16,8 @@ __copyright__ = """
 """
 __license__ = "GPL-3.0"
 
+import threading
+
 import grpc
 import sushi_rpc_pb2 as proto
 import sushi_rpc_pb2_grpc
@@ -33,13 +35,27 @@ class KeyboardControllerServiceMockup(sushi_rpc_pb2_grpc.KeyboardControllerServi
         super().__init__()
         self.called = False
         self.recent_request = None
+        self.requests = []
+        # When set, note ons wait for it to be set, counting how many are waiting at the same time
+        self.hold = None
+        self.held = 0
+        self._lock = threading.Lock()
 
     def SendNoteOn(self, request, context):
+        if request.track.id < 0:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Track with id {} doesn't exist.".format(request.track.id))
+        self.requests.append(request)
+        hold = self.hold
+        if hold is not None:
+            with self._lock:
+                self.held += 1
+            hold.wait(5)
         self.called = True
         self.recent_request = request
         return proto.GenericVoidValue()
 
     def SendNoteOff(self, request, context):
+        self.requests.append(request)
         self.called = True
         self.recent_request = request
         return proto.GenericVoidValue()
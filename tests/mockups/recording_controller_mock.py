@@ -0,0 +1,125 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+from src.elkpy import events
+from src.elkpy import sushi_info_types as info
+
+
+class RecordingParameterController:
+    def __init__(self):
+        self.calls = []
+
+    def set_parameter_value(self, processor_identifier, parameter_identifier, value):
+        self.calls.append((processor_identifier, parameter_identifier, value))
+
+
+class RecordingAudioGraphController:
+    def __init__(self):
+        self.calls = []
+        self.processor_states = {}
+
+    def set_discrete_processor_state(self, processor_identifier, program_id=None, bypassed=False,
+                                     property_values=[], parameter_values=[]):
+        self.calls.append((processor_identifier, bypassed, list(parameter_values)))
+
+    def get_processor_state(self, processor_identifier):
+        state = info.ProcessorState({})
+        state.program_id = None
+        state.bypassed = False
+        state.properties = []
+        state.parameters = list(self.processor_states[processor_identifier])
+        state.binary_data = bytes()
+        return state
+
+
+class RecordingController:
+    """
+    Stands in for a SushiController, recording the parameter writes made through it instead of sending RPCs.
+    """
+    def __init__(self):
+        self.parameters = RecordingParameterController()
+        self.audio_graph = RecordingAudioGraphController()
+
+    def clear(self):
+        self.parameters.calls.clear()
+        self.audio_graph.calls.clear()
+
+    def rpc_count(self):
+        return len(self.parameters.calls) + len(self.audio_graph.calls)
+
+
+class _RecordingSubController:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __getattr__(self, method):
+        def call(*args):
+            self._owner.calls.append((method, args))
+            return self._owner.result(method, args)
+        return call
+
+
+class RecordingGraphController:
+    """
+    Stands in for a SushiController, recording the graph, routing and transport calls made through it. Tracks and
+    processors created through it get new ids and their creation events are set right away.
+    """
+    def __init__(self, tracks=None, processors=None, binary_session=b"", parameters=None):
+        self.calls = []
+        self.tracks = dict(tracks or {})
+        self.processors = dict(processors or {})
+        self.binary_session = binary_session
+        self.parameter_ids = dict(parameters or {})
+        self._next_id = 100
+        self.audio_graph = _RecordingSubController(self)
+        self.audio_routing = _RecordingSubController(self)
+        self.midi_controller = _RecordingSubController(self)
+        self.transport = _RecordingSubController(self)
+        self.session = _RecordingSubController(self)
+        self.parameters = _RecordingSubController(self)
+
+    def result(self, method, args):
+        match method:
+            case "get_all_tracks":
+                return [self._info(info.TrackInfo, name, sushi_id) for name, sushi_id in self.tracks.items()]
+            case "get_all_processors":
+                return [self._info(info.ProcessorInfo, name, sushi_id) for name, sushi_id in self.processors.items()]
+            case "get_track_id":
+                return self.tracks[args[0]]
+            case "get_processor_parameters":
+                return [self._info(info.ParameterInfo, name, sushi_id)
+                        for name, sushi_id in self.parameter_ids.get(args[0], {}).items()]
+            case "save_binary_session":
+                return self.binary_session
+            case "create_track" | "create_multibus_track" | "create_processor_on_track":
+                ev = events.ElkpyEvent()
+                ev.sushi_id = self._next_id
+                self._next_id += 1
+                ev.set()
+                return ev
+        return None
+
+    def method_calls(self):
+        return [method for method, _ in self.calls if not method.startswith("get_") and method != "save_binary_session"]
+
+    @staticmethod
+    def _info(info_type, name, sushi_id):
+        obj = info_type({})
+        obj.name = name
+        obj.id = sushi_id
+        return obj
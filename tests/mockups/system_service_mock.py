@@ -34,6 +34,7 @@ grpc_build_info = proto.SushiBuildInfo(version=expected_build_info.version,
                                        commit_hash=expected_build_info.commit_hash,
                                        build_date=expected_build_info.build_date)
 
+expected_api_version = "1.2.0"
 expected_input_channel_count = 3
 expected_output_channel_count = 24
 
@@ -45,6 +46,9 @@ class SystemControllerServiceMockup(sushi_rpc_pb2_grpc.SystemControllerServicer)
     def GetSushiVersion(self, request, context):
         return proto.GenericStringValue(value=expected_build_info.version)
 
+    def GetSushiApiVersion(self, request, context):
+        return proto.GenericStringValue(value=expected_api_version)
+
     def GetBuildInfo(self, request, context):
         return grpc_build_info
 
@@ -0,0 +1,187 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.elkpy import notificationbroker
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.notificationbroker import BrokerNotificationClient, NotificationBroker
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+TIMEOUT = 5.0
+
+
+class Collector(object):
+    def __init__(self, count):
+        self.received = []
+        self._count = count
+        self.done = threading.Event()
+
+    def __call__(self, notification):
+        self.received.append(notification)
+        if len(self.received) >= self._count:
+            self.done.set()
+
+
+class TestNotificationBroker(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        self._broker = NotificationBroker(os.path.join(self._dir.name, "notifications.sock"), self._fake.address,
+                                          proto_file)
+        self._broker.start()
+        self._clients = []
+
+    def tearDown(self):
+        for client in self._clients:
+            client.close()
+        self._broker.stop()
+        self._controller.close()
+        self._fake.stop()
+        self._dir.cleanup()
+
+    def _client(self):
+        client = BrokerNotificationClient(self._broker.socket_path, proto_file)
+        self._clients.append(client)
+        return client
+
+    def _wait_for_subscribers(self, kind, count):
+        deadline = time.monotonic() + TIMEOUT
+        while self._broker.get_subscriber_count(kind) != count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._broker.get_subscriber_count(kind), count)
+
+    def _create_processor(self, track_id, name):
+        ev = self._controller.audio_graph.create_processor_on_track(name, "sushi.testing.equalizer", "",
+                                                                    info_types.PluginType.INTERNAL, track_id, 0,
+                                                                    True)
+        ev.wait_sync(TIMEOUT)
+        return ev.sushi_id
+
+    def test_one_upstream_stream_for_all_clients(self):
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        eq_1 = self._create_processor(track.sushi_id, "eq_1")
+        eq_2 = self._create_processor(track.sushi_id, "eq_2")
+
+        everything = Collector(4)
+        only_eq_2 = Collector(2)
+        blocked = Collector(3)
+        self._client().subscribe_to_parameter_updates(everything)
+        self._client().subscribe_to_parameter_updates(only_eq_2, processors=[eq_2])
+        self._client().subscribe_to_parameter_updates(blocked, param_blocklist=[[eq_1, 0]])
+        self._wait_for_subscribers("parameter", 3)
+        self.assertEqual(self._fake.get_subscriber_count("parameter"), 1)
+        self.assertEqual(self._broker.get_upstream_kinds(), ["parameter"])
+
+        for processor in (eq_1, eq_2):
+            self._controller.parameters.set_parameter_value(processor, 0, 0.25)
+            self._controller.parameters.set_parameter_value(processor, 1, 0.75)
+        for collector in (everything, only_eq_2, blocked):
+            self.assertTrue(collector.done.wait(TIMEOUT))
+
+        self.assertEqual([(n.parameter.processor_id, n.parameter.parameter_id) for n in everything.received],
+                         [(eq_1, 0), (eq_1, 1), (eq_2, 0), (eq_2, 1)])
+        self.assertEqual([n.normalized_value for n in everything.received], [0.25, 0.75, 0.25, 0.75])
+        self.assertEqual({n.parameter.processor_id for n in only_eq_2.received}, {eq_2})
+        self.assertNotIn((eq_1, 0), [(n.parameter.processor_id, n.parameter.parameter_id)
+                                       for n in blocked.received])
+
+    def test_client_close_and_broker_stop(self):
+        transport = Collector(1)
+        client = self._client()
+        client.subscribe_to_transport_changes(transport)
+        subscription = self._client().subscribe_to_transport_changes(lambda n: None)
+        self._wait_for_subscribers("transport", 2)
+
+        self._controller.transport.set_tempo(140.0)
+        self.assertTrue(transport.done.wait(TIMEOUT))
+        self.assertAlmostEqual(transport.received[0].tempo, 140.0)
+
+        client.close()
+        self._wait_for_subscribers("transport", 1)
+
+        self._broker.stop()
+        self.assertEqual(self._broker.get_subscriber_count("transport"), 0)
+        self.assertFalse(subscription.done())
+
+    def test_client_reconnects_after_broker_restart(self):
+        transport = Collector(2)
+        confirmations = []
+        subscription = self._client().subscribe_to_transport_changes(transport,
+                                                                      on_subscribed=lambda: confirmations.append(1))
+        self._wait_for_subscribers("transport", 1)
+        self._wait_for(lambda: len(confirmations) == 1)
+        self._controller.transport.set_tempo(140.0)
+        self._wait_for(lambda: len(transport.received) == 1)
+
+        self._broker.stop()
+        self._broker = NotificationBroker(self._broker.socket_path, self._fake.address, proto_file)
+        self._broker.start()
+        self._wait_for_subscribers("transport", 1)
+        self._controller.transport.set_tempo(150.0)
+        self.assertTrue(transport.done.wait(TIMEOUT))
+        self.assertAlmostEqual(transport.received[1].tempo, 150.0)
+        self.assertEqual(len(confirmations), 2)
+        self.assertFalse(subscription.done())
+
+    def test_refuses_to_replace_running_broker(self):
+        with self.assertRaises(RuntimeError):
+            NotificationBroker(self._broker.socket_path, self._fake.address, proto_file).start()
+        # The running broker still serves
+        transport = Collector(1)
+        self._client().subscribe_to_transport_changes(transport)
+        self._wait_for_subscribers("transport", 1)
+
+    def test_replaces_stale_socket(self):
+        self._broker.stop()
+        with socket.socket(socket.AF_UNIX) as stale:
+            stale.bind(self._broker.socket_path)
+        self._broker.start()
+        self._client().subscribe_to_transport_changes(lambda n: None)
+        self._wait_for_subscribers("transport", 1)
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + TIMEOUT
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+
+class TestDefaultSocketPath(unittest.TestCase):
+    def test_per_user(self):
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}):
+            self.assertEqual(notificationbroker._default_socket_path(), "/run/user/1000/elkpy-notifications.sock")
+        with mock.patch.dict(os.environ):
+            os.environ.pop("XDG_RUNTIME_DIR", None)
+            self.assertEqual(os.path.basename(notificationbroker._default_socket_path()),
+                             "elkpy-notifications-{}.sock".format(os.getuid()))
@@ -0,0 +1,165 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from src.elkpy import grpc_gen
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.notificationrecorder import NotificationRecorder, NotificationReplayer
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+TIMEOUT = 5.0
+
+
+def _parameter_update(processor_id, parameter_id, value):
+    return SUSHI_PROTO.ParameterUpdate(
+        parameter=SUSHI_PROTO.ParameterIdentifier(processor_id=processor_id, parameter_id=parameter_id),
+        normalized_value=value)
+
+
+class TestNotificationRecorder(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "notifications.rec")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_round_trip(self):
+        notifications = [("parameter", _parameter_update(1, 2, 0.5)),
+                         ("track", SUSHI_PROTO.TrackUpdate(action=1, track=SUSHI_PROTO.TrackIdentifier(id=3))),
+                         ("timing", SUSHI_PROTO.CpuTimings(average=0.1, min=0.05, max=0.2)),
+                         ("transport", SUSHI_PROTO.TransportUpdate(tempo=130.0)),
+                         ("property", SUSHI_PROTO.PropertyValue(value="file.wav"))]
+        with NotificationRecorder(self._path) as recorder:
+            for kind, notification in notifications:
+                recorder.record(kind, notification)
+                time.sleep(0.01)
+        self.assertEqual(recorder.record_count, 5)
+
+        records = list(NotificationReplayer(self._path, proto_file))
+        self.assertEqual([(kind, notification) for _, kind, notification in records], notifications)
+        timestamps = [timestamp for timestamp, _, _ in records]
+        self.assertEqual(timestamps[0], 0.0)
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertGreaterEqual(timestamps[-1], 0.04)
+
+    def test_truncated_recording(self):
+        with NotificationRecorder(self._path) as recorder:
+            for i in range(3):
+                recorder.record("parameter", _parameter_update(1, i, 0.5))
+        with open(self._path, "r+b") as f:
+            f.truncate(os.path.getsize(self._path) - 2)
+        self.assertEqual(len(list(NotificationReplayer(self._path, proto_file))), 2)
+
+        with open(self._path, "wb") as f:
+            f.write(b"not a recording")
+        with self.assertRaises(ValueError):
+            NotificationReplayer(self._path, proto_file)
+
+    def test_replay_speed(self):
+        with NotificationRecorder(self._path) as recorder:
+            recorder.record("parameter", _parameter_update(1, 0, 0.0))
+            time.sleep(0.2)
+            recorder.record("parameter", _parameter_update(1, 0, 1.0))
+            recorder.record("transport", SUSHI_PROTO.TransportUpdate(tempo=100.0))
+        replayer = NotificationReplayer(self._path, proto_file)
+
+        values = []
+        start = time.monotonic()
+        self.assertEqual(replayer.replay({"parameter": lambda n: values.append(n.normalized_value)}), 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(values, [0.0, 1.0])
+
+        start = time.monotonic()
+        self.assertEqual(replayer.replay({"parameter": values.append, "transport": values.append}, speed=0), 3)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+
+class TestNotificationRecorderWithFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "notifications.rec")
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+        self._dir.cleanup()
+
+    def _wait_for_subscribers(self, kind, count=1):
+        deadline = time.monotonic() + TIMEOUT
+        while self._fake.get_subscriber_count(kind) != count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_record_and_replay_to_fake(self):
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        gain = self._controller.audio_graph.create_processor_on_track("gain", "sushi.testing.gain", "",
+                                                                      info_types.PluginType.INTERNAL,
+                                                                      track.sushi_id, 0, True)
+        gain.wait_sync(TIMEOUT)
+
+        recorder = NotificationRecorder(self._path)
+        recorder.attach(self._controller.notifications, ["parameter", "transport"])
+        self._wait_for_subscribers("parameter")
+        self._wait_for_subscribers("transport")
+        for value in (0.25, 0.5, 0.75):
+            self._controller.parameters.set_parameter_value(gain.sushi_id, 0, value)
+        self._controller.transport.set_tempo(140.0)
+        deadline = time.monotonic() + TIMEOUT
+        while recorder.record_count < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        recorder.close()
+        self._wait_for_subscribers("parameter", 0)
+        self.assertEqual(self._fake.get_subscriber_count("parameter"), 0)
+
+        records = list(NotificationReplayer(self._path, proto_file))
+        self.assertEqual([n.normalized_value for _, kind, n in records if kind == "parameter"],
+                         [0.25, 0.5, 0.75])
+        self.assertEqual(len([kind for _, kind, _ in records if kind == "transport"]), 1)
+
+        # Replayed to the fake, the notifications reach the callbacks of another client
+        received = []
+        done = threading.Event()
+
+        def on_update(notification):
+            received.append(notification.normalized_value)
+            if len(received) == 3:
+                done.set()
+
+        self._controller.notifications.subscribe_to_parameter_updates(on_update)
+        self._wait_for_subscribers("parameter")
+        self.assertEqual(NotificationReplayer(self._path, proto_file).replay_to(self._fake, speed=0,
+                                                                                kinds=["parameter"]), 3)
+        self.assertTrue(done.wait(TIMEOUT))
+        self.assertEqual(received, [0.25, 0.5, 0.75])
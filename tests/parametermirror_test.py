@@ -0,0 +1,188 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.elkpy import parametermirror
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.parametermirror import ParameterMirror, ParameterMirrorWriter
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+TIMEOUT = 5.0
+
+
+class TestParameterMirror(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "parameters")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_read_written_values(self):
+        with ParameterMirrorWriter(self._path, capacity=3) as writer, ParameterMirror(self._path) as mirror:
+            writer.update(1, 0, 0.5)
+            self.assertEqual(mirror.get_parameter_value(1, 0), 0.5)
+            writer.update_many([(1, 1, 0.25), (2, 0, 1.0), (1, 0, 0.75)])
+            self.assertEqual(mirror.get_parameter_value(1, 0), 0.75)
+            self.assertEqual(mirror.get_all_values(), {(1, 0): 0.75, (1, 1): 0.25, (2, 0): 1.0})
+            self.assertIn((2, 0), mirror)
+            with self.assertRaises(KeyError):
+                mirror.get_parameter_value(3, 0)
+
+            writer.update(3, 0, 0.5)
+            self.assertEqual(writer.dropped, 1)
+            self.assertNotIn((3, 0), mirror)
+        self.assertFalse(os.path.exists(self._path))
+
+    def test_invalid_file(self):
+        with open(self._path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            ParameterMirror(self._path)
+
+    def test_sequence_numbers_wrap_around(self):
+        with ParameterMirrorWriter(self._path) as writer, ParameterMirror(self._path) as mirror:
+            writer.update(1, 0, 0.5)
+            offset = writer._slot_offset
+            parametermirror._UINT32.pack_into(writer._map, offset, 0xFFFFFFFE)
+            writer.update(1, 0, 0.25)
+            self.assertEqual(parametermirror._UINT32.unpack_from(writer._map, offset)[0], 0)
+            self.assertEqual(mirror.get_parameter_value(1, 0), 0.25)
+
+    def test_readers_follow_restarted_writer(self):
+        first = ParameterMirrorWriter(self._path)
+        first.update(1, 0, 0.5)
+        with ParameterMirror(self._path) as mirror:
+            self.assertEqual(mirror.get_parameter_value(1, 0), 0.5)
+            # The writing process restarts without closing the first writer
+            with ParameterMirrorWriter(self._path) as second:
+                second.update(1, 0, 0.75)
+                second.update(2, 0, 1.0)
+                self.assertEqual(mirror.get_parameter_value(1, 0), 0.75)
+                self.assertEqual(mirror.get_all_values(), {(1, 0): 0.75, (2, 0): 1.0})
+                first.close()
+                self.assertTrue(os.path.exists(self._path))
+
+    def test_default_path_per_user(self):
+        self.assertTrue(parametermirror.DEFAULT_PATH.endswith("-{}".format(os.getuid())))
+
+    def test_refuses_files_of_others(self):
+        with ParameterMirrorWriter(self._path):
+            with mock.patch.object(parametermirror.os, "getuid", return_value=os.getuid() + 1):
+                with self.assertRaises(PermissionError):
+                    ParameterMirror(self._path)
+            os.chmod(self._path, 0o666)
+            with self.assertRaises(PermissionError):
+                ParameterMirror(self._path)
+
+    def test_writer_ignores_file_writable_by_others(self):
+        with ParameterMirrorWriter(self._path) as first, ParameterMirror(self._path) as mirror:
+            first.update(1, 0, 0.5)
+            os.chmod(self._path, 0o666)
+            with ParameterMirrorWriter(self._path) as second:
+                second.update(1, 0, 0.75)
+                # The readers of the replaced file aren't told to switch to the new one
+                self.assertEqual(mirror.get_parameter_value(1, 0), 0.5)
+                with ParameterMirror(self._path) as new_mirror:
+                    self.assertEqual(new_mirror.get_parameter_value(1, 0), 0.75)
+
+    def test_consistent_reads_during_writes(self):
+        with ParameterMirrorWriter(self._path) as writer, ParameterMirror(self._path) as mirror:
+            values = [i / 1000 for i in range(1000)]
+            writer.update(1, 0, values[0])
+            stop = threading.Event()
+
+            def write():
+                i = 0
+                while not stop.is_set():
+                    i += 1
+                    writer.update(1, 0, values[i % len(values)])
+                    # Parameters added while reading
+                    if i < 500:
+                        writer.update(2, i, 0.0)
+
+            thread = threading.Thread(target=write)
+            thread.start()
+            try:
+                known = set(values)
+                for _ in range(20000):
+                    self.assertIn(mirror.get_parameter_value(1, 0), known)
+            finally:
+                stop.set()
+                thread.join()
+            self.assertEqual(len(mirror.keys()), 500)
+
+    def test_read_from_other_process(self):
+        with ParameterMirrorWriter(self._path) as writer:
+            writer.update(7, 3, 0.125)
+            script = ("from src.elkpy.parametermirror import ParameterMirror\n"
+                      "print(ParameterMirror({!r}).get_parameter_value(7, 3))".format(self._path))
+            output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            self.assertEqual(float(output.stdout), 0.125)
+
+
+class TestParameterMirrorWithFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, "parameters")
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+        self._dir.cleanup()
+
+    def test_populate_and_follow_notifications(self):
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        eq = self._controller.audio_graph.create_processor_on_track("eq", "sushi.testing.equalizer", "",
+                                                                    info_types.PluginType.INTERNAL, track.sushi_id,
+                                                                    0, True)
+        eq.wait_sync(TIMEOUT)
+        self._controller.parameters.set_parameter_value(eq.sushi_id, 1, 0.25)
+
+        with ParameterMirrorWriter(self._path) as writer, ParameterMirror(self._path) as mirror:
+            self.assertEqual(writer.populate(self._controller), len(mirror.keys()))
+            self.assertEqual(mirror.get_parameter_value(eq.sushi_id, 1), 0.25)
+            self.assertEqual(mirror.get_parameter_value(track.sushi_id, 0),
+                             self._controller.parameters.get_parameter_value(track.sushi_id, 0))
+
+            writer.attach(self._controller.notifications)
+            deadline = time.monotonic() + TIMEOUT
+            while not self._fake.get_subscriber_count("parameter") and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self._controller.parameters.set_parameter_value(eq.sushi_id, 1, 0.75)
+            while mirror.get_parameter_value(eq.sushi_id, 1) != 0.75 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(mirror.get_parameter_value(eq.sushi_id, 1), 0.75)
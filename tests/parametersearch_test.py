@@ -0,0 +1,112 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import time
+import unittest
+
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.parametersearch import PARAMETER, PROPERTY, ParameterSearchIndex
+from src.elkpy.sushicontroller import SushiController
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+TIMEOUT = 5.0
+
+
+class TestParameterSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        self._track = self._create_track("main")
+        self._eq = self._create_processor("eq", "sushi.testing.equalizer")
+        self._synth = self._create_processor("synth", "vendor.synth")
+        self._index = ParameterSearchIndex(self._controller)
+
+    def tearDown(self):
+        self._index.detach()
+        self._controller.close()
+        self._fake.stop()
+
+    def _create_track(self, name):
+        ev = self._controller.audio_graph.create_track(name, 2)
+        ev.wait_sync(TIMEOUT)
+        return ev.sushi_id
+
+    def _create_processor(self, name, uid):
+        ev = self._controller.audio_graph.create_processor_on_track(name, uid, "", info_types.PluginType.INTERNAL,
+                                                                    self._track, 0, True)
+        ev.wait_sync(TIMEOUT)
+        return ev.sushi_id
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + TIMEOUT
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_build_and_search(self):
+        # 3 track parameters, 3 equalizer parameters, 8 generic parameters and 1 property
+        self.assertEqual(self._index.build(), 15)
+
+        found = self._index.search("FREQ")
+        self.assertEqual([(e.processor_name, e.name) for e in found], [("eq", "frequency")])
+        self.assertEqual(found[0].unit, "Hz")
+
+        self.assertEqual(len(self._index.search("parameter_")), 8)
+        self.assertEqual(len(self._index.search("parameter_", processor_id=self._eq)), 0)
+        self.assertEqual(len(self._index.search("parameter_1", limit=1)), 1)
+        self.assertEqual([e.name for e in self._index.search("a", prefix=True)], [])
+        self.assertEqual([e.name for e in self._index.search("ga", prefix=True)], ["gain", "gain"])
+
+        self.assertEqual([e.name for e in self._index.search("hz", fields=["unit"])], ["frequency"])
+        self.assertEqual([e.name for e in self._index.search("", kind=PROPERTY)], ["file"])
+        self.assertEqual([e.name for e in self._index.search("", parameter_type=info_types.ParameterType.BOOL)],
+                         ["mute"])
+        self.assertTrue(all(e.kind == PARAMETER for e in self._index.search("", kind=PARAMETER)))
+        with self.assertRaises(ValueError):
+            self._index.search("x", fields=["type"])
+
+    def test_updated_by_notifications(self):
+        processor_subscribers = self._fake.get_subscriber_count("processor")
+        track_subscribers = self._fake.get_subscriber_count("track")
+        self._index.attach(self._controller.notifications)
+        self._index.build()
+        self._wait_for(lambda: self._fake.get_subscriber_count("processor") > processor_subscribers)
+        self._wait_for(lambda: self._fake.get_subscriber_count("track") > track_subscribers)
+
+        lfo = self._create_processor("lfo", "sushi.testing.lfo")
+        self._wait_for(lambda: self._index.get_entries(lfo))
+        self.assertEqual([e.processor_id for e in self._index.search("freq")], sorted([self._eq, lfo]))
+
+        aux = self._create_track("aux")
+        self._wait_for(lambda: self._index.get_entries(aux))
+        self.assertEqual(len(self._index.search("gain", processor_id=aux)), 1)
+
+        self._controller.audio_graph.delete_processor_from_track(self._eq, self._track).wait_sync(TIMEOUT)
+        self._wait_for(lambda: not self._index.get_entries(self._eq))
+        self.assertEqual([e.processor_id for e in self._index.search("freq")], [lfo])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(REPO_DIR, "benchmarks")
+# The benchmarks are scripts importing each other as top level modules
+sys.path.append(BENCHMARK_DIR)
+
+import regression_gate  # noqa: E402
+import rpc_benchmark  # noqa: E402
+
+RESAMPLES = 500
+
+
+def _samples(seed: int, scale: float = 1.0, count: int = 50) -> list[float]:
+    rng = random.Random(seed)
+    return [scale * (1e-3 + abs(rng.gauss(0, 1e-4))) for _ in range(count)]
+
+
+def _results(samples: list[float], higher_is_better: bool = False) -> dict:
+    result = rpc_benchmark.BenchmarkResult("latency.test", "ops/s" if higher_is_better else "s", samples,
+                                           higher_is_better)
+    return {"version": rpc_benchmark.RESULT_VERSION, "meta": {}, "results": {result.name: result.to_dict()}}
+
+
+class TestBootstrapRatio(unittest.TestCase):
+    def test_identical_samples(self):
+        samples = _samples(1)
+        low, high = regression_gate.bootstrap_ratio(samples, samples, statistics.median, resamples=RESAMPLES)
+        self.assertLessEqual(low, 1.0)
+        self.assertGreaterEqual(high, 1.0)
+
+    def test_slower_samples(self):
+        low, high = regression_gate.bootstrap_ratio(_samples(1), _samples(2, 2.0), statistics.median,
+                                                    resamples=RESAMPLES)
+        self.assertGreater(low, 1.5)
+        self.assertLess(high, 2.5)
+
+    def test_reproducible(self):
+        baseline, current = _samples(1), _samples(2, 1.05)
+        first = regression_gate.bootstrap_ratio(baseline, current, statistics.median, resamples=RESAMPLES)
+        self.assertEqual(first, regression_gate.bootstrap_ratio(baseline, current, statistics.median,
+                                                                resamples=RESAMPLES))
+        self.assertEqual(regression_gate.bootstrap_ratio(baseline, current, statistics.median, resamples=RESAMPLES,
+                                                         rng=random.Random(7)),
+                         regression_gate.bootstrap_ratio(baseline, current, statistics.median, resamples=RESAMPLES,
+                                                         rng=random.Random(7)))
+
+
+class TestCompareResults(unittest.TestCase):
+    def _statuses(self, baseline: dict, current: dict) -> dict:
+        comparisons = regression_gate.compare_results(baseline, current, resamples=RESAMPLES)
+        return {c.statistic: c.status for c in comparisons}
+
+    def test_identical_distributions_pass(self):
+        # Different draws of the same distribution
+        statuses = self._statuses(_results(_samples(1)), _results(_samples(2)))
+        self.assertEqual({"median": "unchanged", "p95": "unchanged"}, statuses)
+
+    def test_regression_fails(self):
+        statuses = self._statuses(_results(_samples(1)), _results(_samples(2, 1.5)))
+        self.assertEqual({"median": "regression", "p95": "regression"}, statuses)
+
+    def test_improvement(self):
+        statuses = self._statuses(_results(_samples(1)), _results(_samples(2, 0.5)))
+        self.assertEqual({"median": "improvement", "p95": "improvement"}, statuses)
+
+    def test_lower_throughput_fails(self):
+        statuses = self._statuses(_results(_samples(1), True), _results(_samples(2, 0.5), True))
+        self.assertEqual({"median": "regression", "p95": "regression"}, statuses)
+
+    def test_reproducible(self):
+        baseline, current = _results(_samples(1)), _results(_samples(2, 1.1))
+        first = regression_gate.compare_results(baseline, current, resamples=RESAMPLES)
+        second = regression_gate.compare_results(baseline, current, resamples=RESAMPLES)
+        self.assertEqual([c.to_dict() for c in first], [c.to_dict() for c in second])
+
+    def test_unmatched_benchmarks_skipped(self):
+        current = _results(_samples(2))
+        current["results"]["latency.other"] = current["results"].pop("latency.test")
+        self.assertEqual([], regression_gate.compare_results(_results(_samples(1)), current, resamples=RESAMPLES))
+
+
+class TestCompareCommand(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._baseline = self._write("baseline.json", _results(_samples(1)))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write(self, name: str, results: dict) -> str:
+        path = os.path.join(self._dir.name, name)
+        with open(path, "w") as f:
+            json.dump(results, f)
+        return path
+
+    def _compare(self, current: dict) -> subprocess.CompletedProcess:
+        output = os.path.join(self._dir.name, "comparison.json")
+        result = subprocess.run([sys.executable, os.path.join(BENCHMARK_DIR, "regression_gate.py"), "compare",
+                                 "--baseline", self._baseline, "--current", self._write("current.json", current),
+                                 "--output", output], capture_output=True, text=True)
+        with open(output) as f:
+            self.assertEqual(2, len(json.load(f)["comparisons"]))
+        return result
+
+    def test_exit_status(self):
+        self.assertEqual(0, self._compare(_results(_samples(2))).returncode)
+        result = self._compare(_results(_samples(2, 1.5)))
+        self.assertEqual(1, result.returncode, result.stderr)
+        self.assertIn("2 regressions in 2 comparisons", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestQuickRun(unittest.TestCase):
+    def test_quick_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "results.json")
+            result = subprocess.run([sys.executable, os.path.join(REPO_DIR, "benchmarks", "rpc_benchmark.py"),
+                                     "--proto", proto_file, "--quick", "--output", output],
+                                    capture_output=True, text=True, timeout=120)
+            self.assertEqual(0, result.returncode, result.stderr)
+            with open(output) as f:
+                results = json.load(f)
+
+        self.assertTrue(results["meta"]["quick"])
+        self.assertEqual({"latency", "throughput", "notifications", "conversion", "startup"},
+                         {name.split(".")[0] for name in results["results"]})
+        # The notifications are streamed by elkpy.fakesushi
+        fanout = results["results"]["notifications.fanout_4_subscribers"]
+        self.assertEqual("notifications/s", fanout["unit"])
+        self.assertTrue(fanout["higher_is_better"])
+        for name, benchmark in results["results"].items():
+            self.assertTrue(benchmark["samples"], name)
+            self.assertGreater(benchmark["median"], 0, name)
+        self.assertIn("notifications.fanout_4_subscribers", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
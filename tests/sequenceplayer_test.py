@@ -0,0 +1,161 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import gc
+import os
+import struct
+import tempfile
+import unittest
+
+from src.elkpy.keyboardcontroller import KeyboardEventType as Type
+from src.elkpy import sequenceplayer as sp
+
+
+class RecordingKeyboard:
+    def __init__(self):
+        self.batches = []
+
+    def send_events_async(self, track_identifier, events):
+        self.batches.append((track_identifier, list(events)))
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.reads = 0
+
+    def get_tempo(self):
+        self.reads += 1
+        return 6000.0
+
+
+def _write_midi_file(path):
+    track = bytes([
+        0x00, 0xFF, 0x51, 0x03, 0x07, 0xA1, 0x20,   # 120 bpm
+        0x00, 0x90, 60, 127,                        # note on
+        0x00, 64, 127,                              # note on, running status
+        0x60, 0x80, 60, 0,                          # note off after one beat
+        0x00, 0x90, 64, 0,                          # note on with velocity 0
+        0x00, 0xE0, 0x00, 0x40,                     # pitch bend, centered
+        0x00, 0xFF, 0x51, 0x03, 0x0F, 0x42, 0x40,   # 60 bpm
+        0x60, 0xD1, 127,                            # channel aftertouch
+        0x00, 0xFF, 0x2F, 0x00,
+    ])
+    with open(path, "wb") as f:
+        f.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, 96))
+        f.write(b"MTrk" + struct.pack(">I", len(track)) + track)
+
+
+class TestMidiFile(unittest.TestCase):
+    def test_read_midi_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.mid")
+            _write_midi_file(path)
+            events, tempo_map = sp.read_midi_file(path)
+
+        self.assertEqual(tempo_map, [(0.0, 120.0), (1.0, 60.0)])
+        self.assertEqual([(e.time, e.type, e.channel, e.note) for e in events],
+                         [(0.0, Type.NOTE_ON, 0, 60),
+                          (0.0, Type.NOTE_ON, 0, 64),
+                          (1.0, Type.NOTE_OFF, 0, 60),
+                          (1.0, Type.NOTE_OFF, 0, 64),
+                          (1.0, Type.PITCH_BEND, 0, 0),
+                          (2.0, Type.AFTERTOUCH, 1, 0)])
+        self.assertAlmostEqual(events[4].value, 8192 / 16383)
+
+        seconds = sp.beats_to_seconds(events, tempo_map)
+        self.assertEqual([e.time for e in seconds], [0.0, 0.0, 0.5, 0.5, 0.5, 1.5])
+
+    def test_not_a_midi_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.mid")
+            with open(path, "wb") as f:
+                f.write(b"RIFF" + bytes(10))
+            with self.assertRaises(ValueError):
+                sp.read_midi_file(path)
+
+
+class TestSequencePlayer(unittest.TestCase):
+    def setUp(self):
+        self._keyboard = RecordingKeyboard()
+        self._events = [sp.SequenceEvent(0.02, Type.NOTE_OFF, 0, 60, 0.0),
+                        sp.SequenceEvent(0.0, Type.NOTE_ON, 0, 60, 0.8),
+                        sp.SequenceEvent(0.0, Type.NOTE_ON, 0, 64, 0.8)]
+
+    def test_play_batches_simultaneous_events(self):
+        player = sp.SequencePlayer(self._keyboard, 3, self._events)
+        player.play()
+        self.assertTrue(player.wait(2.0))
+        self.assertFalse(player.is_playing())
+
+        self.assertEqual(self._keyboard.batches,
+                         [(3, [(Type.NOTE_ON, 0, 60, 0.8), (Type.NOTE_ON, 0, 64, 0.8)]),
+                          (3, [(Type.NOTE_OFF, 0, 60, 0.0)]),
+                          # Still on at the end
+                          (3, [(Type.NOTE_OFF, 0, 64, 0.0)])])
+        stats = player.get_jitter_stats()
+        self.assertEqual(stats.count, 2)
+        self.assertGreaterEqual(stats.p50, 0.0)
+        self.assertLessEqual(stats.p50, stats.max)
+
+    def test_tempo_from_transport(self):
+        events = [sp.SequenceEvent(beat, Type.NOTE_ON, 0, 60, 0.5) for beat in range(4)]
+        player = sp.SequencePlayer(self._keyboard, 0, events, in_beats=True, transport=RecordingTransport())
+        player.play()
+        self.assertTrue(player.wait(1.0))
+        self.assertEqual(len(self._keyboard.batches), 5)
+
+    def test_stop_looping(self):
+        player = sp.SequencePlayer(self._keyboard, 0, self._events)
+        player.play(loop=True)
+        self.assertTrue(player.is_playing())
+        player.stop()
+        self.assertFalse(player.is_playing())
+        self.assertEqual(len(self._keyboard.batches), player.get_jitter_stats().count + 1)
+
+    def test_stop_turns_notes_off(self):
+        events = [sp.SequenceEvent(0.0, Type.NOTE_ON, 0, 60, 0.8),
+                  sp.SequenceEvent(0.0, Type.NOTE_ON, 1, 64, 0.8),
+                  sp.SequenceEvent(0.0, Type.NOTE_ON, 1, 67, 0.0),
+                  sp.SequenceEvent(10.0, Type.NOTE_OFF, 0, 60, 0.0)]
+        player = sp.SequencePlayer(self._keyboard, 3, events)
+        player.play()
+        self.assertFalse(player.wait(0.05))
+        player.stop()
+        self.assertEqual(self._keyboard.batches[-1],
+                         (3, [(Type.NOTE_OFF, 0, 60, 0.0), (Type.NOTE_OFF, 1, 64, 0.0)]))
+
+    def test_tempo_read_on_each_loop(self):
+        transport = RecordingTransport()
+        events = [sp.SequenceEvent(0.0, Type.NOTE_ON, 0, 60, 0.5), sp.SequenceEvent(1.0, Type.NOTE_OFF, 0, 60, 0.0)]
+        player = sp.SequencePlayer(self._keyboard, 0, events, in_beats=True, transport=transport)
+        player.play(loop=True)
+        self.assertFalse(player.wait(0.1))
+        player.stop()
+        self.assertGreater(transport.reads, 2)
+
+    def test_disable_gc_is_shared_between_players(self):
+        self.assertTrue(gc.isenabled())
+        players = [sp.SequencePlayer(self._keyboard, 0, self._events, disable_gc=True) for _ in range(2)]
+        for player in players:
+            player.play(loop=True)
+        self.assertFalse(player.wait(0.05))
+        self.assertFalse(gc.isenabled())
+        players[0].stop()
+        self.assertFalse(gc.isenabled())
+        players[1].stop()
+        self.assertTrue(gc.isenabled())
@@ -0,0 +1,169 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import unittest
+
+from tests.mockups.recording_controller_mock import RecordingGraphController
+from src.elkpy import grpc_gen
+from src.elkpy import sessiondiff as sd
+from src.elkpy.sessiondiff import OperationType as Op
+
+proto_file = os.environ.get("SUSHI_GRPC_ELKPY_PROTO")
+if proto_file is None:
+    print(
+        "Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition"
+    )
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+
+def add_track(session, name, processors, channels=2, gain=0.5):
+    track = session.tracks.add(name=name, channels=channels, buses=1)
+    track.type.type = 1
+    track.track_state.parameters.add(value=gain).parameter.parameter_id = 0
+    for processor_name, uid, value in processors:
+        processor = track.processors.add(name=processor_name, uid=uid)
+        processor.type.type = 1
+        processor.state.parameters.add(value=value).parameter.parameter_id = 1
+        processor.state.bypassed.value = False
+        processor.state.bypassed.has_value = True
+    return track
+
+
+def make_session(tempo=120.0):
+    session = SUSHI_PROTO.SessionState()
+    session.engine_state.tempo = tempo
+    return session
+
+
+class TestStateDifference(unittest.TestCase):
+    def test_partial_state(self):
+        live = sd.empty_state()
+        live.parameters = [(0, 0.5), (1, 0.5)]
+        live.bypassed = False
+        target = sd.empty_state()
+        target.parameters = [(0, 0.5), (1, 0.7)]
+        target.bypassed = False
+
+        diff = sd.state_difference(live, target)
+        self.assertEqual(diff.parameters, [(1, 0.7)])
+        self.assertIsNone(diff.bypassed)
+        self.assertIsNone(sd.state_difference(target, target))
+
+    def test_program_change_sends_everything(self):
+        live = sd.empty_state()
+        live.parameters = [(0, 0.5)]
+        target = sd.empty_state()
+        target.program_id = 3
+        target.parameters = [(0, 0.5)]
+
+        diff = sd.state_difference(live, target)
+        self.assertEqual(diff.program_id, 3)
+        self.assertEqual(diff.parameters, [(0, 0.5)])
+
+
+class TestDiffGraphs(unittest.TestCase):
+    def setUp(self):
+        live = make_session()
+        add_track(live, "main", [("synth", "sushi.testing.synth", 0.1), ("delay", "sushi.testing.delay", 0.2),
+                                 ("reverb", "sushi.testing.reverb", 0.3)])
+        add_track(live, "aux", [("comp", "sushi.testing.comp", 0.4)])
+        live.engine_state.input_connections.add(track="main", track_channel=0, engine_channel=0)
+        live.engine_state.output_connections.add(track="aux", track_channel=0, engine_channel=0)
+        self._live = live
+
+    def test_identical_sessions(self):
+        model = sd.GraphModel.from_session(self._live)
+        self.assertTrue(sd.diff_graphs(model, model).is_empty())
+
+    def test_parameter_change_only(self):
+        target = make_session()
+        target.CopyFrom(self._live)
+        target.tracks[0].processors[1].state.parameters[0].value = 0.9
+
+        plan = sd.diff_graphs(sd.GraphModel.from_session(self._live), sd.GraphModel.from_session(target))
+        self.assertEqual(plan.rpc_count(), 1)
+        op = plan.operations()[0]
+        self.assertEqual(op.type, Op.SET_PROCESSOR_STATE)
+        self.assertEqual(op.args["processor"], "delay")
+        self.assertEqual(op.args["state"].parameters[0][0], 1)
+        self.assertAlmostEqual(op.args["state"].parameters[0][1], 0.9, places=6)
+
+    def test_graph_changes(self):
+        target = make_session(tempo=90.0)
+        add_track(target, "main", [("reverb", "sushi.testing.reverb", 0.3), ("synth", "sushi.testing.synth", 0.1),
+                                   ("delay", "sushi.testing.delay", 0.2), ("eq", "sushi.testing.eq", 0.5)])
+        add_track(target, "bass", [("comp", "sushi.testing.comp", 0.4)])
+        target.engine_state.input_connections.add(track="main", track_channel=1, engine_channel=0)
+
+        plan = sd.diff_graphs(sd.GraphModel.from_session(self._live), sd.GraphModel.from_session(target))
+        ops = [(op.type, op.args.get("processor", op.args.get("track"))) for op in plan.operations()]
+        self.assertEqual(ops, [(Op.DISCONNECT_AUDIO_INPUT, "main"),
+                               (Op.CREATE_TRACK, "bass"),
+                               (Op.MOVE_PROCESSOR, "reverb"),
+                               (Op.CREATE_PROCESSOR, "eq"),
+                               (Op.MOVE_PROCESSOR, "comp"),
+                               (Op.DELETE_TRACK, "aux"),
+                               (Op.SET_PROCESSOR_STATE, "eq"),
+                               (Op.SET_PROCESSOR_STATE, "bass"),
+                               (Op.CONNECT_AUDIO_INPUT, "main"),
+                               (Op.SET_TEMPO, None)])
+        self.assertEqual(len(plan.stages), 4)
+        self.assertEqual(plan.operations()[2].args["before"], "synth")
+        self.assertIsNone(plan.operations()[3].args["before"])
+
+    def test_replaced_plugin_and_track(self):
+        target = make_session()
+        add_track(target, "main", [("synth", "sushi.testing.other_synth", 0.1),
+                                   ("delay", "sushi.testing.delay", 0.2), ("reverb", "sushi.testing.reverb", 0.3)])
+        add_track(target, "aux", [("comp", "sushi.testing.comp", 0.4)], channels=1)
+        target.engine_state.input_connections.add(track="main", track_channel=0, engine_channel=0)
+        target.engine_state.output_connections.add(track="aux", track_channel=0, engine_channel=0)
+
+        plan = sd.diff_graphs(sd.GraphModel.from_session(self._live), sd.GraphModel.from_session(target))
+        ops = [(op.type, op.args.get("processor", op.args.get("track"))) for op in plan.stages[0]]
+        # The output connection of aux is deleted with it and connected again after it's recreated
+        self.assertEqual(ops, [(Op.DELETE_PROCESSOR, "synth"), (Op.DELETE_TRACK, "aux")])
+        self.assertIn(sd.GraphOperation(Op.CONNECT_AUDIO_OUTPUT, track="aux", track_channel=0, engine_channel=0),
+                      plan.operations())
+
+
+class TestPlanExecutor(unittest.TestCase):
+    def test_execute(self):
+        live = make_session()
+        add_track(live, "main", [("synth", "sushi.testing.synth", 0.1)])
+        target = make_session()
+        add_track(target, "main", [("delay", "sushi.testing.delay", 0.2), ("synth", "sushi.testing.synth", 0.1)])
+        add_track(target, "aux", [("comp", "sushi.testing.comp", 0.4)])
+
+        controller = RecordingGraphController(tracks={"main": 1}, processors={"synth": 2})
+        plan = sd.diff_graphs(sd.GraphModel.from_session(live), sd.GraphModel.from_session(target))
+        sd.PlanExecutor(controller, timeout=1.0).execute(plan)
+
+        self.assertEqual(controller.method_calls(),
+                         ["create_track", "create_processor_on_track", "create_processor_on_track",
+                          "set_processor_state", "set_processor_state", "set_processor_state"])
+        calls = [args for method, args in controller.calls if method == "create_processor_on_track"]
+        # delay goes in front of synth on main, comp to the back of the new track
+        self.assertEqual(calls[0][4:], (1, 2, False))
+        self.assertEqual(calls[1][4:], (100, 0, True))
+        states = [args[0] for method, args in controller.calls if method == "set_processor_state"]
+        self.assertEqual(states, [101, 100, 102])
@@ -0,0 +1,126 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from src.elkpy import grpc_gen
+from src.elkpy import sessionstore
+
+proto_file = os.environ.get("SUSHI_GRPC_ELKPY_PROTO")
+if proto_file is None:
+    print(
+        "Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition"
+    )
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+
+def make_session(gain, save_date="2025-01-01"):
+    session = SUSHI_PROTO.SessionState()
+    session.save_date = save_date
+    session.engine_state.tempo = 120
+    for name in ("main", "aux"):
+        track = session.tracks.add()
+        track.name = name
+        track.channels = 2
+        track.track_state.parameters.add(value=0.5).parameter.parameter_id = 0
+        for plugin in ("synth", "delay"):
+            processor = track.processors.add()
+            processor.name = name + "_" + plugin
+            processor.uid = "sushi.testing." + plugin
+            processor.state.parameters.add(value=gain).parameter.parameter_id = 1
+            processor.state.binary_data = bytes(1000)
+    return session.SerializeToString()
+
+
+class TestSessionSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self._store = sessionstore.SessionSnapshotStore(self._dir.name, proto_file)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_save_and_load(self):
+        session = make_session(0.25)
+        self._store.save("song", session)
+        self.assertEqual(self._store.list(), ["song"])
+        self.assertTrue(self._store.contains("song"))
+
+        loaded = SUSHI_PROTO.SessionState()
+        loaded.ParseFromString(self._store.load("song"))
+        expected = SUSHI_PROTO.SessionState()
+        expected.ParseFromString(session)
+        self.assertEqual(loaded, expected)
+
+    def test_deduplication(self):
+        written = self._store.save("a", make_session(0.25))
+        # Skeleton, one track state and one processor state shared by all four processors
+        self.assertEqual(self._store.get_stats()["chunks"], 3)
+        self.assertEqual(self._store.save("b", make_session(0.25, "2025-01-02")), 0)
+        self.assertGreater(self._store.save("c", make_session(0.75)), 0)
+        self.assertLess(self._store.save("c", make_session(0.75)), written)
+
+        stats = self._store.get_stats()
+        self.assertEqual(stats["sessions"], 3)
+        self.assertEqual(stats["chunks"], 4)
+        self.assertLess(stats["stored_bytes"], stats["session_bytes"] / 10)
+
+    def test_delete_and_collect_garbage(self):
+        self._store.save("a", make_session(0.25))
+        self._store.save("b", make_session(0.75))
+        self._store.delete("b")
+        self.assertEqual(self._store.collect_garbage(), 1)
+        self.assertEqual(self._store.collect_garbage(), 0)
+        self.assertEqual(self._store.list(), ["a"])
+        self._store.load("a")
+
+        with self.assertRaises(KeyError):
+            self._store.load("b")
+        with self.assertRaises(KeyError):
+            self._store.delete("b")
+
+    def test_collect_garbage_while_saving(self):
+        self._store.save("a", make_session(0.25))
+        stop = threading.Event()
+
+        def collect():
+            while not stop.is_set():
+                self._store.collect_garbage()
+
+        collector = threading.Thread(target=collect)
+        collector.start()
+        try:
+            for i in range(20):
+                self._store.delete("a")
+                self._store.save("a", make_session(0.25, str(i)))
+                self._store.load("a")
+        finally:
+            stop.set()
+            collector.join()
+        self._store.load("a")
+        self.assertEqual(self._store.collect_garbage(), 0)
+
+    def test_invalid_name(self):
+        with self.assertRaises(ValueError):
+            self._store.save("../song", make_session(0.25))
@@ -0,0 +1,99 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import time
+import unittest
+
+import numpy as np
+
+from tests.mockups.recording_controller_mock import RecordingController
+from src.elkpy import sushisnapshot as ss
+
+
+class TestParameterSnapshot(unittest.TestCase):
+    def test_capture(self):
+        controller = RecordingController()
+        controller.audio_graph.processor_states = {
+            2: [(1, 0.25), (0, 0.5)],
+            1: [(3, 1.0)],
+        }
+        snapshot = ss.ParameterSnapshot.capture("a", controller, [2, 1])
+
+        self.assertEqual(snapshot.index.keys(), [(1, 3), (2, 0), (2, 1)])
+        np.testing.assert_allclose(snapshot.values, [1.0, 0.5, 0.25])
+
+    def test_aligned_values(self):
+        snapshot = ss.ParameterSnapshot("a", ss.ParameterIndex([(1, 1), (1, 2)]), [0.1, 0.2])
+        index = ss.ParameterIndex([(1, 2), (1, 3)])
+        np.testing.assert_allclose(snapshot.aligned_values(index), [0.2, np.nan])
+
+    def test_mismatched_length(self):
+        with self.assertRaises(ValueError):
+            ss.ParameterSnapshot("a", ss.ParameterIndex([(1, 1)]), [0.1, 0.2])
+
+
+class TestSnapshotMorpher(unittest.TestCase):
+    def setUp(self):
+        self._controller = RecordingController()
+        a = ss.ParameterSnapshot("a", ss.ParameterIndex([(1, 1), (1, 2), (2, 1)]), [0.0, 0.0, 0.0])
+        b = ss.ParameterSnapshot("b", ss.ParameterIndex([(1, 1), (1, 2), (3, 1)]), [1.0, 0.0, 1.0])
+        self._morpher = ss.SnapshotMorpher(self._controller, [a, b], rate=200.0)
+
+    def test_evaluate_mismatched_parameters(self):
+        self.assertEqual(self._morpher.index.keys(), [(1, 1), (1, 2), (2, 1), (3, 1)])
+        np.testing.assert_allclose(self._morpher.evaluate([0.5, 0.5]), [0.5, 0.0, 0.0, 1.0])
+        np.testing.assert_allclose(self._morpher.evaluate([1.0, 0.0]), [0.0, 0.0, 0.0, np.nan])
+
+    def test_position_weights(self):
+        np.testing.assert_allclose(self._morpher.position_weights(0.25), [0.75, 0.25])
+        np.testing.assert_allclose(self._morpher.position_weights(5.0), [0.0, 1.0])
+        np.testing.assert_allclose(self._morpher.position_weights(-1.0), [1.0, 0.0])
+
+    def test_apply_writes_only_changes(self):
+        self.assertEqual(self._morpher.apply([1.0, 0.0]), 2)
+        self.assertEqual(self._controller.audio_graph.calls, [(1, None, [(1, 0.0), (2, 0.0)])])
+        self.assertEqual(self._controller.parameters.calls, [(2, 1, 0.0)])
+
+        self._controller.clear()
+        self.assertEqual(self._morpher.apply([1.0, 0.0]), 0)
+
+        self.assertEqual(self._morpher.apply([0.5, 0.5]), 2)
+        self.assertEqual(self._controller.parameters.calls, [(1, 1, 0.5), (3, 1, 1.0)])
+
+    def test_morph_ramp(self):
+        self._morpher.morph([0.0, 1.0], 0.05)
+        np.testing.assert_allclose(self._morpher.get_weights(), [0.0, 1.0])
+        self.assertEqual(self._controller.parameters.calls[-1], (1, 1, 1.0))
+
+    def test_background_thread(self):
+        self._morpher.start()
+        try:
+            self._morpher.set_position(1.0)
+            deadline = time.monotonic() + 2.0
+            while self._controller.rpc_count() < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            self._morpher.stop()
+        self.assertIn((1, None, [(1, 1.0), (2, 0.0)]), self._controller.audio_graph.calls)
+        self.assertIn((3, 1, 1.0), self._controller.parameters.calls)
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            self._morpher.evaluate([1.0])
+        with self.assertRaises(ValueError):
+            self._morpher.set_weights([-1.0, 1.0])
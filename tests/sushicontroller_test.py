@@ -0,0 +1,77 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import asyncio
+import os
+import sys
+import unittest
+
+from src.elkpy import sushicontroller as sc
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+# Nothing listens here, gRPC channels only connect when used
+SUSHI_ADDRESS = ('localhost:51099')
+
+SUB_CONTROLLERS = ["audio_graph", "keyboard", "parameters", "programs", "timings", "transport", "audio_routing",
+                   "midi_controller", "cv_gate_controller", "osc_controller", "system", "session", "notifications"]
+
+
+class TestLazySubControllers(unittest.TestCase):
+    def setUp(self):
+        self._controller = sc.SushiController(SUSHI_ADDRESS, proto_file)
+
+    def tearDown(self):
+        self._controller.close()
+
+    def test_nothing_created_up_front(self):
+        for name in SUB_CONTROLLERS:
+            self.assertNotIn(name, self._controller.__dict__)
+
+    def test_created_once_on_access(self):
+        keyboard = self._controller.keyboard
+        self.assertIs(keyboard, self._controller.keyboard)
+        self.assertEqual(["keyboard"], [n for n in SUB_CONTROLLERS if n in self._controller.__dict__])
+
+    def test_event_queues(self):
+        self.assertIs(self._controller.audiograph_event_queue, self._controller.audio_graph.audiograph_event_queue)
+        self.assertIs(self._controller.processor_event_queue, self._controller.audio_graph.processor_event_queue)
+        self.assertNotIn("notifications", self._controller.__dict__)
+
+    def test_event_matching_started_on_demand(self):
+        self._controller._start_event_matching(timeout=5.0)
+        notifications = self._controller.__dict__["notifications"]
+        self.assertTrue(notifications.notification_thread.is_alive())
+        self._controller.close()
+        self.assertFalse(notifications.notification_thread.is_alive())
+
+
+class TestLazySubControllersAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_notifications_started_with_running_loop(self):
+        controller = sc.SushiController(SUSHI_ADDRESS, proto_file)
+        self.assertIn("notifications", controller.__dict__)
+        tasks = controller.notifications.tasks
+        controller.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
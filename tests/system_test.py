@@ -53,6 +53,14 @@ class TestSystemController(unittest.TestCase):
         self.assertEqual(self._sc.get_sushi_version(),
                          system_service_mock.expected_build_info.version)
 
+    def test_get_sushi_api_version(self):
+        self.assertEqual(self._sc.get_sushi_api_version(),
+                         system_service_mock.expected_api_version)
+
+    def test_get_sushi_api_version_without_modules(self):
+        self.assertEqual(grpc_gen.get_sushi_api_version(SUSHI_ADDRESS),
+                         system_service_mock.expected_api_version)
+
     def test_get_build_info(self):
         self.assertEqual(self._sc.get_build_info(),
                          system_service_mock.expected_build_info)
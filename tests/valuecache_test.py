@@ -0,0 +1,324 @@
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import Future
+
+from src.elkpy import grpc_gen
+from src.elkpy import sushi_info_types as info_types
+from src.elkpy.fakesushi import FakeSushi
+from src.elkpy.sushicontroller import SushiController
+from src.elkpy.valuecache import DOMAIN, NORMALIZED, STRING, ParameterValueCache, PropertyValueCache
+
+proto_file = os.environ.get('SUSHI_GRPC_ELKPY_PROTO')
+if proto_file is None:
+    print("Environment variable SUSHI_GRPC_ELKPY_PROTO not defined, set it to point the .proto definition")
+    sys.exit(-1)
+
+SUSHI_PROTO, SUSHI_GRPC = grpc_gen.modules_from_proto(proto_file)
+
+TIMEOUT = 5.0
+
+
+class Notifications(object):
+    """
+    Stands in for a NotificationController, the subscriptions never receive anything.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self._on_subscribed = []
+
+    def _subscribe(self, cb, on_subscribed=None):
+        self.subscriptions.append(Future())
+        self._on_subscribed.append(on_subscribed)
+        return self.subscriptions[-1]
+
+    def confirm(self):
+        for on_subscribed in self._on_subscribed:
+            on_subscribed()
+
+    subscribe_to_parameter_updates = subscribe_to_property_updates = _subscribe
+    subscribe_to_processor_changes = subscribe_to_track_changes = _subscribe
+
+
+def _parameter_update(processor_id, parameter_id, value):
+    return SUSHI_PROTO.ParameterUpdate(
+        parameter=SUSHI_PROTO.ParameterIdentifier(processor_id=processor_id, parameter_id=parameter_id),
+        normalized_value=value, domain_value=value * 10, formatted_value="{:.1f}".format(value * 10))
+
+
+def _property_update(processor_id, property_id, value):
+    return SUSHI_PROTO.PropertyValue(
+        property=SUSHI_PROTO.PropertyIdentifier(processor_id=processor_id, property_id=property_id), value=value)
+
+
+class TestParameterValueCache(unittest.TestCase):
+    def setUp(self):
+        self._notifications = Notifications()
+        self._cache = ParameterValueCache(max_age=0.2)
+        self._cache.attach(self._notifications)
+        self._notifications.confirm()
+
+    def test_lookup(self):
+        self.assertIsNone(self._cache.lookup(1, 2))
+        self._cache.store(1, 2, NORMALIZED, 0.5, time.monotonic())
+        self.assertEqual(self._cache.lookup(1, 2), 0.5)
+        self.assertIsNone(self._cache.lookup(1, 2, DOMAIN))
+
+        self._cache.on_parameter_update(_parameter_update(1, 2, 0.25))
+        self.assertEqual(self._cache.lookup(1, 2), 0.25)
+        self.assertEqual(self._cache.lookup(1, 2, DOMAIN), 2.5)
+        self.assertEqual(self._cache.lookup(1, 2, STRING), "2.5")
+        self.assertEqual(self._cache.get_stats(), {"hits": 4, "misses": 2, "hit_ratio": 4 / 6, "entries": 1})
+
+    def test_max_age(self):
+        self._cache.on_parameter_update(_parameter_update(1, 2, 0.25))
+        time.sleep(0.25)
+        self.assertIsNone(self._cache.lookup(1, 2))
+
+        unlimited = ParameterValueCache(max_age=None)
+        notifications = Notifications()
+        unlimited.attach(notifications)
+        notifications.confirm()
+        unlimited.store(1, 2, NORMALIZED, 0.5, time.monotonic() - 3600)
+        self.assertEqual(unlimited.lookup(1, 2), 0.5)
+
+    def test_read_older_than_notification(self):
+        read_time = time.monotonic()
+        self._cache.on_parameter_update(_parameter_update(1, 2, 0.25))
+        self._cache.store(1, 2, NORMALIZED, 0.5, read_time)
+        self.assertEqual(self._cache.lookup(1, 2), 0.25)
+
+    def test_invalidation(self):
+        for processor_id in (1, 2, 3):
+            self._cache.on_parameter_update(_parameter_update(processor_id, 0, 0.25))
+            self._cache.on_parameter_update(_parameter_update(processor_id, 1, 0.25))
+        self._cache.on_processor_update(SUSHI_PROTO.ProcessorUpdate(
+            action=2, processor=SUSHI_PROTO.ProcessorIdentifier(id=1)))
+        self._cache.on_track_update(SUSHI_PROTO.TrackUpdate(action=2, track=SUSHI_PROTO.TrackIdentifier(id=2)))
+        self._cache.invalidate(3, 0)
+        self.assertIsNone(self._cache.lookup(1, 0))
+        self.assertIsNone(self._cache.lookup(2, 1))
+        self.assertIsNone(self._cache.lookup(3, 0))
+        self.assertEqual(self._cache.lookup(3, 1), 0.25)
+
+    def test_not_served_before_subscription_confirmed(self):
+        cache = ParameterValueCache()
+        notifications = Notifications()
+        cache.attach(notifications)
+        cache.on_parameter_update(_parameter_update(1, 2, 0.25))
+        self.assertFalse(cache.is_live())
+        self.assertIsNone(cache.lookup(1, 2))
+
+        notifications.confirm()
+        self.assertTrue(cache.is_live())
+        # What was stored before may have missed notifications
+        self.assertIsNone(cache.lookup(1, 2))
+        cache.on_parameter_update(_parameter_update(1, 2, 0.5))
+        self.assertEqual(cache.lookup(1, 2), 0.5)
+
+    def test_not_served_without_stream(self):
+        self._cache.on_parameter_update(_parameter_update(1, 2, 0.25))
+        self._notifications.subscriptions[0].set_exception(ConnectionError())
+        self.assertFalse(self._cache.is_live())
+        self.assertIsNone(self._cache.lookup(1, 2))
+
+        self._cache.detach()
+        self.assertEqual(self._cache.get_stats()["entries"], 0)
+        self.assertTrue(all(s.cancelled() for s in self._notifications.subscriptions[1:]))
+
+
+class TestParameterValueCacheWithFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        synth = self._controller.audio_graph.create_processor_on_track("synth", "vendor.synth", "",
+                                                                       info_types.PluginType.INTERNAL,
+                                                                       track.sushi_id, 0, True)
+        synth.wait_sync(TIMEOUT)
+        self._synth = synth.sushi_id
+        self._cache = self._controller.enable_parameter_cache()
+        deadline = time.monotonic() + TIMEOUT
+        while not self._cache.is_live() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self._cache.is_live())
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def _value_reads(self):
+        return self._fake.get_call_counts().get("ParameterController/GetParameterValue", 0)
+
+    def _wait_for_cached(self, parameter_id, value):
+        deadline = time.monotonic() + TIMEOUT
+        while self._cache._entries.get((self._synth, parameter_id)) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._cache._entries[(self._synth, parameter_id)].values[NORMALIZED], value)
+
+    def test_reads_served_from_cache(self):
+        parameters = self._controller.parameters
+        value = parameters.get_parameter_value(self._synth, 0)
+        for _ in range(9):
+            self.assertEqual(parameters.get_parameter_value(self._synth, 0), value)
+        self.assertEqual(self._value_reads(), 1)
+        self.assertEqual(self._cache.get_stats()["hit_ratio"], 0.9)
+
+        # A set is seen through its notification, without reading it back
+        parameters.set_parameter_value(self._synth, 0, 0.75)
+        self._wait_for_cached(0, 0.75)
+        self.assertEqual(parameters.get_parameter_value(self._synth, 0), 0.75)
+        self.assertEqual(parameters.get_parameter_value_as_string(self._synth, 0),
+                         self._cache.lookup(self._synth, 0, STRING))
+        self.assertEqual(self._value_reads(), 1)
+
+    def test_program_change_and_deletion(self):
+        parameters = self._controller.parameters
+        parameters.get_parameter_value(self._synth, 1)
+        self._controller.programs.set_processor_program(self._synth, 1)
+        parameters.get_parameter_value(self._synth, 1)
+        self.assertEqual(self._value_reads(), 2)
+
+        self._controller.audio_graph.delete_processor_from_track(self._synth, self._controller.audio_graph
+                                                                 .get_track_id("main")).wait_sync(TIMEOUT)
+        deadline = time.monotonic() + TIMEOUT
+        while self._cache.get_stats()["entries"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._cache.get_stats()["entries"], 0)
+
+        self._controller.disable_parameter_cache()
+        self.assertIsNone(self._controller.parameters._value_cache)
+
+
+class TestPropertyValueCache(unittest.TestCase):
+    def setUp(self):
+        self._notifications = Notifications()
+        self._cache = PropertyValueCache()
+        self._cache.attach(self._notifications)
+        self._notifications.confirm()
+
+    def test_lazy_values_and_versions(self):
+        # Values that were never read are not kept, only their version
+        self._cache.on_property_update(_property_update(1, 0, "a.wav"))
+        self.assertEqual(self._cache.get_version(1, 0), 1)
+        self.assertIsNone(self._cache.lookup(1, 0))
+
+        self._cache.store(1, 0, "a.wav", time.monotonic())
+        self.assertEqual(self._cache.lookup(1, 0), "a.wav")
+        self.assertEqual(self._cache.get_version(1, 0), 2)
+
+        self._cache.on_property_update(_property_update(1, 0, "a.wav"))
+        self.assertEqual(self._cache.get_version(1, 0), 2)
+        self._cache.on_property_update(_property_update(1, 0, "b.wav"))
+        self.assertEqual(self._cache.lookup(1, 0), "b.wav")
+        self.assertEqual(self._cache.get_version(1, 0), 3)
+        self.assertEqual(self._cache.get_version(1, 1), 0)
+
+    def test_invalidation(self):
+        self._cache.store(1, 0, "a.wav", time.monotonic())
+        self._cache.store(2, 0, "b.wav", time.monotonic())
+        self._cache.store_infos(2, ["info"])
+        self._cache.invalidate(1, 0)
+        self.assertIsNone(self._cache.lookup(1, 0))
+        self.assertEqual(self._cache.get_version(1, 0), 1)
+
+        self._cache.on_processor_update(SUSHI_PROTO.ProcessorUpdate(
+            action=2, processor=SUSHI_PROTO.ProcessorIdentifier(id=2)))
+        self.assertIsNone(self._cache.lookup(2, 0))
+        self.assertIsNone(self._cache.lookup_infos(2))
+        self.assertEqual(self._cache.get_version(2, 0), 1)
+
+    def test_versions_survive_reconfirmation(self):
+        for value in ("a.wav", "b.wav", "c.wav"):
+            self._cache.store(1, 0, value, time.monotonic())
+        self.assertEqual(self._cache.get_version(1, 0), 3)
+
+        # The stream is confirmed again, e.g. after a broker reconnected
+        self._notifications.confirm()
+        self.assertIsNone(self._cache.lookup(1, 0))
+        self.assertEqual(self._cache.get_version(1, 0), 3)
+        self._cache.on_property_update(_property_update(1, 0, "d.wav"))
+        self.assertEqual(self._cache.get_version(1, 0), 4)
+        self._cache.store(1, 0, "d.wav", time.monotonic())
+        self.assertEqual(self._cache.lookup(1, 0), "d.wav")
+        self.assertEqual(self._cache.get_version(1, 0), 5)
+
+    def test_max_age(self):
+        self.assertEqual(self._cache.max_age, 5.0)
+        self._cache.store(1, 0, "a.wav", time.monotonic() - 6.0)
+        self.assertIsNone(self._cache.lookup(1, 0))
+        self._cache.store(1, 0, "a.wav", time.monotonic())
+        self.assertEqual(self._cache.lookup(1, 0), "a.wav")
+
+    def test_not_served_without_stream(self):
+        self._cache.store(1, 0, "a.wav", time.monotonic())
+        self._cache.store_infos(1, ["info"])
+        self._notifications.subscriptions[0].set_exception(ConnectionError())
+        self.assertIsNone(self._cache.lookup(1, 0))
+        self.assertIsNone(self._cache.lookup_infos(1))
+
+
+class TestPropertyValueCacheWithFakeSushi(unittest.TestCase):
+    def setUp(self):
+        self._fake = FakeSushi(proto_file)
+        self._controller = SushiController(self._fake.start(), proto_file)
+        track = self._controller.audio_graph.create_track("main", 2)
+        track.wait_sync(TIMEOUT)
+        synth = self._controller.audio_graph.create_processor_on_track("synth", "vendor.synth", "",
+                                                                       info_types.PluginType.INTERNAL,
+                                                                       track.sushi_id, 0, True)
+        synth.wait_sync(TIMEOUT)
+        self._synth = synth.sushi_id
+        self._cache = self._controller.enable_property_cache()
+        deadline = time.monotonic() + TIMEOUT
+        while self._fake.get_subscriber_count("property") < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self._controller.close()
+        self._fake.stop()
+
+    def _calls(self, method):
+        return self._fake.get_call_counts().get("ParameterController/" + method, 0)
+
+    def test_reads_served_from_cache(self):
+        parameters = self._controller.parameters
+        for _ in range(3):
+            self.assertEqual(parameters.get_property_value(self._synth, 0), "")
+            self.assertEqual([p.name for p in parameters.get_processor_properties(self._synth)], ["file"])
+        self.assertEqual(self._calls("GetPropertyValue"), 1)
+        self.assertEqual(self._calls("GetProcessorProperties"), 1)
+        version = self._cache.get_version(self._synth, 0)
+
+        parameters.set_property_value(self._synth, 0, "kick.wav")
+        deadline = time.monotonic() + TIMEOUT
+        while self._cache.get_version(self._synth, 0) == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(parameters.get_property_value(self._synth, 0), "kick.wav")
+        self.assertEqual(self._calls("GetPropertyValue"), 1)
+
+        self._controller.disable_property_cache()
+        self.assertIsNone(parameters._property_cache)
+        parameters.get_property_value(self._synth, 0)
+        self.assertEqual(self._calls("GetPropertyValue"), 2)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+__author__ = "Elk Audio AB"
+__copyright__ = """
+
+    Copyright 2017-2025 Modern Ancient Instruments Networked AB, dba Elk
+
+    elkpy is free software: you can redistribute it and/or modify it under the terms of the
+    GNU General Public License as published by the Free Software Foundation, either version 3
+    of the License, or (at your option) any later version.
+
+    elkpy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without
+    even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License along with elkpy.  If
+    not, see <http://www.gnu.org/licenses/>.
+"""
+__license__ = "GPL-3.0"
+
+"""
+Generate the protobuf and gRPC modules bundled with elkpy for a sushi version, and update the registry used by
+grpc_gen.modules_from_proto() to find them.
+
+Usage:
+    python3 tools/generate_stubs.py PROTO [--api-version VERSION] [--stubs-dir DIR]
+
+The api version is read from the api_version.proto file next to PROTO if not given. The modules are generated with
+the installed grpcio-tools, and need at least the same grpcio version at runtime.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+
+import grpc_tools.protoc as gprotoc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS_DIR = os.path.join(REPO_DIR, "src", "elkpy", "stubs")
+PROTO_NAME = "sushi_rpc.proto"
+
+REGISTRY_TEMPLATE = """# Generated by tools/generate_stubs.py, do not edit.
+
+# sha256 of sushi_rpc.proto: sushi gRPC api version of the bundled stubs
+BUNDLED_STUBS: dict[str, str] = {{{entries}}}
+"""
+
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+from elkpy.grpc_gen import stub_package_name  # noqa: E402
+
+
+def read_api_version(proto_path: str) -> str:
+    """
+    Parameters:
+        proto_path (str): The path of sushi_rpc.proto.
+
+    Returns:
+        str: The default value of ApiVersion in the api_version.proto file next to it.
+    """
+    with open(os.path.join(os.path.dirname(proto_path), "api_version.proto")) as f:
+        match = re.search(r'\[default\s*=\s*"([^"]+)"\]', f.read())
+    if match is None:
+        raise ValueError("No api version found next to {}, pass --api-version".format(proto_path))
+    return match.group(1)
+
+
+def generate(proto_path: str, api_version: str, stubs_dir: str) -> str:
+    """
+    Generate the modules of one sushi version into their own subpackage of stubs_dir.
+
+    Returns:
+        str: The path of the subpackage.
+    """
+    package_dir = os.path.join(stubs_dir, stub_package_name(api_version))
+    os.makedirs(package_dir, exist_ok=True)
+    shutil.copyfile(proto_path, os.path.join(package_dir, PROTO_NAME))
+    with open(os.path.join(package_dir, "__init__.py"), "w") as f:
+        f.write("# Generated by tools/generate_stubs.py for sushi gRPC api version {}, do not edit.\n"
+                .format(api_version))
+
+    if gprotoc.main(["dummy", "-I" + package_dir, "--python_out=" + package_dir,
+                     "--grpc_python_out=" + package_dir, PROTO_NAME]) != 0:
+        raise RuntimeError("protoc failed on {}".format(proto_path))
+
+    # The generated grpc module imports the protobuf module as a top level module
+    grpc_module = os.path.join(package_dir, "sushi_rpc_pb2_grpc.py")
+    with open(grpc_module) as f:
+        code = f.read()
+    with open(grpc_module, "w") as f:
+        f.write(code.replace("\nimport sushi_rpc_pb2 as", "\nfrom . import sushi_rpc_pb2 as"))
+    return package_dir
+
+
+def write_registry(stubs_dir: str) -> dict[str, str]:
+    """
+    Rewrite the registry from the subpackages of stubs_dir.
+
+    Returns:
+        dict[str, str]: The registry.
+    """
+    stubs = {}
+    for name in sorted(os.listdir(stubs_dir)):
+        proto_path = os.path.join(stubs_dir, name, PROTO_NAME)
+        if not os.path.isfile(proto_path):
+            continue
+        with open(proto_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with open(os.path.join(stubs_dir, name, "__init__.py")) as f:
+            stubs[digest] = re.search(r"api version (\S+),", f.read()).group(1)
+
+    entries = "".join("\n    {!r}: {!r},".format(k, v) for k, v in stubs.items())
+    with open(os.path.join(stubs_dir, "registry.py"), "w") as f:
+        f.write(REGISTRY_TEMPLATE.format(entries=entries + "\n" if entries else ""))
+    return stubs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate the modules bundled with elkpy for a sushi version")
+    parser.add_argument("proto", help="Path to sushi_rpc.proto")
+    parser.add_argument("--api-version", help="The sushi gRPC api version of the .proto file")
+    parser.add_argument("--stubs-dir", default=STUBS_DIR, help="The elkpy.stubs package directory")
+    args = parser.parse_args()
+
+    api_version = args.api_version or read_api_version(args.proto)
+    package_dir = generate(args.proto, api_version, args.stubs_dir)
+    stubs = write_registry(args.stubs_dir)
+    print("Generated {} for api version {}, {} version(s) bundled".format(package_dir, api_version, len(stubs)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())